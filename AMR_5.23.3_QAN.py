@@ -3,28 +3,46 @@
 #==============================================================================
 
 import sys
-from Tkinter import *
-import tkMessageBox
 from datetime import datetime
 import getpass
 
-from grail.widgets import *
-from grail.rtv import *
-import grail.compass.projectinfo
 from grail.data import model
-from grail.dialogs import gselectprojectdialog
-from grail.compass.responsevar import ResponseVar
-from grail.compass import cmpsys
-from grail import messages
 from grail import fileutils
-from grail import gsys
-from grail import rtv
+from StringIO import StringIO
+
+import BenchPool_QAN
+import Pipeline_QAN
+import Profile_QAN
+import RunJournal_QAN
+import SlabArray_QAN
+
+# loaded by a batch run (BatchRun_QAN, only imported by the batch run itself): panel variables only, no panel or widget toolkit
+batchMode = "BatchRun_QAN" in sys.modules and sys.modules["BatchRun_QAN"].batchMode
+if batchMode:
+   from BatchRun_QAN import StringRTV, IntegerRTV, FloatRTV
+else:
+   from Tkinter import *
+   import tkMessageBox
+   from grail.widgets import *
+   from grail.rtv import *
+   import grail.compass.projectinfo
+   from grail.dialogs import gselectprojectdialog
+   from grail.compass.responsevar import ResponseVar
+   from grail.compass import cmpsys
+   from grail import messages
+   from grail import gsys
+   from grail import rtv
+
+try: # optional, used for whole bench array calculations
+   import numpy
+except ImportError:
+   numpy = None
 
 #==============================================================================
 # Version Information
 #==============================================================================
 
-PROC_TITLE = "AMR/NSR Calculation - ver 5.23.2 - Feb 10, 2023"
+PROC_TITLE = "AMR/NSR Calculation - ver 5.24.13 - Oct 18, 2026"
 
 # QTR 2, 2014 - v3: updated for May 2014 metal prices
 # Sept 26, 2014 - v3a: added loop for Qanaiyaq oxide ore processing VALTO
@@ -63,6 +81,22 @@ PROC_TITLE = "AMR/NSR Calculation - ver 5.23.2 - Feb 10, 2023"
 # Feb 15, 2022- v5.23.1: Checked few more parameters, for ZnPayPb, using the 50% shipping, and 50% recovery
 # Feb 9, 2023- v5.23.2: Updated the numbers with new costs from the 2024 LOM Economic Model 01182023.xlsx, which is the Input Assumptions and Economic Model Folder, Updated on Feb 9, 2023
 # July 3, 2023- v5.23.3 Updated the costs number for the 5YBP, 2023 
+# Oct 18, 2026 - v5.24.0: added whole bench array (NumPy) AMR engine, used in place of the block by block loop when NumPy is available
+# Oct 18, 2026 - v5.24.1: added price sweep (priceDecks) to calculate AMR for several price decks in one pass, stored to VALT items and/or a side file
+# Oct 18, 2026 - v5.24.2: moved bench calculation to AMR_bench, run in a pool of worker processes (BenchPool_QAN) when benchWorkers is not 1
+# Oct 18, 2026 - v5.24.3: batch entry point: RunModelCalc split from ExecuteModelCalc, panel and widget toolkit not loaded for batch runs (BatchRun_QAN)
+# Oct 18, 2026 - v5.24.4: fused runs with the other model scripts (Pipeline_QAN): RunStage split from RunModelCalc, benches opened by OpenBench
+# Oct 18, 2026 - v5.24.5: run profile (Profile_QAN, profileRun): time per bench and per phase (open, read, AMR, price sweep, store), blocks and peak memory
+# Oct 18, 2026 - v5.24.6: run journal (RunJournal_QAN): start and end record of each run; run log only appended to, "Failed!" written when the bench pass fails
+# Oct 18, 2026 - v5.24.7: outcome of the bench pass (BenchPool_QAN.BenchOutcome); a run with failed benches (model access error) raises BenchError after its bench pass, logged "Failed!" and journalled as failed
+# Oct 18, 2026 - v5.24.8: run log kept in memory for the run and appended in one locked write at its end, "Executed OK" or "Failed!"
+#                         (RunJournal_QAN.RunLog), so the lines of runs in parallel are not interleaved
+# Oct 18, 2026 - v5.24.9: BatchRun_QAN only imported when loaded by a batch run, not at MineSight start-up
+# Oct 18, 2026 - v5.24.10: bulk concentrate freight and selling cost (derivedConstants) calculated again by DeriveConstants after a batch run sets the constants
+# Oct 18, 2026 - v5.24.11: run profile off by default (profileRun); blocks counted from the GEOL and PERLT values the bench calculation reads
+# Oct 18, 2026 - v5.24.12: whole bench arrays read and stored in one pass from a local model slab; no Pb payment for a bulk
+#                          concentrate without Pb (PBGWX 0), in both engines, in place of a division by zero
+# Oct 18, 2026 - v5.24.13: whole bench arrays read and stored by SlabArray_QAN, shared with DEST
 
 
 
@@ -121,6 +155,26 @@ NWABTeff = 0.0271 # NW Arctic Borough Tax: schedule weighted average of# i) 4.50
 ZnSell, PbSell = 2.79, 2.97 # $/dmt concentrate $/t P7
 BkSell = (ZnSell + PbSell)/2 # $/dmt concentrate $/t Q7
 
+# constants derived from other constants, calculated again as above by DeriveConstants when a batch run (BatchRun_QAN.SetParameters) has
+# set the constants, so e.g. ZnFreight also changes BkFreight; they cannot be set themselves
+derivedConstants = ["BkFreight", "BkSell"]
+def DeriveConstants():
+   global BkFreight, BkSell
+   BkFreight = (ZnFreight + PbFreight)/2 # $/dmt
+   BkSell = (ZnSell + PbSell)/2 # $/dmt concentrate $/t Q7
+
+# calculation engine
+useArrayEngine = True # True: calculate each bench with whole bench array (NumPy) operations if NumPy is available; False: block by block loop
+benchWorkers = 1 # worker processes for benches: 1 runs in this process, 0 uses one per processor (see BenchPool_QAN)
+profileRun = False # time each bench and its phases, written to the run profile next to the run log (see Profile_QAN)
+
+# price sweep: AMR for several price decks in the same pass over each bench as the panel prices (requires the array engine)
+# each deck is (Zn c/lb, Pb c/lb, Ag c/ozt, VALT item); VLTO and VLTW items are named from the VALT item as for the panel item, use '' for no item
+priceDecks = [] # empty list for panel prices only
+##priceDecks = [(100, 80, 1600, "VALT2"), (120, 90, 2000, "VALT3"), (140, 100, 2400, "VALT4")]
+##priceDecks = [(zn, pb, 2000, '') for zn in (100, 110, 120, 130, 140) for pb in (80, 90, 100)] # price grid to side file only
+priceSweepFile = "AMR_price_sweep.csv" # side file in model folder with a column per deck for each non-Air block, '' for none
+
 #==============================================================================
 # Panel 1
 #==============================================================================
@@ -137,144 +191,228 @@ ModelLabels = [("$/t var:") for i in range(NUM_ITEMS)]
 
 # top = gtools.splitframe(root)
 
-class DefineModelFile(GPanel):
-
-   def makewidgets(self):
-      self.makeFilePickers()
-      self.makeItems()
-      objsignal.listen(file15, "onChange()", self, self.onFile15Change)
-      self.onFile15Change(file15)
-      self.makePriceSpinner1()
-      self.makePriceSpinner2()
-      self.makePriceSpinner3()
-      # self.makeCommentBox()
-
-
-   def makeFilePickers(self):
-      grp = GGroup(self, text="Choose model file")
-      grp.pack(anchor=NW, pady=2, padx=2, ipadx = 2, ipady=2)
-      item15 = cmpsys.getpcf().filelistbytype(15)
-      cbs = GComboBox(grp.interior(), items=item15, rtv=file15)
-      lbls = GLabel(grp.interior(), text="Name of 3D block model:")
-      gtools.stdwidgetcolumns([lbls], [cbs])
-      self.remember([cbs])
-
-   def makeItems(self):
-      grp = GGroup(self, text="Store VALT in item")
-      grp.pack(side = 'top', anchor=W,pady=2, padx=2)
-      self.reqrtvs = ModelItems
-      self.reqcbs = gtools.makewidgets(grp.interior(), GComboBox, len(self.reqrtvs), list_rtv=self.reqrtvs)
-      lbls = gtools.makewidgets(grp.interior(), GLabel, len(ModelLabels), list_text=ModelLabels)
-      gtools.stdwidgetcolumns(lbls, self.reqcbs)
-      self.remember(self.reqcbs+lbls)
-
-   def onFile15Change(self, file15rtv):
-      if len(file15rtv.get())>1:  # make sure there is a model name
-         items = cmpsys.getpcf().itemlist(file15rtv.get())
-         for cb in (self.reqcbs):
-            cb.configure(items=items)
-
-   def makePriceSpinner1(self):
-      price = 1
-      grp = GGroup(self, text="Zn price (cents/lb)")
-      grp.pack(side='top', anchor=W, pady=2, padx=2)
-      pricespin = GSpinner(grp.interior(), min = 10, max = 500, rtv = pickPriceZn)
-      pricespin.pack(side='top', anchor=W, padx=20, pady=2)
-      self.remember([pricespin])
-
-   def makePriceSpinner2(self):
-      price = 2
-      grp = GGroup(self, text="Pb price (cents/lb)")
-      grp.pack(side='top', anchor=W, pady=2, padx=2)
-      pricespin = GSpinner(grp.interior(), min = 10, max = 500, rtv = pickPricePb)
-      pricespin.pack(side='top', anchor=W, padx=20, pady=2)
-      self.remember([pricespin])
-
-   def makePriceSpinner3(self):
-      price = 3
-      grp = GGroup(self, text="Ag price (cents/ozt)")
-      grp.pack(side='top', anchor=W, pady=2, padx=2)
-      pricespin = GSpinner(grp.interior(), min = 100, max = 5000, rtv = pickPriceAg)
-      pricespin.pack(side='top', anchor=W, padx=25, pady=2)
-      self.remember([pricespin])
-
-   # def makeCommentBox(self):
-   #    # grp = GGroup(self, text="Comment")
-   #    # grp.pack(side='top', anchor=W, pady=2, padx=2)
-   #    var = rtv.StringRTV(value='This is a test!', name="__gtextentry test")
-   #    te = GTextEntry(top, width= 35, text = 'comment here', rtv=var)
-   #    te.pack(expand=1, fill=Tkinter.X, anchor='nw')
-   #    self.remember([te])
-
-
-              #==============================================================================
+if not batchMode: # panel
+
+   class DefineModelFile(GPanel):
+
+      def makewidgets(self):
+         self.makeFilePickers()
+         self.makeItems()
+         objsignal.listen(file15, "onChange()", self, self.onFile15Change)
+         self.onFile15Change(file15)
+         self.makePriceSpinner1()
+         self.makePriceSpinner2()
+         self.makePriceSpinner3()
+         # self.makeCommentBox()
+
+
+      def makeFilePickers(self):
+         grp = GGroup(self, text="Choose model file")
+         grp.pack(anchor=NW, pady=2, padx=2, ipadx = 2, ipady=2)
+         item15 = cmpsys.getpcf().filelistbytype(15)
+         cbs = GComboBox(grp.interior(), items=item15, rtv=file15)
+         lbls = GLabel(grp.interior(), text="Name of 3D block model:")
+         gtools.stdwidgetcolumns([lbls], [cbs])
+         self.remember([cbs])
+
+      def makeItems(self):
+         grp = GGroup(self, text="Store VALT in item")
+         grp.pack(side = 'top', anchor=W,pady=2, padx=2)
+         self.reqrtvs = ModelItems
+         self.reqcbs = gtools.makewidgets(grp.interior(), GComboBox, len(self.reqrtvs), list_rtv=self.reqrtvs)
+         lbls = gtools.makewidgets(grp.interior(), GLabel, len(ModelLabels), list_text=ModelLabels)
+         gtools.stdwidgetcolumns(lbls, self.reqcbs)
+         self.remember(self.reqcbs+lbls)
+
+      def onFile15Change(self, file15rtv):
+         if len(file15rtv.get())>1:  # make sure there is a model name
+            items = cmpsys.getpcf().itemlist(file15rtv.get())
+            for cb in (self.reqcbs):
+               cb.configure(items=items)
+
+      def makePriceSpinner1(self):
+         price = 1
+         grp = GGroup(self, text="Zn price (cents/lb)")
+         grp.pack(side='top', anchor=W, pady=2, padx=2)
+         pricespin = GSpinner(grp.interior(), min = 10, max = 500, rtv = pickPriceZn)
+         pricespin.pack(side='top', anchor=W, padx=20, pady=2)
+         self.remember([pricespin])
+
+      def makePriceSpinner2(self):
+         price = 2
+         grp = GGroup(self, text="Pb price (cents/lb)")
+         grp.pack(side='top', anchor=W, pady=2, padx=2)
+         pricespin = GSpinner(grp.interior(), min = 10, max = 500, rtv = pickPricePb)
+         pricespin.pack(side='top', anchor=W, padx=20, pady=2)
+         self.remember([pricespin])
+
+      def makePriceSpinner3(self):
+         price = 3
+         grp = GGroup(self, text="Ag price (cents/ozt)")
+         grp.pack(side='top', anchor=W, pady=2, padx=2)
+         pricespin = GSpinner(grp.interior(), min = 100, max = 5000, rtv = pickPriceAg)
+         pricespin.pack(side='top', anchor=W, padx=25, pady=2)
+         self.remember([pricespin])
+
+      # def makeCommentBox(self):
+      #    # grp = GGroup(self, text="Comment")
+      #    # grp.pack(side='top', anchor=W, pady=2, padx=2)
+      #    var = rtv.StringRTV(value='This is a test!', name="__gtextentry test")
+      #    te = GTextEntry(top, width= 35, text = 'comment here', rtv=var)
+      #    te.pack(expand=1, fill=Tkinter.X, anchor='nw')
+      #    self.remember([te])
+
+
+              
+
+#==============================================================================
 # Folder Layout
 #==============================================================================
 
-PANEL1 = "Model File Information"
-PROC_FOLDERS = GFolder("Model Operations", [GItem(PANEL1, DefineModelFile)])
+if not batchMode:
+   PANEL1 = "Model File Information"
+   PROC_FOLDERS = GFolder("Model Operations", [GItem(PANEL1, DefineModelFile)])
 
 #==============================================================================
-# Execution Functions
+# Array Functions (whole bench)
 #==============================================================================
 
-def ExecuteModelCalc(projectpath):
-   projinf = cmpsys.getproject()
-   pcffile = projinf.get(grail.compass.projectinfo.PCFPATH_TAG)
-   projdir = fileutils.getdir(projectpath)
-   pcfpath = projdir+'\\'+pcffile
-   PythonLog = projdir+"\RunLog-Python_scripts.txt" # will create an empty file if none present in model folder
-   PyLogFile = open(PythonLog,"a")
-   DT = datetime.today()
-   msgText = "\n"+DT.strftime("%d-%b-%Y  %H:%M\n")+"User: "+getpass.getuser()+"\n"+"Script: "+PROC_TITLE
-   PyLogFile.write(msgText)
-
-   # replacement for col, row, level spinners
-   pcf = cmpsys.getpcf()
-   minColumn, minRow, minLevel = 1, 1, 1
-   maxColumn, maxRow, maxLevel = pcf.nx(), pcf.ny(), pcf.nz()
-##   minColumn, minRow, minLevel = 62, 113, 14  # for debuggging
-##   maxColumn, maxRow, maxLevel = 62, 113, 14  # for debuggging
-
-   # get AMR storage variable name from panel and append to "itemlist", including placeholders for Qanaiyaq variables
-   for item in ModelItems:
-      if item.get() != '':
-         # get sulphide item, VALTx, and append
-         VALTitem = item.get()
-         itemlist.append(VALTitem)
-         # turn VALTx into VLTOx and append
-         VLTOitem = VALTitem.replace("ALT","LTO")
-         itemlist.append(VLTOitem)
-         # turn VALTx into VLTWx and append
-         VLTWitem = VALTitem.replace("ALT","LTW")
-         itemlist.append(VLTWitem)
-         break
-
-   # check if path to a Qanaiyaq model
-   isQanaiyaq = "QAN" in pcfpath or "qan" in pcfpath or "Qan" in pcfpath
-   if isQanaiyaq:
-      msgText = "\n  Qanaiyaq model "+file15.get()+" in "+projdir
-      print msgText
-      PyLogFile.write(msgText)
-      msgText = "\n  AMR calculated for sulphide, oxide Pb-Ag, and weathered Zn-Cu floatation\n"
-      print msgText
-      PyLogFile.write(msgText)
-      # add oxide and weathered metallurgy parameters to model item list
-      itemlist.extend(itemlistQanAdd)
+# array form of AMR_single in ExecuteModelCalc, same parameters plus Ag price ($/g); block values are arrays, terms are scalars
+def AMR_single_array(concType,Gfeed,Gconc,Rconc,GconcAg,CGreduction,Pricet,Pay,Deduct,ConcPaySec,Tc,DeductAg,PayAg,RefineAg,Freight,Selling,AgPriceg):
+   CGnet = Gconc/100.0 - CGreduction
+   isConc = CGnet > 0
+   CGnetDiv = numpy.where(isConc, CGnet, 1.0) # divisor where no concentrate is made, these blocks are set to 0 below
+   ConcShipped = numpy.where(isConc, (Gfeed*Rconc)/10000.0 / CGnetDiv, 0.0)
+   isShipped = ConcShipped > 0
+   # calculate produced to sold conc ratio
+   if CGreduction > 0:
+      PSratio = CGnet/numpy.where(isConc, Gconc/100.0, 1.0) # Production/Sold concentrate ratio
+      GconcAgNet = GconcAg * PSratio
+      dewateringPS = dewatering * PSratio
    else:
-      msgText = "\n  Aqqaluk model "+file15.get()+" in "+projdir
-      print msgText
-      PyLogFile.write(msgText)
-      msgText = "\n  AMR calculated only for sulphide floatation (no oxide Pb-Ag or weathered Zn-Cu in Aqqaluk)\n"
-      print msgText
-      PyLogFile.write(msgText)
+      GconcAgNet = GconcAg
+      dewateringPS = dewatering
+   # determine payable Ag
+   if concType == 'ZN':
+      AginConcPay = (GconcAgNet - DeductAg) * PayAg
+   else: # PB
+      AginConcPay = numpy.minimum(GconcAgNet - DeductAg, GconcAgNet*PayAg)
+   AginConcPay = numpy.where(GconcAgNet > DeductAg, AginConcPay, 0.0)
+   # determine concentrate charge, including Ag
+   totalTc = Tc + RefineAg * AginConcPay
+   # gross concentrate payment, including Ag
+   ConcPay = Pricet * CGnet * numpy.minimum(Pay,(CGnet-Deduct)/CGnetDiv)
+   grossConcPay = ConcPay + AgPriceg * AginConcPay + ConcPaySec
+   # net concentrate payment calculation and conversion from $/t concentrate to $/t ore
+   busIntrptIns = BII * (grossConcPay - totalTc)
+   buroughTax = NWABTeff * (grossConcPay - totalTc - Freight)
+   netConcPay = grossConcPay - totalTc - Freight - Selling - busIntrptIns - buroughTax - dewateringPS - portsite
+   return numpy.where(isShipped, netConcPay * ConcShipped, 0.0)
+
+# array form of AMR_bulk in ExecuteModelCalc; block values are arrays, terms are scalars
+def AMR_bulk_array(STZN,ZNGWX,PBGWX,ZNRWX,AGGWX,ZnPricet,PbPricet,AgPriceg,BkTc):
+   ZnCGnet = ZNGWX/100.0
+   PbCGnet = PBGWX/100.0
+   isConc = ZnCGnet > 0
+   ZnCGnetDiv = numpy.where(isConc, ZnCGnet, 1.0) # divisor where no concentrate is made, these blocks are set to 0 below
+   hasPb = PbCGnet > 0
+   PbCGnetDiv = numpy.where(hasPb, PbCGnet, 1.0) # divisor where the concentrate has no Pb, these blocks get no Pb payment below
+   ConcShipped = numpy.where(isConc, (STZN*ZNRWX)/10000.0 / ZnCGnetDiv, 0.0)
+   isShipped = ConcShipped > 0
+   # as no CG deduction for bulk at this stage, PSratio would be 1, so adjustment (as in single conc above) not implemented, just set to variables
+   GconcAgNet = AGGWX
+   dewateringPS = dewatering
+   # determine payable Ag
+   AginConcPay = numpy.where(GconcAgNet > BkDeductAg, (GconcAgNet - BkDeductAg) * BkPayAg, 0.0)
+   # determine concentrate charge, including Ag
+   totalTc = BkTc + PbRefineAg * AginConcPay
+   # gross concentrate payment, including Ag
+   ZnConcPay = ZnPricet * ZnCGnet * numpy.minimum(ZnPayZn,(ZnCGnet-ZnDeductZn)/ZnCGnetDiv)
+   PbConcPay = numpy.where(hasPb, PbPricet * PbCGnet * numpy.minimum(PbPayPb,(PbCGnet-PbDeductPb)/PbCGnetDiv), 0.0)
+   ConcPay = ZnConcPay + PbConcPay
+   grossConcPay = ConcPay + AgPriceg * AginConcPay
+   # net concentrate payment calculation and conversion from $/t concentrate to $/t ore
+   busIntrptIns = BII * (grossConcPay - totalTc)
+   buroughTax = NWABTeff * (grossConcPay - totalTc - BkFreight)
+   netConcPay = grossConcPay - totalTc - BkFreight - BkSell - busIntrptIns - buroughTax - dewateringPS - portsite
+   return numpy.where(isShipped, netConcPay * ConcShipped, 0.0)
+
+# read the AMR items for a whole bench into a dictionary of 2D arrays, including the Air mask
+def AMR_read_bench(slab, l, isQanaiyaq):
+   cols, rows = slab.maxcolumn(), slab.maxrow()
+   bench = {}
+   bench["isAir"] = SlabArray_QAN.SlabArray(slab, "GEOL", l, rows, cols) == Air # geology is above topography, so no AMR can be calculated
+   bench["STZN"] = SlabArray_QAN.SlabArray(slab, "STZN", l, rows, cols, 0.0)
+   bench["STPB"] = SlabArray_QAN.SlabArray(slab, "STPB", l, rows, cols, 0.0)
+   # AGM is not used in the AMR calculation, so it is not read here
+   for item in ["ZNREC","PBREC","AGGZN","AGGPB","ZNGRD","PBGRD"]:
+      bench[item] = SlabArray_QAN.SlabArray(slab, item, l, rows, cols)
+   if isQanaiyaq: # get oxide and weathered float metallurgical parameters (PBRWX is not used in the AMR calculation)
+      for item in ["AGGOX","PBGOX","PBROX","AGGWX","ZNGWX","PBGWX","ZNRWX"]:
+         bench[item] = SlabArray_QAN.SlabArray(slab, item, l, rows, cols)
+   return bench
+
+# calculate sulphide, oxide and weathered AMR arrays for a bench read by AMR_read_bench, for one set of price terms from PriceTerms
+def AMR_calc_bench(bench, isQanaiyaq, terms):
+   ZnPricet, PbPricet, AgPriceg, ZnConcPayPb, PbConcPayZn, ZnTc, PbTc, BkTc = terms
+   isAir = bench["isAir"]
+   STZN, STPB = bench["STZN"], bench["STPB"]
+   errorSettings = numpy.seterr(divide='ignore', invalid='ignore', over='ignore') # Air and undefined blocks may hold any value, masked out below
+   try:
+      # calculate Sulphide float AMR for all deposits
+      VALTzn = AMR_single_array('ZN',STZN,bench["ZNGRD"],bench["ZNREC"],bench["AGGZN"],ZnCGreduction,ZnPricet,ZnPayZn,ZnDeductZn,ZnConcPayPb,ZnTc,ZnDeductAg,ZnPayAg,ZnRefineAg,ZnFreight,ZnSell,AgPriceg)
+      VALTpb = AMR_single_array('PB',STPB,bench["PBGRD"],bench["PBREC"],bench["AGGPB"],PbCGreduction,PbPricet,PbPayPb,PbDeductPb,PbConcPayZn,PbTc,PbDeductAg,PbPayAg,PbRefineAg,PbFreight,PbSell,AgPriceg)
+      VALTs = numpy.where(isAir, 0.0, VALTzn + VALTpb)
+      # if Qanaiyaq, also calculate Oxide and Weathered float AMR
+      if isQanaiyaq:
+         VALTox = AMR_single_array('PB',STPB,bench["PBGOX"],bench["PBROX"],bench["AGGOX"],PbCGreduction,PbPricet,PbPayPb,PbDeductPb,0.0,PbTc,PbDeductAg,PbPayAg,PbRefineAg,PbFreight,PbSell,AgPriceg)
+         VALTox = numpy.where(isAir, 0.0, VALTox)
+         VALTwx = AMR_bulk_array(STZN,bench["ZNGWX"],bench["PBGWX"],bench["ZNRWX"],bench["AGGWX"],ZnPricet,PbPricet,AgPriceg,BkTc)
+         VALTwx = numpy.where(isAir, 0.0, VALTwx)
+      else:
+         VALTox = numpy.zeros(isAir.shape)
+         VALTwx = numpy.zeros(isAir.shape)
+   finally:
+      numpy.seterr(**errorSettings)
+   return VALTs, VALTox, VALTwx
+
+# calculate and store VALTx, VLTOx and VLTWx for a whole bench, matching the block by block loop in ExecuteModelCalc
+def AMR_bench_array(slab, l, isQanaiyaq, VALTitem, VLTOitem, VLTWitem, terms):
+   bench = AMR_read_bench(slab, l, isQanaiyaq)
+   VALTs, VALTox, VALTwx = AMR_calc_bench(bench, isQanaiyaq, terms)
+   # write values
+   SlabArray_QAN.StoreSlabArray(slab, VALTitem, l, VALTs)
+   SlabArray_QAN.StoreSlabArray(slab, VLTOitem, l, VALTox)
+   SlabArray_QAN.StoreSlabArray(slab, VLTWitem, l, VALTwx)
+   return bench
+
+# calculate every price deck of the sweep for a bench already read by AMR_read_bench, storing decks with a VALT item
+# and returning all decks as columns of side file lines (one line per non-Air block, model bench/row/column)
+def AMR_sweep_bench(slab, l, bench, isQanaiyaq, sweepDecks, b, minRow, minColumn):
+   isAir = bench["isAir"]
+   rows, cols = numpy.nonzero(~isAir)
+   columns = [numpy.zeros(len(rows)) + b, rows + minRow, cols + minColumn]
+   for (ZnPrice, PbPrice, AgPrice, VALTitem, terms) in sweepDecks:
+      VALTs, VALTox, VALTwx = AMR_calc_bench(bench, isQanaiyaq, terms)
+      if VALTitem != '':
+         SlabArray_QAN.StoreSlabArray(slab, VALTitem, l, VALTs)
+         SlabArray_QAN.StoreSlabArray(slab, VALTitem.replace("ALT","LTO"), l, VALTox)
+         SlabArray_QAN.StoreSlabArray(slab, VALTitem.replace("ALT","LTW"), l, VALTwx)
+      columns.append(VALTs[rows, cols])
+      if isQanaiyaq:
+         columns.append(VALTox[rows, cols])
+         columns.append(VALTwx[rows, cols])
+   sweepText = StringIO()
+   if len(rows) > 0:
+      numpy.savetxt(sweepText, numpy.column_stack(columns), fmt=["%d","%d","%d"] + ["%.4f"]*(len(columns)-3), delimiter=",")
+   return sweepText.getvalue()
 
-   # get prices from panel variables (note they are in cents not dollars)
-   ZnPrice = pickPriceZn.get() / 100.00
-   PbPrice = pickPricePb.get() / 100.00
-   AgPrice = pickPriceAg.get() / 100.00
+#==============================================================================
+# Execution Functions
+#==============================================================================
 
-   # calculations which are not required to be repeated in the loop
+# price dependent terms, calculated once per price deck and not repeated in the loop (prices in $/lb Zn, $/lb Pb, $/ozt Ag)
+def PriceTerms(ZnPrice, PbPrice, AgPrice):
    ZnPricet = ZnPrice*2204.62 # $/t
    PbPricet = PbPrice*2204.62 # $/t
    AgPriceg = AgPrice/31.10348 # $/g
@@ -326,42 +464,43 @@ def ExecuteModelCalc(projectpath):
    else:
       PbTcBk = PbTcBase + (PbTcBasis-PbPricet)*PbBelowBasis
    BkTc = (ZnTcBk + PbTcBk)/2
-
-   # describe case
-   msgText = "  Metal prices of $%3.2f/lb Zn, $%3.2f/lb Pb, and $%4.2f/ozt Ag\n" % (ZnPrice, PbPrice, AgPrice)
-   print msgText
-   PyLogFile.write(msgText)
-   if isQanaiyaq:
-      msgText = "  Sulphide, Oxide, and Weathered $/t values stored in "+VALTitem+", "+VLTOitem+" and "+VLTWitem+"\n"
+   return ZnPricet, PbPricet, AgPriceg, ZnConcPayPb, PbConcPayZn, ZnTc, PbTc, BkTc
+
+# open, calculate and store one bench (b), returning its (message, logged) pairs, price sweep lines and bench profile (None if not profiled);
+# called directly or in a BenchPool worker process
+def AMR_bench(pcfpath, modelFile, b, minRow, maxRow, minColumn, maxColumn, itemlist, isQanaiyaq, VALTitem, VLTOitem, VLTWitem, terms, arrayEngine, sweepDecks,
+              profiled):
+   ZnPricet, PbPricet, AgPriceg, ZnConcPayPb, PbConcPayZn, ZnTc, PbTc, BkTc = terms
+   benchMessages = [("  Opening and updating Bench: %2d" % (b), False)]
+   sweepText = ""
+   profile = Profile_QAN.BenchProfile(b, profiled)
+   try:
+      m = Pipeline_QAN.OpenBench(pcfpath, modelFile, b, minRow, maxRow, minColumn, maxColumn, itemlist)
+   except model.ModelError, e:
+      benchMessages.append(("Model Access Error: "+str(e)+"\n", True))
+      benchMessages.append(("Failed\n", True))
    else:
-      msgText = "  Sulphide $/t value stored in "+VALTitem+"\n"
-   print msgText
-   PyLogFile.write(msgText)
-
-   # assume run fails unless last line overwritten
-   PyLogFile.write("Failed!\n")
-
-   for b in xrange(minLevel,maxLevel+1):
-      print "  Opening and updating Bench: %2d" % (b)
-      try:
-         m = model.Model(pcfpath, file15.get(), b, b, minRow, maxRow, minColumn, maxColumn, itemlist)
-      except model.ModelError, e:
-         msgText = "Model Access Error: "+str(e)+"\n"
-         print msgText
-         PyLogFile.write(msgText)
-         msgText = "Failed\n"
-         print msgText
-         PyLogFile.write(msgText)
-      else:
-         if m != None:
-            slab = m.slab()
-            cols, rows = slab.maxcolumn(), slab.maxrow()
-            l = 0
+      profile.Phase("open")
+      if m != None:
+         slab = m.slab()
+         cols, rows = slab.maxcolumn(), slab.maxrow()
+         l = 0
+         profile.Phase("read")
+         if arrayEngine: # whole bench in array operations
+            bench = AMR_bench_array(slab, l, isQanaiyaq, VALTitem, VLTOitem, VLTWitem, terms)
+            profile.CountBlocks(rows*cols, int(bench["isAir"].sum()))
+            profile.Phase("AMR")
+            if len(sweepDecks) > 0: # same bench arrays for every price deck
+               sweepText = AMR_sweep_bench(slab, l, bench, isQanaiyaq, sweepDecks, b, minRow, minColumn)
+               profile.Phase("price sweep")
+         else:
             # traverse the slab, get values, calculate, and set the new value
+            airBlocks = 0
             for r in xrange(rows):
                for c in xrange(cols):
                   GEOL = slab["GEOL", l, r, c]
                   if GEOL == Air: # geology is above topography, so no AMR can be calculated
+                     airBlocks += 1
                      VALTs = 0.0
                      VALTox = 0.0
                      VALTwx = 0.0
@@ -434,12 +573,12 @@ def ExecuteModelCalc(projectpath):
                            AMR = netConcPay * ConcShipped
 ###################################################
 ###  DEBUGGING code for NSR model
-##                              ConcProduced = (Gfeed*Rconc)/100.0 / Gconc
-##                              grossConcRev = Pricet * CGnet + AgPriceg * GconcAgNet  # calculation was changed again for BII in EcM in mid-Jan 2018
+##                           ConcProduced = (Gfeed*Rconc)/100.0 / Gconc
+##                           grossConcRev = Pricet * CGnet + AgPriceg * GconcAgNet  # calculation was changed again for BII in EcM in mid-Jan 2018
 ##
-##                              print "ConcShipped:%7.4f  AginConcPay:%8.3f  totalTc:%8.3f  ConcPay:%9.3f  GrossConcPay:%9.3f  Selling:%6.3f   Freight:%6.3f" % (ConcShipped,AginConcPay/31.10348,totalTc,ConcPay,grossConcPay,Selling,Freight)
-##                              print "ConcProduced:%7.4f  dewater:%6.3f  GrossConcRev:%9.3f  busIntIns:%6.3f  BuroughTax:%7.3f  netConcPay:%8.3f  AMR:%8.3f" % (ConcProduced,dewateringPS,grossConcRev,busIntrptIns,buroughTax,netConcPay,AMR)
-##                              print "row:%3d  col:%3d  bench:%3d\n" % ((r+minRow),(c+minColumn),minLevel)
+##                           print "ConcShipped:%7.4f  AginConcPay:%8.3f  totalTc:%8.3f  ConcPay:%9.3f  GrossConcPay:%9.3f  Selling:%6.3f   Freight:%6.3f" % (ConcShipped,AginConcPay/31.10348,totalTc,ConcPay,grossConcPay,Selling,Freight)
+##                           print "ConcProduced:%7.4f  dewater:%6.3f  GrossConcRev:%9.3f  busIntIns:%6.3f  BuroughTax:%7.3f  netConcPay:%8.3f  AMR:%8.3f" % (ConcProduced,dewateringPS,grossConcRev,busIntrptIns,buroughTax,netConcPay,AMR)
+##                           print "row:%3d  col:%3d  bench:%3d\n" % ((r+minRow),(c+minColumn),minLevel)
 ###################################################
                         else:
                            AMR = 0.0
@@ -466,7 +605,11 @@ def ExecuteModelCalc(projectpath):
                            # determine concentrate charge, including Ag
                            totalTc = BkTc + PbRefineAg * AginConcPay
                            # gross concentrate payment, including Ag
-                           ConcPay = ZnPricet * ZnCGnet * min(ZnPayZn,(ZnCGnet-ZnDeductZn)/ZnCGnet) + PbPricet * PbCGnet * min(PbPayPb,(PbCGnet-PbDeductPb)/PbCGnet)
+                           if PbCGnet > 0:
+                              PbConcPay = PbPricet * PbCGnet * min(PbPayPb,(PbCGnet-PbDeductPb)/PbCGnet)
+                           else: # no Pb in the bulk concentrate, so no Pb payment
+                              PbConcPay = 0.0
+                           ConcPay = ZnPricet * ZnCGnet * min(ZnPayZn,(ZnCGnet-ZnDeductZn)/ZnCGnet) + PbConcPay
                            grossConcPay = ConcPay + AgPriceg * AginConcPay
                            # net concentrate payment calculation and conversion from $/t concentrate to $/t ore
                            busIntrptIns = BII * (grossConcPay - totalTc)
@@ -475,12 +618,12 @@ def ExecuteModelCalc(projectpath):
                            AMR = netConcPay * ConcShipped
 ###################################################
 ###  DEBUGGING code for NSR model
-##                              ConcProduced = (STZN*ZNRWX)/100.0 / ZNGWX
-##                              grossConcRev = ZnPricet * ZnCGnet + PbPricet * PbCGnet + AgPriceg * GconcAgNet   # calculation was changed again for BII in EcM in mid-Jan 2018
+##                           ConcProduced = (STZN*ZNRWX)/100.0 / ZNGWX
+##                           grossConcRev = ZnPricet * ZnCGnet + PbPricet * PbCGnet + AgPriceg * GconcAgNet   # calculation was changed again for BII in EcM in mid-Jan 2018
 ##
-##                              print "ConcShipped:%7.4f  AginConcPay:%8.3f  totalTc:%8.3f  ConcPay:%9.3f  GrossConcPay:%9.3f  Selling:%6.3f   Freight:%6.3f" % (ConcShipped,AginConcPay/31.10348,totalTc,ConcPay,grossConcPay,BkSell,BkFreight)
-##                              print "ConcProduced:%7.4f  dewater:%6.3f  GrossConcRev:%9.3f  busIntIns:%6.3f  BuroughTax:%7.3f  netConcPay:%8.3f  AMR:%8.3f" % (ConcProduced,dewateringPS,grossConcRev,busIntrptIns,buroughTax,netConcPay,AMR)
-##                              print "row:%3d  col:%3d  bench:%3d\n" % ((r+minRow),(c+minColumn),minLevel)
+##                           print "ConcShipped:%7.4f  AginConcPay:%8.3f  totalTc:%8.3f  ConcPay:%9.3f  GrossConcPay:%9.3f  Selling:%6.3f   Freight:%6.3f" % (ConcShipped,AginConcPay/31.10348,totalTc,ConcPay,grossConcPay,BkSell,BkFreight)
+##                           print "ConcProduced:%7.4f  dewater:%6.3f  GrossConcRev:%9.3f  busIntIns:%6.3f  BuroughTax:%7.3f  netConcPay:%8.3f  AMR:%8.3f" % (ConcProduced,dewateringPS,grossConcRev,busIntrptIns,buroughTax,netConcPay,AMR)
+##                           print "row:%3d  col:%3d  bench:%3d\n" % ((r+minRow),(c+minColumn),minLevel)
 ###################################################
                         else:
                            AMR = 0.0
@@ -503,28 +646,176 @@ def ExecuteModelCalc(projectpath):
                         VALTwx = 0.0
 ###################################################
 ###  DEBUGGING code for NSR model
-##                     print "VALTs:%9.3f\n" % (VALTs)
-##                     if isQanaiyaq:
-##                        print "VALTox:%9.3f  VALTwx:%9.3f\n" % (VALTox,VALTwx)
+##                  print "VALTs:%9.3f\n" % (VALTs)
+##                  if isQanaiyaq:
+##                     print "VALTox:%9.3f  VALTwx:%9.3f\n" % (VALTox,VALTwx)
 ###################################################
                   # write values
                   slab[VALTitem, l, r, c] = VALTs
                   slab[VLTOitem, l, r, c] = VALTox
                   slab[VLTWitem, l, r, c] = VALTwx
-         m.storeslab()
-         m.free()
-      print "  Done"
-   # if executes completely, remove and rewrite last line
-   PyLogFile.close
-   PyLogFile = open(PythonLog,"r")
-   fileContents = PyLogFile.readlines()
-   fileContents = fileContents[:-1] # remove last line of file
-   PyLogFile.close
-   PyLogFile = open(PythonLog,"w")
-   for item in fileContents: # rewrites file content from list
-      PyLogFile.write("%s" % item)
+            profile.CountBlocks(rows*cols, airBlocks)
+            profile.Phase("AMR")
+      m.storeslab()
+      m.free()
+      profile.Phase("store")
+   benchMessages.append(("  Done", False))
+   return benchMessages, sweepText, profile.Result()
+
+def ExecuteModelCalc(projectpath):
+   projinf = cmpsys.getproject()
+   pcffile = projinf.get(grail.compass.projectinfo.PCFPATH_TAG)
+   projdir = fileutils.getdir(projectpath)
+   pcfpath = projdir+'\\'+pcffile
+   RunModelCalc(projdir, pcfpath, cmpsys.getpcf())
+
+# run for the model file (file15) and panel variables in the project folder projdir, pcfpath and pcf are the project control file path
+# and pcf object; from ExecuteModelCalc, or from a batch run (BatchRun_QAN) without the panel
+def RunModelCalc(projdir, pcfpath, pcf):
+   run = RunStage(projdir, pcfpath, pcf)
+   try:
+      for (benchFunction, benchArgs, report) in run:
+         BenchPool_QAN.RunBenches(benchFunction, benchArgs, benchWorkers, report)
+   finally:
+      run.close() # a bench pass that fails is ended as failed in the run log and run journal
+
+# RunModelCalc as a stage, yielding its bench pass as (bench function, bench argument tuples, report function) for the caller to run;
+# RunModelCalc runs it in a BenchPool, a fused run (Pipeline_QAN) runs it on the benches opened once for all of its stages
+def RunStage(projdir, pcfpath, pcf):
+   PythonLog = projdir+"\RunLog-Python_scripts.txt" # will create an empty file if none present in model folder
+   PyLogFile = RunJournal_QAN.RunLog(PythonLog)
+   journal = RunJournal_QAN.RunJournal(projdir, PROC_TITLE, [("file15", file15.get()), ("pickPriceZn", pickPriceZn.get()), ("pickPricePb", pickPricePb.get()),
+                                    ("pickPriceAg", pickPriceAg.get()), ("ModelItems", [item.get() for item in ModelItems if item.get() != '']),
+                                    ("priceDecks", priceDecks), ("useArrayEngine", useArrayEngine), ("benchWorkers", benchWorkers)])
+   journal.Start()
+   DT = datetime.today()
+   msgText = "\n"+DT.strftime("%d-%b-%Y  %H:%M\n")+"User: "+getpass.getuser()+"\n"+"Script: "+PROC_TITLE+"\n"+"Run: "+journal.runId
+   PyLogFile.write(msgText)
+
+   # replacement for col, row, level spinners
+   minColumn, minRow, minLevel = 1, 1, 1
+   maxColumn, maxRow, maxLevel = pcf.nx(), pcf.ny(), pcf.nz()
+##   minColumn, minRow, minLevel = 62, 113, 14  # for debuggging
+##   maxColumn, maxRow, maxLevel = 62, 113, 14  # for debuggging
+
+   # get AMR storage variable name from panel and append to "itemlist", including placeholders for Qanaiyaq variables
+   for item in ModelItems:
+      if item.get() != '':
+         # get sulphide item, VALTx, and append
+         VALTitem = item.get()
+         itemlist.append(VALTitem)
+         # turn VALTx into VLTOx and append
+         VLTOitem = VALTitem.replace("ALT","LTO")
+         itemlist.append(VLTOitem)
+         # turn VALTx into VLTWx and append
+         VLTWitem = VALTitem.replace("ALT","LTW")
+         itemlist.append(VLTWitem)
+         break
+
+   # check if path to a Qanaiyaq model
+   isQanaiyaq = "QAN" in pcfpath or "qan" in pcfpath or "Qan" in pcfpath
+   if isQanaiyaq:
+      msgText = "\n  Qanaiyaq model "+file15.get()+" in "+projdir
+      print msgText
+      PyLogFile.write(msgText)
+      msgText = "\n  AMR calculated for sulphide, oxide Pb-Ag, and weathered Zn-Cu floatation\n"
+      print msgText
+      PyLogFile.write(msgText)
+      # add oxide and weathered metallurgy parameters to model item list
+      itemlist.extend(itemlistQanAdd)
+   else:
+      msgText = "\n  Aqqaluk model "+file15.get()+" in "+projdir
+      print msgText
+      PyLogFile.write(msgText)
+      msgText = "\n  AMR calculated only for sulphide floatation (no oxide Pb-Ag or weathered Zn-Cu in Aqqaluk)\n"
+      print msgText
+      PyLogFile.write(msgText)
+
+   # get prices from panel variables (note they are in cents not dollars)
+   ZnPrice = pickPriceZn.get() / 100.00
+   PbPrice = pickPricePb.get() / 100.00
+   AgPrice = pickPriceAg.get() / 100.00
+
+   # calculations which are not required to be repeated in the loop
+   ZnPricet, PbPricet, AgPriceg, ZnConcPayPb, PbConcPayZn, ZnTc, PbTc, BkTc = PriceTerms(ZnPrice, PbPrice, AgPrice)
+
+   # describe case
+   msgText = "  Metal prices of $%3.2f/lb Zn, $%3.2f/lb Pb, and $%4.2f/ozt Ag\n" % (ZnPrice, PbPrice, AgPrice)
+   print msgText
+   PyLogFile.write(msgText)
+   if isQanaiyaq:
+      msgText = "  Sulphide, Oxide, and Weathered $/t values stored in "+VALTitem+", "+VLTOitem+" and "+VLTWitem+"\n"
+   else:
+      msgText = "  Sulphide $/t value stored in "+VALTitem+"\n"
+   print msgText
+   PyLogFile.write(msgText)
+   arrayEngine = useArrayEngine and numpy is not None
+   if arrayEngine:
+      msgText = "  Calculated by whole bench arrays\n"
+   else:
+      msgText = "  Calculated block by block\n"
+   print msgText
+   PyLogFile.write(msgText)
+
+   # price sweep, terms calculated once per deck
+   sweepDecks = []
+   sweepFile = None
+   if len(priceDecks) > 0 and not arrayEngine:
+      msgText = "  Price sweep of %d decks not run as it requires the array engine (NumPy)\n" % (len(priceDecks))
+      print msgText
+      PyLogFile.write(msgText)
+   elif len(priceDecks) > 0:
+      header = "BENCH,ROW,COLUMN"
+      for (ZnCents, PbCents, AgCents, sweepItem) in priceDecks:
+         terms = PriceTerms(ZnCents / 100.00, PbCents / 100.00, AgCents / 100.00)
+         sweepDecks.append((ZnCents, PbCents, AgCents, sweepItem, terms))
+         if sweepItem != '':
+            itemlist.extend([sweepItem, sweepItem.replace("ALT","LTO"), sweepItem.replace("ALT","LTW")])
+         deckName = "%d_%d_%d" % (ZnCents, PbCents, AgCents)
+         header = header + ",VALT_" + deckName
+         if isQanaiyaq:
+            header = header + ",VLTO_" + deckName + ",VLTW_" + deckName
+         msgText = "  Price deck %d cents/lb Zn, %d cents/lb Pb, %d cents/ozt Ag stored in %s\n" % (ZnCents, PbCents, AgCents, sweepItem or "side file only")
+         print msgText
+         PyLogFile.write(msgText)
+      if priceSweepFile != '':
+         sweepFile = open(projdir+"\\"+priceSweepFile,"w")
+         sweepFile.write(header+"\n")
+         msgText = "  Price sweep values for non-Air blocks written to "+priceSweepFile+"\n"
+         print msgText
+         PyLogFile.write(msgText)
+
+   # calculate benches, in a pool of worker processes if benchWorkers is not 1; messages and sweep lines are written in bench order
+   profile = Profile_QAN.RunProfile(projdir, PROC_TITLE, profileRun, journal.runId)
+   outcome = BenchPool_QAN.BenchOutcome(PROC_TITLE, minLevel)
+   def ReportBench(result):
+      benchMessages, sweepText, benchProfile = result
+      BenchPool_QAN.ReportMessages(benchMessages, PyLogFile)
+      outcome.Report(benchMessages)
+      if sweepFile != None:
+         sweepFile.write(sweepText)
+      profile.Add(benchProfile)
+   terms = (ZnPricet, PbPricet, AgPriceg, ZnConcPayPb, PbConcPayZn, ZnTc, PbTc, BkTc)
+   benchArgs = [(pcfpath, file15.get(), b, minRow, maxRow, minColumn, maxColumn, itemlist, isQanaiyaq, VALTitem, VLTOitem, VLTWitem, terms, arrayEngine, sweepDecks, profileRun) for b in xrange(minLevel,maxLevel+1)]
+   try:
+      yield (AMR_bench, benchArgs, ReportBench)
+      outcome.Check()
+   except: # bench pass failed, benches of it failed, or its run stopped (close() of this stage)
+      PyLogFile.write("Failed!\n")
+      PyLogFile.close()
+      journal.End("Failed")
+      raise
+   if sweepFile != None:
+      sweepFile.close()
+   msgText = profile.Write()
+   if msgText != '':
+      print msgText
+      PyLogFile.write(msgText)
+   # executed completely; the run log and run journal are only appended to, the run's lines together (those of the other stages of a fused
+   # run or of runs in parallel before or after them)
    PyLogFile.write("Executed OK\n")
-   PyLogFile.close
+   PyLogFile.close()
+   journal.End("OK")
 
 #==============================================================================
 # Procedure Entry Points
@@ -0,0 +1,165 @@
+#==============================================================================
+# Batch (no panel) runs of the grail model scripts (ModelCalcs, AMR, DEST)
+#==============================================================================
+
+# usage: python BatchRun_QAN.py <script> <project .pcf> <model file> [parameter file ...] [name=value ...]
+#   e.g. python BatchRun_QAN.py AMR_5.23.3_QAN.py C:\MSProjects\QAN\msqan.pcf qan15.dat pickPriceZn=120 ModelItems=['VALT2'] benchWorkers=0
+# Parameters set the script's panel variables (pickPriceZn, pickDPScutoff, millFunction, valbFunction, ModelItems, ...) or its constants
+# (priceDecks, cutoffDecks, valbVariants, benchWorkers, useArrayEngine, ...) by name. A parameter file has one "name = value" per line,
+# with # for comments. Values are python literals (numbers, lists, tuples, quoted strings), anything else is taken as a string.
+# The script is run by its RunModelCalc, as from the panel, but without loading the widget toolkit (Tkinter, grail.widgets) or the
+# compass panel. Each batch run is a separate process, so many scenarios can be launched in parallel from a script or batch file.
+
+import sys
+import os
+import imp
+import ast
+
+import LocalModel_QAN
+import BenchPool_QAN
+
+#==============================================================================
+# Version Information
+#==============================================================================
+
+# Oct 18, 2026 - v1.0.0: batch entry point for ModelCalcs, AMR and DEST, panel variables and constants set from arguments or parameter files
+# Oct 18, 2026 - v1.0.1: local model backend (LocalModel_QAN) installed when MineSight is not available
+# Oct 18, 2026 - v1.0.2: local model backend installed when a script is loaded, not when this module is imported
+# Oct 18, 2026 - v1.0.3: parameters set by SetParameters, the constants a script derives from them calculated again (DeriveConstants)
+# Oct 18, 2026 - v1.0.4: RunScript for a loaded script, so a script can be loaded apart from its run
+
+#==============================================================================
+# Panel Variables
+#==============================================================================
+
+batchMode = False # set before a script is loaded by a batch run, the script then skips its panel and the widget toolkit
+
+# stand-in for the grail run time variables (StringRTV, IntegerRTV, FloatRTV) of the panel, holds the value only
+class BatchRTV(object):
+
+   def __init__(self, name=None, value=None):
+      self.name = name
+      self.value = value
+
+   def get(self):
+      return self.value
+
+   def set(self, value):
+      self.value = value
+
+def StringRTV(name=None, value=''):
+   return BatchRTV(name, value)
+
+def IntegerRTV(name=None, value=0):
+   return BatchRTV(name, value)
+
+def FloatRTV(name=None, value=0.0):
+   return BatchRTV(name, value)
+
+#==============================================================================
+# Parameter Functions
+#==============================================================================
+
+# python literal if possible, otherwise the text itself
+def ParseValue(text):
+   try:
+      return ast.literal_eval(text)
+   except (ValueError, SyntaxError):
+      return text
+
+# (name, value) pairs from "name = value" text
+def ParseParameter(text):
+   if '=' not in text:
+      raise ValueError("parameter is not name = value: "+text)
+   (name, value) = text.split('=', 1)
+   return (name.strip(), ParseValue(value.strip()))
+
+# (name, value) pairs from a parameter file, one per line, # for comments
+def ReadParameters(path):
+   parameters = []
+   paramFile = open(path, "r")
+   for line in paramFile:
+      line = line.split('#', 1)[0].strip()
+      if line != '':
+         parameters.append(ParseParameter(line))
+   paramFile.close()
+   return parameters
+
+# set a panel variable (or list of them, e.g. ModelItems) or a constant of the loaded script
+def SetParameter(script, name, value):
+   if not hasattr(script, name):
+      raise ValueError("%s has no panel variable or constant %s" % (script.PROC_TITLE, name))
+   current = getattr(script, name)
+   if isinstance(current, BatchRTV):
+      current.set(value)
+   elif isinstance(current, list) and len(current) > 0 and isinstance(current[0], BatchRTV):
+      if not isinstance(value, (list, tuple)):
+         value = [value]
+      for k in range(len(current)):
+         if k < len(value):
+            current[k].set(value[k])
+         else:
+            current[k].set('')
+   else:
+      setattr(script, name, value)
+
+# set the parameters [(name, value), ...] of a loaded script, then calculate again the constants it derives from its constants (its
+# DeriveConstants, if it has one); a derived constant (in its derivedConstants) cannot be set, only the constants it is derived from
+def SetParameters(script, parameters):
+   derived = getattr(script, "derivedConstants", [])
+   for (name, value) in parameters:
+      if name in derived:
+         raise ValueError("%s constant %s is derived from other constants, set those instead" % (script.PROC_TITLE, name))
+      SetParameter(script, name, value)
+   if hasattr(script, "DeriveConstants"):
+      script.DeriveConstants()
+
+#==============================================================================
+# Run Functions
+#==============================================================================
+
+# module name for a script file, e.g. AMR_5.23.3_QAN.py -> AMR_5_23_3_QAN
+def ScriptName(path):
+   return os.path.splitext(os.path.basename(path))[0].replace('.', '_')
+
+# load a script for a batch run; also run in each bench worker process so the bench function can be found by its module name
+def LoadScript(path):
+   global batchMode
+   LocalModel_QAN.Install() # without MineSight, runs on local models (LocalModel_QAN)
+   batchMode = True
+   return imp.load_source(ScriptName(path), path)
+
+# run a script loaded from scriptPath (LoadScript) for the model file in the project of pcfpath, with the panel variables and constants in
+# parameters [(name, value), ...]
+def RunScript(script, scriptPath, pcfpath, modelFile, parameters):
+   scriptPath = os.path.abspath(scriptPath)
+   pcfpath = os.path.abspath(pcfpath)
+   from grail.data import pcf as grailpcf # MineSight's, or the local model backend installed by LoadScript
+   BenchPool_QAN.workerInitializer, BenchPool_QAN.workerInitArgs = LoadScript, (scriptPath,)
+   script.file15.set(modelFile)
+   SetParameters(script, parameters)
+   script.RunModelCalc(os.path.dirname(pcfpath), pcfpath, grailpcf.Pcf(pcfpath))
+
+# run a script for the model file in the project of pcfpath, with the panel variables and constants in parameters [(name, value), ...]
+def Run(scriptPath, pcfpath, modelFile, parameters):
+   RunScript(LoadScript(os.path.abspath(scriptPath)), scriptPath, pcfpath, modelFile, parameters)
+
+def Main(argv):
+   if len(argv) < 4:
+      print("usage: python BatchRun_QAN.py <script> <project .pcf> <model file> [parameter file ...] [name=value ...]")
+      return 1
+   parameters = []
+   for arg in argv[4:]:
+      if '=' in arg:
+         parameters.append(ParseParameter(arg))
+      else:
+         parameters.extend(ReadParameters(arg))
+   Run(argv[1], argv[2], argv[3], parameters)
+   return 0
+
+#==============================================================================
+
+# from the command line, run through the imported module so the scripts see the same batchMode
+if __name__ == "__main__":
+   import BatchRun_QAN
+   sys.exit(BatchRun_QAN.Main(sys.argv))
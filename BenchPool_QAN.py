@@ -0,0 +1,106 @@
+#==============================================================================
+# Bench process pool for the grail model scripts (AMR, DEST, ModelCalcs)
+#==============================================================================
+
+import multiprocessing
+
+#==============================================================================
+# Version Information
+#==============================================================================
+
+# Oct 18, 2026 - v1.0.0: run independent benches in a pool of worker processes, results reported in bench order
+# Oct 18, 2026 - v1.0.1: worker initializer, set by a batch run (BatchRun_QAN) to load the script in each worker
+# Oct 18, 2026 - v1.0.2: outcome of a bench pass (BenchOutcome), a run with failed benches raises BenchError once its benches are reported
+
+#==============================================================================
+# Constants
+#==============================================================================
+
+# python interpreter for worker processes, needed when the host application is not python itself; '' to use the default (sys.executable)
+pythonExecutable = ''
+
+# function (and arguments) run once in each worker process before any bench, None for none; a batch run uses it to load its script
+workerInitializer = None
+workerInitArgs = ()
+
+benchFailedMessage = "Failed\n" # logged by a bench function for a bench it could not calculate (e.g. a model access error)
+
+#==============================================================================
+# Pool Functions
+#==============================================================================
+
+# run one (function, arguments) job in a worker process; at module level so it can be sent to the workers
+def _call(job):
+   benchFunction, args = job
+   return benchFunction(*args)
+
+# number of worker processes for a worker setting: 0 (or less) for one per processor, never more than the number of benches
+def PoolSize(workers, benches):
+   if workers <= 0:
+      try:
+         workers = multiprocessing.cpu_count()
+      except NotImplementedError:
+         workers = 1
+   return max(1, min(workers, benches))
+
+# run benchFunction(*args) for each argument tuple in benchArgs (one per bench, in bench order), passing each result to report(result)
+# results are always reported in the order of benchArgs, whatever order the workers finish in, so the log is the same as a serial run
+# benchFunction must be defined at module level of the calling script, and the script run under "if __name__ == '__main__':"
+def RunBenches(benchFunction, benchArgs, workers, report):
+   workers = PoolSize(workers, len(benchArgs))
+   if workers <= 1: # serial, in this process
+      for args in benchArgs:
+         report(benchFunction(*args))
+      return workers
+   if pythonExecutable != '':
+      multiprocessing.set_executable(pythonExecutable)
+   pool = multiprocessing.Pool(workers, workerInitializer, workerInitArgs)
+   try:
+      for result in pool.imap(_call, [(benchFunction, args) for args in benchArgs]):
+         report(result)
+   except:
+      pool.terminate()
+      pool.join()
+      raise
+   pool.close()
+   pool.join()
+   return workers
+
+# print the (message, logged) pairs returned by a bench function and write the logged ones to the run log file
+def ReportMessages(messages, logFile):
+   for (msgText, logged) in messages:
+      print(msgText)
+      if logged:
+         logFile.write(msgText)
+
+#==============================================================================
+# Outcome Functions
+#==============================================================================
+
+class BenchError(Exception):
+   pass
+
+# True if the (message, logged) pairs returned by a bench function report the bench as failed
+def BenchFailed(messages):
+   return (benchFailedMessage, True) in messages
+
+# Outcome of the bench pass of a run: Report(messages) is called with the messages of each bench, in bench order from firstBench, and
+# Check() raises BenchError if any of them failed, so a run with failed benches is not taken as executed
+class BenchOutcome(object):
+
+   def __init__(self, title, firstBench):
+      self.title = title
+      self.bench = firstBench
+      self.benches = 0
+      self.failed = []
+
+   def Report(self, messages):
+      if BenchFailed(messages):
+         self.failed.append(self.bench)
+      self.bench += 1
+      self.benches += 1
+
+   def Check(self):
+      if len(self.failed) > 0:
+         raise BenchError("%s: %d of %d benches failed (bench %s)" % (self.title, len(self.failed), self.benches,
+                          ', '.join(["%d" % (b) for b in self.failed])))
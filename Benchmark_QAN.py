@@ -0,0 +1,436 @@
+#==============================================================================
+# Benchmark of the model scripts (ModelCalcs, AMR, DEST, fused pipeline, Vulcan blasthole coding) on synthetic models
+#==============================================================================
+
+# usage: python Benchmark_QAN.py <folder> [AQQ|QAN] [nx,ny,nz ...] [benchWorkers=n] [vulcanPython=path]
+#   e.g. python Benchmark_QAN.py C:\Offline\Benchmark QAN
+#        python Benchmark_QAN.py C:\Offline\Benchmark AQQ 60,50,1 240,200,40 benchWorkers=0
+# Generates a synthetic local model (LocalModel_QAN) of each size in a folder of the deposit (AQQ or QAN) in the folder, nx columns by ny
+# rows by nz levels (default from one bench to a full 3D model), and times each stage on it: ModelCalcs, AMR and DEST run one after the
+# other as batch runs (BatchRun_QAN), the three fused in one run (Pipeline_QAN), and the Vulcan blasthole coding on blastholes sampled
+# from one bench of the model (local Vulcan models, LocalVulcan_QAN; skipped if shapely is not installed). The Vulcan coding is a Python 3
+# script, run by the Python 3 of vulcanPython. Scripts are loaded before they are timed. Stage speed is in model blocks per second
+# (blastholes per second for the Vulcan coding). A stage that fails is reported and fails the benchmark once the other stages have run.
+# The synthetic model is Aqqaluk or Qanaiyaq style: GEOL (and, for Qanaiyaq, GEOL1) codes from the geology groups of the ModelCalcs
+# script, Air above a rolling topography, exhalite, baritic and vein ore bodies in shale and Siksikpuk waste, weathered or oxide ore
+# near surface, plausible STZN, STPB, STFE, STBA, AG, TOC, S and SG for the rock type, and RESCL and PERLT (mostly not yet mined)
+# distributions. The generator is seeded, so a size is the same model in every benchmark run.
+# Each result is appended to Benchmark_results.csv in the folder (for all deposits) with the date, computer, python and script versions,
+# and compared with the last result of the same stage, size and computer, so regressions and speed-ups show from run to run.
+
+import sys
+import os
+import re
+import ast
+import glob
+import time
+import socket
+import platform
+import subprocess
+
+try: # needed for the synthetic models
+   import numpy
+except ImportError:
+   numpy = None
+
+import LocalModel_QAN
+import LocalVulcan_QAN
+import BatchRun_QAN
+import Pipeline_QAN
+
+#==============================================================================
+# Version Information
+#==============================================================================
+
+# Oct 18, 2026 - v1.0.0: synthetic Aqqaluk and Qanaiyaq style model generator, timed ModelCalcs, AMR, DEST, fused and Vulcan coding stages,
+#                        results file with comparison to the previous run
+# Oct 18, 2026 - v1.0.1: Vulcan coding run by Python 3 (vulcanPython), scripts loaded before they are timed, a failed stage fails the
+#                        benchmark, each deposit in its own folder
+
+#==============================================================================
+# Constants
+#==============================================================================
+
+# scripts of the stages, found in the folder of this module (the last by name if there are several)
+scriptPatterns = {"ModelCalcs":"ModelCalcs_*_QAN.py", "AMR":"AMR_*_QAN.py", "DEST":"DEST_*_QAN.py", "Vulcan":"Vulcan_Block_Coding*_QAN.py"}
+stageParameters = {"ModelCalcs":[], "AMR":[("ModelItems", ["VALT1"])], "DEST":[("ModelItems", ["VALT1"])]}
+outputItems = ["VALT1", "VLTO1", "VLTW1", "VALS1", "VALB1"] # value items stored by AMR and DEST, not in their item lists
+
+deposits = {"AQQ":2, "QAN":4} # DEP code of the synthetic model
+benchmarkSizes = [(60, 50, 1), (120, 100, 1), (120, 100, 10), (240, 200, 40)] # nx, ny, nz; one bench to the full 3D model
+blockSize = (15.0, 15.0, 12.5) # m
+modelOrigin = (10000.0, 20000.0, 500.0) # lower corner of the synthetic model
+modelFile = "synthetic.dat"
+seed = 2026
+blastholesPerBlock = 2
+vulcanPython = "python3" # Python 3 with the Vulcan coding packages (Vulcan's python.exe, or a Python 3 with shapely for local Vulcan models)
+
+# run by vulcanPython with the script and blasthole model paths: runs the Vulcan coding script on the blasthole model from its folder, with
+# its messages hidden, and prints the seconds it took; Python start-up and compiling the script are not timed
+vulcanTimer = '''
+import sys, os, time
+(scriptPath, bhModel) = sys.argv[1:3]
+code = compile(open(scriptPath, "rb").read(), scriptPath, "exec")
+os.chdir(os.path.dirname(bhModel))
+sys.argv = [scriptPath, bhModel]
+sys.path.insert(0, os.path.dirname(scriptPath))
+(stdout, sys.stdout) = (sys.stdout, open(os.devnull, "w"))
+start = time.time()
+exec(code, {"__name__":"__main__", "__file__":scriptPath})
+seconds = time.time() - start
+sys.stdout = stdout
+print(seconds)
+'''
+
+resultsFile = "Benchmark_results.csv"
+resultsHeader = ["DATE", "HOST", "PYTHON", "DEPOSIT", "STAGE", "VERSION", "NX", "NY", "NZ", "BLOCKS", "SECONDS", "BLOCKS_PER_SECOND"]
+comparedFields = ["HOST", "DEPOSIT", "STAGE", "NX", "NY", "NZ"] # a result is compared with the last one of the same stage, size and computer
+
+#==============================================================================
+# Synthetic Model Functions
+#==============================================================================
+
+# smooth random field over the model grid (levels, rows, columns), a sum of random waves with values about -1 to 1
+def SmoothField(rng, shape, waves=6, wavelength=20.0):
+   (l, r, c) = numpy.meshgrid(*[numpy.arange(n, dtype=float) for n in shape], indexing='ij')
+   field = numpy.zeros(shape)
+   for k in range(waves):
+      (kl, kr, kc) = rng.normal(0.0, 2*numpy.pi/wavelength, 3)
+      field += numpy.sin(kl*l + kr*r + kc*c + rng.uniform(0, 2*numpy.pi))
+   return field/numpy.sqrt(waves/2.0)
+
+# random codes of the non empty groups (lists of codes) for the blocks of mask, in proportion to weights
+def PickCodes(rng, codes, mask, groups, weights):
+   chosen = [(group, weight) for (group, weight) in zip(groups, weights) if len(group) > 0]
+   p = numpy.array([weight for (group, weight) in chosen], dtype=float)
+   whichGroup = rng.choice(len(chosen), mask.sum(), p=p/p.sum())
+   values = numpy.zeros(len(whichGroup))
+   for (g, (group, weight)) in enumerate(chosen):
+      picked = whichGroup == g
+      values[picked] = rng.choice(group, picked.sum())
+   codes[mask] = values
+
+def Lognormal(rng, median, spread, shape, high):
+   return numpy.minimum(median*numpy.exp(rng.normal(0.0, spread, shape)), high)
+
+# input items of a synthetic model of shape (nz, ny, nx) for the deposit, geology codes from the groups of the ModelCalcs script;
+# returns item -> array, numpy.nan for undefined
+def SyntheticItems(mc, deposit, shape, rng):
+   d = deposits[deposit] - 1
+   isQanaiyaq = deposit == "QAN"
+   # Air above a rolling topography
+   levels = numpy.arange(shape[0], dtype=float).reshape(-1, 1, 1)
+   relief = max(0.8, 0.3*shape[0]) # levels
+   top = shape[0] - relief*0.5*(1.0 + SmoothField(rng, (1,) + shape[1:], 3, 60.0))
+   isAir = levels + 0.5 > top
+   depth = top - levels # levels below the surface
+   # ore bodies in waste, ore type and waste type from separate fields
+   isOre = ~isAir & (SmoothField(rng, shape) > 0.45)
+   oreType = SmoothField(rng, shape, 4, 40.0)
+   isWaste = ~isAir & ~isOre
+   GEOL = numpy.zeros(shape)
+   PickCodes(rng, GEOL, isOre & (oreType <= 0.5), [mc.Exhalite[d], mc.Vein[d]], [0.9, 0.1])
+   PickCodes(rng, GEOL, isOre & (oreType > 0.5), [mc.Baritic[d]], [1.0])
+   PickCodes(rng, GEOL, isWaste, [mc.Black_Shale[d], mc.Siksikpuk[d], mc.Baritic_Siksikpuk[d]], [0.6, 0.3, 0.1])
+   GEOL1 = GEOL.copy()
+   # ore near the surface weathered, coded in GEOL for Aqqaluk, in GEOL1 (weathered or oxide) for Qanaiyaq
+   isWeathered = isOre & (depth < 2.5)
+   if isQanaiyaq:
+      PickCodes(rng, GEOL1, isWeathered, [mc.Weathered[d], mc.Oxide[d]], [0.6, 0.4])
+   else:
+      PickCodes(rng, GEOL, isWeathered, [mc.Weathered[d]], [1.0])
+      GEOL1 = GEOL.copy()
+   isBaritic = isOre & (oreType > 0.5)
+   isShale = isWaste & numpy.isin(GEOL, mc.Black_Shale[d])
+   # grades (%, AG oz/st), lower in waste, barium high in baritic ore and Siksikpuk
+   STZN = numpy.where(isOre, Lognormal(rng, 14.0, 0.5, shape, 45.0), Lognormal(rng, 0.6, 0.8, shape, 8.0))
+   STPB = numpy.where(isOre, Lognormal(rng, 4.0, 0.6, shape, 25.0), Lognormal(rng, 0.2, 0.8, shape, 4.0))
+   STFE = numpy.where(isOre, rng.uniform(2.0, 14.0, shape), rng.uniform(1.0, 6.0, shape))
+   STBA = numpy.where(isBaritic, rng.uniform(20.0, 45.0, shape), numpy.where(isShale, rng.uniform(0.5, 3.0, shape), rng.uniform(1.0, 12.0, shape)))
+   rpb = numpy.clip(numpy.where(isWeathered, rng.normal(0.55, 0.15, shape), rng.normal(0.2, 0.08, shape)), 0.02, 0.95)
+   STSPB = numpy.round(STPB*rpb, 2)
+   AG = numpy.round(0.028*STZN + 0.36*STPB + Lognormal(rng, 0.15, 0.5, shape, 2.0), 2)
+   TOC = numpy.where(isShale, rng.uniform(1.0, 4.0, shape), rng.uniform(0.1, 1.0, shape))
+   S = numpy.round(0.5*STZN + 0.15*STPB + 0.6*STFE + rng.uniform(0.0, 2.0, shape), 2)
+   CU = Lognormal(rng, 0.02, 1.0, shape, 0.6)
+   NSG = numpy.clip(100.0 - 1.5*STZN - 1.2*STPB - 2.0*STFE - 1.7*STBA - rng.uniform(0.0, 10.0, shape), 0.5, 100.0)
+   SG = numpy.round(2.65 + 0.02*STZN + 0.045*STPB + 0.03*STFE + 0.017*STBA, 3)
+   items = {"GEOL":GEOL, "GEOL1":GEOL1, "GEOSM":GEOL1.copy(), "DEP":numpy.full(shape, float(deposits[deposit])),
+            "STZN":STZN, "STPB":STPB, "STSPB":STSPB, "STFE":STFE, "STBA":STBA, "AG":AG, "TOC":TOC, "S":S, "CU":CU, "NSG":NSG, "SG":SG,
+            "ODENM":numpy.round(SG*0.98, 3)}
+   # drill hole assays and textures only where sampled
+   sampled = rng.uniform(0.0, 1.0, shape) < 0.5
+   items["PB"] = numpy.where(sampled, numpy.round(STPB*rng.uniform(0.8, 1.2, shape), 2), numpy.nan)
+   items["SPB"] = numpy.where(sampled, numpy.round(items["PB"]*rpb, 2), numpy.nan)
+   items["SIO2"] = numpy.where(sampled, numpy.round(NSG*rng.uniform(0.7, 0.95, shape), 2), numpy.nan)
+   textured = rng.uniform(0.0, 1.0, shape) < 0.4
+   T1 = rng.uniform(20.0, 60.0, shape)
+   T2 = rng.uniform(1.0, 35.0, shape)
+   items["T1"] = numpy.where(textured, numpy.round(T1), numpy.nan)
+   items["T2"] = numpy.where(textured, numpy.round(T2), numpy.nan)
+   items["T6"] = numpy.where(textured, numpy.round(numpy.maximum(100.0 - T1 - T2, 0.0)), numpy.nan)
+   items["SHPCT"] = numpy.where(isWaste, 100.0, rng.choice([0.0, 0.0, 0.0, 25.0, 50.0, 75.0], shape))
+   if isQanaiyaq:
+      items["KCFLG"] = numpy.zeros(shape)
+   else: # Key Creek plate in part of the model
+      items["KCFLG"] = numpy.where(SmoothField(rng, shape, 2, 80.0) > 0.6, 1.0, 0.0)
+   # most blocks not yet mined (PERLT 0), resource classes 1 to 4
+   items["PERLT"] = numpy.where(rng.uniform(0.0, 1.0, shape) < 0.6, 0.0, rng.randint(1, 7, shape).astype(float))
+   items["RESCL"] = rng.choice([1.0, 2.0, 3.0, 4.0], shape, p=[0.3, 0.4, 0.2, 0.1])
+   items["PITPH"] = numpy.ceil((numpy.arange(shape[2], dtype=float) + 1)*4.0/shape[2])*numpy.ones(shape) # pit phases across the model
+   for item in items:
+      if item not in ("GEOL", "GEOL1", "GEOSM", "DEP"):
+         items[item] = numpy.where(isAir, numpy.nan, items[item])
+   return items
+
+# local pcf of a synthetic model, named so the scripts tell Qanaiyaq (qan in the path) from Aqqaluk
+def WritePcf(pcfpath, shape):
+   pcfFile = open(pcfpath, "w")
+   pcfFile.write("# synthetic model (Benchmark_QAN)\n")
+   for (name, value) in zip(("nx", "ny", "nz", "dx", "dy", "dz", "xmin", "ymin", "zmin"), shape[::-1] + blockSize + modelOrigin):
+      pcfFile.write("%s = %r\n" % (name, value))
+   pcfFile.close()
+
+# generate the synthetic model of the deposit, nx by ny by nz, in folder with all items of the scripts; returns the local pcf path
+def GenerateModel(folder, deposit, size, scripts):
+   (nx, ny, nz) = size
+   shape = (nz, ny, nx)
+   rng = numpy.random.RandomState(seed)
+   items = SyntheticItems(scripts["ModelCalcs"], deposit, shape, rng)
+   pcfpath = os.path.join(folder, "%s_synthetic.pcf" % (deposit.lower()))
+   WritePcf(pcfpath, shape)
+   modelFolder = LocalModel_QAN.ModelFolder(pcfpath, modelFile)
+   if not os.path.isdir(modelFolder):
+      os.makedirs(modelFolder)
+   itemlist = list(outputItems)
+   for name in ("ModelCalcs", "AMR", "DEST"):
+      itemlist += scripts[name].itemlist + getattr(scripts[name], "itemlistQanAdd", [])
+   for item in set(itemlist) | set(items):
+      values = items.get(item)
+      if values is None:
+         values = numpy.full(shape, LocalModel_QAN.UNDEFINED)
+      else:
+         values = numpy.where(numpy.isnan(values), LocalModel_QAN.UNDEFINED, values)
+      numpy.save(LocalModel_QAN.ItemPath(modelFolder, item), values.astype(LocalModel_QAN.storageType))
+   return pcfpath
+
+#==============================================================================
+# Vulcan Coding Functions
+#==============================================================================
+
+# list constant of a script, "name = [...]"
+def ScriptList(scriptPath, name):
+   text = open(scriptPath, "r").read()
+   return ast.literal_eval(re.search(r'^%s\s*=\s*(\[[^\]]*\])' % (name), text, re.M).group(1))
+
+# blasthole variables stored by a script, block["name"] = ...
+def ScriptVariables(scriptPath):
+   text = open(scriptPath, "r").read()
+   return sorted(set(re.findall(r'block\["(\w+)"\]\s*=[^=]', text)))
+
+# Vulcan reference model (local) from the blocks below the topography of the model calculated by ModelCalcs, and a blasthole model of
+# blastholesPerBlock holes in each rock block of the highest mostly rock bench; returns the blasthole model path and number of holes
+def VulcanModels(folder, deposit, pcfpath, scriptPath):
+   modelFolder = LocalModel_QAN.ModelFolder(pcfpath, modelFile)
+   def Item(item):
+      values = numpy.load(LocalModel_QAN.ItemPath(modelFolder, item))
+      return numpy.where(values == LocalModel_QAN.UNDEFINED, LocalVulcan_QAN.undefinedValue, values)
+   GEOL = Item("GEOL")
+   isRock = GEOL != 0
+   shape = GEOL.shape
+   centres = numpy.meshgrid(*[origin + size*(numpy.arange(n) + 0.5) for (origin, size, n) in zip(modelOrigin[::-1], blockSize[::-1], shape)],
+                            indexing='ij')[::-1] # x, y, z
+   refModel = ScriptList(scriptPath, "Vulcan_refModel")[0 if deposit == "AQQ" else 1]
+   refFolder = LocalVulcan_QAN.ModelFolder(os.path.join(folder, refModel))
+   if not os.path.isdir(refFolder):
+      os.makedirs(refFolder)
+   LocalVulcan_QAN.WriteSchema(refFolder, blockSize)
+   refVariables = ScriptList(scriptPath, "refItems") + ScriptList(scriptPath, "refModeItems")
+   for (name, values) in zip(("xworld", "yworld", "zworld"), centres):
+      numpy.save(LocalVulcan_QAN.VariablePath(refFolder, name), values[isRock])
+   for name in refVariables:
+      numpy.save(LocalVulcan_QAN.VariablePath(refFolder, name), Item(name.upper())[isRock])
+   # blastholes
+   rockLevels = [l for l in range(shape[0]) if isRock[l].mean() >= 0.8] or [int(numpy.argmax(isRock.sum(axis=(1, 2))))]
+   l = rockLevels[-1]
+   rng = numpy.random.RandomState(seed)
+   blocks = numpy.repeat(numpy.nonzero(isRock[l].ravel())[0], blastholesPerBlock)
+   holes = len(blocks)
+   def Sample(item, low=0.8, high=1.2):
+      values = Item(item)[l].ravel()[blocks]
+      return numpy.where(values < 0, values, numpy.round(values*rng.uniform(low, high, holes), 2))
+   variables = {"xworld":centres[0][l].ravel()[blocks] + rng.uniform(-0.45, 0.45, holes)*blockSize[0],
+                "yworld":centres[1][l].ravel()[blocks] + rng.uniform(-0.45, 0.45, holes)*blockSize[1],
+                "zworld":centres[2][l].ravel()[blocks], "volume":numpy.full(holes, numpy.prod(blockSize)/blastholesPerBlock),
+                "zn":numpy.where(rng.uniform(0.0, 1.0, holes) < 0.02, LocalVulcan_QAN.undefinedValue, Sample("STZN")),
+                "pb":Sample("STPB"), "spb":Sample("STSPB"), "fe":Sample("STFE"), "ba":Sample("STBA"), "ag":Sample("AG"),
+                "cu":Sample("CU"), "sio2":Sample("SIO2"), "toc":Sample("TOC", 1.0, 1.0), "geol":Sample("GEOL", 1.0, 1.0),
+                "geol1":Sample("GEOL1", 1.0, 1.0)}
+   bhModel = os.path.join(folder, "%s_bh_synthetic.bmf" % (deposit.lower()))
+   bhFolder = LocalVulcan_QAN.ModelFolder(bhModel)
+   if not os.path.isdir(bhFolder):
+      os.makedirs(bhFolder)
+   LocalVulcan_QAN.WriteSchema(bhFolder, blockSize)
+   for name in ScriptVariables(scriptPath):
+      variables.setdefault(name, numpy.full(holes, LocalVulcan_QAN.undefinedValue))
+   for (name, values) in variables.items():
+      numpy.save(LocalVulcan_QAN.VariablePath(bhFolder, name), values.astype(LocalVulcan_QAN.storageType))
+   numpy.save(LocalVulcan_QAN.VariablePath(bhFolder, "area"), numpy.array([deposit]*holes, dtype='U'))
+   return (bhModel, holes)
+
+# seconds the Vulcan blasthole coding script takes on a blasthole model, run from the folder of its reference model by the Python 3 of
+# vulcanPython (vulcanTimer)
+def RunVulcan(scriptPath, bhModel):
+   process = subprocess.Popen([vulcanPython, "-c", vulcanTimer, scriptPath, bhModel], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+   (output, errors) = process.communicate()
+   if process.returncode != 0:
+      lines = errors.decode("utf-8", "replace").strip().splitlines() or ["exit code %d" % (process.returncode)]
+      raise RuntimeError("%s failed in %s: %s" % (os.path.basename(scriptPath), vulcanPython, lines[-1]))
+   return float(output.decode("ascii").split()[-1])
+
+#==============================================================================
+# Benchmark Functions
+#==============================================================================
+
+# version of a script from its PROC_TITLE ("... - ver 5.24.4 - ..."), or from the last line of its version history ("... - v2.1.6 ...")
+def ScriptVersion(script, scriptPath):
+   if script is not None:
+      return re.search(r'ver ([^ ]+)', script.PROC_TITLE).group(1)
+   versions = re.findall(r'^#.* - v(\d[\w.]*)', open(scriptPath, "r").read(), re.M)
+   if len(versions) == 0:
+      return os.path.basename(scriptPath)
+   return versions[-1]
+
+# seconds to run function(*args), with the script messages hidden
+def Timed(function, *args):
+   (stdout, nullFile) = (sys.stdout, open(os.devnull, "w"))
+   sys.stdout = nullFile
+   try:
+      start = time.time()
+      function(*args)
+      return time.time() - start
+   finally:
+      sys.stdout = stdout
+      nullFile.close()
+
+# seconds of a batch run of a script (BatchRun_QAN), the script loaded before it is timed
+def TimedBatchRun(scriptPath, pcfpath, parameters):
+   script = BatchRun_QAN.LoadScript(scriptPath)
+   return Timed(BatchRun_QAN.RunScript, script, scriptPath, pcfpath, modelFile, parameters)
+
+# seconds of a fused run of the stages (Pipeline_QAN), the scripts loaded before it is timed
+def TimedPipeline(stages, pcfpath):
+   scripts = Pipeline_QAN.LoadScripts([scriptPath for (scriptPath, parameters) in stages])
+   return Timed(Pipeline_QAN.RunScripts, scripts, stages, pcfpath, modelFile)
+
+def ReadResults(path):
+   if not os.path.exists(path):
+      return []
+   resultsFile = open(path, "r")
+   results = [line.rstrip('\n').split(',') for line in resultsFile][1:]
+   resultsFile.close()
+   return [dict(zip(resultsHeader, fields)) for fields in results if len(fields) == len(resultsHeader)]
+
+# append a result to the results file, and report it against the last result of the same stage, size and computer
+def RecordResult(path, result):
+   key = [str(result[name]) for name in comparedFields]
+   previous = [old for old in ReadResults(path) if [old[name] for name in comparedFields] == key]
+   message = "%-10s %4s x %4s x %3s  %9s blocks  %8.2f s  %10.1f blocks/s  (%s)" % (result["STAGE"], result["NX"], result["NY"],
+             result["NZ"], result["BLOCKS"], result["SECONDS"], result["BLOCKS_PER_SECOND"], result["VERSION"])
+   if len(previous) > 0:
+      last = previous[-1]
+      message += "  %.2fx of %s (%s)" % (result["BLOCKS_PER_SECOND"]/max(float(last["BLOCKS_PER_SECOND"]), 1e-9), last["DATE"], last["VERSION"])
+   print(message)
+   isNew = not os.path.exists(path)
+   resultsFile = open(path, "a")
+   if isNew:
+      resultsFile.write(','.join(resultsHeader) + '\n')
+   resultsFile.write(','.join([str(result[name]) for name in resultsHeader]) + '\n')
+   resultsFile.close()
+
+# scripts of the stages, {stage name:path}
+def FindScripts():
+   folder = os.path.dirname(os.path.abspath(__file__))
+   scriptPaths = {}
+   for (name, pattern) in scriptPatterns.items():
+      found = sorted(glob.glob(os.path.join(folder, pattern)))
+      if len(found) > 0:
+         scriptPaths[name] = found[-1]
+   return scriptPaths
+
+# benchmark the stages on synthetic models of the deposit and sizes [(nx, ny, nz), ...] in the deposit's folder in folder; a stage that
+# fails fails the benchmark (RuntimeError) once the other stages have run
+def Run(folder, deposit, sizes, benchWorkers=1):
+   if numpy is None:
+      raise ImportError("NumPy is needed for the synthetic models")
+   folder = os.path.abspath(folder)
+   depositFolder = os.path.join(folder, deposit)
+   if not os.path.isdir(depositFolder):
+      os.makedirs(depositFolder)
+   scriptPaths = FindScripts()
+   scripts = dict([(name, BatchRun_QAN.LoadScript(scriptPaths[name])) for name in ("ModelCalcs", "AMR", "DEST")])
+   Pipeline_QAN.benchWorkers = benchWorkers
+   resultsPath = os.path.join(folder, resultsFile)
+   common = {"DATE":time.strftime("%Y-%m-%d %H:%M"), "HOST":socket.gethostname(), "PYTHON":platform.python_version(), "DEPOSIT":deposit}
+   failures = []
+   # time a stage, function(*args) returning its seconds, and record the result; a stage that fails is reported and left out of the
+   # results, the other stages still run
+   def Record(stage, version, size, blocks, function, *args):
+      try:
+         seconds = function(*args)
+      except Exception as e:
+         print("%-10s %4s x %4s x %3s  failed: %s" % (stage, size[0], size[1], size[2], e))
+         failures.append("%s %dx%dx%d" % (stage, size[0], size[1], size[2]))
+         return
+      result = dict(common, STAGE=stage, VERSION=version, NX=size[0], NY=size[1], NZ=size[2], BLOCKS=blocks, SECONDS=round(seconds, 3),
+                    BLOCKS_PER_SECOND=round(blocks/max(seconds, 1e-9), 1))
+      RecordResult(resultsPath, result)
+   for size in sizes:
+      blocks = size[0]*size[1]*size[2]
+      pcfpath = GenerateModel(depositFolder, deposit, size, scripts)
+      stages = []
+      for name in ("ModelCalcs", "AMR", "DEST"):
+         parameters = stageParameters[name] + [("benchWorkers", benchWorkers)]
+         Record(name, ScriptVersion(scripts[name], scriptPaths[name]), size, blocks, TimedBatchRun, scriptPaths[name], pcfpath, parameters)
+         stages.append((scriptPaths[name], stageParameters[name]))
+      if "Vulcan" in scriptPaths:
+         try:
+            import shapely
+         except ImportError:
+            print("Vulcan     skipped, shapely is not installed")
+         else:
+            (bhModel, holes) = VulcanModels(depositFolder, deposit, pcfpath, scriptPaths["Vulcan"])
+            Record("Vulcan", ScriptVersion(None, scriptPaths["Vulcan"]), size, holes, RunVulcan, scriptPaths["Vulcan"], bhModel)
+      # the three stages fused, on a fresh copy of the synthetic model
+      GenerateModel(depositFolder, deposit, size, scripts)
+      Record("Pipeline", '+'.join([ScriptVersion(scripts[name], scriptPaths[name]) for name in ("ModelCalcs", "AMR", "DEST")]), size, blocks,
+             TimedPipeline, stages, pcfpath)
+   if len(failures) > 0:
+      raise RuntimeError("benchmark failed, %d stages failed: %s" % (len(failures), ', '.join(failures)))
+
+def Main(argv):
+   global vulcanPython
+   if len(argv) < 2:
+      print("usage: python Benchmark_QAN.py <folder> [AQQ|QAN] [nx,ny,nz ...] [benchWorkers=n] [vulcanPython=path]")
+      return 1
+   deposit = "QAN"
+   sizes = []
+   benchWorkers = 1
+   for arg in argv[2:]:
+      if arg.upper() in deposits:
+         deposit = arg.upper()
+      elif arg.startswith("benchWorkers="):
+         benchWorkers = int(arg.split('=', 1)[1])
+      elif arg.startswith("vulcanPython="):
+         vulcanPython = arg.split('=', 1)[1]
+      else:
+         sizes.append(tuple([int(n) for n in arg.split(',')]))
+   Run(argv[1], deposit, sizes or benchmarkSizes, benchWorkers)
+   return 0
+
+#==============================================================================
+
+# from the command line, run through the imported module so the scripts see the same batchMode
+if __name__ == "__main__":
+   import Benchmark_QAN
+   sys.exit(Benchmark_QAN.Main(sys.argv))
@@ -0,0 +1,346 @@
+#==============================================================================
+# Mill throughput calibration of the ModelCalcs throughput model to actual mill data, on the FLAG1 tagged blocks of a local model
+#==============================================================================
+
+# usage: python Calibration_QAN.py <local .pcf> <model file> <mill data .csv> <ModelCalcs script> [fit=NAME,...] [parameter file ...] [name=value ...]
+#   e.g. python Calibration_QAN.py C:\Offline\QAN\qanlocal.pcf qan15.dat mill_2024_2025.csv ModelCalcs_24.52.7_QAN.py
+#        python Calibration_QAN.py C:\Offline\AQQ\aqqlocal.pcf aqq15.dat mill_quarters.csv ModelCalcs_24.52.7_QAN.py fit=TPH_eff,BCsag gc=1
+# Fits parameters of the throughput model (fit=, default Ksag and Kbm) so that the model throughput of the ore polygon cuts milled in each
+# period matches the mill. The blocks milled in a period are tagged with the period in FLAG1 (as for the annual mill throughput Back
+# Calculation); the mill data CSV has PERIOD, TONNES and HOURS columns, the tonnes milled and operating hours of each period. The model file
+# is one ModelCalcs has been run on with the constants given here (name=value and parameter files set them, as for its batch run,
+# BatchRun_QAN).
+# Fit parameters are TPH_eff, Ksag and Kbm (of the grinding configuration gc), and the SAG filling BCsag (ball filling) and MLsag (total
+# filling) of all SAG mills, or BCsag1_2, BCsag3, MLsag1_2 and MLsag3 of one configuration.
+# The hardness inputs (SG, AB, BMWi, ACLS, QWXFG) and tonnes of the tagged blocks are read once and kept in memory, and each model
+# evaluation is one pass of the script's whole bench throughput model (ThroughputArrays, EfficiencyArrays) over them, with the SAG mill
+# power models cached by configuration, so the thousands of evaluations of a fit take seconds. Tagged blocks whose stored MPT the model
+# does not reproduce (host geology defaults) keep their stored throughput, scaled with TPH_eff.
+# The fit is a least squares fit (Levenberg-Marquardt) of the relative differences of the model and mill throughput (tonnes per operating
+# hour) of the periods. The report, <model file>_calibration.txt next to the model, has the fitted parameters and the throughput of each
+# period before and after the fit; <model file>_calibration_parameters.txt has the fitted TPH_eff, Ksag and Kbm as a parameter file for
+# batch runs.
+
+import sys
+import os
+import csv
+import time
+
+try: # needed for the throughput model
+   import numpy
+except ImportError:
+   numpy = None
+
+import LocalModel_QAN
+import BatchRun_QAN
+
+#==============================================================================
+# Version Information
+#==============================================================================
+
+# Oct 18, 2026 - v1.0.0: least squares fit of TPH_eff, Ksag, Kbm and SAG filling to mill tonnes and hours of FLAG1 tagged blocks
+# Oct 18, 2026 - v1.0.1: script parameters set by BatchRun_QAN.SetParameters, so the constants derived from them are calculated again
+
+#==============================================================================
+# Constants
+#==============================================================================
+
+tagItem = "FLAG1" # period of the blocks milled in it
+defaultFit = ["Ksag", "Kbm"]
+# bounds of the fit parameters; a group (BCsag, MLsag) sets the parameters of all SAG mills to the same value
+parameterBounds = {"TPH_eff":(0.5, 1.5), "Ksag":(0.1, 3.0), "Kbm":(0.1, 3.0), "BCsag1_2":(0.02, 0.30), "BCsag3":(0.02, 0.30),
+                   "MLsag1_2":(0.10, 0.45), "MLsag3":(0.10, 0.45)}
+parameterGroups = {"BCsag":["BCsag1_2", "BCsag3"], "MLsag":["MLsag1_2", "MLsag3"]}
+parameterFileParameters = ["TPH_eff", "Ksag", "Kbm"] # fitted parameters written to the parameter file, the SAG filling is in the report only
+
+mptTolerance = 1e-6 # largest difference of a stored MPT reproduced by the throughput model
+maxIterations = 100
+relativeStep = 1e-6 # of the parameter, for the finite difference Jacobian
+convergence = 1e-10 # relative decrease of the sum of squares that ends the fit
+maxDamping = 1e10
+
+periodColumns = ("PERIOD", "FLAG1") # mill data CSV columns, in order of preference
+tonnesColumns = ("TONNES", "TONS")
+hoursColumns = ("HOURS", "OPHOURS")
+
+#==============================================================================
+# Input Functions
+#==============================================================================
+
+# mill data [(period, tonnes, hours), ...] from a CSV with PERIOD, TONNES and HOURS columns
+def ReadMillData(path):
+   millFile = open(path, "r")
+   reader = csv.reader(millFile)
+   header = [name.strip().upper() for name in next(reader)]
+   columns = [LocalModel_QAN.HeaderColumn(header, names) for names in (periodColumns, tonnesColumns, hoursColumns)]
+   if None in columns:
+      raise ValueError("%s has no PERIOD, TONNES and HOURS columns" % (path))
+   periods = []
+   for fields in reader:
+      if len(fields) < len(header) or fields[columns[0]].strip() == '':
+         continue
+      (period, tonnes, hours) = [float(fields[k]) for k in columns]
+      if tonnes <= 0 or hours <= 0:
+         raise ValueError("period %g of %s has no tonnes or operating hours" % (period, path))
+      periods.append((period, tonnes, hours))
+   millFile.close()
+   if len(periods) == 0:
+      raise ValueError("%s has no periods" % (path))
+   return periods
+
+# check the fit parameters, any of parameterBounds or parameterGroups
+def CheckFit(fit):
+   for name in fit:
+      if name not in parameterBounds and name not in parameterGroups:
+         raise ValueError("cannot fit %s, the fit parameters are %s" % (name, ', '.join(sorted(parameterBounds.keys()) + sorted(parameterGroups.keys()))))
+   if len(fit) == 0 or len(set(fit)) < len(fit):
+      raise ValueError("fit parameters must be given once each: " + ','.join(fit))
+
+#==============================================================================
+# Calibration Classes
+#==============================================================================
+
+# Throughput model of the tagged blocks of a local model, for a loaded ModelCalcs script with its constants set: the inputs are read once,
+# Throughput(values) is the model tonnes per operating hour of each period for values of the fit parameters, and Fit() fits them to the
+# mill data periods [(period, tonnes, hours), ...]
+class MillCalibration(object):
+
+   def __init__(self, script, pcfpath, modelFile, periods, fit):
+      CheckFit(fit)
+      self.script = script
+      self.fit = fit
+      self.mills = {} # SAG mill power models by configuration, each caching its power draw by SG
+      self.evaluations = 0
+      pcf = LocalModel_QAN.Pcf(pcfpath)
+      folder = LocalModel_QAN.ModelFolder(pcfpath, modelFile)
+      tags = numpy.load(LocalModel_QAN.ItemPath(folder, tagItem), mmap_mode='r').ravel()
+      period = numpy.zeros(len(tags), dtype=int) - 1
+      for (k, (code, tonnes, hours)) in enumerate(periods):
+         period[tags == code] = k
+      blocks = numpy.nonzero(period >= 0)[0]
+      (SG, Ab, BBMWi, ACLS, QWXFG, ODENM, MPT) = [numpy.array(numpy.load(LocalModel_QAN.ItemPath(folder, item), mmap_mode='r').ravel()[blocks])
+                                               for item in ("SG", "AB", "BMWi", "ACLS", "QWXFG", "ODENM", "MPT")]
+      period = period[blocks]
+      hasThroughput = MPT > 0 # not Air, and calculated by ModelCalcs
+      self.taggedBlocks, self.skippedBlocks = len(blocks), len(blocks) - int(hasThroughput.sum())
+      tonnes = ODENM*pcf.dx()*pcf.dy()*pcf.dz()
+      # blocks by the throughput model: their stored MPT reproduced with the constants of the script
+      isModelled = hasThroughput & (SG > 0) & (Ab > 0) & (BBMWi > 0)
+      (self.SG, self.Ab, self.BBMWi, self.ACLS, self.QWXFG) = [values[isModelled] for values in (SG, Ab, BBMWi, ACLS, QWXFG)]
+      TPH = self.BlockThroughput(self.Circuit({}), script.TPH_eff)
+      isModelled[isModelled] = numpy.abs(script.RoundArray(60.0/TPH,6) - MPT[isModelled]) <= mptTolerance
+      isFixed = hasThroughput & ~isModelled
+      self.modelledBlocks, self.fixedBlocks = int(isModelled.sum()), int(isFixed.sum())
+      (self.SG, self.Ab, self.BBMWi, self.ACLS, self.QWXFG) = [values[isModelled] for values in (SG, Ab, BBMWi, ACLS, QWXFG)]
+      self.tonnes, self.period = tonnes[isModelled], period[isModelled]
+      # periods with tagged blocks, the hours of the blocks with their stored throughput at TPH_eff
+      periodTonnes = numpy.bincount(period[hasThroughput], weights=tonnes[hasThroughput], minlength=len(periods))
+      self.fixedHours = numpy.bincount(period[isFixed], weights=tonnes[isFixed]*MPT[isFixed]/60.0, minlength=len(periods))
+      self.emptyPeriods = [periods[k][0] for k in range(len(periods)) if periodTonnes[k] <= 0]
+      used = numpy.nonzero(periodTonnes > 0)[0]
+      if len(used) == 0:
+         raise ValueError("no blocks with throughput are tagged in %s with the periods of the mill data" % (tagItem))
+      index = numpy.zeros(len(periods), dtype=int) - 1
+      index[used] = numpy.arange(len(used))
+      self.period = index[self.period]
+      self.periods = [periods[k] for k in used]
+      self.periodTonnes, self.fixedHours = periodTonnes[used], self.fixedHours[used]
+      self.millThroughput = numpy.array([tonnes/hours for (code, tonnes, hours) in self.periods])
+      (self.lower, self.upper) = [numpy.array([parameterBounds[parameterGroups.get(name, [name])[0]][k] for name in fit]) for k in (0, 1)]
+
+   # grinding circuit of the script for circuit parameters, with the SAG mill power models of the same configuration shared
+   def Circuit(self, parameters):
+      circuit = self.script.GrindingCircuit(parameters)
+      for name in ("sagMill1_2", "sagMill3"):
+         mill = getattr(circuit, name)
+         setattr(circuit, name, self.mills.setdefault((mill.CSmill, mill.BCmill, mill.MLmill), mill))
+      return circuit
+
+   # model throughput (t/h) of the blocks in a grinding circuit with the grinding circuit efficiency tphEff
+   def BlockThroughput(self, circuit, tphEff):
+      self.evaluations += 1
+      errorSettings = numpy.seterr(divide='ignore', invalid='ignore', over='ignore')
+      try:
+         (SEsag, SEbm, TPHsag, TPHbm) = self.script.ThroughputArrays(self.SG, self.Ab, self.BBMWi, circuit.P80(self.ACLS), circuit)
+         (TPH, SAGFG) = self.script.EfficiencyArrays(TPHsag, TPHbm, self.QWXFG, tphEff)
+      finally:
+         numpy.seterr(**errorSettings)
+      return TPH
+
+   # values of the fit parameters in the script's constants
+   def StartValues(self):
+      values = []
+      for name in self.fit:
+         name = parameterGroups.get(name, [name])[0]
+         if name in ("Ksag", "Kbm"): # of the grinding configuration
+            values.append(getattr(self.script, name)[self.script.gc])
+         else:
+            values.append(getattr(self.script, name))
+      return numpy.array(values, dtype=float)
+
+   # circuit parameters {parameter: value, ...} and grinding circuit efficiency for values of the fit parameters
+   def Parameters(self, values):
+      parameters, tphEff = {}, self.script.TPH_eff
+      for (name, value) in zip(self.fit, values.tolist()):
+         if name == "TPH_eff":
+            tphEff = value
+         else:
+            for parameter in parameterGroups.get(name, [name]):
+               parameters[parameter] = value
+      return (parameters, tphEff)
+
+   # model tonnes per operating hour of each period (array) for values of the fit parameters
+   def Throughput(self, values):
+      (parameters, tphEff) = self.Parameters(values)
+      TPH = self.BlockThroughput(self.Circuit(parameters), tphEff)
+      hours = numpy.bincount(self.period, weights=self.tonnes/TPH, minlength=len(self.periods)) + self.fixedHours*self.script.TPH_eff/tphEff
+      return self.periodTonnes/hours
+
+   # relative differences of the model and mill throughput of the periods
+   def Residuals(self, values):
+      return self.Throughput(values)/self.millThroughput - 1.0
+
+   # forward difference Jacobian of the residuals, stepping back from the upper bound
+   def Jacobian(self, values, residuals):
+      jacobian = numpy.zeros((len(residuals), len(values)))
+      for k in range(len(values)):
+         step = relativeStep*max(abs(values[k]), 1e-3)
+         if values[k] + step > self.upper[k]:
+            step = -step
+         stepped = values.copy()
+         stepped[k] += step
+         jacobian[:, k] = (self.Residuals(stepped) - residuals)/step
+      return jacobian
+
+   # Levenberg-Marquardt fit from the script's constants, within the parameter bounds; returns (start values, fitted values, iterations)
+   def Fit(self):
+      start = self.StartValues()
+      values = numpy.clip(start, self.lower, self.upper)
+      residuals = self.Residuals(values)
+      cost = residuals.dot(residuals)
+      damping = 1e-3
+      iterations = 0
+      while iterations < maxIterations:
+         iterations += 1
+         jacobian = self.Jacobian(values, residuals)
+         normal = jacobian.T.dot(jacobian)
+         gradient = jacobian.T.dot(residuals)
+         improved = False
+         while not improved and damping < maxDamping:
+            step = numpy.linalg.pinv(normal + damping*numpy.diag(numpy.diag(normal))).dot(-gradient)
+            trial = numpy.clip(values + step, self.lower, self.upper)
+            trialResiduals = self.Residuals(trial)
+            trialCost = trialResiduals.dot(trialResiduals)
+            if trialCost < cost:
+               improved = True
+               damping = max(damping/10.0, 1e-12)
+            else:
+               damping *= 10.0
+         if not improved: # no step lowers the sum of squares
+            break
+         decrease = (cost - trialCost)/max(cost, 1e-300)
+         (values, residuals, cost) = (trial, trialResiduals, trialCost)
+         if decrease < convergence:
+            break
+      return (start, values, iterations)
+
+#==============================================================================
+# Report Functions
+#==============================================================================
+
+# fitted values of the script's parameter file constants, [(name, value), ...]; Ksag and Kbm as the lists of all grinding configurations
+def FittedConstants(script, fit, values):
+   constants = []
+   for (name, value) in zip(fit, values.tolist()):
+      if name in ("Ksag", "Kbm"):
+         configurations = list(getattr(script, name))
+         configurations[script.gc] = value
+         constants.append((name, "[" + ", ".join(["%.6f" % (K) for K in configurations]) + "]"))
+      elif name in parameterFileParameters:
+         constants.append((name, "%.6f" % (value)))
+   return constants
+
+# report lines of a calibration
+def ReportLines(calibration, start, values, iterations, seconds):
+   startThroughput = calibration.Throughput(start)
+   fittedThroughput = calibration.Throughput(values)
+   lines = ["Tagged blocks (%s): %d, %d by the throughput model, %d with their stored throughput (TPH_eff scaled), %d without throughput" %
+            (tagItem, calibration.taggedBlocks, calibration.modelledBlocks, calibration.fixedBlocks, calibration.skippedBlocks)]
+   if len(calibration.emptyPeriods) > 0:
+      lines.append("Periods without tagged blocks, not fitted: " + ", ".join(["%g" % (period) for period in calibration.emptyPeriods]))
+   lines.append("Fit of %s: %d iterations, %d model evaluations in %.1f s" % (", ".join(calibration.fit), iterations, calibration.evaluations, seconds))
+   lines.append("")
+   lines.append("%-10s %12s %12s" % ("parameter", "start", "fitted"))
+   for (name, startValue, value) in zip(calibration.fit, start.tolist(), values.tolist()):
+      lines.append("%-10s %12.6f %12.6f" % (name, startValue, value))
+   lines.append("")
+   lines.append("%-10s %12s %10s %10s %12s %8s %12s %8s" % ("period", "mill t", "mill h", "mill t/h", "start t/h", "error %", "fitted t/h", "error %"))
+   for (k, (period, tonnes, hours)) in enumerate(calibration.periods):
+      mill = calibration.millThroughput[k]
+      lines.append("%-10g %12.0f %10.1f %10.1f %12.1f %8.2f %12.1f %8.2f" % (period, tonnes, hours, mill, startThroughput[k],
+                   100.0*(startThroughput[k]/mill - 1), fittedThroughput[k], 100.0*(fittedThroughput[k]/mill - 1)))
+   (startError, fittedError) = [100.0*numpy.sqrt(numpy.mean((throughput/calibration.millThroughput - 1)**2)) for throughput in (startThroughput, fittedThroughput)]
+   lines.append("RMS error %%: start %.2f, fitted %.2f" % (startError, fittedError))
+   filling = [name for name in calibration.fit if name not in parameterFileParameters]
+   if len(filling) > 0:
+      lines.append("")
+      lines.append("SAG filling (%s) is not in the parameter file: set it in the constants of the ModelCalcs script, its SAG mill power models" %
+                   (", ".join(filling)))
+      lines.append("are built when the script loads")
+   return lines
+
+#==============================================================================
+# Calibration Functions
+#==============================================================================
+
+# fit the throughput model of a ModelCalcs script (its constants set by parameters [(name, value), ...]) to the mill data of the tagged
+# blocks of the model file of the local pcf; writes the report and parameter file next to the model and returns the fitted values
+def Calibrate(pcfpath, modelFile, millPath, scriptPath, parameters, fit):
+   if numpy is None:
+      raise ImportError("NumPy is needed for the throughput model")
+   pcfpath = os.path.abspath(pcfpath)
+   script = BatchRun_QAN.LoadScript(os.path.abspath(scriptPath))
+   BatchRun_QAN.SetParameters(script, parameters)
+   started = time.time()
+   calibration = MillCalibration(script, pcfpath, modelFile, ReadMillData(millPath), fit)
+   (start, values, iterations) = calibration.Fit()
+   lines = ReportLines(calibration, start, values, iterations, time.time() - started)
+   header = ["Mill throughput calibration of " + modelFile, "  script: " + script.PROC_TITLE, "  mill data: " + os.path.basename(millPath),
+             "  " + time.strftime("%b %d, %Y %H:%M"), ""]
+   folder = os.path.dirname(pcfpath)
+   reportFile = open(os.path.join(folder, modelFile + "_calibration.txt"), "w")
+   for line in header + lines:
+      print(line)
+      reportFile.write(line + "\n")
+   reportFile.close()
+   constants = FittedConstants(script, fit, values)
+   if len(constants) > 0:
+      parameterFile = open(os.path.join(folder, modelFile + "_calibration_parameters.txt"), "w")
+      parameterFile.write("# fitted to %s by Calibration_QAN, %s\n" % (os.path.basename(millPath), time.strftime("%b %d, %Y %H:%M")))
+      for (name, value) in constants:
+         parameterFile.write("%s = %s\n" % (name, value))
+      parameterFile.close()
+   return dict(zip(fit, values.tolist()))
+
+def Main(argv):
+   if len(argv) < 5:
+      print("usage: python Calibration_QAN.py <local .pcf> <model file> <mill data .csv> <ModelCalcs script> [fit=NAME,...] [parameter file ...] [name=value ...]")
+      return 1
+   fit = defaultFit
+   parameters = []
+   for arg in argv[5:]:
+      if arg.startswith("fit="):
+         fit = [name.strip() for name in arg[4:].split(',') if name.strip() != '']
+      elif '=' in arg:
+         parameters.append(BatchRun_QAN.ParseParameter(arg))
+      else:
+         parameters.extend(BatchRun_QAN.ReadParameters(arg))
+   Calibrate(argv[1], argv[2], argv[3], argv[4], parameters, fit)
+   return 0
+
+#==============================================================================
+
+# from the command line, run through the imported module so the scripts see the same batchMode
+if __name__ == "__main__":
+   import Calibration_QAN
+   sys.exit(Calibration_QAN.Main(sys.argv))
@@ -5,27 +5,44 @@
 #==============================================================================
 
 import sys
-from Tkinter import *
-import tkMessageBox
 from datetime import datetime
 import getpass
 
-from grail.widgets import *
-from grail.rtv import *
-import grail.compass.projectinfo
 from grail.data import model
-from grail.dialogs import gselectprojectdialog
-from grail.compass.responsevar import ResponseVar
-from grail.compass import cmpsys
-from grail import messages
 from grail import fileutils
-from grail import gsys
+
+import BenchPool_QAN
+import Pipeline_QAN
+import Profile_QAN
+import RunJournal_QAN
+import SlabArray_QAN
+
+# loaded by a batch run (BatchRun_QAN, only imported by the batch run itself): panel variables only, no panel or widget toolkit
+batchMode = "BatchRun_QAN" in sys.modules and sys.modules["BatchRun_QAN"].batchMode
+if batchMode:
+   from BatchRun_QAN import StringRTV, IntegerRTV, FloatRTV
+else:
+   from Tkinter import *
+   import tkMessageBox
+   from grail.widgets import *
+   from grail.rtv import *
+   import grail.compass.projectinfo
+   from grail.dialogs import gselectprojectdialog
+   from grail.compass.responsevar import ResponseVar
+   from grail.compass import cmpsys
+   from grail import messages
+   from grail import gsys
+
+try: # optional, used for whole bench array dilution
+   import numpy
+except ImportError:
+   numpy = None
 
 #==============================================================================
 # Version Information
 #==============================================================================
 
-PROC_TITLE = "Destination Coding - ver 11.52.5_QAN - Feb 26, 2024"
+PROC_TITLE = "Destination Coding - ver 11.52.21_QAN - Oct 18, 2026"
 
 # May 6, 2012 - v1
 # Dec 22, 2012 - v2: updated cutoffs to RD Model deposit averages and SP optimum, added Reactive split to Low Grade, reversed DESTC order
@@ -93,6 +110,24 @@ PROC_TITLE = "Destination Coding - ver 11.52.5_QAN - Feb 26, 2024"
 # Feb 9, 2023 -v11.52.4 Updated the costs for the LOM 2024
 # July 3, 2023-v11.52.5 Updated the costs for the 5YBP 2024
 # Feb 26, 2024 - v11.52.5_QAN: QAN22v6 (updated S) model update
+# Oct 18, 2026 - v11.52.6_QAN: moved bench calculation to DestBench, run in a pool of worker processes (BenchPool_QAN) when benchWorkers is not 1
+# Oct 18, 2026 - v11.52.7_QAN: DILFG dilution traverses as whole bench array (NumPy) stencils when useArrayEngine is True, same result as the block by block traverses
+# Oct 18, 2026 - v11.52.8_QAN: "salt & pepper" noise reduction decisions from NoisePatterns, memoised by 3x3 DESTD kernel
+# Oct 18, 2026 - v11.52.9_QAN: added cutoff sweep (cutoffDecks), a read only pass summarising undiluted DESTC by RESCL for several sets of $/s cutoffs
+# Oct 18, 2026 - v11.52.10_QAN: added VALB variants (valbVariants), VALB for other RESCL bases and milling options stored to their own items in the same pass as a VALB run
+# Oct 18, 2026 - v11.52.11_QAN: batch entry point: RunModelCalc split from ExecuteModelCalc, panel and widget toolkit not loaded for batch runs (BatchRun_QAN)
+# Oct 18, 2026 - v11.52.12_QAN: fused runs with the other model scripts (Pipeline_QAN): RunStage split from RunModelCalc, benches opened by OpenBench
+# Oct 18, 2026 - v11.52.13_QAN: run profile (Profile_QAN, profileRun): time per bench and per phase (open, read, DESTC, each dilution traverse, noise reduction, DESTR, concentrates, store), blocks and peak memory
+# Oct 18, 2026 - v11.52.14_QAN: run journal (RunJournal_QAN): start and end record of each run; run log only appended to, "Failed!" written when the bench pass fails
+# Oct 18, 2026 - v11.52.15_QAN: outcome of the bench pass (BenchPool_QAN.BenchOutcome); a run with failed benches (model access error) raises BenchError after its bench pass, logged "Failed!" and journalled as failed
+# Oct 18, 2026 - v11.52.16_QAN: run log kept in memory for the run and appended in one locked write at its end, "Executed OK" or "Failed!"
+#                               (RunJournal_QAN.RunLog), so the lines of runs in parallel are not interleaved
+# Oct 18, 2026 - v11.52.17_QAN: BatchRun_QAN only imported when loaded by a batch run, not at MineSight start-up
+# Oct 18, 2026 - v11.52.18_QAN: VALB runs of an Aqqaluk model with milling options 4 to 6 (oxide and weathered ore, no VLTO/VLTW items) fail before the bench pass
+# Oct 18, 2026 - v11.52.19_QAN: run profile off by default (profileRun); blocks counted from the GEOL and PERLT values the bench calculation reads
+# Oct 18, 2026 - v11.52.20_QAN: one DESTC decision (AssignDESTC) for the DESTC assignment and the cutoff sweep
+# Oct 18, 2026 - v11.52.21_QAN: whole bench arrays read by SlabArray_QAN, shared with AMR; repeats of an array dilution traverse
+#                               test only the kernels next to the blocks changed by the repeat before
 #==============================================================================
 # Mill and mill feed option codes are:
 #  0 - LG stockpiled and std VALB {1-cutoff}(HG to mill; LG-N to LG SP; OX & WX to SPs)
@@ -227,6 +262,23 @@ DPScutoffMG_ar = [ 7.00, 7.50, 7.50, 7.50, 7.50, 7.50, 7.50, 7.50, 7.50,2.10,2.1
 # Qanaiyaq Weathered value realization
 maximizeWX = True      # if False then maximize Sulfide Mill feed; if True then maximize Weathered Mill feed, i.e. if a Bulk Concentrate gives a higher cash flow than Zinc & Lead Concentrates then make a Bulk Concentrate
 
+# cutoff sweep: instead of coding the model, summarise undiluted DESTC (tonnes, concentrates, grinding hours, $) by RESCL for each set of $/s cutoffs
+# in one read only pass; each deck is (DPScutoff, DPScutoffMG, DPScutoffLG), used as the panel cutoffs (stored cutoff arrays are not used)
+cutoffDecks = [] # empty list for a normal DEST run
+##cutoffDecks = [(dps, 7.00, 0.00) for dps in (0.00, 1.00, 2.00, 2.10, 3.00, 4.00, 6.00, 8.00, 10.00, 12.00)]
+cutoffSweepFile = "DEST_cutoff_sweep.csv" # summary table in model folder, one line per deck, DESTC and RESCL
+
+# VALB variants: in a VALB run, also calculate VALB for each (VALB function 1-3, milling option 0-6, VALB item) in the same pass over each bench
+# VALB functions and milling options are numbered as in the panel; the per block costs and NET values are calculated once for all variants
+valbVariants = [] # empty list for the panel VALB function and milling option only
+##valbVariants = [(1, 0, "VALB2"), (2, 0, "VALB3"), (3, 0, "VALB4"), (1, 6, "VALB5"), (2, 6, "VALB6"), (3, 6, "VALB7")] # Reserve, Resource and Blue Sky pits, sulphide only and with OX & WX mills
+
+# execution
+useArrayEngine = True # True: dilution traverses with whole bench array (NumPy) stencils if NumPy is available; False: block by block traverses
+patternCacheSize = 100000 # 3x3 DESTD kernels remembered by each noise reduction pattern cache (NoisePatterns), cleared when full
+benchWorkers = 1 # worker processes for benches: 1 runs in this process, 0 uses one per processor (see BenchPool_QAN)
+profileRun = False # time each bench and its phases, written to the run profile next to the run log (see Profile_QAN)
+
 #==============================================================================
 # Panel 1
 #==============================================================================
@@ -268,135 +320,1360 @@ NGPperiod = IntegerRTV(name="perFlag", value=0)
 PERLT_FUNCTIONS = ["0-no, apply to all blocks", "1-yes, apply only to unassigned periods", "2-yes, use prestored array of cutoffs (R&R change tracking)"]
 perFunction = IntegerRTV(name="perFunction")
 
-class DefineModelFile(GPanel):
-
-   def makewidgets(self):
-      self.makeFilePickers()
-      self.makeItems()
-      objsignal.listen(file15, "onChange()", self, self.onFile15Change)
-      self.onFile15Change(file15)
-      self.makeBenchSpinner()
-      self.makeDPSSpinner()
-      self.makeDPSMGSpinner()
-      self.makeDPSLGSpinner()
-      self.makeMillFlag()
-      self.makeVALBFlag()
-      self.makeDRFlag()
-      self.makeDDFlag()
-      self.makePeriodFlag()
-
-   def makeFilePickers(self):
-      grp = GGroup(self, text="Choose model file")
-      grp.pack(anchor=NW, pady=2, padx=2, ipadx = 2, ipady=2)
-      item15 = cmpsys.getpcf().filelistbytype(15)
-      cbs = GComboBox(grp.interior(), items=item15, rtv=file15)
-      lbls = GLabel(grp.interior(), text="Name of 3D block model:")
-      gtools.stdwidgetcolumns([lbls], [cbs])
-      self.remember([cbs])
-
-   def makeItems(self):
-      grp = GGroup(self, text="Get VALT from item")
-      grp.pack(side = 'top', anchor=W,pady=2, padx=2)
-      self.reqrtvs = ModelItems
-      self.reqcbs = gtools.makewidgets(grp.interior(), GComboBox, len(self.reqrtvs), list_rtv=self.reqrtvs)
-      lbls = gtools.makewidgets(grp.interior(), GLabel, len(ModelLabels), list_text=ModelLabels)
-      gtools.stdwidgetcolumns(lbls, self.reqcbs)
-      self.remember(self.reqcbs+lbls)
-
-   def onFile15Change(self, file15rtv):
-      if len(file15rtv.get())>1:  # make sure there is a model name
-         items = cmpsys.getpcf().itemlist(file15rtv.get())
-         for cb in (self.reqcbs):
-            cb.configure(items=items)
-
-   def makeBenchSpinner(self):
-      grp = GGroup(self, text="Lowest bench #")
-      grp.pack(side='top', anchor=W, pady=2, padx=2)
-      benchspin = GSpinner(grp.interior(), min = 1, max = 122, rtv = pickBench)
-      benchspin.pack(side='top', anchor=W, padx=15, pady=4)
-      self.remember([benchspin])
-
-   def makeDPSSpinner(self):
-      grp = GGroup(self, text="$/s cutoff for HG (mandatory)")
-      grp.pack(side='top', anchor=W, pady=2, padx=2)
-      DPSspin = GSpinner(grp.interior(), min = 0.0, max = 20.0, rtv = pickDPScutoff)
-      DPSspin.pack(side='top', anchor=W, padx=80, pady=4)
-      self.remember([DPSspin])
-
-   def makeDPSMGSpinner(self):
-      grp = GGroup(self, text="$/s cutoff for MG (optional)")
-      grp.pack(side='top', anchor=W, pady=2, padx=2)
-      DPSMGspin = GSpinner(grp.interior(), min = 0.0, max = 20.0, rtv = pickDPScutoffMG)
-      DPSMGspin.pack(side='top', anchor=W, padx=80, pady=4)
-      self.remember([DPSMGspin])
-
-   def makeDPSLGSpinner(self):
-      grp = GGroup(self, text="$/s cutoff for LG (optional)")
-      grp.pack(side='top', anchor=W, pady=2, padx=2)
-      DPSLGspin = GSpinner(grp.interior(), min = 0.0, max = 20.0, rtv = pickDPScutoffLG)
-      DPSLGspin.pack(side='top', anchor=W, padx=80, pady=4)
-      self.remember([DPSLGspin])
-
-   def makeMillFlag(self): # Assign milling destination(s) and mill feed materials
-      grp = GGroup(self, text="Mills and mill feeds")
-      grp.pack(side='top', anchor=W, pady=2, padx=2)
-      rbut = GRadio(grp.interior(), items=MILL_FUNCTIONS, rtv=millFunction)
-      rbut.pack(anchor=NW, padx=4, pady=4)
-      self.remember([rbut])
-
-   def makeVALBFlag(self): # Calculate block values for L-G pit design or not, and if so, base on M&I (Reserve pit), MI&I (Resource pit), or MII&B (Blue Sky pit)
-      grp = GGroup(self, text="VALB basis  (for use in MS-EP)")
-      grp.pack(side='top', anchor=W, pady=2, padx=2)
-      rbut = GRadio(grp.interior(), items=VALB_FUNCTIONS, rtv=valbFunction)
-      rbut.pack(anchor=NW, padx=4, pady=4)
-      self.remember([rbut])
-
-   def makeDRFlag(self): # Assigning DESTR based on requirement: diluted for published R&R, undiluted for R&R sensitivity analysis
-      grp = GGroup(self, text="Dilution (mills option 0 to 2)")
-      grp.pack(side='top', anchor=W, pady=2, padx=2)
-      rbut = GRadio(grp.interior(), items=DR_FUNCTIONS, rtv=drFunction)
-      rbut.pack(anchor=NW, padx=4, pady=4)
-      self.remember([rbut])
-
-   def makeDDFlag(self): # Assigning DESTD for HG & LG_N based on schedule requirement: LOM plan (all resource classes are OK) or R&R report plan (only M&I resource classes are OK)
-      grp = GGroup(self, text="RESCL filter applied to DESTx (mills option 0 to 2)")
-      grp.pack(side='top', anchor=W, pady=2, padx=2)
-      rbut = GRadio(grp.interior(), items=DD_FUNCTIONS, rtv=ddFunction)
-      rbut.pack(anchor=NW, padx=4, pady=4)
-      self.remember([rbut])
-
-   def makePeriodFlag(self):
-      grp = GGroup(self, text="Period filter? (mills option 0 to 2)")
-      grp.pack(side='top', anchor=W, pady=2, padx=2)
-      rbut = GRadio(grp.interior(), items=PERLT_FUNCTIONS, rtv=perFunction)
-      rbut.pack(anchor=NW, padx=4, pady=4)
-      self.remember([rbut])
+if not batchMode: # panel
+
+   class DefineModelFile(GPanel):
+
+      def makewidgets(self):
+         self.makeFilePickers()
+         self.makeItems()
+         objsignal.listen(file15, "onChange()", self, self.onFile15Change)
+         self.onFile15Change(file15)
+         self.makeBenchSpinner()
+         self.makeDPSSpinner()
+         self.makeDPSMGSpinner()
+         self.makeDPSLGSpinner()
+         self.makeMillFlag()
+         self.makeVALBFlag()
+         self.makeDRFlag()
+         self.makeDDFlag()
+         self.makePeriodFlag()
+
+      def makeFilePickers(self):
+         grp = GGroup(self, text="Choose model file")
+         grp.pack(anchor=NW, pady=2, padx=2, ipadx = 2, ipady=2)
+         item15 = cmpsys.getpcf().filelistbytype(15)
+         cbs = GComboBox(grp.interior(), items=item15, rtv=file15)
+         lbls = GLabel(grp.interior(), text="Name of 3D block model:")
+         gtools.stdwidgetcolumns([lbls], [cbs])
+         self.remember([cbs])
+
+      def makeItems(self):
+         grp = GGroup(self, text="Get VALT from item")
+         grp.pack(side = 'top', anchor=W,pady=2, padx=2)
+         self.reqrtvs = ModelItems
+         self.reqcbs = gtools.makewidgets(grp.interior(), GComboBox, len(self.reqrtvs), list_rtv=self.reqrtvs)
+         lbls = gtools.makewidgets(grp.interior(), GLabel, len(ModelLabels), list_text=ModelLabels)
+         gtools.stdwidgetcolumns(lbls, self.reqcbs)
+         self.remember(self.reqcbs+lbls)
+
+      def onFile15Change(self, file15rtv):
+         if len(file15rtv.get())>1:  # make sure there is a model name
+            items = cmpsys.getpcf().itemlist(file15rtv.get())
+            for cb in (self.reqcbs):
+               cb.configure(items=items)
+
+      def makeBenchSpinner(self):
+         grp = GGroup(self, text="Lowest bench #")
+         grp.pack(side='top', anchor=W, pady=2, padx=2)
+         benchspin = GSpinner(grp.interior(), min = 1, max = 122, rtv = pickBench)
+         benchspin.pack(side='top', anchor=W, padx=15, pady=4)
+         self.remember([benchspin])
+
+      def makeDPSSpinner(self):
+         grp = GGroup(self, text="$/s cutoff for HG (mandatory)")
+         grp.pack(side='top', anchor=W, pady=2, padx=2)
+         DPSspin = GSpinner(grp.interior(), min = 0.0, max = 20.0, rtv = pickDPScutoff)
+         DPSspin.pack(side='top', anchor=W, padx=80, pady=4)
+         self.remember([DPSspin])
+
+      def makeDPSMGSpinner(self):
+         grp = GGroup(self, text="$/s cutoff for MG (optional)")
+         grp.pack(side='top', anchor=W, pady=2, padx=2)
+         DPSMGspin = GSpinner(grp.interior(), min = 0.0, max = 20.0, rtv = pickDPScutoffMG)
+         DPSMGspin.pack(side='top', anchor=W, padx=80, pady=4)
+         self.remember([DPSMGspin])
+
+      def makeDPSLGSpinner(self):
+         grp = GGroup(self, text="$/s cutoff for LG (optional)")
+         grp.pack(side='top', anchor=W, pady=2, padx=2)
+         DPSLGspin = GSpinner(grp.interior(), min = 0.0, max = 20.0, rtv = pickDPScutoffLG)
+         DPSLGspin.pack(side='top', anchor=W, padx=80, pady=4)
+         self.remember([DPSLGspin])
+
+      def makeMillFlag(self): # Assign milling destination(s) and mill feed materials
+         grp = GGroup(self, text="Mills and mill feeds")
+         grp.pack(side='top', anchor=W, pady=2, padx=2)
+         rbut = GRadio(grp.interior(), items=MILL_FUNCTIONS, rtv=millFunction)
+         rbut.pack(anchor=NW, padx=4, pady=4)
+         self.remember([rbut])
+
+      def makeVALBFlag(self): # Calculate block values for L-G pit design or not, and if so, base on M&I (Reserve pit), MI&I (Resource pit), or MII&B (Blue Sky pit)
+         grp = GGroup(self, text="VALB basis  (for use in MS-EP)")
+         grp.pack(side='top', anchor=W, pady=2, padx=2)
+         rbut = GRadio(grp.interior(), items=VALB_FUNCTIONS, rtv=valbFunction)
+         rbut.pack(anchor=NW, padx=4, pady=4)
+         self.remember([rbut])
+
+      def makeDRFlag(self): # Assigning DESTR based on requirement: diluted for published R&R, undiluted for R&R sensitivity analysis
+         grp = GGroup(self, text="Dilution (mills option 0 to 2)")
+         grp.pack(side='top', anchor=W, pady=2, padx=2)
+         rbut = GRadio(grp.interior(), items=DR_FUNCTIONS, rtv=drFunction)
+         rbut.pack(anchor=NW, padx=4, pady=4)
+         self.remember([rbut])
+
+      def makeDDFlag(self): # Assigning DESTD for HG & LG_N based on schedule requirement: LOM plan (all resource classes are OK) or R&R report plan (only M&I resource classes are OK)
+         grp = GGroup(self, text="RESCL filter applied to DESTx (mills option 0 to 2)")
+         grp.pack(side='top', anchor=W, pady=2, padx=2)
+         rbut = GRadio(grp.interior(), items=DD_FUNCTIONS, rtv=ddFunction)
+         rbut.pack(anchor=NW, padx=4, pady=4)
+         self.remember([rbut])
+
+      def makePeriodFlag(self):
+         grp = GGroup(self, text="Period filter? (mills option 0 to 2)")
+         grp.pack(side='top', anchor=W, pady=2, padx=2)
+         rbut = GRadio(grp.interior(), items=PERLT_FUNCTIONS, rtv=perFunction)
+         rbut.pack(anchor=NW, padx=4, pady=4)
+         self.remember([rbut])
 
 #==============================================================================
 # Folder Layout
 #==============================================================================
 
-PANEL1 = "Model File Information"
-PROC_FOLDERS = GFolder("Model Operations",[GItem(PANEL1, DefineModelFile)])
+if not batchMode:
+   PANEL1 = "Model File Information"
+   PROC_FOLDERS = GFolder("Model Operations",[GItem(PANEL1, DefineModelFile)])
+
+#==============================================================================
+# Dilution Array Functions (whole bench)
+#==============================================================================
+
+# order of the dilution traverses in DestBench
+dilutionTraverses = ["OreTraverse_A","WasteTraverse_A","OreTraverse_B","WasteTraverse_B","OreTraverse_C","WasteTraverse_B","OreTraverse_C","OreTraverse_C"]
+
+# 3x3 kernel of every interior block (rows 1 to rows-2, columns 1 to cols-2) as nine shifted views of a bench array, in MTX order
+# 6 7 8
+# 3 4 5
+# 0 1 2
+def KernelViews(values):
+   rows, cols = values.shape
+   return [values[dr:rows-2+dr, dc:cols-2+dc] for dr in (0,1,2) for dc in (0,1,2)]
+
+# kernel blocks of the other material for a traverse: not sulphide mill HG (DESTC) for OreTraverse_A,
+# ore (DILFG 0 or 1) for the waste traverses, waste (DILFG 2 or 3) for the other ore traverses
+def OtherMaterial(traverse, values):
+   if traverse == "OreTraverse_A":
+      return values > HG
+   elif traverse[:5] == "Waste":
+      return values < 2
+   else:
+      return values > 1
+
+# change test of a traverse for all kernels at once, where s[i] is True if kernel block i is of the other material
+def KernelChange(traverse, s):
+   always = numpy.ones(s[4].shape, dtype=bool)
+   tests = [s[1] & s[3] & s[5] & s[7], # 4 side test
+            s[3] & s[1] & s[5],        # 3 side test-1 (bottom)
+            s[1] & s[3] & s[7],        # 3 side test-2 (left)
+            s[3] & s[7] & s[5],        # 3 side test-3 (top)
+            s[1] & s[5] & s[7],        # 3 side test-4 (right)
+            s[1] & s[7],               # 2 side test-1 (opposite, vertical)
+            s[3] & s[5]]               # 2 side test-2 (opposite, horizontal)
+   if traverse == "OreTraverse_C":
+      changes = [always, s[0] | s[2], s[0] | s[6], s[6] | s[8], s[2] | s[8], always, always]
+   elif traverse == "WasteTraverse_B":
+      changes = [always, always, always, always, always, s[3] | s[5], s[1] | s[7]]
+   else: # OreTraverse_A, WasteTraverse_A and OreTraverse_B
+      changes = [always, s[0] & s[2], s[0] & s[6], s[6] & s[8], s[2] & s[8], s[3] | s[5], s[1] | s[7]] # 2 side: line exceptions
+      if traverse == "OreTraverse_A":
+         changes[0] = numpy.sum([~s[0], ~s[2], ~s[6], ~s[8]], axis=0) < 3 # diagonal line exception
+   return numpy.select(tests, changes, False)
+
+# blocks 0 to 3 of a 3x3 kernel (dr, dc from its lower left block), those before the centre in the block by block traverse
+kernelBefore = [(0,0), (0,1), (0,2), (1,0)]
+# blocks 4 to 8 of a 3x3 kernel, the centre and those after it
+kernelAfter = [(1,1), (1,2), (2,0), (2,1), (2,2)]
+
+# one dilution traverse of a bench DILFG array (DESTC array for OreTraverse_A tests), returning the new DILFG array; active is False for
+# interior blocks skipped by the period filter. The block by block traverse changes DILFG in place, row by row, so each kernel sees the
+# new DILFG of the blocks before it (0 1 2 3) and the old DILFG of the blocks after it (5 6 7 8). All kernels are tested at once, then
+# the kernels with a block 0 to 3 changed by the last test are tested again, with blocks 0 to 3 from the last result, until no block
+# changes; every repeat settles at least the next block along any chain of changes, so the result is exactly that of the block by
+# block traverse. A chain of changes can take many repeats (up to 18 on random 200 x 300 benches), each only of the kernels next to it.
+def DilutionPass(traverse, dilfg, destc, active):
+   if traverse == "OreTraverse_A": # tests DESTC, not changed by the traverse, so no repeat
+      tested, newFlag = destc, 3
+      centre = KernelViews(destc)[4] <= HG
+   elif traverse == "WasteTraverse_A":
+      tested, newFlag = dilfg, 0
+      centre = KernelViews(dilfg)[4] > 1  # waste block, has value of 2 (or 3 if dilution modified)
+   elif traverse == "WasteTraverse_B":
+      tested, newFlag = dilfg, 0
+      centre = KernelViews(dilfg)[4] == 2 # original waste block only
+   else: # OreTraverse_B and OreTraverse_C
+      tested, newFlag = dilfg, 3
+      centre = KernelViews(dilfg)[4] == 1 # original ore blocks only
+   centre = centre & active
+   other = OtherMaterial(traverse, tested)
+   change = centre & KernelChange(traverse, KernelViews(other))
+   result = dilfg.copy()
+   result[1:-1, 1:-1][change] = newFlag
+   if tested is destc:
+      return result
+   rows, cols = dilfg.shape
+   (changedRows, changedCols) = numpy.nonzero(result != dilfg)
+   while len(changedRows) > 0:
+      # centres (bench row and column) of the kernels with a changed block 0 to 3: the row above a changed block and the block right of it
+      r = numpy.concatenate([changedRows + 1, changedRows + 1, changedRows + 1, changedRows])
+      c = numpy.concatenate([changedCols - 1, changedCols, changedCols + 1, changedCols + 1])
+      interior = (r >= 1) & (r <= rows-2) & (c >= 1) & (c <= cols-2)
+      kernels = numpy.unique(r[interior]*cols + c[interior])
+      (r, c) = (kernels // cols, kernels % cols)
+      s = [OtherMaterial(traverse, result[r-1+dr, c-1+dc]) for (dr, dc) in kernelBefore] + [other[r-1+dr, c-1+dc] for (dr, dc) in kernelAfter]
+      values = numpy.where(centre[r-1, c-1] & KernelChange(traverse, s), newFlag, dilfg[r, c])
+      changed = values != result[r, c]
+      result[r, c] = values
+      (changedRows, changedCols) = (r[changed], c[changed])
+   return result
+
+# DILFG based dilution of a bench by whole bench arrays, the same as the dilution traverses in DestBench; changed DILFG values are stored,
+# each traverse is a phase of the bench profile
+def DilutionArrays(slab, l, rows, cols, periodFilter, profile):
+   dilfg = SlabArray_QAN.SlabArray(slab, "DILFG", l, rows, cols)
+   destc = SlabArray_QAN.SlabArray(slab, "DESTC", l, rows, cols)
+   if periodFilter: # only blocks with PERLT < 1
+      active = KernelViews(SlabArray_QAN.SlabArray(slab, "PERLT", l, rows, cols))[4] < 1
+   else:
+      active = numpy.ones(KernelViews(dilfg)[4].shape, dtype=bool)
+   diluted = dilfg
+   for (n, traverse) in enumerate(dilutionTraverses):
+      diluted = DilutionPass(traverse, diluted, destc, active)
+      profile.Phase("dilution %d %s" % (n+1, traverse))
+   for (r, c) in zip(*numpy.nonzero(diluted != dilfg)):
+      slab["DILFG", l, r, c] = float(diluted[r, c])
+
+#==============================================================================
+# Noise Reduction Patterns
+#==============================================================================
+
+# codes counted for the most common code of a kernel, in order of preference for a tie (Cover waste is disregarded)
+mostCodes = [HG, LG_PR, LG_N, W_PR, W_N, W_CN, SP_OX, SP_WX]
+# codes changed by test #3 (Blocks in Corner)
+cornerCodes = [LG_N, LG_PR, W_PR, W_N, W_CN, W_CV, SP_OX, SP_WX]
+# DILFG code of a changed block for each test, as [sulphide ore replaced by sulphide ore, sulphide ore replaced by waste,
+#                                                  waste replaced by sulphide ore, waste replaced by waste]
+horseshoeFlags = [10, 7, 4, 13]
+parallelFlags = [11, 8, 5, 14]
+cornerFlags = [12, 9, 6, 15]
+
+# "salt & pepper" noise reduction decision for a 3x3 DESTD kernel (tuple in MTX order), all tests or only test #3 (Blocks in Corner)
+# returns None for no change, or (replacement DESTD, DILFG, blocks changed as (row, column) offsets from the centre)
+def NoiseDecision(MTX, cornersOnly):
+   if not cornersOnly:
+      # 1) check for semi-surrounding 5 blocks on a side, i.e. horseshoe shape
+      if MTX[1]!=MTX[4] and ((MTX[1]==MTX[0] and MTX[1]==MTX[3] and MTX[1]==MTX[6] and MTX[1]==MTX[7]) or (MTX[1]==MTX[2] and MTX[1]==MTX[5] and MTX[1]==MTX[8] and MTX[1]==MTX[7])): # left or right
+         return NoiseChange(horseshoeFlags, MTX[1], MTX[4], ((0,0),))
+      elif MTX[3]!=MTX[4] and ((MTX[3]==MTX[6] and MTX[3]==MTX[7] and MTX[3]==MTX[8] and MTX[3]==MTX[5]) or (MTX[3]==MTX[0] and MTX[3]==MTX[1] and MTX[3]==MTX[2] and MTX[3]==MTX[5])): # top or bottom
+         return NoiseChange(horseshoeFlags, MTX[3], MTX[4], ((0,0),))
+      # 2) check for 2 similar block parallel lines; Cover or Mill Feed materials are exceptions in coding
+      elif MTX[4]==MTX[5] and MTX[7]==MTX[8] and MTX[1]==MTX[2] and MTX[7]!=MTX[4] and MTX[1]!=MTX[4]:  # above and below (horizontal)
+         if MTX[7]==MTX[1] or MTX[1]==W_CV or MTX[1]==HG:  # same 2 blocks above and below or if bottom 2 blocks are Cover or Mill Feed
+            return NoiseChange(parallelFlags, MTX[7], MTX[4], ((0,0),(0,1)))
+         elif MTX[7]==W_CV or MTX[7]==HG:  # top 2 blocks are Cover or Mill Feed
+            return NoiseChange(parallelFlags, MTX[1], MTX[4], ((0,0),(0,1)))
+         else:
+            return NoiseChange(parallelFlags, min(MTX[1],MTX[7]), MTX[4], ((0,0),(0,1)))
+      elif MTX[4]==MTX[1] and MTX[3]==MTX[0] and MTX[5]==MTX[2] and MTX[3]!=MTX[4] and MTX[5]!=MTX[4]:  # left and right (vertical)
+         if MTX[3]==MTX[5] or MTX[5]==W_CV or MTX[5]==HG:  # same 2 blocks left and right or if right 2 blocks are Cover or Mill Feed
+            return NoiseChange(parallelFlags, MTX[3], MTX[4], ((0,0),(-1,0)))
+         elif MTX[3]==W_CV or MTX[3]==HG:  # left 2 blocks are Cover or Mill Feed
+            return NoiseChange(parallelFlags, MTX[5], MTX[4], ((0,0),(-1,0)))
+         else:  # pick lowest code of either side
+            return NoiseChange(parallelFlags, min(MTX[3],MTX[5]), MTX[4], ((0,0),(-1,0)))
+   # 3) check for contiguous 3 blocks in a corner; "Ore" and "Cover" materials are exceptions to coding
+   if MTX[4] not in cornerCodes: # includes Mill Feed blocks, not changed if in 3 block set
+      return None
+   if MTX[0]==MTX[3] and MTX[0]==MTX[1] and MTX[0]!=W_CV and MTX[0]!=HG:
+      cornerCode = MTX[0]
+   elif MTX[2]==MTX[1] and MTX[2]==MTX[5] and MTX[2]!=W_CV and MTX[2]!=HG:
+      cornerCode = MTX[2]
+   elif MTX[6]==MTX[3] and MTX[6]==MTX[7] and MTX[6]!=W_CV and MTX[6]!=HG:
+      cornerCode = MTX[6]
+   elif MTX[8]==MTX[5] and MTX[8]==MTX[7] and MTX[8]!=W_CV and MTX[8]!=HG:
+      cornerCode = MTX[8]
+   else:
+      cornerCode = 0
+   # find most common code, but disregard Cover waste
+   counts = [MTX.count(code) for code in mostCodes]
+   mostCode = mostCodes[counts.index(max(counts))]
+   # implement single or two block based change
+   centreCount = MTX.count(MTX[4])
+   if centreCount <= 2 or (centreCount == 3 and (MTX[0] == MTX[4] or MTX[2] == MTX[4] or MTX[6] == MTX[4] or MTX[8] == MTX[4])):
+      return NoiseChange(cornerFlags, max(mostCode,cornerCode), MTX[4], ((0,0),))
+   return None
+
+# noise reduction change of the centre block (and blocks) to replacement, with the DILFG code from the flags of the test
+def NoiseChange(flags, replacement, center, blocks):
+   if center <= LG_N: # sulphide ore being replaced
+      if replacement <= LG_N: # sulphide ore replaced by sulphide ore
+         return (replacement, flags[0], blocks)
+      else:                   # sulphide ore replaced by waste
+         return (replacement, flags[1], blocks)
+   else: # waste being replaced
+      if replacement <= LG_N: # waste replaced by sulphide ore
+         return (replacement, flags[2], blocks)
+      else:                   # waste replaced by waste
+         return (replacement, flags[3], blocks)
+
+# NoiseDecision memoised by kernel, as benches repeat a small number of kernels; the cache is cleared when it holds cacheSize kernels
+# hits and misses count the kernels found in and added to the cache
+class NoisePatterns(object):
+
+   def __init__(self, cornersOnly, cacheSize=patternCacheSize):
+      self.cornersOnly = cornersOnly
+      self.cacheSize = cacheSize
+      self.cache = {}
+      self.hits = 0
+      self.misses = 0
+
+   def Decide(self, kernel):
+      if kernel in self.cache:
+         self.hits += 1
+         return self.cache[kernel]
+      self.misses += 1
+      if len(self.cache) >= self.cacheSize:
+         self.cache.clear()
+      decision = NoiseDecision(kernel, self.cornersOnly)
+      self.cache[kernel] = decision
+      return decision
+
+# noise reduction pattern caches for all tests and for the repeat of test #3, shared by the benches run in a process
+noisePatterns = NoisePatterns(False)
+cornerPatterns = NoisePatterns(True)
 
 #==============================================================================
 # Execution Functions
 #==============================================================================
 
+# undiluted DESTC of a block and its $/s value (as stored in VALSx) for one set of cutoffs, with the MG possibility flag (MG blocks are
+# coded after dilution); VALS_OX and VALS_WX are None if not calculated (not Qanaiyaq, or Oxide High Pb-Ag for VALS_WX); the DESTC
+# assignment of DestBench and the cutoff sweep (DestSweepBench) both decide by it
+def AssignDESTC(isQanaiyaq, millingOption, DPScutoff, DPScutoffMG, DPScutoffLG, VALS, VALS_RH, VALS_OX, VALS_WX, WARDC, STFE, STBA):
+   VALS_value = VALS # default for all sulfide materials (adjustment for LG-N as rehandle is included for that material)
+   if VALS >= DPScutoff or ((millingOption == 1 or millingOption == 2) and VALS >= DPScutoffMG) or (not isQanaiyaq and millingOption == 2 and VALS >= DPScutoffLG and WARDC <= 0): # HG or MG or LG-PR in Aqqaluk
+      workDESTC = HG
+      isMGO = not isQanaiyaq and VALS < DPScutoff and VALS >= DPScutoffMG and STFE < 14 and STBA < 9 # modify MGO based on histograms of MGO stockpile in LOM (9% Ba gives 85% of tonnage, 14% Fe gives 91% of tonnage)
+   else:
+      isMGO = False
+      if VALS_RH >= 0:
+         if WARDC > 0:
+            workDESTC = LG_N
+            VALS_value = VALS_RH # including rehandle cost
+         else: # LG-PR not otherwise allocated
+            workDESTC = LG_PR
+      elif WARDC <= 0:
+         workDESTC = W_PR
+      elif WARDC <= 1:
+         workDESTC = W_N
+      elif WARDC <= 2:
+         workDESTC = W_CN
+      else: # WARDC <= 3:
+         workDESTC = W_CV
+   # if Qanaiyaq deposit then check for possible High Lead Oxide and Weathered High Copper materials
+   if isQanaiyaq:
+      if VALS_OX >= 0: # then assign to 8-Oxide High Pb-Ag directly as no overlap with regular Sulfide Mill feed
+         workDESTC = SP_OX
+         VALS_value = VALS_OX # includes rehandle cost
+      elif VALS_WX >= 0: # then possiblity exists to assign 9-Weathered High Zn-Cu
+         # NOTE: WX is about 50/50 PR/N, but stockpiling both Possibly Reactive and Non-reactive material.  Would need to include WARDC if filtering by PR/N...
+         makeWX = workDESTC >= LG_PR and workDESTC <= W_N # default: transfer to Weathered Milling if Sulfide Milling does not provide a positive cash flow
+         if maximizeWX: # then additionally transfer to Weathered if provides a higher cash flow than Sulfide Milling
+            makeWX = makeWX or (workDESTC == LG_N and VALS_WX > VALS_RH) or ((workDESTC <= HG or workDESTC >= MG_N) and VALS_WX > VALS)
+         if makeWX:
+            workDESTC = SP_WX
+            VALS_value = VALS_WX # includes rehandle cost
+   return workDESTC, VALS_value, isMGO
+
+# open, calculate and store one bench (b), returning its (message, logged) pairs; called directly or in a BenchPool worker process
+# dilution and noise reduction only use blocks of the same bench, so benches are independent
+# a VALB run stores VALB for each (VALBtype, millingOption, VALB item) of valbRuns, the first being the panel VALBtype, millingOption and VALBitem
+# the bench profile (Profile_QAN) is returned with the messages, None if not profiled
+def DestBench(pcfpath, modelFile, b, minRow, maxRow, minColumn, maxColumn, itemlist, blockVolume, isQanaiyaq, VALTitem, VALSitem, VALBitem, VLTOitem, VLTWitem,
+              millingOption, DPScutoff, DPScutoffMG, DPScutoffLG, DESTRdiluted, DESTname, VALBtype, filterDEST, filter_by_period, filter_by_period_ar, valbRuns, profiled):
+   benchMessages = [("  Opening and updating Bench: %2d" % (b), False)]
+   profile = Profile_QAN.BenchProfile(b, profiled)
+   try:
+      m = Pipeline_QAN.OpenBench(pcfpath, modelFile, b, minRow, maxRow, minColumn, maxColumn, itemlist)
+   except model.ModelError, e:
+      benchMessages.append(("Model Access Error: "+str(e)+"\n", True))
+      benchMessages.append(("Failed\n", True))
+   else:
+      profile.Phase("open")
+      if m != None:
+         slab = m.slab()
+         cols, rows = slab.maxcolumn(), slab.maxrow()
+         l = 0
+         profile.Phase("read")
+         airBlocks, periodBlocks = 0, 0
+         if VALBtype > 1: # a VALB calculation run only
+            # == VALB assignment ==
+            # traverse the slab, get values, calculate, and set the new values
+            # note that array implementation of cutoffs by year is not incorporated into VALB calculation as VALB is independant of the year
+            # L-G calculation only based on undiluted blocks as one can not start a "cone" on a diluted waste block
+            # costs and NET values are calculated once per block for all VALB runs (RESCL basis and milling option)
+            secondaryMill = isQanaiyaq and max([runMilling for (runVALBtype, runMilling, runVALBitem) in valbRuns]) >= 4
+            for r in xrange(rows):
+               for c in xrange(cols):
+                  GEOL = slab["GEOL", l, r, c]
+                  if GEOL > Air: # not air
+                     # grab values
+                     d = int(slab["DEP", l, r, c] - 1) # array index starts at 0
+                     WARDC = slab["WARDC", l, r, c]
+                     ODENM = slab["ODENM", l, r, c]
+                     RESCL = slab["RESCL", l, r, c]
+                     MPT = slab["MPT", l, r, c]     # min/t
+                     TPH = 60.0/MPT                 # t/hr
+                     SEsag = slab["SESAG", l, r, c]
+                     SEbm = slab["SEBM", l, r, c]
+                     AMR = slab[VALTitem, l, r, c]
+                     STZN = slab["STZN", l, r, c]
+                     ZNREC = slab["ZNREC", l, r, c]
+                     ZNGRD = slab["ZNGRD", l, r, c]
+                     STPB = slab["STPB", l, r, c]
+                     PBREC = slab["PBREC", l, r, c]
+                     PBGRD = slab["PBGRD", l, r, c]
+
+                     # calculate operating cost escalators and base operating cost ($/t)
+                     powerEsc = (SEsag + SEbm - averagePower) * powerCost  # grinding power cost escalator, (+) is increased cost
+                     throughputEsc = comminutionCost[d]*(averageTPH[d]/TPH - 1)  # throughput rate cost escalator, (+) is increased cost
+                     haulEsc = max((haulIncrBench[d] - b) * -haulIncrLU, (haulIncrBench[d] - b) * haulIncrLD)  # haulage cost adjustment above/below median bench (either direction an increase); (+) is increased cost
+                     OpCost_mill_noTails = haulEsc + (mill_cost[d] + powerEsc + throughputEsc) + indirect_cost/TPH
+
+                     # calculate Sulphide operating cost and Mill cutoff ($/t)
+                     Concentrate = (STZN * ZNREC / ZNGRD + STPB * PBREC / PBGRD)/100.0
+                     tails_cost = (1.0 - Concentrate) * tailsCostPerTonne
+                     OpCost_mill_SU = OpCost_mill_noTails + tails_cost
+                     MillCO_SU = OpCost_mill_SU + mine_ore_cost[d] - mine_waste_cost[d]
+                     VALS_block = (AMR - MillCO_SU) / MPT /60  # $/sec for block, for millingOption = 3
+                     VALS_block_LG = VALS_block - rehandle_cost / MPT /60  # $/sec for block for stockpile material
+                     NET_SU = AMR - OpCost_mill_SU - mine_ore_cost[d]
+
+                     # additional calculations if secondary mill available for High Pb Oxide and/or Weathered High Cu, thus added value of these ores used in pit generation
+                     if secondaryMill:
+                        # 1) High Lead Oxide
+                        AMR_OX = slab[VLTOitem, l, r, c]
+                        PBROX = slab["PBROX", l, r, c]
+                        PBGOX = slab["PBGOX", l, r, c]
+                        # calculate tailings tonnage and cost
+                        Concentrate = (STPB * PBROX / PBGOX)/100.0
+                        tails_cost = (1.0 - Concentrate) * tailsCostPerTonne
+                        # calculate Oxide operating cost and and Mill cutoff ($/t)
+                        OpCost_mill_OX = OpCost_mill_noTails + tails_cost + rehandle_cost + mill_oxide
+                        MillCO_OX = OpCost_mill_OX + mine_ore_cost[d] - mine_waste_cost[d]
+                        NET_OX = AMR_OX - OpCost_mill_OX - mine_ore_cost[d]
+
+                        # 2) Weathered High Copper
+                        AMR_WX = slab[VLTWitem, l, r, c]
+                        ZNRWX = slab["ZNRWX", l, r, c]
+                        ZNGWX = slab["ZNGWX", l, r, c]
+                        # calculate tailings tonnage and cost
+                        Concentrate = (STZN * ZNRWX / ZNGWX)/100.0 # Zn basis for Bulk Conc
+                        tails_cost = (1 - Concentrate) * tailsCostPerTonne
+                        # calculate Weathered operating cost and Mill cutoff ($/t)
+                        OpCost_mill_WX = OpCost_mill_noTails + tails_cost + rehandle_cost
+                        MillCO_WX = OpCost_mill_WX + mine_ore_cost[d] - mine_waste_cost[d]
+                        NET_WX = AMR_WX - OpCost_mill_WX - mine_ore_cost[d]
+
+                     for (runVALBtype, runMilling, runVALBitem) in valbRuns:
+                        if runMilling != 3:  # normally this case would be for millingOption=0, i.e. conventional breakeven cutoff
+                           block_is_HGore = RESCL <= runVALBtype and AMR >= MillCO_SU
+                           block_is_LGore = False
+                        else: # millingOption = 3, use HG c/o as threshold
+                           block_is_HGore = RESCL <= runVALBtype and VALS_block >= DPScutoff
+                           if block_is_HGore:
+                              block_is_LGore = False
+                           else:
+                              block_is_LGore = RESCL <= runVALBtype and VALS_block_LG >= 0 and WARDC > 0  # only non-reactive is stockpiled for eventual recovery
+
+                        if block_is_HGore:
+                           workVALB = NET_SU * blockVolume * ODENM
+                        elif block_is_LGore:
+                           workVALB = 0.70 * (NET_SU - rehandle_cost) * blockVolume * ODENM  # discount value to 70% due to delayed realization of value from stockpiling (10 years to reclaim, so 5 years for mid-point of reclaim, at 8% discount) = 1/1.08^5 = 68%
+                        else:
+                           workVALB = -(mine_waste_cost[d] + haulEsc) * blockVolume * ODENM
+
+                        # revise VALB block value if higher value threshold met
+                        if isQanaiyaq and runMilling >= 4:
+                           if runMilling == 4 or runMilling == 6:
+                              if RESCL <= runVALBtype and NET_OX > 0 and (NET_OX > NET_SU):
+                                 workVALB = NET_OX * blockVolume * ODENM
+                           if runMilling >= 5: # i.e. 5 or 6
+                              if RESCL <= runVALBtype and NET_WX > 0 and (NET_WX > NET_SU):
+                                 workVALB = NET_WX * blockVolume * ODENM
+
+                        # store resulting VALB value
+                        slab[runVALBitem, l, r, c] = workVALB
+                  else: # in air, so just store "no value"
+                     airBlocks += 1
+                     for (runVALBtype, runMilling, runVALBitem) in valbRuns:
+                        slab[runVALBitem, l, r, c] = 0.0
+            # == end of VALB assignment ==
+            profile.CountBlocks(rows*cols, airBlocks)
+            profile.Phase("VALB")
+         else:  # not a VALB calculation run
+            # == DESTC assignment ==
+            # traverse the slab, get values, calculate, and set the new values
+            for r in xrange(rows):
+               for c in xrange(cols):
+                  if filter_by_period:
+                     PERLT = int(slab["PERLT", l, r, c])
+                     if filter_by_period_ar: # use stored array value
+                        DPScutoff = DPScutoff_ar[PERLT]
+                        DPScutoffMG = DPScutoffMG_ar[PERLT]
+                        DPScutoffLG = DPScutoffMG
+                        run_calcs = True
+                     else: # run with entered cutoff(s) if year not set
+                        run_calcs = PERLT < 1
+                        if not run_calcs:
+                           periodBlocks += 1
+                  else: # run with entered cutoff(s) on all blocks
+                     run_calcs = True
+
+                  if run_calcs:
+                     GEOL = slab["GEOL", l, r, c]
+                     if GEOL > Air:
+                        # grab values
+                        d = int(slab["DEP", l, r, c] - 1) # array index starts at 0
+                        WARDC = slab["WARDC", l, r, c]
+                        MPT = slab["MPT", l, r, c] # min/t
+                        TPH = 60.0/MPT             # t/hr
+                        TPS = 1.0 / (MPT * 60.0)   # t/sec
+                        SEsag = slab["SESAG", l, r, c]
+                        SEbm = slab["SEBM", l, r, c]
+                        AMR = slab[VALTitem, l, r, c]
+                        STZN = slab["STZN", l, r, c]
+                        ZNREC = slab["ZNREC", l, r, c]
+                        ZNGRD = slab["ZNGRD", l, r, c]
+                        STPB = slab["STPB", l, r, c]
+                        PBREC = slab["PBREC", l, r, c]
+                        PBGRD = slab["PBGRD", l, r, c]
+                        STFE = slab["STFE", l, r, c]
+                        STBA = slab["STBA", l, r, c]
+
+                        # calculate operating cost escalators and base operating cost ($/t)
+                        powerEsc = (SEsag + SEbm - averagePower) * powerCost  # grinding power cost escalator, (+) is increased cost
+                        throughputEsc = comminutionCost[d]*(averageTPH[d]/TPH - 1)  # throughput rate cost escalator, (+) is increased cost
+                        haulEsc = max((haulIncrBench[d] - b) * -haulIncrLU, (haulIncrBench[d] - b) * haulIncrLD)  # haulage cost adjustment above/below median bench (either direction an increase); (+) is increased cost; technically should not be included in $/s calc, but not large and easier to compute here than in MSSO
+                        OpCost_mill_noTails = haulEsc + (mill_cost[d] + powerEsc + throughputEsc) + indirect_cost/TPH
+
+                        # calculate Sulphide operating cost and Mill cutoff ($/t)
+                        Concentrate = (STZN * ZNREC / ZNGRD + STPB * PBREC / PBGRD)/100.0
+                        tails_cost = (1 - Concentrate) * tailsCostPerTonne
+                        OpCost_mill_SU = OpCost_mill_noTails + tails_cost
+                        MillCO_SU = OpCost_mill_SU + mine_ore_cost[d] - mine_waste_cost[d]
+
+                        # calculate $/s
+                        VALS = (AMR - MillCO_SU) * TPS  # $/sec for block for direct mill feed
+                        VALS_RH = VALS - rehandle_cost * TPS  # $/sec for block for stockpiled LG as includes rehandle
+
+                        # if Qanaiyaq deposit then calculate $/s for possible High Lead Oxide and Weathered High Copper materials
+                        VALS_OX, VALS_WX = None, None
+                        if isQanaiyaq:
+                           # 1) Oxide High Lead-Silver
+                           AMR_OX = slab[VLTOitem, l, r, c]
+                           PBROX = slab["PBROX", l, r, c]
+                           PBGOX = slab["PBGOX", l, r, c]
+                           # calculate tailings tonnage and cost
+                           Concentrate = (STPB * PBROX / PBGOX)/100.0
+                           tails_cost = (1 - Concentrate) * tailsCostPerTonne
+                           # calculate Oxide operating cost and and Mill cutoff ($/t), include rehandle cost as assume majority will be stockpiled due to: a) small mill size or b) end-of-life milling
+                           OpCost_mill_OX = OpCost_mill_noTails + tails_cost + rehandle_cost + mill_oxide
+                           MillCO_OX = OpCost_mill_OX + mine_ore_cost[d] - mine_waste_cost[d]
+                           # calculate $/s
+                           VALS_OX = (AMR_OX - MillCO_OX) * TPS
+                           if VALS_OX < 0: # not Oxide High Pb-Ag
+                              # 2) Weathered High Zinc-Copper
+                              AMR_WX = slab[VLTWitem, l, r, c]
+                              ZNRWX = slab["ZNRWX", l, r, c]
+                              ZNGWX = slab["ZNGWX", l, r, c]
+                              # calculate tailings tonnage and cost
+                              Concentrate = (STZN * ZNRWX / ZNGWX)/100.0 # Zn basis for Bulk Conc
+                              tails_cost = (1 - Concentrate) * tailsCostPerTonne
+                              # calculate Weathered operating cost and Mill cutoff ($/t), include rehandle cost as assume majority will be stockpiled due to: a) small mill size or b) end-of-life milling
+                              OpCost_mill_WX = OpCost_mill_noTails + tails_cost + rehandle_cost
+                              MillCO_WX = OpCost_mill_WX + mine_ore_cost[d] - mine_waste_cost[d]
+                              # calculate $/s
+                              VALS_WX = (AMR_WX - MillCO_WX) * TPS
+
+                        # assign DESTC and the VALS and OPCST values of its material (check Panel 1 constants for millingOption definitions)
+                        workDESTC, VALS_value, isMGO = AssignDESTC(isQanaiyaq, millingOption, DPScutoff, DPScutoffMG, DPScutoffLG, VALS, VALS_RH, VALS_OX, VALS_WX, WARDC, STFE, STBA)
+                        if workDESTC == SP_OX: # includes rehandle cost
+                           OPCST_value = OpCost_mill_OX
+                        elif workDESTC == SP_WX: # includes rehandle cost
+                           OPCST_value = OpCost_mill_WX
+                           # ensure MET set to Weathered High Zinc-Copper, thus QWXFG and WXFG also set
+                           slab["MET", l, r, c] = 4
+                           slab["QWXFG", l, r, c] = 1
+                           slab["WXFG", l, r, c] = 1
+                        elif workDESTC == LG_N: # including rehandle cost
+                           OPCST_value = OpCost_mill_SU + rehandle_cost
+                        else: # default for all sulfide materials
+                           OPCST_value = OpCost_mill_SU
+
+                        # set DESTC, VALS, and OPCST items
+                        slab["DESTC", l, r, c] = workDESTC
+                        slab[VALSitem, l, r, c] = VALS_value   # this is adjusted at end if destination later reclassified due to dilution
+                        slab["OPCST", l, r, c] = OPCST_value   # this is adjusted at end if destination later reclassified due to dilution
+                        slab["FLAG2", l, r, c] = isMGO   # used temporarily as boolean for MG possibility flag
+
+                        # for dilution steps, fill DESTD and DILFG with initial values
+                        slab["DESTD", l, r, c] = workDESTC
+                        if workDESTC <= HG: # set dilution flag =1 only for sulphide mill HG feed
+                           slab["DILFG", l, r, c] = 1
+                        else:
+                           slab["DILFG", l, r, c] = 2
+                     else: # in air
+                        airBlocks += 1
+                        slab[VALSitem, l, r, c] = 0.0
+                        slab["OPCST", l, r, c] = 0.0
+                        slab["DESTC", l, r, c] = W_N
+                        slab["DESTD", l, r, c] = W_N
+                        slab["DILFG", l, r, c] = 2 # not mill feed
+            # == end of DESTC assignment ==
+            profile.CountBlocks(rows*cols, airBlocks, periodBlocks)
+            profile.Phase("DESTC")
+
+            # == DILFG based dilution process (only on HG) ==
+            # -- subroutine definitions --
+            def WasteTraverse_A():
+            # 8-value traverse of the REVISED truncated slab for WASTE diluted to sulphide mill HG ORE
+               for r in xrange(1,rows-1):
+                  for c in xrange(1,cols-1):
+                     if filter_by_period and not filter_by_period_ar:
+                        PERLT = int(slab["PERLT", l, r, c])
+                        run_calcs = PERLT < 1
+                     else:
+                        run_calcs = True
+                     if run_calcs:
+                        # grab working copies of 3x3 area
+                        # 6 7 8
+                        # 3 4 5
+                        # 0 1 2
+                        MTX[4] = slab["DILFG", l, r, c]
+                        if MTX[4] > 1:  # waste block, has value of 2 (or 3 if dilution modified)
+                           MTX[0] = slab["DILFG", l, r-1, c-1]
+                           MTX[1] = slab["DILFG", l, r-1, c]
+                           MTX[2] = slab["DILFG", l, r-1, c+1]
+                           MTX[3] = slab["DILFG", l, r, c-1]
+                           MTX[5] = slab["DILFG", l, r, c+1]
+                           MTX[6] = slab["DILFG", l, r+1, c-1]
+                           MTX[7] = slab["DILFG", l, r+1, c]
+                           MTX[8] = slab["DILFG", l, r+1, c+1]
+                           if MTX[1] < 2 and MTX[3] < 2 and MTX[5] < 2 and MTX[7] < 2:  # 4 side test
+                              change = True
+                           elif MTX[3] < 2 and MTX[1] < 2 and MTX[5] < 2:  # 3 side test-1 (bottom)
+                              change = MTX[0] < 2 and MTX[2] < 2
+                           elif MTX[1] < 2 and MTX[3] < 2 and MTX[7] < 2:  # 3 side test-2 (left)
+                              change = MTX[0] < 2 and MTX[6] < 2
+                           elif MTX[3] < 2 and MTX[7] < 2 and MTX[5] < 2:  # 3 side test-3 (top)
+                              change = MTX[6] < 2 and MTX[8] < 2
+                           elif MTX[1] < 2 and MTX[5] < 2 and MTX[7] < 2:  # 3 side test-4 (right)
+                              change = MTX[2] < 2 and MTX[8] < 2
+                           elif MTX[1] < 2 and MTX[7] < 2:                 # 2 side test-1 (opposite, vertical)
+                              change = not(MTX[3] > 1 and MTX[5] > 1) # horizontal line exception
+                           elif MTX[3] < 2 and MTX[5] < 2:                 # 2 side test-2 (opposite, horizontal)
+                              change = not(MTX[1] > 1 and MTX[7] > 1) # vertical line exception
+                           else:
+                              change = False
+                           if change:
+                              slab["DILFG", l, r, c] = 0
+
+            def WasteTraverse_B():
+            # 4-value traverse of the REVISED truncated slab for WASTE diluted to sulphide mill HG ORE
+               for r in xrange(1,rows-1):
+                  for c in xrange(1,cols-1):
+                     if filter_by_period and not filter_by_period_ar:
+                        PERLT = int(slab["PERLT", l, r, c])
+                        run_calcs = PERLT < 1
+                     else:
+                        run_calcs = True
+                     if run_calcs:
+                        # grab working copies of 3x3 area
+                        # 6 7 8
+                        # 3 4 5
+                        # 0 1 2
+                        MTX[4] = slab["DILFG", l, r, c]
+                        if MTX[4] == 2:  # original waste block only
+                           MTX[1] = slab["DILFG", l, r-1, c]
+                           MTX[3] = slab["DILFG", l, r, c-1]
+                           MTX[5] = slab["DILFG", l, r, c+1]
+                           MTX[7] = slab["DILFG", l, r+1, c]
+                           if MTX[1] < 2 and MTX[3] < 2 and MTX[5] < 2 and MTX[7] < 2:  # 4 side test
+                              change = True
+                           elif MTX[3] < 2 and MTX[1] < 2 and MTX[5] < 2:  # 3 side test-1 (bottom)
+                              change = True
+                           elif MTX[1] < 2 and MTX[3] < 2 and MTX[7] < 2:  # 3 side test-2 (left)
+                              change = True
+                           elif MTX[3] < 2 and MTX[7] < 2 and MTX[5] < 2:  # 3 side test-3 (top)
+                              change = True
+                           elif MTX[1] < 2 and MTX[5] < 2 and MTX[7] < 2:  # 3 side test-4 (right)
+                              change = True
+                           elif MTX[1] < 2 and MTX[7] < 2:                 # 2 side test-1 (opposite, vertical)
+                              change = not(MTX[3] > 1 and MTX[5] > 1) # horizontal line exception
+                           elif MTX[3] < 2 and MTX[5] < 2:                 # 2 side test-2 (opposite, horizontal)
+                              change = not(MTX[1] > 1 and MTX[7] > 1) # vertical line exception
+                           else:
+                              change = False
+                           if change:
+                              slab["DILFG", l, r, c] = 0
+
+            def OreTraverse_A():
+            # 8-value traverse of the truncated slab for sulphide mill HG ORE diluted to WASTE
+               for r in xrange(1,rows-1):
+                  for c in xrange(1,cols-1):
+                     if filter_by_period and not filter_by_period_ar:
+                        PERLT = int(slab["PERLT", l, r, c])
+                        run_calcs = PERLT < 1
+                     else:
+                        run_calcs = True
+                     if run_calcs:
+                        # grab working copies of 3x3 area
+                        # 6 7 8
+                        # 3 4 5
+                        # 0 1 2
+                        MTX[4] = slab["DESTC", l, r, c]
+                        if MTX[4] <= HG:
+                           MTX[0] = slab["DESTC", l, r-1, c-1]
+                           MTX[1] = slab["DESTC", l, r-1, c]
+                           MTX[2] = slab["DESTC", l, r-1, c+1]
+                           MTX[3] = slab["DESTC", l, r, c-1]
+                           MTX[5] = slab["DESTC", l, r, c+1]
+                           MTX[6] = slab["DESTC", l, r+1, c-1]
+                           MTX[7] = slab["DESTC", l, r+1, c]
+                           MTX[8] = slab["DESTC", l, r+1, c+1]
+                           if MTX[1] > HG and MTX[3] > HG and MTX[5] > HG and MTX[7] > HG:  # 4 side test
+                              change = ((MTX[0] <= HG) + (MTX[2] <= HG) + (MTX[6] <= HG) + (MTX[8] <= HG)) < 3 # diagonal line exception
+                           elif MTX[3] > HG and MTX[1] > HG and MTX[5] > HG:  # 3 side test-1 (bottom)
+                              change = MTX[0] > HG and MTX[2] > HG
+                           elif MTX[1] > HG and MTX[3] > HG and MTX[7] > HG:  # 3 side test-2 (left)
+                              change = MTX[0] > HG and MTX[6] > HG
+                           elif MTX[3] > HG and MTX[7] > HG and MTX[5] > HG:  # 3 side test-3 (top)
+                              change = MTX[6] > HG and MTX[8] > HG
+                           elif MTX[1] > HG and MTX[5] > HG and MTX[7] > HG:  # 3 side test-4 (right)
+                              change = MTX[2] > HG and MTX[8] > HG
+                           elif MTX[1] > HG and MTX[7] > HG:                  # 2 side test-1 (opposite, vertical)
+                              change = not(MTX[3] <= HG and MTX[5] <= HG) # horizontal line exception
+                           elif MTX[3] > HG and MTX[5] > HG:                  # 2 side test-2 (opposite, horizontal)
+                              change = not(MTX[1] <= HG and MTX[7] <= HG) # vertical line exception
+                           else:
+                              change = False
+                           if change:
+                              slab["DILFG", l, r, c] = 3
+
+            def OreTraverse_B():
+            # 8-value traverse of the REVISED truncated slab for sulphide mill HG ORE diluted to WASTE
+               for r in xrange(1,rows-1):
+                  for c in xrange(1,cols-1):
+                     if filter_by_period and not filter_by_period_ar:
+                        PERLT = int(slab["PERLT", l, r, c])
+                        run_calcs = PERLT < 1
+                     else:
+                        run_calcs = True
+                     if run_calcs:
+                        # grab working copies of 3x3 area
+                        # 6 7 8
+                        # 3 4 5
+                        # 0 1 2
+                        MTX[4] = slab["DILFG", l, r, c]
+                        if MTX[4] == 1: # original ore blocks only
+                           MTX[0] = slab["DILFG", l, r-1, c-1]
+                           MTX[1] = slab["DILFG", l, r-1, c]
+                           MTX[2] = slab["DILFG", l, r-1, c+1]
+                           MTX[3] = slab["DILFG", l, r, c-1]
+                           MTX[5] = slab["DILFG", l, r, c+1]
+                           MTX[6] = slab["DILFG", l, r+1, c-1]
+                           MTX[7] = slab["DILFG", l, r+1, c]
+                           MTX[8] = slab["DILFG", l, r+1, c+1]
+                           if MTX[1] > 1 and MTX[3] > 1 and MTX[5] > 1 and MTX[7] > 1:  # 4 side test
+                              change = True
+                           elif MTX[3] > 1 and MTX[1] > 1 and MTX[5] > 1:  # 3 side test-1 (bottom)
+                              change = MTX[0] > 1 and MTX[2] > 1
+                           elif MTX[1] > 1 and MTX[3] > 1 and MTX[7] > 1:  # 3 side test-2 (left)
+                              change = MTX[0] > 1 and MTX[6] > 1
+                           elif MTX[3] > 1 and MTX[7] > 1 and MTX[5] > 1:  # 3 side test-3 (top)
+                              change = MTX[6] > 1 and MTX[8] > 1
+                           elif MTX[1] > 1 and MTX[5] > 1 and MTX[7] > 1:  # 3 side test-4 (right)
+                              change = MTX[2] > 1 and MTX[8] > 1
+                           elif MTX[1] > 1 and MTX[7] > 1:                 # 2 side test-1 (opposite, vertical)
+                              change = not(MTX[3] < 2 and MTX[5] < 2) # horizontal line exception
+                           elif MTX[3] > 1 and MTX[5] > 1:                 # 2 side test-2 (opposite, horizontal)
+                              change = not(MTX[1] < 2 and MTX[7] < 2) # vertical line exception
+                           else:
+                              change = False
+                           if change:
+                              slab["DILFG", l, r, c] = 3
+
+            def OreTraverse_C():
+            # 8-value traverse of the REVISED truncated slab for sulphide mill HG ORE diluted to WASTE
+               for r in xrange(1,rows-1):
+                  for c in xrange(1,cols-1):
+                     if filter_by_period and not filter_by_period_ar:
+                        PERLT = int(slab["PERLT", l, r, c])
+                        run_calcs = PERLT < 1
+                     else:
+                        run_calcs = True
+                     if run_calcs:
+                        # grab working copies of 3x3 area
+                        # 6 7 8
+                        # 3 4 5
+                        # 0 1 2
+                        MTX[4] = slab["DILFG", l, r, c]
+                        if MTX[4] == 1:  # original ore blocks only
+                           MTX[0] = slab["DILFG", l, r-1, c-1]
+                           MTX[1] = slab["DILFG", l, r-1, c]
+                           MTX[2] = slab["DILFG", l, r-1, c+1]
+                           MTX[3] = slab["DILFG", l, r, c-1]
+                           MTX[5] = slab["DILFG", l, r, c+1]
+                           MTX[6] = slab["DILFG", l, r+1, c-1]
+                           MTX[7] = slab["DILFG", l, r+1, c]
+                           MTX[8] = slab["DILFG", l, r+1, c+1]
+                           if MTX[1] > 1 and MTX[3] > 1 and MTX[5] > 1 and MTX[7] > 1:  # 4 side test
+                              change = True
+                           elif MTX[3] > 1 and MTX[1] > 1 and MTX[5] > 1:  # 3 side test-1 (bottom)
+                              change = MTX[0] > 1 or MTX[2] > 1
+                           elif MTX[1] > 1 and MTX[3] > 1 and MTX[7] > 1:  # 3 side test-2 (left)
+                              change = MTX[0] > 1 or MTX[6] > 1
+                           elif MTX[3] > 1 and MTX[7] > 1 and MTX[5] > 1:  # 3 side test-3 (top)
+                              change = MTX[6] > 1 or MTX[8] > 1
+                           elif MTX[1] > 1 and MTX[5] > 1 and MTX[7] > 1:  # 3 side test-4 (right)
+                              change = MTX[2] > 1 or MTX[8] > 1
+                           elif MTX[1] > 1 and MTX[7] > 1:                 # 2 side test-1 (opposite, vertical)
+                              change = True
+                           elif MTX[3] > 1 and MTX[5] > 1:                 # 2 side test-2 (opposite, horizontal)
+                              change = True
+                           else:
+                              change = False
+                           if change:
+                              slab["DILFG", l, r, c] = 3
+            # -- end of subroutine definitions --
+
+            if useArrayEngine and numpy is not None: # same traverses in the same order (dilutionTraverses), by whole bench arrays
+               DilutionArrays(slab, l, rows, cols, filter_by_period and not filter_by_period_ar, profile)
+            else:
+               traverses = {"OreTraverse_A":OreTraverse_A, "OreTraverse_B":OreTraverse_B, "OreTraverse_C":OreTraverse_C,
+                            "WasteTraverse_A":WasteTraverse_A, "WasteTraverse_B":WasteTraverse_B}
+               for (n, traverse) in enumerate(dilutionTraverses):
+                  traverses[traverse]()
+                  profile.Phase("dilution %d %s" % (n+1, traverse))
+            # == end of DILFG based dilution process ==
+
+            # == DESTD modification based on result of kernel (DILFG) dilution (only on sulphide mill HG ORE) ==
+            for r in xrange(1,rows-1):
+               for c in xrange(1,cols-1):
+                  if filter_by_period and not filter_by_period_ar:
+                     PERLT = int(slab["PERLT", l, r, c])
+                     run_calcs = PERLT < 1
+                  else:
+                     run_calcs = True
+                  if run_calcs:
+                     if slab["DILFG", l, r, c] <= 0: # non-HG blocks (LG-N, W-PR, SP_OX ...) diluted to be sulphide mill feed (HG)
+                        slab["DESTD", l, r, c] = HG
+                     elif slab["DILFG", l, r, c] >= 3: # HG changed to Waste, default to LG class based on reactivity
+                        WARDC = slab["WARDC", l, r, c]
+                        if WARDC > 0:
+                           slab["DESTD", l, r, c] = LG_N
+                        else:
+                           slab["DESTD", l, r, c] = LG_PR
+            # == end of DESTD modification ==
+            profile.Phase("DESTD")
+
+            # == "salt & pepper" noise reduction for all destination codes, with exceptions in main body of code for HG and W_CV ==
+            # all tests, then repeat test #3, Blocks in Corner, over changed DESTD codes; "Ore" and "Cover" materials are exceptions to coding
+            # decisions for each 3x3 kernel from NoisePatterns (see NoiseDecision); DESTD is changed in place, so later kernels see the changed codes
+            destd = [[slab["DESTD", l, r, c] for c in xrange(cols)] for r in xrange(rows)]
+            hits, misses = noisePatterns.hits + cornerPatterns.hits, noisePatterns.misses + cornerPatterns.misses
+            for patterns in (noisePatterns, cornerPatterns):
+               for r in xrange(1,rows-1):
+                  for c in xrange(1,cols-1):
+                     if filter_by_period and not filter_by_period_ar:
+                        PERLT = int(slab["PERLT", l, r, c])
+                        run_calcs = PERLT < 1
+                     else:
+                        run_calcs = True
+                     if run_calcs:
+                        # 3x3 area in MTX order
+                        # 6 7 8
+                        # 3 4 5
+                        # 0 1 2
+                        below, centre, above = destd[r-1], destd[r], destd[r+1]
+                        decision = patterns.Decide((below[c-1], below[c], below[c+1], centre[c-1], centre[c], centre[c+1], above[c-1], above[c], above[c+1]))
+                        if decision is not None:
+                           replacement, DILFG, blocks = decision
+                           for (ro, co) in blocks:
+                              destd[r+ro][c+co] = replacement
+                              slab["DESTD", l, r+ro, c+co] = replacement
+                              slab["DILFG", l, r+ro, c+co] = DILFG
+            hits = noisePatterns.hits + cornerPatterns.hits - hits
+            misses = noisePatterns.misses + cornerPatterns.misses - misses
+            benchMessages.append(("  Noise reduction: %d kernels, %d from the pattern cache" % (hits + misses, hits), False))
+            # == end "salt & pepper" noise reduction ==
+            profile.Phase("noise reduction")
+
+            # == DILFG reset (only on HG & LG_N) ==
+            # reset DILFG if, after all of the above, it flip-flopped back and forth from what it originally was and is effectively now unchanged
+            # NOTE: after this adjustment DILFG will still not exactly match R&R classification as dilution is of HG (only) using all RESCL, but REPORTABLE ores is based on MI&I only
+            for r in xrange(rows):
+               for c in xrange(cols):
+                  if filter_by_period and not filter_by_period_ar:
+                     PERLT = int(slab["PERLT", l, r, c])
+                     run_calcs = PERLT < 1
+                  else:
+                     run_calcs = True
+                  if run_calcs:
+                     DESTD = slab["DESTD", l, r, c]
+                     DESTC = slab["DESTC", l, r, c]
+                     if DESTD == DESTC:
+                        if DESTD <= LG_N or DESTD >= SP_OX: # reportable sulphide, oxide, or weathered ores
+                           slab["DILFG", l, r, c] = 1  # reset to unchanged REPORTABLE ores
+                        else:
+                           slab["DILFG", l, r, c] = 2  # unchanged as Waste
+                     elif DESTD == LG_N: # exception for retagging LG sulphide ores considered Waste
+                        DILFG = slab["DILFG", l, r, c]
+                        if DILFG == 3:
+                           slab["DILFG", l, r, c] = 0  # sulphide mill feed from Waste (LG)
+            # == end DILFG reset ==
+            profile.Phase("DILFG reset")
+
+            # == DESTR assignment ==
+            # sets DESTR based on DEST and, if DEST is a diluted value, resets DILFG for non-MI&I blocks so that DILFG and DESTR classifications will exactly match
+            for r in xrange(rows):
+               for c in xrange(cols):
+                  if filter_by_period and not filter_by_period_ar:
+                     PERLT = int(slab["PERLT", l, r, c])
+                     run_calcs = PERLT < 1
+                  else:
+                     run_calcs = True
+                  if run_calcs:
+                     DEST = slab[DESTname, l, r, c]
+                     RESCL = slab["RESCL", l, r, c]
+                     if DEST <= HG:  # HG sulphide mill feed
+                        if RESCL <= 2:
+                           slab["DESTR", l, r, c] = 1  # Measured & Indicated
+                        elif RESCL <= 3:
+                           slab["DESTR", l, r, c] = 2  # Inferred
+                        else:  # HG sulphide mill feed reclassified to Waste
+                           slab["DESTR", l, r, c] = 11
+                           if DESTRdiluted:
+                              slab["DILFG", l, r, c] = 16  # dilution from R&R criteria
+                     elif DEST <= LG_N: # Low Grade Non-reactive Stockpile
+                        if RESCL <= 2:
+                           slab["DESTR", l, r, c] = 3  # Measured & Indicated
+                        elif RESCL <= 3:
+                           slab["DESTR", l, r, c] = 4  # Inferred
+                        else:  # LG sulphide mill stockpile reclassified to Waste
+                           slab["DESTR", l, r, c] = 11
+                           if DESTRdiluted:
+                              slab["DILFG", l, r, c] = 16  # dilution from R&R criteria
+                     elif DEST <= LG_PR: # Low Grade Possibly Reactive (not stockpileable)
+                        if RESCL <= 2:
+                           slab["DESTR", l, r, c] = 5  # Measured & Indicated
+                        elif RESCL <= 3:
+                           slab["DESTR", l, r, c] = 6  # Inferred
+                        else:  # LG possibly reactive reclassified to Waste
+                           slab["DESTR", l, r, c] = 12
+                           if DESTRdiluted:
+                              slab["DILFG", l, r, c] = 17  # dilution from R&R criteria
+                     elif DEST >= SP_WX: # Weathered
+                        if RESCL <= 2:
+                           slab["DESTR", l, r, c] = 9  # Measured & Indicated
+                        elif RESCL <= 3:
+                           slab["DESTR", l, r, c] = 10  # Inferred
+                        else:  # oxide mill feed reclassified to Waste
+                           slab["DESTR", l, r, c] = 14
+                           if DESTRdiluted:
+                              slab["DILFG", l, r, c] = 19  # dilution from R&R criteria
+                     elif DEST >= SP_OX: # Oxide ore
+                        if RESCL <= 2:
+                           slab["DESTR", l, r, c] = 7  # Measured & Indicated
+                        elif RESCL <= 3:
+                           slab["DESTR", l, r, c] = 8  # Inferred
+                        else:  # oxide mill feed reclassified to Waste
+                           slab["DESTR", l, r, c] = 13
+                           if DESTRdiluted:
+                              slab["DILFG", l, r, c] = 18  # dilution from R&R criteria
+                     else:  # remainder are always waste classes for R&R
+                        slab["DESTR", l, r, c] = 0
+            # == end DESTR assignment ==
+            profile.Phase("DESTR")
+
+            # == DESTx reclassification ==
+            # filter the DESTx code based on resource classification (RESCL)
+            if filterDEST > 0:  # DESTx filtering is set
+               RESCLlimit = filterDEST + 1
+               # filterDEST=1 => RESCLlimit=2 => M&I => Ore in Inferred, Blue Sky, and Beyond-the-Sea reserve classes is considered Waste (typically for scheduling R&R production)
+               # filterDEST=2 => RESCLlimit=3 => MI&I => Ore only in Blue Sky and Beyond-the-Sea reserve classes is considered Waste (typically for reporting R&R)
+               for r in xrange(rows):
+                  for c in xrange(cols):
+                     if filter_by_period and not filter_by_period_ar:
+                        PERLT = int(slab["PERLT", l, r, c])
+                        run_calcs = PERLT < 1
+                     else:
+                        run_calcs = True
+                     if run_calcs:
+                        RESCL = slab["RESCL", l, r, c]
+                        if RESCL > RESCLlimit: # only reclassify blocks of lower quality
+                           if DESTRdiluted: # use DESTD and DESTC items
+                              DESTD = slab["DESTD", l, r, c]
+                              if DESTD <= LG_PR or DESTD >= SP_OX: # reclassify HG, LG-N, and LG-PR for sulphide mill and all oxide/weathered for secondary mill (whether exists or not)
+                                 DESTC = slab["DESTC", l, r, c]
+                                 if DESTC <= LG_PR or DESTC >= SP_OX:
+                                    if WARDC <= 0: # 0 is possibly reactive
+                                       slab["DESTD", l, r, c] = W_PR
+                                    else:
+                                       slab["DESTD", l, r, c] = W_N
+                                 else:  # originally classified a waste class, so replace with original waste class
+                                    slab["DESTD", l, r, c] = DESTC
+                           else: # use DESTC item only
+                              DESTC = slab["DESTC", l, r, c]
+                              if DESTC <= LG_PR or DESTC >= SP_OX: # reclassify HG, LG-N, and LG-PR for sulphide mill and all oxide/weathered for secondary mill (whether exists or not)
+                                 if WARDC <= 0: # 0 is possibly reactive
+                                    slab["DESTC", l, r, c] = W_PR
+                                 else:
+                                    slab["DESTC", l, r, c] = W_N
+            # == end DEST reclassification ==
+            profile.Phase("DEST reclassification")
+
+            # == Concentrate calculations based on DESTx and redo of OPCST and VALS calculations for diluted values  ==
+            for r in xrange(rows):
+               for c in xrange(cols):
+                  if filter_by_period and not filter_by_period_ar:
+                     PERLT = int(slab["PERLT", l, r, c])
+                     run_calcs = PERLT < 1
+                  else:
+                     run_calcs = True
+                  if run_calcs:
+                     GEOL = slab["GEOL", l, r, c]
+                     DEST = slab[DESTname, l, r, c]
+                     if GEOL > Air: # not in air
+                        # calculate concentrate and tailings tonnages for block
+                        STZN = slab["STZN", l, r, c]
+                        STPB = slab["STPB", l, r, c]
+                        ODENM = slab["ODENM", l, r, c]
+                        TonnesPerBlock = blockVolume*ODENM  # NOTE this is not adjusted by topo, will be taken care of by partials file
+                        if DEST < SP_OX or DEST > SP_WX: # Sulfide (most destinations); includes MG
+                           ZNREC = slab["ZNREC", l, r, c]
+                           ZNGRD = slab["ZNGRD", l, r, c]
+                           workZNCON = (STZN * ZNREC / ZNGRD)/100.0
+                           PBREC = slab["PBREC", l, r, c]
+                           PBGRD = slab["PBGRD", l, r, c]
+                           workPBCON = (STPB * PBREC / PBGRD)/100.0
+                        elif DEST >= SP_WX: # Weathered High Zn-Cu; MG selected above
+                           ZNRWX = slab["ZNRWX", l, r, c]
+                           ZNGWX = slab["ZNGWX", l, r, c]
+                           workZNCON = (STZN * ZNRWX / ZNGWX)/100.0 # Zn basis for total Bulk Concentrate
+                           workPBCON = 0.0
+                        else: # DEST = SP_OX, i.e. Oxide High Pb-Ag
+                           workZNCON = 0.0
+                           PBROX = slab["PBROX", l, r, c]
+                           PBGOX = slab["PBGOX", l, r, c]
+                           workPBCON = (STPB * PBROX / PBGOX)/100.0
+                        # concentrate and tailings tonnages
+                        workZNCON = workZNCON * TonnesPerBlock
+                        workPBCON = workPBCON * TonnesPerBlock
+                        workTAILS = TonnesPerBlock - workZNCON - workPBCON
+
+                        # rewrite OPCST and VALS for diluted blocks
+                        if DESTRdiluted:
+                           DESTD = slab["DESTD", l, r, c]
+                           DESTC = slab["DESTC", l, r, c]
+                           if DESTD != DESTC:
+                              MPT = slab["MPT", l, r, c] # min/t
+                              TPH = 60.0/MPT             # t/hr
+                              TPS = 1.0 / (MPT * 60.0)   # t/sec
+                              if (DESTC == LG_N and DESTD == HG) or (DESTC == HG and DESTD == LG_N):
+                                 rewriteOPCST = True
+                                 VALS = slab[VALSitem, l, r, c]
+                                 OpCost = slab["OPCST", l, r, c]
+                                 if DESTC == LG_N:
+                                    OPCST_value = OpCost - rehandle_cost
+                                    VALS_value = VALS + rehandle_cost * TPS
+                                 else:  # DESTC == HG
+                                    OPCST_value = OpCost + rehandle_cost
+                                    VALS_value = VALS - rehandle_cost * TPS
+                              elif isQanaiyaq and (DESTC >= SP_OX and DESTD < SP_OX) or (DESTC < SP_OX and DESTD >= SP_OX):
+                                 rewriteOPCST = True
+                                 d = int(slab["DEP", l, r, c] - 1) # array index starts at 0
+                                 SEsag = slab["SESAG", l, r, c]
+                                 SEbm = slab["SEBM", l, r, c]
+                                 if DESTD < SP_OX:
+                                    AMR_TA = slab[VALTitem, l, r, c]
+                                 elif DESTD >= SP_WX:
+                                    AMR_TA = slab[VLTWitem, l, r, c]
+                                 else: # == SP_OX
+                                    AMR_TA = slab[VLTOitem, l, r, c]
+                                 # calculate operating cost escalators and base operating cost ($/t)
+                                 powerEsc = (SEsag + SEbm - averagePower) * powerCost  # grinding power cost escalator, (+) is increased cost
+                                 throughputEsc = comminutionCost[d]*(averageTPH[d]/TPH - 1)  # throughput rate cost escalator, (+) is increased cost
+                                 haulEsc = max((haulIncrBench[d] - b) * -haulIncrLU, (haulIncrBench[d] - b) * haulIncrLD)  # haulage cost adjustment above/below median bench (either direction an increase); (+) is increased cost; technically should not be included in $/s calc, but not large and easier to compute here than in MSSO
+                                 OpCost_mill_noTails = haulEsc + (mill_cost[d] + powerEsc + throughputEsc) + indirect_cost/TPH
+                                 # calculate 100% Tails operating cost and Mill cutoff ($/t)
+                                 OpCost_mill_TA = OpCost_mill_noTails + tailsCostPerTonne # as 100% tailings
+                                 MillCO_TA = OpCost_mill_TA + mine_ore_cost[d] - mine_waste_cost[d]
+                                 # calculate $/s
+                                 VALS_TA = (AMR_TA - MillCO_TA) * TPS  # $/sec for block for direct mill feed
+                                 # set and rewrite VALS and OPCST items
+                                 if DESTD == LG_N or DESTD >= SP_OX:  # set model values including rehandle cost
+                                    OPCST_value = OpCost_mill_TA + rehandle_cost
+                                    VALS_value = VALS_TA - rehandle_cost * TPS
+                                 else:  # set model values default
+                                    OPCST_value = OpCost_mill_TA
+                                    VALS_value = VALS_TA
+                              else:
+                                 rewriteOPCST = False
+                              # overwrite VALS and OPCST items if required
+                              if rewriteOPCST:
+                                 slab[VALSitem, l, r, c] = VALS_value
+                                 slab["OPCST", l, r, c] = OPCST_value
+
+                        # assign MG blocks, if any
+                        isMGO = slab["FLAG2", l, r, c] # used temporarily as boolean for MG possibility flag
+                        if isMGO:
+                           WARDC = slab["WARDC", l, r, c]
+                           if WARDC > 0:
+                              MGO = MG_N
+                           else:
+                              MGO = MG_PR
+                           slab["DESTC", l, r, c] = MGO
+                           if DESTRdiluted:
+                              DESTD = slab["DESTD", l, r, c]
+                              if DESTD == HG:
+                                 slab["DESTD", l, r, c] = MGO
+                                 DEST = MGO
+                           else:
+                              slab["DESTD", l, r, c] = MGO
+                              DEST = MGO
+                     else: # in Air
+                        workZNCON = 0.0
+                        workPBCON = 0.0
+                        workTAILS = 0.0
+
+                     # write revised values
+                     slab["ZNCON", l, r, c] = workZNCON
+                     slab["PBCON", l, r, c] = workPBCON
+                     slab["TAILS", l, r, c] = workTAILS
+                     # == end Concentrate calculations ==
+
+                     # == Blastability Class ==
+                     d = int(slab["DEP", l, r, c] - 1) # array index starts at 0
+                     if GEOL in Construction[d]:
+                        BAC = 1
+                     elif GEOL in Black_Shale[d]:
+                        BAC = 2
+                     elif GEOL in Baritic[d]:
+                        if DEST >= W_PR and DEST <= SP_WX: # waste
+                           BAC = 3
+                        else: # ore
+                           BAC = 4
+                     elif GEOL in Non_Baritic[d]:
+                        STFE = slab["STFE", l, r, c]
+                        if DEST <= LG_PR or DEST >= MG_N: # ore
+                           if STFE <= 20: # lower iron
+                              BAC = 5
+                           else: # higher iron
+                              BAC = 6
+                        else: # waste
+                           BAC = 7
+                     else:
+                        BAC = 0 # not otherwise classified
+                     slab["BAC", l, r, c] = BAC
+                     # == end Blastability Class ==
+
+                     # == ORCT4 filtering based on DEST ==
+                     if GEOL > Air: # not in the air
+                        if DEST >= LG_N: # all classes except Direct Mill Feed
+                           ORCT4 = DEST + 18  # set all non-mill feed destinations to DEST code + 18, e.g. LG_N=2 becomes ORCT4=20, etc
+                        else: # DEST = HG
+                           ORCT2 = slab["ORCT2", l, r, c]
+                           if ORCT2 >= 5 and ORCT2 != 8: # Shales
+                              ORCT4 = 0
+                           elif STZN < 15: # low zinc grade
+                              if ORCT2 <= 1: # Exhalite
+                                 ORCT4 = 1
+                              elif ORCT2 <= 2: # Weathered
+                                 ORCT4 = 4
+                              elif ORCT2 <= 3: # Baritic
+                                 ORCT4 = 7
+                              elif ORCT2 <= 4: # Iron-rich
+                                 ORCT4 = 10
+                              else: # ORCT2 = 8, # Veined
+                                 ORCT4 = 13
+                           elif STZN >= 25: # high zinc grade
+                              if ORCT2 <= 1: # Exhalite
+                                 ORCT4 = 3
+                              elif ORCT2 <= 2: # Weathered
+                                 ORCT4 = 6
+                              elif ORCT2 <= 3: # Baritic
+                                 ORCT4 = 9
+                              elif ORCT2 <= 4: # Iron-rich
+                                 ORCT4 = 12
+                              else: # ORCT2 = 8, # Veined
+                                 ORCT4 = 15
+                           else: # medium zinc grade
+                              if ORCT2 <= 1: # Exhalite
+                                 ORCT4 = 2
+                              elif ORCT2 <= 2: # Weathered
+                                 ORCT4 = 5
+                              elif ORCT2 <= 3: # Baritic
+                                 ORCT4 = 8
+                              elif ORCT2 <= 4: # Iron-rich
+                                 ORCT4 = 11
+                              else: # ORCT2 = 8, # Veined
+                                 ORCT4 = 14
+                     else: # in air
+                        ORCT4 = model.UNDEFINED
+                     slab["ORCT4", l, r, c] = ORCT4
+                     # == end ORCT4 filtering ==
+            profile.Phase("concentrates")
+
+         m.storeslab()
+         m.free()
+         profile.Phase("store")
+      benchMessages.append(("  Done", False))
+   return benchMessages, profile.Result()
+
+# read one bench (b) and summarise its undiluted DESTC for every cutoff deck, returning its (message, logged) pairs and the summary as
+# {(deck, DESTC, RESCL): [tonnes, ZNCON t, PBCON t, grinding hours, $]}, and the bench profile; $/s values are calculated once per block,
+# the model is not changed
+def DestSweepBench(pcfpath, modelFile, b, minRow, maxRow, minColumn, maxColumn, itemlist, blockVolume, isQanaiyaq, VALTitem, VLTOitem, VLTWitem,
+                   millingOption, sweepDecks, filter_by_period, filter_by_period_ar, profiled):
+   benchMessages = [("  Opening and reading Bench: %2d" % (b), False)]
+   summary = {}
+   profile = Profile_QAN.BenchProfile(b, profiled)
+   try:
+      m = Pipeline_QAN.OpenBench(pcfpath, modelFile, b, minRow, maxRow, minColumn, maxColumn, itemlist)
+   except model.ModelError, e:
+      benchMessages.append(("Model Access Error: "+str(e)+"\n", True))
+      benchMessages.append(("Failed\n", True))
+   else:
+      profile.Phase("open")
+      if m != None:
+         slab = m.slab()
+         cols, rows = slab.maxcolumn(), slab.maxrow()
+         l = 0
+         profile.Phase("read")
+         airBlocks, periodBlocks = 0, 0
+         for r in xrange(rows):
+            for c in xrange(cols):
+               if filter_by_period and not filter_by_period_ar:
+                  PERLT = int(slab["PERLT", l, r, c])
+                  run_calcs = PERLT < 1
+                  if not run_calcs:
+                     periodBlocks += 1
+               else:
+                  run_calcs = True
+               if run_calcs and not slab["GEOL", l, r, c] > Air: # in air
+                  airBlocks += 1
+               elif run_calcs:
+                  # grab values
+                  d = int(slab["DEP", l, r, c] - 1) # array index starts at 0
+                  WARDC = slab["WARDC", l, r, c]
+                  RESCL = int(slab["RESCL", l, r, c])
+                  MPT = slab["MPT", l, r, c] # min/t
+                  TPH = 60.0/MPT             # t/hr
+                  TPS = 1.0 / (MPT * 60.0)   # t/sec
+                  SEsag = slab["SESAG", l, r, c]
+                  SEbm = slab["SEBM", l, r, c]
+                  AMR = slab[VALTitem, l, r, c]
+                  STZN = slab["STZN", l, r, c]
+                  ZNREC = slab["ZNREC", l, r, c]
+                  ZNGRD = slab["ZNGRD", l, r, c]
+                  STPB = slab["STPB", l, r, c]
+                  PBREC = slab["PBREC", l, r, c]
+                  PBGRD = slab["PBGRD", l, r, c]
+                  STFE = slab["STFE", l, r, c]
+                  STBA = slab["STBA", l, r, c]
+                  TonnesPerBlock = blockVolume*slab["ODENM", l, r, c]
+
+                  # undiluted $/s as the DESTC assignment in DestBench, before dilution and the VALS of diluted blocks
+                  powerEsc = (SEsag + SEbm - averagePower) * powerCost
+                  throughputEsc = comminutionCost[d]*(averageTPH[d]/TPH - 1)
+                  haulEsc = max((haulIncrBench[d] - b) * -haulIncrLU, (haulIncrBench[d] - b) * haulIncrLD)
+                  OpCost_mill_noTails = haulEsc + (mill_cost[d] + powerEsc + throughputEsc) + indirect_cost/TPH
+                  Concentrate = (STZN * ZNREC / ZNGRD + STPB * PBREC / PBGRD)/100.0
+                  tails_cost = (1 - Concentrate) * tailsCostPerTonne
+                  MillCO_SU = OpCost_mill_noTails + tails_cost + mine_ore_cost[d] - mine_waste_cost[d]
+                  VALS = (AMR - MillCO_SU) * TPS
+                  VALS_RH = VALS - rehandle_cost * TPS
+                  VALS_OX, VALS_WX = None, None
+                  if isQanaiyaq:
+                     PBROX = slab["PBROX", l, r, c]
+                     PBGOX = slab["PBGOX", l, r, c]
+                     OxConcentrate = (STPB * PBROX / PBGOX)/100.0
+                     tails_cost = (1 - OxConcentrate) * tailsCostPerTonne
+                     MillCO_OX = OpCost_mill_noTails + tails_cost + rehandle_cost + mill_oxide + mine_ore_cost[d] - mine_waste_cost[d]
+                     VALS_OX = (slab[VLTOitem, l, r, c] - MillCO_OX) * TPS
+                     if VALS_OX < 0:
+                        ZNRWX = slab["ZNRWX", l, r, c]
+                        ZNGWX = slab["ZNGWX", l, r, c]
+                        WxConcentrate = (STZN * ZNRWX / ZNGWX)/100.0 # Zn basis for Bulk Conc
+                        tails_cost = (1 - WxConcentrate) * tailsCostPerTonne
+                        MillCO_WX = OpCost_mill_noTails + tails_cost + rehandle_cost + mine_ore_cost[d] - mine_waste_cost[d]
+                        VALS_WX = (slab[VLTWitem, l, r, c] - MillCO_WX) * TPS
+
+                  # DESTC and totals for each deck
+                  for deck in xrange(len(sweepDecks)):
+                     DPScutoff, DPScutoffMG, DPScutoffLG = sweepDecks[deck]
+                     DESTC, VALS_value, isMGO = AssignDESTC(isQanaiyaq, millingOption, DPScutoff, DPScutoffMG, DPScutoffLG, VALS, VALS_RH, VALS_OX, VALS_WX, WARDC, STFE, STBA)
+                     if isMGO: # as the MG code after dilution in DestBench
+                        if WARDC > 0:
+                           DESTC = MG_N
+                        else:
+                           DESTC = MG_PR
+                     if DESTC == SP_OX: # Oxide High Pb-Ag
+                        workZNCON, workPBCON = 0.0, OxConcentrate * TonnesPerBlock
+                     elif DESTC == SP_WX: # Weathered High Zn-Cu
+                        workZNCON, workPBCON = WxConcentrate * TonnesPerBlock, 0.0
+                     else: # Sulfide (most destinations); includes MG
+                        workZNCON, workPBCON = (STZN * ZNREC / ZNGRD)/100.0 * TonnesPerBlock, (STPB * PBREC / PBGRD)/100.0 * TonnesPerBlock
+                     key = (deck, DESTC, RESCL)
+                     if key not in summary:
+                        summary[key] = [0.0, 0.0, 0.0, 0.0, 0.0]
+                     totals = summary[key]
+                     totals[0] += TonnesPerBlock
+                     totals[1] += workZNCON
+                     totals[2] += workPBCON
+                     totals[3] += TonnesPerBlock / TPH
+                     totals[4] += VALS_value * TonnesPerBlock / TPS
+         profile.CountBlocks(rows*cols, airBlocks, periodBlocks)
+         profile.Phase("cutoff sweep")
+         m.free()
+      benchMessages.append(("  Done", False))
+   return benchMessages, summary, profile.Result()
+
 def ExecuteModelCalc(projectpath):
    projinf = cmpsys.getproject()
    pcffile = projinf.get(grail.compass.projectinfo.PCFPATH_TAG)
    projdir = fileutils.getdir(projectpath)
    pcfpath = projdir+'\\'+pcffile
+   RunModelCalc(projdir, pcfpath, cmpsys.getpcf())
+
+# run for the model file (file15) and panel variables in the project folder projdir, pcfpath and pcf are the project control file path
+# and pcf object; from ExecuteModelCalc, or from a batch run (BatchRun_QAN) without the panel
+def RunModelCalc(projdir, pcfpath, pcf):
+   run = RunStage(projdir, pcfpath, pcf)
+   try:
+      for (benchFunction, benchArgs, report) in run:
+         BenchPool_QAN.RunBenches(benchFunction, benchArgs, benchWorkers, report)
+   finally:
+      run.close() # a bench pass that fails is ended as failed in the run log and run journal
+
+# RunModelCalc as a stage, yielding its bench pass as (bench function, bench argument tuples, report function) for the caller to run;
+# RunModelCalc runs it in a BenchPool, a fused run (Pipeline_QAN) runs it on the benches opened once for all of its stages
+def RunStage(projdir, pcfpath, pcf):
    PythonLog = projdir+"\RunLog-Python_scripts.txt" # will create an empty file if none present in model folder
-   PyLogFile = open(PythonLog,"a")
+   PyLogFile = RunJournal_QAN.RunLog(PythonLog)
+   journal = RunJournal_QAN.RunJournal(projdir, PROC_TITLE, [("file15", file15.get()), ("pickDPScutoff", pickDPScutoff.get()), ("pickDPScutoffMG", pickDPScutoffMG.get()),
+                                    ("pickDPScutoffLG", pickDPScutoffLG.get()), ("millFunction", millFunction.get()), ("valbFunction", valbFunction.get()),
+                                    ("drFunction", drFunction.get()), ("ddFunction", ddFunction.get()), ("perFunction", perFunction.get()),
+                                    ("ModelItems", [item.get() for item in ModelItems if item.get() != '']), ("cutoffDecks", cutoffDecks),
+                                    ("valbVariants", valbVariants), ("useArrayEngine", useArrayEngine), ("benchWorkers", benchWorkers)])
+   journal.Start()
    DT = datetime.today()
-   msgText = "\n"+DT.strftime("%d-%b-%Y  %H:%M\n")+"User: "+getpass.getuser()+"\n"+"Script: "+PROC_TITLE
+   msgText = "\n"+DT.strftime("%d-%b-%Y  %H:%M\n")+"User: "+getpass.getuser()+"\n"+"Script: "+PROC_TITLE+"\n"+"Run: "+journal.runId
    PyLogFile.write(msgText)
    print pcfpath
 
    # calculate block volume
-   pcf = cmpsys.getpcf()
    blockVolume = pcf.dx()*pcf.dy()*pcf.dz()
 
    # get ending Bench from panel variable
@@ -435,6 +1712,8 @@ def ExecuteModelCalc(projectpath):
             # turn VALTx into VLTWx and append
             VLTWitem = VALTitem.replace("ALT","LTW")
             itemlist.append(VLTWitem)
+         else: # no oxide or weathered items
+            VLTOitem, VLTWitem = '', ''
          break
 
    # select available mills and feed types
@@ -511,7 +1790,42 @@ def ExecuteModelCalc(projectpath):
          msgText = "  $/s values stored in "+VALSitem+" and obtained from $/t value in "+VALTitem+"\n"
       print msgText
       PyLogFile.write(msgText)
+
+      if useArrayEngine and numpy is not None:
+         msgText = "  Dilution calculated by whole bench arrays\n"
+      else:
+         msgText = "  Dilution calculated block by block\n"
+      print msgText
+      PyLogFile.write(msgText)
+
+      # cutoff sweep, cutoffs of each deck set as for the panel cutoffs
+      sweepDecks = []
+      for (sweepDPS, sweepDPSMG, sweepDPSLG) in cutoffDecks:
+         if millingOption <=0 or millingOption >=3: # only one cutoff; set cutoffs equal
+            sweepDecks.append((sweepDPS, sweepDPS, sweepDPS))
+         else: # multiple cutoffs; ensure third c/o <= second c/o <= first c/o
+            sweepDPSMG = min(sweepDPS, sweepDPSMG)
+            sweepDecks.append((sweepDPS, sweepDPSMG, min(sweepDPSMG, sweepDPSLG)))
+      valbRuns = []
+      if len(sweepDecks) > 0:
+         msgText = "  Cutoff sweep of %d decks, model not changed; undiluted DESTC summary written to %s\n" % (len(sweepDecks), cutoffSweepFile)
+         print msgText
+         PyLogFile.write(msgText)
    else: # a VALB calculation run
+      # milling options 4 to 6 take the oxide and weathered $/t values (VLTO, VLTW items), only in Qanaiyaq models
+      oxideOptions = [option for option in [millingOption] + [millVariant for (valbVariant, millVariant, itemVariant) in valbVariants] if option >= 4]
+      if not isQanaiyaq and len(oxideOptions) > 0:
+         msgText = "  Milling option %s (%s) needs the VLTO and VLTW items of a Qanaiyaq model, VALB not calculated for an Aqqaluk model\n" % (
+                   oxideOptions[0], MILL_FUNCTIONS[oxideOptions[0]].split(" {")[0].strip())
+         print msgText
+         PyLogFile.write(msgText)
+         PyLogFile.write("Failed!\n")
+         PyLogFile.close()
+         journal.End("Failed")
+         raise ValueError(msgText.strip())
+      filterDEST, filter_by_period, filter_by_period_ar = 0, False, False # not used in a VALB calculation run
+      sweepDecks = []
+      valbRuns = [(VALBtype, millingOption, VALBitem)]
       msgText = "  Option #3, DESTR dilution:   inactive\n"
       print msgText
       PyLogFile.write(msgText)
@@ -536,1085 +1850,65 @@ def ExecuteModelCalc(projectpath):
       print msgText
       PyLogFile.write(msgText)
 
-   # assume run fails unless last line overwritten
-   PyLogFile.write("Failed!\n")
-
-   for b in xrange(minLevel,maxLevel+1):
-      print "  Opening and updating Bench: %2d" % (b)
-      try:
-         m = model.Model(pcfpath, file15.get(), b, b, minRow, maxRow, minColumn, maxColumn, itemlist)
-      except model.ModelError, e:
-         msgText = "Model Access Error: "+str(e)+"\n"
+      # VALB variants, calculated in the same pass
+      for (valbVariant, millVariant, itemVariant) in valbVariants:
+         valbRuns.append((valbVariant + 1, millVariant, itemVariant)) # VALBtype code as RESCL category filter
+         itemlist.append(itemVariant)
+         msgText = "  VALB variant stored in "+itemVariant+": "+VALB_FUNCTIONS[valbVariant].strip()+", "+MILL_FUNCTIONS[millVariant].split(" {")[0]+"\n"
          print msgText
          PyLogFile.write(msgText)
-         msgText = "Failed\n"
-         print msgText
-         PyLogFile.write(msgText)
-      else:
-         if m != None:
-            slab = m.slab()
-            cols, rows = slab.maxcolumn(), slab.maxrow()
-            l = 0
-            if VALBtype > 1: # a VALB calculation run only
-               # == VALB assignment ==
-               # traverse the slab, get values, calculate, and set the new values
-               # note that array implementation of cutoffs by year is not incorporated into VALB calculation as VALB is independant of the year
-               # L-G calculation only based on undiluted blocks as one can not start a "cone" on a diluted waste block
-               for r in xrange(rows):
-                  for c in xrange(cols):
-                     GEOL = slab["GEOL", l, r, c]
-                     if GEOL > Air: # not air
-                        # grab values
-                        d = int(slab["DEP", l, r, c] - 1) # array index starts at 0
-                        WARDC = slab["WARDC", l, r, c]
-                        ODENM = slab["ODENM", l, r, c]
-                        RESCL = slab["RESCL", l, r, c]
-                        MPT = slab["MPT", l, r, c]     # min/t
-                        TPH = 60.0/MPT                 # t/hr
-                        SEsag = slab["SESAG", l, r, c]
-                        SEbm = slab["SEBM", l, r, c]
-                        AMR = slab[VALTitem, l, r, c]
-                        STZN = slab["STZN", l, r, c]
-                        ZNREC = slab["ZNREC", l, r, c]
-                        ZNGRD = slab["ZNGRD", l, r, c]
-                        STPB = slab["STPB", l, r, c]
-                        PBREC = slab["PBREC", l, r, c]
-                        PBGRD = slab["PBGRD", l, r, c]
-
-                        # calculate operating cost escalators and base operating cost ($/t)
-                        powerEsc = (SEsag + SEbm - averagePower) * powerCost  # grinding power cost escalator, (+) is increased cost
-                        throughputEsc = comminutionCost[d]*(averageTPH[d]/TPH - 1)  # throughput rate cost escalator, (+) is increased cost
-                        haulEsc = max((haulIncrBench[d] - b) * -haulIncrLU, (haulIncrBench[d] - b) * haulIncrLD)  # haulage cost adjustment above/below median bench (either direction an increase); (+) is increased cost
-                        OpCost_mill_noTails = haulEsc + (mill_cost[d] + powerEsc + throughputEsc) + indirect_cost/TPH
-
-                        # calculate Sulphide operating cost and Mill cutoff ($/t)
-                        Concentrate = (STZN * ZNREC / ZNGRD + STPB * PBREC / PBGRD)/100.0
-                        tails_cost = (1.0 - Concentrate) * tailsCostPerTonne
-                        OpCost_mill_SU = OpCost_mill_noTails + tails_cost
-                        MillCO_SU = OpCost_mill_SU + mine_ore_cost[d] - mine_waste_cost[d]
-
-                        if millingOption != 3:  # normally this case would be for millingOption=0, i.e. conventional breakeven cutoff
-                           block_is_HGore = RESCL <= VALBtype and AMR >= MillCO_SU
-                           block_is_LGore = False
-                        else: # millingOption = 3, use HG c/o as threshold
-                           VALS_block = (AMR - MillCO_SU) / MPT /60  # $/sec for block
-                           block_is_HGore = RESCL <= VALBtype and VALS_block >= DPScutoff
-                           if block_is_HGore:
-                              block_is_LGore = False
-                           else:
-                              VALS_block_LG = VALS_block - rehandle_cost / MPT /60  # $/sec for block for stockpile material
-                              block_is_LGore = RESCL <= VALBtype and VALS_block_LG >= 0 and WARDC > 0  # only non-reactive is stockpiled for eventual recovery
-
-                        NET_SU = AMR - OpCost_mill_SU - mine_ore_cost[d]
-                        if block_is_HGore:
-                           workVALB = NET_SU * blockVolume * ODENM
-                        elif block_is_LGore:
-                           workVALB = 0.70 * (NET_SU - rehandle_cost) * blockVolume * ODENM  # discount value to 70% due to delayed realization of value from stockpiling (10 years to reclaim, so 5 years for mid-point of reclaim, at 8% discount) = 1/1.08^5 = 68%
-                        else:
-                           workVALB = -(mine_waste_cost[d] + haulEsc) * blockVolume * ODENM
-
-                        # additional calculations if secondary mill available for High Pb Oxide and/or Weathered High Cu, thus added value of these ores used in pit generation
-                        if isQanaiyaq and millingOption >= 4:
-                           # 1) High Lead Oxide
-                           AMR_OX = slab[VLTOitem, l, r, c]
-                           PBROX = slab["PBROX", l, r, c]
-                           PBGOX = slab["PBGOX", l, r, c]
-                           # calculate tailings tonnage and cost
-                           Concentrate = (STPB * PBROX / PBGOX)/100.0
-                           tails_cost = (1.0 - Concentrate) * tailsCostPerTonne
-                           # calculate Oxide operating cost and and Mill cutoff ($/t)
-                           OpCost_mill_OX = OpCost_mill_noTails + tails_cost + rehandle_cost + mill_oxide
-                           MillCO_OX = OpCost_mill_OX + mine_ore_cost[d] - mine_waste_cost[d]
-
-                           # 2) Weathered High Copper
-                           AMR_WX = slab[VLTWitem, l, r, c]
-                           ZNRWX = slab["ZNRWX", l, r, c]
-                           ZNGWX = slab["ZNGWX", l, r, c]
-                           # calculate tailings tonnage and cost
-                           Concentrate = (STZN * ZNRWX / ZNGWX)/100.0 # Zn basis for Bulk Conc
-                           tails_cost = (1 - Concentrate) * tailsCostPerTonne
-                           # calculate Weathered operating cost and Mill cutoff ($/t)
-                           OpCost_mill_WX = OpCost_mill_noTails + tails_cost + rehandle_cost
-                           MillCO_WX = OpCost_mill_WX + mine_ore_cost[d] - mine_waste_cost[d]
-
-                           # revise VALB block value if higher value threshold met
-                           if millingOption == 4 or millingOption == 6:
-                              NET_OX = AMR_OX - OpCost_mill_OX - mine_ore_cost[d]
-                              if RESCL <= VALBtype and NET_OX > 0 and (NET_OX > NET_SU):
-                                 workVALB = NET_OX * blockVolume * ODENM
-                           if millingOption >= 5: # i.e. 5 or 6
-                              NET_WX = AMR_WX - OpCost_mill_WX - mine_ore_cost[d]
-                              if RESCL <= VALBtype and NET_WX > 0 and (NET_WX > NET_SU):
-                                 workVALB = NET_WX * blockVolume * ODENM
-
-                        # store resulting VALB value
-                        slab[VALBitem, l, r, c] = workVALB
-                     else: # in air, so just store "no value"
-                        slab[VALBitem, l, r, c] = 0.0
-               # == end of VALB assignment ==
-            else:  # not a VALB calculation run
-               # == DESTC assignment ==
-               # traverse the slab, get values, calculate, and set the new values
-               for r in xrange(rows):
-                  for c in xrange(cols):
-                     if filter_by_period:
-                        PERLT = int(slab["PERLT", l, r, c])
-                        if filter_by_period_ar: # use stored array value
-                           DPScutoff = DPScutoff_ar[PERLT]
-                           DPScutoffMG = DPScutoffMG_ar[PERLT]
-                           DPScutoffLG = DPScutoffMG
-                           run_calcs = True
-                        else: # run with entered cutoff(s) if year not set
-                           run_calcs = PERLT < 1
-                     else: # run with entered cutoff(s) on all blocks
-                        run_calcs = True
-
-                     if run_calcs:
-                        GEOL = slab["GEOL", l, r, c]
-                        if GEOL > Air:
-                           # grab values
-                           d = int(slab["DEP", l, r, c] - 1) # array index starts at 0
-                           WARDC = slab["WARDC", l, r, c]
-                           MPT = slab["MPT", l, r, c] # min/t
-                           TPH = 60.0/MPT             # t/hr
-                           TPS = 1.0 / (MPT * 60.0)   # t/sec
-                           SEsag = slab["SESAG", l, r, c]
-                           SEbm = slab["SEBM", l, r, c]
-                           AMR = slab[VALTitem, l, r, c]
-                           STZN = slab["STZN", l, r, c]
-                           ZNREC = slab["ZNREC", l, r, c]
-                           ZNGRD = slab["ZNGRD", l, r, c]
-                           STPB = slab["STPB", l, r, c]
-                           PBREC = slab["PBREC", l, r, c]
-                           PBGRD = slab["PBGRD", l, r, c]
-                           STFE = slab["STFE", l, r, c]
-                           STBA = slab["STBA", l, r, c]
-
-                           # calculate operating cost escalators and base operating cost ($/t)
-                           powerEsc = (SEsag + SEbm - averagePower) * powerCost  # grinding power cost escalator, (+) is increased cost
-                           throughputEsc = comminutionCost[d]*(averageTPH[d]/TPH - 1)  # throughput rate cost escalator, (+) is increased cost
-                           haulEsc = max((haulIncrBench[d] - b) * -haulIncrLU, (haulIncrBench[d] - b) * haulIncrLD)  # haulage cost adjustment above/below median bench (either direction an increase); (+) is increased cost; technically should not be included in $/s calc, but not large and easier to compute here than in MSSO
-                           OpCost_mill_noTails = haulEsc + (mill_cost[d] + powerEsc + throughputEsc) + indirect_cost/TPH
-
-                           # calculate Sulphide operating cost and Mill cutoff ($/t)
-                           Concentrate = (STZN * ZNREC / ZNGRD + STPB * PBREC / PBGRD)/100.0
-                           tails_cost = (1 - Concentrate) * tailsCostPerTonne
-                           OpCost_mill_SU = OpCost_mill_noTails + tails_cost
-                           MillCO_SU = OpCost_mill_SU + mine_ore_cost[d] - mine_waste_cost[d]
-
-                           # calculate $/s
-                           VALS = (AMR - MillCO_SU) * TPS  # $/sec for block for direct mill feed
-                           VALS_RH = VALS - rehandle_cost * TPS  # $/sec for block for stockpiled LG as includes rehandle
-
-                           # set model values default for all sulfide materials (adjustment for LG-N as rehandle is included for that material)
-                           OPCST_value = OpCost_mill_SU
-                           VALS_value = VALS
-
-                           # assign DESTC and write VALS values to slab (check Panel 1 constants for millingOption definitions)
-                           if VALS >= DPScutoff or ((millingOption == 1 or millingOption == 2) and VALS >= DPScutoffMG) or (not isQanaiyaq and millingOption == 2 and VALS >= DPScutoffLG and WARDC <= 0): # HG or MG or LG-PR in Aqqaluk
-                              workDESTC = HG
-                              isMGO = not isQanaiyaq and VALS < DPScutoff and VALS >= DPScutoffMG and STFE < 14 and STBA < 9 # modify MGO based on histograms of MGO stockpile in LOM (9% Ba gives 85% of tonnage, 14% Fe gives 91% of tonnage)
-                           else:
-                              isMGO = False
-                              if VALS_RH >= 0:
-                                 if WARDC > 0:
-                                    workDESTC = LG_N
-                                    # set model values including rehandle cost
-                                    OPCST_value = OpCost_mill_SU + rehandle_cost
-                                    VALS_value = VALS_RH
-                                 else: # LG-PR not otherwise allocated
-                                    workDESTC = LG_PR
-                              elif WARDC <= 0:
-                                 workDESTC = W_PR
-                              elif WARDC <= 1:
-                                 workDESTC = W_N
-                              elif WARDC <= 2:
-                                 workDESTC = W_CN
-                              else: # WARDC <= 3:
-                                 workDESTC = W_CV
-
-                           # if Qanaiyaq deposit then check for possible High Lead Oxide and Weathered High Copper materials
-                           if isQanaiyaq:
-                              # 1) check if Oxide High Lead-Silver
-                              AMR_OX = slab[VLTOitem, l, r, c]
-                              PBROX = slab["PBROX", l, r, c]
-                              PBGOX = slab["PBGOX", l, r, c]
-                              # calculate tailings tonnage and cost
-                              Concentrate = (STPB * PBROX / PBGOX)/100.0
-                              tails_cost = (1 - Concentrate) * tailsCostPerTonne
-                              # calculate Oxide operating cost and and Mill cutoff ($/t), include rehandle cost as assume majority will be stockpiled due to: a) small mill size or b) end-of-life milling
-                              OpCost_mill_OX = OpCost_mill_noTails + tails_cost + rehandle_cost + mill_oxide
-                              MillCO_OX = OpCost_mill_OX + mine_ore_cost[d] - mine_waste_cost[d]
-                              # calculate $/s
-                              VALS_OX = (AMR_OX - MillCO_OX) * TPS
-                              if VALS_OX >= 0: # then assign to 8-Oxide High Pb-Ag directly as no overlap with regular Sulfide Mill feed
-                                 workDESTC = SP_OX
-                                 # set model values, includes rehandle cost
-                                 OPCST_value = OpCost_mill_OX
-                                 VALS_value = VALS_OX
-                              else:
-                                 # 2) check possibility of Weathered High Zinc-Copper
-                                 AMR_WX = slab[VLTWitem, l, r, c]
-                                 ZNRWX = slab["ZNRWX", l, r, c]
-                                 ZNGWX = slab["ZNGWX", l, r, c]
-                                 # calculate tailings tonnage and cost
-                                 Concentrate = (STZN * ZNRWX / ZNGWX)/100.0 # Zn basis for Bulk Conc
-                                 tails_cost = (1 - Concentrate) * tailsCostPerTonne
-                                 # calculate Weathered operating cost and Mill cutoff ($/t), include rehandle cost as assume majority will be stockpiled due to: a) small mill size or b) end-of-life milling
-                                 OpCost_mill_WX = OpCost_mill_noTails + tails_cost + rehandle_cost
-                                 MillCO_WX = OpCost_mill_WX + mine_ore_cost[d] - mine_waste_cost[d]
-                                 # calculate $/s
-                                 VALS_WX = (AMR_WX - MillCO_WX) * TPS
-                                 if VALS_WX >= 0: # then possiblity exists to assign 9-Weathered High Zn-Cu
-                                    # NOTE: WX is about 50/50 PR/N, but stockpiling both Possibly Reactive and Non-reactive material.  Would need to include WARDC if filtering by PR/N...
-                                    makeWX = workDESTC >= LG_PR and workDESTC <= W_N # default: transfer to Weathered Milling if Sulfide Milling does not provide a positive cash flow
-                                    if maximizeWX: # then additionally transfer to Weathered if provides a higher cash flow than Sulfide Milling
-                                       makeWX = makeWX or (workDESTC == LG_N and VALS_WX > VALS_RH) or ((workDESTC <= HG or workDESTC >= MG_N) and VALS_WX > VALS)
-                                    if makeWX:
-                                       workDESTC = SP_WX
-                                       # set model values, includes rehandle cost
-                                       OPCST_value = OpCost_mill_WX
-                                       VALS_value = VALS_WX
-                                       # ensure MET set to Weathered High Zinc-Copper, thus QWXFG and WXFG also set
-                                       slab["MET", l, r, c] = 4
-                                       slab["QWXFG", l, r, c] = 1
-                                       slab["WXFG", l, r, c] = 1
-
-                           # set DESTC, VALS, and OPCST items
-                           slab["DESTC", l, r, c] = workDESTC
-                           slab[VALSitem, l, r, c] = VALS_value   # this is adjusted at end if destination later reclassified due to dilution
-                           slab["OPCST", l, r, c] = OPCST_value   # this is adjusted at end if destination later reclassified due to dilution
-                           slab["FLAG2", l, r, c] = isMGO   # used temporarily as boolean for MG possibility flag
-
-                           # for dilution steps, fill DESTD and DILFG with initial values
-                           slab["DESTD", l, r, c] = workDESTC
-                           if workDESTC <= HG: # set dilution flag =1 only for sulphide mill HG feed
-                              slab["DILFG", l, r, c] = 1
-                           else:
-                              slab["DILFG", l, r, c] = 2
-                        else: # in air
-                           slab[VALSitem, l, r, c] = 0.0
-                           slab["OPCST", l, r, c] = 0.0
-                           slab["DESTC", l, r, c] = W_N
-                           slab["DESTD", l, r, c] = W_N
-                           slab["DILFG", l, r, c] = 2 # not mill feed
-               # == end of DESTC assignment ==
-
-               # == DILFG based dilution process (only on HG) ==
-               # -- subroutine definitions --
-               def WasteTraverse_A():
-               # 8-value traverse of the REVISED truncated slab for WASTE diluted to sulphide mill HG ORE
-                  for r in xrange(1,rows-1):
-                     for c in xrange(1,cols-1):
-                        if filter_by_period and not filter_by_period_ar:
-                           PERLT = int(slab["PERLT", l, r, c])
-                           run_calcs = PERLT < 1
-                        else:
-                           run_calcs = True
-                        if run_calcs:
-                           # grab working copies of 3x3 area
-                           # 6 7 8
-                           # 3 4 5
-                           # 0 1 2
-                           MTX[4] = slab["DILFG", l, r, c]
-                           if MTX[4] > 1:  # waste block, has value of 2 (or 3 if dilution modified)
-                              MTX[0] = slab["DILFG", l, r-1, c-1]
-                              MTX[1] = slab["DILFG", l, r-1, c]
-                              MTX[2] = slab["DILFG", l, r-1, c+1]
-                              MTX[3] = slab["DILFG", l, r, c-1]
-                              MTX[5] = slab["DILFG", l, r, c+1]
-                              MTX[6] = slab["DILFG", l, r+1, c-1]
-                              MTX[7] = slab["DILFG", l, r+1, c]
-                              MTX[8] = slab["DILFG", l, r+1, c+1]
-                              if MTX[1] < 2 and MTX[3] < 2 and MTX[5] < 2 and MTX[7] < 2:  # 4 side test
-                                 change = True
-                              elif MTX[3] < 2 and MTX[1] < 2 and MTX[5] < 2:  # 3 side test-1 (bottom)
-                                 change = MTX[0] < 2 and MTX[2] < 2
-                              elif MTX[1] < 2 and MTX[3] < 2 and MTX[7] < 2:  # 3 side test-2 (left)
-                                 change = MTX[0] < 2 and MTX[6] < 2
-                              elif MTX[3] < 2 and MTX[7] < 2 and MTX[5] < 2:  # 3 side test-3 (top)
-                                 change = MTX[6] < 2 and MTX[8] < 2
-                              elif MTX[1] < 2 and MTX[5] < 2 and MTX[7] < 2:  # 3 side test-4 (right)
-                                 change = MTX[2] < 2 and MTX[8] < 2
-                              elif MTX[1] < 2 and MTX[7] < 2:                 # 2 side test-1 (opposite, vertical)
-                                 change = not(MTX[3] > 1 and MTX[5] > 1) # horizontal line exception
-                              elif MTX[3] < 2 and MTX[5] < 2:                 # 2 side test-2 (opposite, horizontal)
-                                 change = not(MTX[1] > 1 and MTX[7] > 1) # vertical line exception
-                              else:
-                                 change = False
-                              if change:
-                                 slab["DILFG", l, r, c] = 0
-
-               def WasteTraverse_B():
-               # 4-value traverse of the REVISED truncated slab for WASTE diluted to sulphide mill HG ORE
-                  for r in xrange(1,rows-1):
-                     for c in xrange(1,cols-1):
-                        if filter_by_period and not filter_by_period_ar:
-                           PERLT = int(slab["PERLT", l, r, c])
-                           run_calcs = PERLT < 1
-                        else:
-                           run_calcs = True
-                        if run_calcs:
-                           # grab working copies of 3x3 area
-                           # 6 7 8
-                           # 3 4 5
-                           # 0 1 2
-                           MTX[4] = slab["DILFG", l, r, c]
-                           if MTX[4] == 2:  # original waste block only
-                              MTX[1] = slab["DILFG", l, r-1, c]
-                              MTX[3] = slab["DILFG", l, r, c-1]
-                              MTX[5] = slab["DILFG", l, r, c+1]
-                              MTX[7] = slab["DILFG", l, r+1, c]
-                              if MTX[1] < 2 and MTX[3] < 2 and MTX[5] < 2 and MTX[7] < 2:  # 4 side test
-                                 change = True
-                              elif MTX[3] < 2 and MTX[1] < 2 and MTX[5] < 2:  # 3 side test-1 (bottom)
-                                 change = True
-                              elif MTX[1] < 2 and MTX[3] < 2 and MTX[7] < 2:  # 3 side test-2 (left)
-                                 change = True
-                              elif MTX[3] < 2 and MTX[7] < 2 and MTX[5] < 2:  # 3 side test-3 (top)
-                                 change = True
-                              elif MTX[1] < 2 and MTX[5] < 2 and MTX[7] < 2:  # 3 side test-4 (right)
-                                 change = True
-                              elif MTX[1] < 2 and MTX[7] < 2:                 # 2 side test-1 (opposite, vertical)
-                                 change = not(MTX[3] > 1 and MTX[5] > 1) # horizontal line exception
-                              elif MTX[3] < 2 and MTX[5] < 2:                 # 2 side test-2 (opposite, horizontal)
-                                 change = not(MTX[1] > 1 and MTX[7] > 1) # vertical line exception
-                              else:
-                                 change = False
-                              if change:
-                                 slab["DILFG", l, r, c] = 0
-
-               def OreTraverse_A():
-               # 8-value traverse of the truncated slab for sulphide mill HG ORE diluted to WASTE
-                  for r in xrange(1,rows-1):
-                     for c in xrange(1,cols-1):
-                        if filter_by_period and not filter_by_period_ar:
-                           PERLT = int(slab["PERLT", l, r, c])
-                           run_calcs = PERLT < 1
-                        else:
-                           run_calcs = True
-                        if run_calcs:
-                           # grab working copies of 3x3 area
-                           # 6 7 8
-                           # 3 4 5
-                           # 0 1 2
-                           MTX[4] = slab["DESTC", l, r, c]
-                           if MTX[4] <= HG:
-                              MTX[0] = slab["DESTC", l, r-1, c-1]
-                              MTX[1] = slab["DESTC", l, r-1, c]
-                              MTX[2] = slab["DESTC", l, r-1, c+1]
-                              MTX[3] = slab["DESTC", l, r, c-1]
-                              MTX[5] = slab["DESTC", l, r, c+1]
-                              MTX[6] = slab["DESTC", l, r+1, c-1]
-                              MTX[7] = slab["DESTC", l, r+1, c]
-                              MTX[8] = slab["DESTC", l, r+1, c+1]
-                              if MTX[1] > HG and MTX[3] > HG and MTX[5] > HG and MTX[7] > HG:  # 4 side test
-                                 change = ((MTX[0] <= HG) + (MTX[2] <= HG) + (MTX[6] <= HG) + (MTX[8] <= HG)) < 3 # diagonal line exception
-                              elif MTX[3] > HG and MTX[1] > HG and MTX[5] > HG:  # 3 side test-1 (bottom)
-                                 change = MTX[0] > HG and MTX[2] > HG
-                              elif MTX[1] > HG and MTX[3] > HG and MTX[7] > HG:  # 3 side test-2 (left)
-                                 change = MTX[0] > HG and MTX[6] > HG
-                              elif MTX[3] > HG and MTX[7] > HG and MTX[5] > HG:  # 3 side test-3 (top)
-                                 change = MTX[6] > HG and MTX[8] > HG
-                              elif MTX[1] > HG and MTX[5] > HG and MTX[7] > HG:  # 3 side test-4 (right)
-                                 change = MTX[2] > HG and MTX[8] > HG
-                              elif MTX[1] > HG and MTX[7] > HG:                  # 2 side test-1 (opposite, vertical)
-                                 change = not(MTX[3] <= HG and MTX[5] <= HG) # horizontal line exception
-                              elif MTX[3] > HG and MTX[5] > HG:                  # 2 side test-2 (opposite, horizontal)
-                                 change = not(MTX[1] <= HG and MTX[7] <= HG) # vertical line exception
-                              else:
-                                 change = False
-                              if change:
-                                 slab["DILFG", l, r, c] = 3
-
-               def OreTraverse_B():
-               # 8-value traverse of the REVISED truncated slab for sulphide mill HG ORE diluted to WASTE
-                  for r in xrange(1,rows-1):
-                     for c in xrange(1,cols-1):
-                        if filter_by_period and not filter_by_period_ar:
-                           PERLT = int(slab["PERLT", l, r, c])
-                           run_calcs = PERLT < 1
-                        else:
-                           run_calcs = True
-                        if run_calcs:
-                           # grab working copies of 3x3 area
-                           # 6 7 8
-                           # 3 4 5
-                           # 0 1 2
-                           MTX[4] = slab["DILFG", l, r, c]
-                           if MTX[4] == 1: # original ore blocks only
-                              MTX[0] = slab["DILFG", l, r-1, c-1]
-                              MTX[1] = slab["DILFG", l, r-1, c]
-                              MTX[2] = slab["DILFG", l, r-1, c+1]
-                              MTX[3] = slab["DILFG", l, r, c-1]
-                              MTX[5] = slab["DILFG", l, r, c+1]
-                              MTX[6] = slab["DILFG", l, r+1, c-1]
-                              MTX[7] = slab["DILFG", l, r+1, c]
-                              MTX[8] = slab["DILFG", l, r+1, c+1]
-                              if MTX[1] > 1 and MTX[3] > 1 and MTX[5] > 1 and MTX[7] > 1:  # 4 side test
-                                 change = True
-                              elif MTX[3] > 1 and MTX[1] > 1 and MTX[5] > 1:  # 3 side test-1 (bottom)
-                                 change = MTX[0] > 1 and MTX[2] > 1
-                              elif MTX[1] > 1 and MTX[3] > 1 and MTX[7] > 1:  # 3 side test-2 (left)
-                                 change = MTX[0] > 1 and MTX[6] > 1
-                              elif MTX[3] > 1 and MTX[7] > 1 and MTX[5] > 1:  # 3 side test-3 (top)
-                                 change = MTX[6] > 1 and MTX[8] > 1
-                              elif MTX[1] > 1 and MTX[5] > 1 and MTX[7] > 1:  # 3 side test-4 (right)
-                                 change = MTX[2] > 1 and MTX[8] > 1
-                              elif MTX[1] > 1 and MTX[7] > 1:                 # 2 side test-1 (opposite, vertical)
-                                 change = not(MTX[3] < 2 and MTX[5] < 2) # horizontal line exception
-                              elif MTX[3] > 1 and MTX[5] > 1:                 # 2 side test-2 (opposite, horizontal)
-                                 change = not(MTX[1] < 2 and MTX[7] < 2) # vertical line exception
-                              else:
-                                 change = False
-                              if change:
-                                 slab["DILFG", l, r, c] = 3
-
-               def OreTraverse_C():
-               # 8-value traverse of the REVISED truncated slab for sulphide mill HG ORE diluted to WASTE
-                  for r in xrange(1,rows-1):
-                     for c in xrange(1,cols-1):
-                        if filter_by_period and not filter_by_period_ar:
-                           PERLT = int(slab["PERLT", l, r, c])
-                           run_calcs = PERLT < 1
-                        else:
-                           run_calcs = True
-                        if run_calcs:
-                           # grab working copies of 3x3 area
-                           # 6 7 8
-                           # 3 4 5
-                           # 0 1 2
-                           MTX[4] = slab["DILFG", l, r, c]
-                           if MTX[4] == 1:  # original ore blocks only
-                              MTX[0] = slab["DILFG", l, r-1, c-1]
-                              MTX[1] = slab["DILFG", l, r-1, c]
-                              MTX[2] = slab["DILFG", l, r-1, c+1]
-                              MTX[3] = slab["DILFG", l, r, c-1]
-                              MTX[5] = slab["DILFG", l, r, c+1]
-                              MTX[6] = slab["DILFG", l, r+1, c-1]
-                              MTX[7] = slab["DILFG", l, r+1, c]
-                              MTX[8] = slab["DILFG", l, r+1, c+1]
-                              if MTX[1] > 1 and MTX[3] > 1 and MTX[5] > 1 and MTX[7] > 1:  # 4 side test
-                                 change = True
-                              elif MTX[3] > 1 and MTX[1] > 1 and MTX[5] > 1:  # 3 side test-1 (bottom)
-                                 change = MTX[0] > 1 or MTX[2] > 1
-                              elif MTX[1] > 1 and MTX[3] > 1 and MTX[7] > 1:  # 3 side test-2 (left)
-                                 change = MTX[0] > 1 or MTX[6] > 1
-                              elif MTX[3] > 1 and MTX[7] > 1 and MTX[5] > 1:  # 3 side test-3 (top)
-                                 change = MTX[6] > 1 or MTX[8] > 1
-                              elif MTX[1] > 1 and MTX[5] > 1 and MTX[7] > 1:  # 3 side test-4 (right)
-                                 change = MTX[2] > 1 or MTX[8] > 1
-                              elif MTX[1] > 1 and MTX[7] > 1:                 # 2 side test-1 (opposite, vertical)
-                                 change = True
-                              elif MTX[3] > 1 and MTX[5] > 1:                 # 2 side test-2 (opposite, horizontal)
-                                 change = True
-                              else:
-                                 change = False
-                              if change:
-                                 slab["DILFG", l, r, c] = 3
-               # -- end of subroutine definitions --
-
-               OreTraverse_A()
-               WasteTraverse_A()
-               OreTraverse_B()
-               WasteTraverse_B()
-               OreTraverse_C()
-               WasteTraverse_B()
-               OreTraverse_C()
-               OreTraverse_C()
-               # == end of DILFG based dilution process ==
-
-               # == DESTD modification based on result of kernel (DILFG) dilution (only on sulphide mill HG ORE) ==
-               for r in xrange(1,rows-1):
-                  for c in xrange(1,cols-1):
-                     if filter_by_period and not filter_by_period_ar:
-                        PERLT = int(slab["PERLT", l, r, c])
-                        run_calcs = PERLT < 1
-                     else:
-                        run_calcs = True
-                     if run_calcs:
-                        if slab["DILFG", l, r, c] <= 0: # non-HG blocks (LG-N, W-PR, SP_OX ...) diluted to be sulphide mill feed (HG)
-                           slab["DESTD", l, r, c] = HG
-                        elif slab["DILFG", l, r, c] >= 3: # HG changed to Waste, default to LG class based on reactivity
-                           WARDC = slab["WARDC", l, r, c]
-                           if WARDC > 0:
-                              slab["DESTD", l, r, c] = LG_N
-                           else:
-                              slab["DESTD", l, r, c] = LG_PR
-               # == end of DESTD modification ==
-
-               # == "salt & pepper" noise reduction for all destination codes, with exceptions in main body of code for HG and W_CV ==
-               # -- DILFG assignment subroutine definitions (applied only to sulphide ore) --
-               def HorseshoeBlocks(replacement,center,l,r,c):
-                  slab["DESTD", l, r, c] = replacement
-                  if center <= LG_N: # sulphide ore being replaced
-                     if replacement <= LG_N: # sulphide ore replaced by sulphide ore
-                        slab["DILFG", l, r, c] = 10
-                     else:                         # sulphide ore replaced by waste
-                        slab["DILFG", l, r, c] = 7
-                  else: # waste being replaced
-                     if replacement <= LG_N: # waste replaced by sulphide ore
-                        slab["DILFG", l, r, c] = 4
-                     else:                         # waste replaced by waste
-                        slab["DILFG", l, r, c] = 13
-
-               def ParallelBlocks(ro,co,replacement,center,l,r,c):
-                  slab["DESTD", l, r, c] = replacement
-                  slab["DESTD", l, r+ro, c+co] = replacement
-                  if center <= LG_N: # sulphide ore being replaced
-                     if replacement <= LG_N: # sulphide ore replaced by sulphide ore
-                        slab["DILFG", l, r, c] = 11
-                        slab["DILFG", l, r+ro, c+co] = 11
-                     else:                         # sulphide ore replaced by waste
-                        slab["DILFG", l, r, c] = 8
-                        slab["DILFG", l, r+ro, c+co] = 8
-                  else: # waste being replaced
-                     if replacement <= LG_N: # waste replaced by sulphide ore
-                        slab["DILFG", l, r, c] = 5
-                        slab["DILFG", l, r+ro, c+co] = 5
-                     else:                         # waste replaced by waste
-                        slab["DILFG", l, r, c] = 14
-                        slab["DILFG", l, r+ro, c+co] = 14
-
-               def CornerBlocks(replacement,center,l,r,c):
-                  slab["DESTD", l, r, c] = replacement
-                  if center <= LG_N: # sulphide feed being replaced
-                     if replacement <= LG_N: # sulphide ore replaced by sulphide ore
-                        slab["DILFG", l, r, c] = 12
-                     else:                         # sulphide ore replaced by waste
-                        slab["DILFG", l, r, c] = 9
-                  else: # waste being replaced
-                     if replacement <= LG_N: # waste replaced by sulphide ore
-                        slab["DILFG", l, r, c] = 6
-                     else:                         # waste replaced by waste
-                        slab["DILFG", l, r, c] = 15
-               # -- end of subroutine definitions --
-
-               for r in xrange(1,rows-1):
-                  for c in xrange(1,cols-1):
-                     if filter_by_period and not filter_by_period_ar:
-                        PERLT = int(slab["PERLT", l, r, c])
-                        run_calcs = PERLT < 1
-                     else:
-                        run_calcs = True
-                     if run_calcs:
-                        # grab working copies of 3x3 area
-                        # 6 7 8
-                        # 3 4 5
-                        # 0 1 2
-                        MTX[0] = slab["DESTD", l, r-1, c-1]
-                        MTX[1] = slab["DESTD", l, r-1, c]
-                        MTX[2] = slab["DESTD", l, r-1, c+1]
-                        MTX[3] = slab["DESTD", l, r, c-1]
-                        MTX[4] = slab["DESTD", l, r, c]
-                        MTX[5] = slab["DESTD", l, r, c+1]
-                        MTX[6] = slab["DESTD", l, r+1, c-1]
-                        MTX[7] = slab["DESTD", l, r+1, c]
-                        MTX[8] = slab["DESTD", l, r+1, c+1]
-
-                        # run multiple block tests in a long if-then-else logic sequence
-
-                        # 1) check for semi-surrounding 5 blocks on a side, i.e. horseshoe shape
-                        if MTX[1]!=MTX[4] and ((MTX[1]==MTX[0] and MTX[1]==MTX[3] and MTX[1]==MTX[6] and MTX[1]==MTX[7]) or (MTX[1]==MTX[2] and MTX[1]==MTX[5] and MTX[1]==MTX[8] and MTX[1]==MTX[7])): # left or right
-                           HorseshoeBlocks(MTX[1],MTX[4],l,r,c)
-                        elif MTX[3]!=MTX[4] and ((MTX[3]==MTX[6] and MTX[3]==MTX[7] and MTX[3]==MTX[8] and MTX[3]==MTX[5]) or (MTX[3]==MTX[0] and MTX[3]==MTX[1] and MTX[3]==MTX[2] and MTX[3]==MTX[5])): # top or bottom
-                           HorseshoeBlocks(MTX[3],MTX[4],l,r,c)
-                        # 2) check for 2 similar block parallel lines; Cover or Mill Feed materials are exceptions in coding
-                        elif MTX[4]==MTX[5] and MTX[7]==MTX[8] and MTX[1]==MTX[2] and MTX[7]!=MTX[4] and MTX[1]!=MTX[4]:  # above and below (horizontal)
-                           if MTX[7]==MTX[1] or MTX[1]==W_CV or MTX[1]==HG:  # same 2 blocks above and below or if bottom 2 blocks are Cover or Mill Feed
-                              ParallelBlocks(0,1,MTX[7],MTX[4],l,r,c)
-                           elif MTX[7]==W_CV or MTX[7]==HG:  # top 2 blocks are Cover or Mill Feed
-                              ParallelBlocks(0,1,MTX[1],MTX[4],l,r,c)
-                           else:
-                              ParallelBlocks(0,1,min(MTX[1],MTX[7]),MTX[4],l,r,c)
-                        elif MTX[4]==MTX[1] and MTX[3]==MTX[0] and MTX[5]==MTX[2] and MTX[3]!=MTX[4] and MTX[5]!=MTX[4]:  # left and right (vertical)
-                           if MTX[3]==MTX[5] or MTX[5]==W_CV or MTX[5]==HG:  # same 2 blocks left and right or if right 2 blocks are Cover or Mill Feed
-                              ParallelBlocks(-1,0,MTX[3],MTX[4],l,r,c)
-                           elif MTX[3]==W_CV or MTX[3]==HG:  # left 2 blocks are Cover or Mill Feed
-                              ParallelBlocks(-1,0,MTX[5],MTX[4],l,r,c)
-                           else:  # pick lowest code of either side
-                              ParallelBlocks(-1,0,min(MTX[3],MTX[5]),MTX[4],l,r,c)
-                        else:
-                           # 3) check for contiguous 3 blocks in a corner; "Ore" and "Cover" materials are exceptions to coding
-                           if MTX[4] > HG:  # do not change Mill Feed blocks if in 3 block set
-                              if MTX[0]==MTX[3] and MTX[0]==MTX[1] and MTX[0]!=W_CV and MTX[0]!=HG:
-                                 cornerCode = MTX[0]
-                              elif MTX[2]==MTX[1] and MTX[2]==MTX[5] and MTX[2]!=W_CV and MTX[2]!=HG:
-                                 cornerCode = MTX[2]
-                              elif MTX[6]==MTX[3] and MTX[6]==MTX[7] and MTX[6]!=W_CV and MTX[6]!=HG:
-                                 cornerCode = MTX[6]
-                              elif MTX[8]==MTX[5] and MTX[8]==MTX[7] and MTX[8]!=W_CV and MTX[8]!=HG:
-                                 cornerCode = MTX[8]
-                              else:
-                                 cornerCode = 0
-                           HGc = MTX.count(HG)
-                           LG_Nc = MTX.count(LG_N)
-                           LG_PRc = MTX.count(LG_PR)
-                           W_PRc = MTX.count(W_PR)
-                           W_Nc = MTX.count(W_N)
-                           W_CNc = MTX.count(W_CN)
-                           W_CVc = MTX.count(W_CV)
-                           SP_OXc = MTX.count(SP_OX)
-                           SP_WXc = MTX.count(SP_WX)
-                           # find most common code, but disregard Cover waste
-                           if HGc >= max(LG_Nc, LG_PRc, W_PRc, W_Nc, W_CNc, SP_OXc, SP_WXc):
-                              mostCode = HG
-                           elif LG_PRc >= max(HGc, LG_Nc, W_PRc, W_Nc, W_CNc, SP_OXc, SP_WXc):
-                              mostCode = LG_PR
-                           elif LG_Nc >= max(HGc, LG_PRc, W_PRc, W_Nc, W_CNc, SP_OXc, SP_WXc):
-                              mostCode = LG_N
-                           elif W_PRc >= max(HGc, LG_Nc, LG_PRc, W_Nc, W_CNc, SP_OXc, SP_WXc):
-                              mostCode = W_PR
-                           elif W_Nc >= max(HGc, LG_Nc, LG_PRc, W_PRc, W_CNc, SP_OXc, SP_WXc):
-                              mostCode = W_N
-                           elif W_CNc >= max(HGc, LG_Nc, LG_PRc, W_PRc, W_Nc, SP_OXc, SP_WXc):
-                              mostCode = W_CN
-                           elif SP_OXc >= max(HGc, LG_Nc, LG_PRc, W_PRc, W_Nc, W_CNc, SP_WXc):
-                              mostCode = SP_OX
-                           elif SP_WXc >= max(HGc, LG_Nc, LG_PRc, W_PRc, W_Nc, W_CNc, SP_OXc):
-                              mostCode = SP_WX
-                           else:
-                              mostCode = 0
-                           if mostCode > 0: # implement single or two block based change
-                              if MTX[4] == LG_N:
-                                 if LG_Nc <= 2 or (LG_Nc == 3 and (MTX[0] == LG_N or MTX[2] == LG_N or MTX[6] == LG_N or MTX[8] == LG_N)):
-                                    CornerBlocks(max(mostCode,cornerCode),MTX[4],l,r,c)
-                              elif MTX[4] == LG_PR:
-                                 if LG_PRc <= 2 or (LG_PRc == 3 and (MTX[0] == LG_PR or MTX[2] == LG_PR or MTX[6] == LG_PR or MTX[8] == LG_PR)):
-                                    CornerBlocks(max(mostCode,cornerCode),MTX[4],l,r,c)
-                              elif MTX[4] == W_PR:
-                                 if W_PRc <= 2 or (W_PRc == 3 and (MTX[0] == W_PR or MTX[2] == W_PR or MTX[6] == W_PR or MTX[8] == W_PR)):
-                                    CornerBlocks(max(mostCode,cornerCode),MTX[4],l,r,c)
-                              elif MTX[4] == W_N:
-                                 if W_Nc <= 2 or (W_Nc == 3 and (MTX[0] == W_N or MTX[2] == W_N or MTX[6] == W_N or MTX[8] == W_N)):
-                                    CornerBlocks(max(mostCode,cornerCode),MTX[4],l,r,c)
-                              elif MTX[4] == W_CN:
-                                 if W_CNc <= 2 or (W_CNc == 3 and (MTX[0] == W_CN or MTX[2] == W_CN or MTX[6] == W_CN or MTX[8] == W_CN)):
-                                    CornerBlocks(max(mostCode,cornerCode),MTX[4],l,r,c)
-                              elif MTX[4] == W_CV:
-                                 if W_CVc <= 2 or (W_CVc == 3 and (MTX[0] == W_CV or MTX[2] == W_CV or MTX[6] == W_CV or MTX[8] == W_CV)):
-                                    CornerBlocks(max(mostCode,cornerCode),MTX[4],l,r,c)
-                              elif MTX[4] == SP_OX:
-                                 if SP_OXc <= 2 or (SP_OXc == 3 and (MTX[0] == SP_OX or MTX[2] == SP_OX or MTX[6] == SP_OX or MTX[8] == SP_OX)):
-                                    CornerBlocks(max(mostCode,cornerCode),MTX[4],l,r,c)
-                              elif MTX[4] == SP_WX:
-                                 if SP_WXc <= 2 or (SP_WXc == 3 and (MTX[0] == SP_WX or MTX[2] == SP_WX or MTX[6] == SP_WX or MTX[8] == SP_WX)):
-                                    CornerBlocks(max(mostCode,cornerCode),MTX[4],l,r,c)
-
-               # repeat test #3, Blocks in Corner, over changed DESTD codes; "Ore" and "Cover" materials are exceptions to coding
-               for r in xrange(1,rows-1):
-                  for c in xrange(1,cols-1):
-                     if filter_by_period and not filter_by_period_ar:
-                        PERLT = int(slab["PERLT", l, r, c])
-                        run_calcs = PERLT < 1
-                     else:
-                        run_calcs = True
-                     if run_calcs:
-                        # grab working copies of 3x3 area
-                        # 6 7 8
-                        # 3 4 5
-                        # 0 1 2
-                        MTX[0] = slab["DESTD", l, r-1, c-1]
-                        MTX[1] = slab["DESTD", l, r-1, c]
-                        MTX[2] = slab["DESTD", l, r-1, c+1]
-                        MTX[3] = slab["DESTD", l, r, c-1]
-                        MTX[4] = slab["DESTD", l, r, c]
-                        MTX[5] = slab["DESTD", l, r, c+1]
-                        MTX[6] = slab["DESTD", l, r+1, c-1]
-                        MTX[7] = slab["DESTD", l, r+1, c]
-                        MTX[8] = slab["DESTD", l, r+1, c+1]
-                        if MTX[4] > HG:  # do not change Mill Feed blocks if in 3 block set
-                           if MTX[0]==MTX[3] and MTX[0]==MTX[1] and MTX[0]!=W_CV and MTX[0]!=HG:
-                              cornerCode = MTX[0]
-                           elif MTX[2]==MTX[1] and MTX[2]==MTX[5] and MTX[2]!=W_CV and MTX[2]!=HG:
-                              cornerCode = MTX[2]
-                           elif MTX[6]==MTX[3] and MTX[6]==MTX[7] and MTX[6]!=W_CV and MTX[6]!=HG:
-                              cornerCode = MTX[6]
-                           elif MTX[8]==MTX[5] and MTX[8]==MTX[7] and MTX[8]!=W_CV and MTX[8]!=HG:
-                              cornerCode = MTX[8]
-                           else:
-                              cornerCode = 0
-                        HGc = MTX.count(HG)
-                        LG_Nc = MTX.count(LG_N)
-                        LG_PRc = MTX.count(LG_PR)
-                        W_PRc = MTX.count(W_PR)
-                        W_Nc = MTX.count(W_N)
-                        W_CNc = MTX.count(W_CN)
-                        W_CVc = MTX.count(W_CV)
-                        SP_OXc = MTX.count(SP_OX)
-                        SP_WXc = MTX.count(SP_WX)
-                        # find most common code, but disregard Cover waste
-                        if HGc >= max(LG_Nc, LG_PRc, W_PRc, W_Nc, W_CNc, SP_OXc, SP_WXc):
-                           mostCode = HG
-                        elif LG_PRc >= max(HGc, LG_Nc, W_PRc, W_Nc, W_CNc, SP_OXc, SP_WXc):
-                           mostCode = LG_PR
-                        elif LG_Nc >= max(HGc, LG_PRc, W_PRc, W_Nc, W_CNc, SP_OXc, SP_WXc):
-                           mostCode = LG_N
-                        elif W_PRc >= max(HGc, LG_Nc, LG_PRc, W_Nc, W_CNc, SP_OXc, SP_WXc):
-                           mostCode = W_PR
-                        elif W_Nc >= max(HGc, LG_Nc, LG_PRc, W_PRc, W_CNc, SP_OXc, SP_WXc):
-                           mostCode = W_N
-                        elif W_CNc >= max(HGc, LG_Nc, LG_PRc, W_PRc, W_Nc, SP_OXc, SP_WXc):
-                           mostCode = W_CN
-                        elif SP_OXc >= max(HGc, LG_Nc, LG_PRc, W_PRc, W_Nc, W_CNc, SP_WXc):
-                           mostCode = SP_OX
-                        elif SP_WXc >= max(HGc, LG_Nc, LG_PRc, W_PRc, W_Nc, W_CNc, SP_OXc):
-                           mostCode = SP_WX
-                        else:
-                           mostCode = 0
-                        if mostCode > 0: # implement single or two block based change
-                           if MTX[4] == LG_N:
-                              if LG_Nc <= 2 or (LG_Nc == 3 and (MTX[0] == LG_N or MTX[2] == LG_N or MTX[6] == LG_N or MTX[8] == LG_N)):
-                                 CornerBlocks(max(mostCode,cornerCode),MTX[4],l,r,c)
-                           elif MTX[4] == LG_PR:
-                              if LG_PRc <= 2 or (LG_PRc == 3 and (MTX[0] == LG_PR or MTX[2] == LG_PR or MTX[6] == LG_PR or MTX[8] == LG_PR)):
-                                 CornerBlocks(max(mostCode,cornerCode),MTX[4],l,r,c)
-                           elif MTX[4] == W_PR:
-                              if W_PRc <= 2 or (W_PRc == 3 and (MTX[0] == W_PR or MTX[2] == W_PR or MTX[6] == W_PR or MTX[8] == W_PR)):
-                                 CornerBlocks(max(mostCode,cornerCode),MTX[4],l,r,c)
-                           elif MTX[4] == W_N:
-                              if W_Nc <= 2 or (W_Nc == 3 and (MTX[0] == W_N or MTX[2] == W_N or MTX[6] == W_N or MTX[8] == W_N)):
-                                 CornerBlocks(max(mostCode,cornerCode),MTX[4],l,r,c)
-                           elif MTX[4] == W_CN:
-                              if W_CNc <= 2 or (W_CNc == 3 and (MTX[0] == W_CN or MTX[2] == W_CN or MTX[6] == W_CN or MTX[8] == W_CN)):
-                                 CornerBlocks(max(mostCode,cornerCode),MTX[4],l,r,c)
-                           elif MTX[4] == W_CV:
-                              if W_CVc <= 2 or (W_CVc == 3 and (MTX[0] == W_CV or MTX[2] == W_CV or MTX[6] == W_CV or MTX[8] == W_CV)):
-                                 CornerBlocks(max(mostCode,cornerCode),MTX[4],l,r,c)
-                           elif MTX[4] == SP_OX:
-                              if SP_OXc <= 2 or (SP_OXc == 3 and (MTX[0] == SP_OX or MTX[2] == SP_OX or MTX[6] == SP_OX or MTX[8] == SP_OX)):
-                                 CornerBlocks(max(mostCode,cornerCode),MTX[4],l,r,c)
-                           elif MTX[4] == SP_WX:
-                              if SP_WXc <= 2 or (SP_WXc == 3 and (MTX[0] == SP_WX or MTX[2] == SP_WX or MTX[6] == SP_WX or MTX[8] == SP_WX)):
-                                 CornerBlocks(max(mostCode,cornerCode),MTX[4],l,r,c)
-               # == end "salt & pepper" noise reduction ==
-
-               # == DILFG reset (only on HG & LG_N) ==
-               # reset DILFG if, after all of the above, it flip-flopped back and forth from what it originally was and is effectively now unchanged
-               # NOTE: after this adjustment DILFG will still not exactly match R&R classification as dilution is of HG (only) using all RESCL, but REPORTABLE ores is based on MI&I only
-               for r in xrange(rows):
-                  for c in xrange(cols):
-                     if filter_by_period and not filter_by_period_ar:
-                        PERLT = int(slab["PERLT", l, r, c])
-                        run_calcs = PERLT < 1
-                     else:
-                        run_calcs = True
-                     if run_calcs:
-                        DESTD = slab["DESTD", l, r, c]
-                        DESTC = slab["DESTC", l, r, c]
-                        if DESTD == DESTC:
-                           if DESTD <= LG_N or DESTD >= SP_OX: # reportable sulphide, oxide, or weathered ores
-                              slab["DILFG", l, r, c] = 1  # reset to unchanged REPORTABLE ores
-                           else:
-                              slab["DILFG", l, r, c] = 2  # unchanged as Waste
-                        elif DESTD == LG_N: # exception for retagging LG sulphide ores considered Waste
-                           DILFG = slab["DILFG", l, r, c]
-                           if DILFG == 3:
-                              slab["DILFG", l, r, c] = 0  # sulphide mill feed from Waste (LG)
-               # == end DILFG reset ==
-
-               # == DESTR assignment ==
-               # sets DESTR based on DEST and, if DEST is a diluted value, resets DILFG for non-MI&I blocks so that DILFG and DESTR classifications will exactly match
-               for r in xrange(rows):
-                  for c in xrange(cols):
-                     if filter_by_period and not filter_by_period_ar:
-                        PERLT = int(slab["PERLT", l, r, c])
-                        run_calcs = PERLT < 1
-                     else:
-                        run_calcs = True
-                     if run_calcs:
-                        DEST = slab[DESTname, l, r, c]
-                        RESCL = slab["RESCL", l, r, c]
-                        if DEST <= HG:  # HG sulphide mill feed
-                           if RESCL <= 2:
-                              slab["DESTR", l, r, c] = 1  # Measured & Indicated
-                           elif RESCL <= 3:
-                              slab["DESTR", l, r, c] = 2  # Inferred
-                           else:  # HG sulphide mill feed reclassified to Waste
-                              slab["DESTR", l, r, c] = 11
-                              if DESTRdiluted:
-                                 slab["DILFG", l, r, c] = 16  # dilution from R&R criteria
-                        elif DEST <= LG_N: # Low Grade Non-reactive Stockpile
-                           if RESCL <= 2:
-                              slab["DESTR", l, r, c] = 3  # Measured & Indicated
-                           elif RESCL <= 3:
-                              slab["DESTR", l, r, c] = 4  # Inferred
-                           else:  # LG sulphide mill stockpile reclassified to Waste
-                              slab["DESTR", l, r, c] = 11
-                              if DESTRdiluted:
-                                 slab["DILFG", l, r, c] = 16  # dilution from R&R criteria
-                        elif DEST <= LG_PR: # Low Grade Possibly Reactive (not stockpileable)
-                           if RESCL <= 2:
-                              slab["DESTR", l, r, c] = 5  # Measured & Indicated
-                           elif RESCL <= 3:
-                              slab["DESTR", l, r, c] = 6  # Inferred
-                           else:  # LG possibly reactive reclassified to Waste
-                              slab["DESTR", l, r, c] = 12
-                              if DESTRdiluted:
-                                 slab["DILFG", l, r, c] = 17  # dilution from R&R criteria
-                        elif DEST >= SP_WX: # Weathered
-                           if RESCL <= 2:
-                              slab["DESTR", l, r, c] = 9  # Measured & Indicated
-                           elif RESCL <= 3:
-                              slab["DESTR", l, r, c] = 10  # Inferred
-                           else:  # oxide mill feed reclassified to Waste
-                              slab["DESTR", l, r, c] = 14
-                              if DESTRdiluted:
-                                 slab["DILFG", l, r, c] = 19  # dilution from R&R criteria
-                        elif DEST >= SP_OX: # Oxide ore
-                           if RESCL <= 2:
-                              slab["DESTR", l, r, c] = 7  # Measured & Indicated
-                           elif RESCL <= 3:
-                              slab["DESTR", l, r, c] = 8  # Inferred
-                           else:  # oxide mill feed reclassified to Waste
-                              slab["DESTR", l, r, c] = 13
-                              if DESTRdiluted:
-                                 slab["DILFG", l, r, c] = 18  # dilution from R&R criteria
-                        else:  # remainder are always waste classes for R&R
-                           slab["DESTR", l, r, c] = 0
-               # == end DESTR assignment ==
-
-               # == DESTx reclassification ==
-               # filter the DESTx code based on resource classification (RESCL)
-               if filterDEST > 0:  # DESTx filtering is set
-                  RESCLlimit = filterDEST + 1
-                  # filterDEST=1 => RESCLlimit=2 => M&I => Ore in Inferred, Blue Sky, and Beyond-the-Sea reserve classes is considered Waste (typically for scheduling R&R production)
-                  # filterDEST=2 => RESCLlimit=3 => MI&I => Ore only in Blue Sky and Beyond-the-Sea reserve classes is considered Waste (typically for reporting R&R)
-                  for r in xrange(rows):
-                     for c in xrange(cols):
-                        if filter_by_period and not filter_by_period_ar:
-                           PERLT = int(slab["PERLT", l, r, c])
-                           run_calcs = PERLT < 1
-                        else:
-                           run_calcs = True
-                        if run_calcs:
-                           RESCL = slab["RESCL", l, r, c]
-                           if RESCL > RESCLlimit: # only reclassify blocks of lower quality
-                              if DESTRdiluted: # use DESTD and DESTC items
-                                 DESTD = slab["DESTD", l, r, c]
-                                 if DESTD <= LG_PR or DESTD >= SP_OX: # reclassify HG, LG-N, and LG-PR for sulphide mill and all oxide/weathered for secondary mill (whether exists or not)
-                                    DESTC = slab["DESTC", l, r, c]
-                                    if DESTC <= LG_PR or DESTC >= SP_OX:
-                                       if WARDC <= 0: # 0 is possibly reactive
-                                          slab["DESTD", l, r, c] = W_PR
-                                       else:
-                                          slab["DESTD", l, r, c] = W_N
-                                    else:  # originally classified a waste class, so replace with original waste class
-                                       slab["DESTD", l, r, c] = DESTC
-                              else: # use DESTC item only
-                                 DESTC = slab["DESTC", l, r, c]
-                                 if DESTC <= LG_PR or DESTC >= SP_OX: # reclassify HG, LG-N, and LG-PR for sulphide mill and all oxide/weathered for secondary mill (whether exists or not)
-                                    if WARDC <= 0: # 0 is possibly reactive
-                                       slab["DESTC", l, r, c] = W_PR
-                                    else:
-                                       slab["DESTC", l, r, c] = W_N
-               # == end DEST reclassification ==
-
-               # == Concentrate calculations based on DESTx and redo of OPCST and VALS calculations for diluted values  ==
-               for r in xrange(rows):
-                  for c in xrange(cols):
-                     if filter_by_period and not filter_by_period_ar:
-                        PERLT = int(slab["PERLT", l, r, c])
-                        run_calcs = PERLT < 1
-                     else:
-                        run_calcs = True
-                     if run_calcs:
-                        GEOL = slab["GEOL", l, r, c]
-                        DEST = slab[DESTname, l, r, c]
-                        if GEOL > Air: # not in air
-                           # calculate concentrate and tailings tonnages for block
-                           STZN = slab["STZN", l, r, c]
-                           STPB = slab["STPB", l, r, c]
-                           ODENM = slab["ODENM", l, r, c]
-                           TonnesPerBlock = blockVolume*ODENM  # NOTE this is not adjusted by topo, will be taken care of by partials file
-                           if DEST < SP_OX or DEST > SP_WX: # Sulfide (most destinations); includes MG
-                              ZNREC = slab["ZNREC", l, r, c]
-                              ZNGRD = slab["ZNGRD", l, r, c]
-                              workZNCON = (STZN * ZNREC / ZNGRD)/100.0
-                              PBREC = slab["PBREC", l, r, c]
-                              PBGRD = slab["PBGRD", l, r, c]
-                              workPBCON = (STPB * PBREC / PBGRD)/100.0
-                           elif DEST >= SP_WX: # Weathered High Zn-Cu; MG selected above
-                              ZNRWX = slab["ZNRWX", l, r, c]
-                              ZNGWX = slab["ZNGWX", l, r, c]
-                              workZNCON = (STZN * ZNRWX / ZNGWX)/100.0 # Zn basis for total Bulk Concentrate
-                              workPBCON = 0.0
-                           else: # DEST = SP_OX, i.e. Oxide High Pb-Ag
-                              workZNCON = 0.0
-                              PBROX = slab["PBROX", l, r, c]
-                              PBGOX = slab["PBGOX", l, r, c]
-                              workPBCON = (STPB * PBROX / PBGOX)/100.0
-                           # concentrate and tailings tonnages
-                           workZNCON = workZNCON * TonnesPerBlock
-                           workPBCON = workPBCON * TonnesPerBlock
-                           workTAILS = TonnesPerBlock - workZNCON - workPBCON
-
-                           # rewrite OPCST and VALS for diluted blocks
-                           if DESTRdiluted:
-                              DESTD = slab["DESTD", l, r, c]
-                              DESTC = slab["DESTC", l, r, c]
-                              if DESTD != DESTC:
-                                 MPT = slab["MPT", l, r, c] # min/t
-                                 TPH = 60.0/MPT             # t/hr
-                                 TPS = 1.0 / (MPT * 60.0)   # t/sec
-                                 if (DESTC == LG_N and DESTD == HG) or (DESTC == HG and DESTD == LG_N):
-                                    rewriteOPCST = True
-                                    VALS = slab[VALSitem, l, r, c]
-                                    OpCost = slab["OPCST", l, r, c]
-                                    if DESTC == LG_N:
-                                       OPCST_value = OpCost - rehandle_cost
-                                       VALS_value = VALS + rehandle_cost * TPS
-                                    else:  # DESTC == HG
-                                       OPCST_value = OpCost + rehandle_cost
-                                       VALS_value = VALS - rehandle_cost * TPS
-                                 elif isQanaiyaq and (DESTC >= SP_OX and DESTD < SP_OX) or (DESTC < SP_OX and DESTD >= SP_OX):
-                                    rewriteOPCST = True
-                                    d = int(slab["DEP", l, r, c] - 1) # array index starts at 0
-                                    SEsag = slab["SESAG", l, r, c]
-                                    SEbm = slab["SEBM", l, r, c]
-                                    if DESTD < SP_OX:
-                                       AMR_TA = slab[VALTitem, l, r, c]
-                                    elif DESTD >= SP_WX:
-                                       AMR_TA = slab[VLTWitem, l, r, c]
-                                    else: # == SP_OX
-                                       AMR_TA = slab[VLTOitem, l, r, c]
-                                    # calculate operating cost escalators and base operating cost ($/t)
-                                    powerEsc = (SEsag + SEbm - averagePower) * powerCost  # grinding power cost escalator, (+) is increased cost
-                                    throughputEsc = comminutionCost[d]*(averageTPH[d]/TPH - 1)  # throughput rate cost escalator, (+) is increased cost
-                                    haulEsc = max((haulIncrBench[d] - b) * -haulIncrLU, (haulIncrBench[d] - b) * haulIncrLD)  # haulage cost adjustment above/below median bench (either direction an increase); (+) is increased cost; technically should not be included in $/s calc, but not large and easier to compute here than in MSSO
-                                    OpCost_mill_noTails = haulEsc + (mill_cost[d] + powerEsc + throughputEsc) + indirect_cost/TPH
-                                    # calculate 100% Tails operating cost and Mill cutoff ($/t)
-                                    OpCost_mill_TA = OpCost_mill_noTails + tailsCostPerTonne # as 100% tailings
-                                    MillCO_TA = OpCost_mill_TA + mine_ore_cost[d] - mine_waste_cost[d]
-                                    # calculate $/s
-                                    VALS_TA = (AMR_TA - MillCO_TA) * TPS  # $/sec for block for direct mill feed
-                                    # set and rewrite VALS and OPCST items
-                                    if DESTD == LG_N or DESTD >= SP_OX:  # set model values including rehandle cost
-                                       OPCST_value = OpCost_mill_TA + rehandle_cost
-                                       VALS_value = VALS_TA - rehandle_cost * TPS
-                                    else:  # set model values default
-                                       OPCST_value = OpCost_mill_TA
-                                       VALS_value = VALS_TA
-                                 else:
-                                    rewriteOPCST = False
-                                 # overwrite VALS and OPCST items if required
-                                 if rewriteOPCST:
-                                    slab[VALSitem, l, r, c] = VALS_value
-                                    slab["OPCST", l, r, c] = OPCST_value
-
-                           # assign MG blocks, if any
-                           isMGO = slab["FLAG2", l, r, c] # used temporarily as boolean for MG possibility flag
-                           if isMGO:
-                              WARDC = slab["WARDC", l, r, c]
-                              if WARDC > 0:
-                                 MGO = MG_N
-                              else:
-                                 MGO = MG_PR
-                              slab["DESTC", l, r, c] = MGO
-                              if DESTRdiluted:
-                                 DESTD = slab["DESTD", l, r, c]
-                                 if DESTD == HG:
-                                    slab["DESTD", l, r, c] = MGO
-                                    DEST = MGO
-                              else:
-                                 slab["DESTD", l, r, c] = MGO
-                                 DEST = MGO
-                        else: # in Air
-                           workZNCON = 0.0
-                           workPBCON = 0.0
-                           workTAILS = 0.0
 
-                        # write revised values
-                        slab["ZNCON", l, r, c] = workZNCON
-                        slab["PBCON", l, r, c] = workPBCON
-                        slab["TAILS", l, r, c] = workTAILS
-                        # == end Concentrate calculations ==
-
-                        # == Blastability Class ==
-                        d = int(slab["DEP", l, r, c] - 1) # array index starts at 0
-                        if GEOL in Construction[d]:
-                           BAC = 1
-                        elif GEOL in Black_Shale[d]:
-                           BAC = 2
-                        elif GEOL in Baritic[d]:
-                           if DEST >= W_PR and DEST <= SP_WX: # waste
-                              BAC = 3
-                           else: # ore
-                              BAC = 4
-                        elif GEOL in Non_Baritic[d]:
-                           STFE = slab["STFE", l, r, c]
-                           if DEST <= LG_PR or DEST >= MG_N: # ore
-                              if STFE <= 20: # lower iron
-                                 BAC = 5
-                              else: # higher iron
-                                 BAC = 6
-                           else: # waste
-                              BAC = 7
-                        else:
-                           BAC = 0 # not otherwise classified
-                        slab["BAC", l, r, c] = BAC
-                        # == end Blastability Class ==
-
-                        # == ORCT4 filtering based on DEST ==
-                        if GEOL > Air: # not in the air
-                           if DEST >= LG_N: # all classes except Direct Mill Feed
-                              ORCT4 = DEST + 18  # set all non-mill feed destinations to DEST code + 18, e.g. LG_N=2 becomes ORCT4=20, etc
-                           else: # DEST = HG
-                              ORCT2 = slab["ORCT2", l, r, c]
-                              if ORCT2 >= 5 and ORCT2 != 8: # Shales
-                                 ORCT4 = 0
-                              elif STZN < 15: # low zinc grade
-                                 if ORCT2 <= 1: # Exhalite
-                                    ORCT4 = 1
-                                 elif ORCT2 <= 2: # Weathered
-                                    ORCT4 = 4
-                                 elif ORCT2 <= 3: # Baritic
-                                    ORCT4 = 7
-                                 elif ORCT2 <= 4: # Iron-rich
-                                    ORCT4 = 10
-                                 else: # ORCT2 = 8, # Veined
-                                    ORCT4 = 13
-                              elif STZN >= 25: # high zinc grade
-                                 if ORCT2 <= 1: # Exhalite
-                                    ORCT4 = 3
-                                 elif ORCT2 <= 2: # Weathered
-                                    ORCT4 = 6
-                                 elif ORCT2 <= 3: # Baritic
-                                    ORCT4 = 9
-                                 elif ORCT2 <= 4: # Iron-rich
-                                    ORCT4 = 12
-                                 else: # ORCT2 = 8, # Veined
-                                    ORCT4 = 15
-                              else: # medium zinc grade
-                                 if ORCT2 <= 1: # Exhalite
-                                    ORCT4 = 2
-                                 elif ORCT2 <= 2: # Weathered
-                                    ORCT4 = 5
-                                 elif ORCT2 <= 3: # Baritic
-                                    ORCT4 = 8
-                                 elif ORCT2 <= 4: # Iron-rich
-                                    ORCT4 = 11
-                                 else: # ORCT2 = 8, # Veined
-                                    ORCT4 = 14
-                        else: # in air
-                           ORCT4 = model.UNDEFINED
-                        slab["ORCT4", l, r, c] = ORCT4
-                        # == end ORCT4 filtering ==
-
-            m.storeslab()
-            m.free()
-         print "  Done"
-   # if executes completely, remove and rewrite last line
-   PyLogFile.close
-   PyLogFile = open(PythonLog,"r")
-   fileContents = PyLogFile.readlines()
-   fileContents = fileContents[:-1] # remove last line of file
-   PyLogFile.close
-   PyLogFile = open(PythonLog,"w")
-   for item in fileContents: # rewrites file content from list
-      PyLogFile.write("%s" % item)
+   # calculate benches, in a pool of worker processes if benchWorkers is not 1; messages are written in bench order
+   profile = Profile_QAN.RunProfile(projdir, PROC_TITLE, profileRun, journal.runId)
+   outcome = BenchPool_QAN.BenchOutcome(PROC_TITLE, minLevel)
+   def ReportBench(result):
+      benchMessages, benchProfile = result
+      BenchPool_QAN.ReportMessages(benchMessages, PyLogFile)
+      outcome.Report(benchMessages)
+      profile.Add(benchProfile)
+   if len(sweepDecks) > 0: # cutoff sweep, bench summaries added together
+      sweepSummary = {}
+      def ReportSweepBench(result):
+         benchMessages, summary, benchProfile = result
+         BenchPool_QAN.ReportMessages(benchMessages, PyLogFile)
+         outcome.Report(benchMessages)
+         profile.Add(benchProfile)
+         for key in summary:
+            if key not in sweepSummary:
+               sweepSummary[key] = [0.0, 0.0, 0.0, 0.0, 0.0]
+            for k in xrange(5):
+               sweepSummary[key][k] += summary[key][k]
+      benchArgs = [(pcfpath, file15.get(), b, minRow, maxRow, minColumn, maxColumn, itemlist, blockVolume, isQanaiyaq, VALTitem, VLTOitem, VLTWitem,
+                    millingOption, sweepDecks, filter_by_period, filter_by_period_ar, profileRun) for b in xrange(minLevel,maxLevel+1)]
+      benchPass = (DestSweepBench, benchArgs, ReportSweepBench)
+   else:
+      benchArgs = [(pcfpath, file15.get(), b, minRow, maxRow, minColumn, maxColumn, itemlist, blockVolume, isQanaiyaq, VALTitem, VALSitem, VALBitem, VLTOitem, VLTWitem,
+                    millingOption, DPScutoff, DPScutoffMG, DPScutoffLG, DESTRdiluted, DESTname, VALBtype, filterDEST, filter_by_period, filter_by_period_ar, valbRuns, profileRun) for b in xrange(minLevel,maxLevel+1)]
+      benchPass = (DestBench, benchArgs, ReportBench)
+   try:
+      yield benchPass
+      outcome.Check()
+   except: # bench pass failed, benches of it failed, or its run stopped (close() of this stage)
+      PyLogFile.write("Failed!\n")
+      PyLogFile.close()
+      journal.End("Failed")
+      raise
+   if len(sweepDecks) > 0:
+      sweepFile = open(projdir+"\\"+cutoffSweepFile,"w")
+      sweepFile.write("DPSCUTOFF,DPSCUTOFFMG,DPSCUTOFFLG,DESTC,RESCL,TONNES,ZNCON,PBCON,GRIND_HRS,VALUE\n")
+      for key in sorted(sweepSummary):
+         deck, DESTC, RESCL = key
+         sweepFile.write("%.2f,%.2f,%.2f,%d,%d,%.1f,%.1f,%.1f,%.2f,%.0f\n" % (sweepDecks[deck] + (DESTC, RESCL) + tuple(sweepSummary[key])))
+      sweepFile.close()
+   msgText = profile.Write()
+   if msgText != '':
+      print msgText
+      PyLogFile.write(msgText)
+   # executed completely; the run log and run journal are only appended to, the run's lines together (those of the other stages of a fused
+   # run or of runs in parallel before or after them)
    PyLogFile.write("Executed OK\n")
-   PyLogFile.close
+   PyLogFile.close()
+   journal.End("OK")
 
 #==============================================================================
 # Procedure Entry Points
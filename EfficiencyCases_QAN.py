@@ -0,0 +1,184 @@
+#==============================================================================
+# Efficiency cases of ModelCalcs without a run: TPH, MPT and Zn recoveries rescaled from the efficiency basis written by its last run
+#==============================================================================
+
+# usage: python EfficiencyCases_QAN.py <project .pcf> <model file> <ModelCalcs script> [parameter file ...] [name=value ...]
+#   e.g. python EfficiencyCases_QAN.py C:\MSProjects\QAN\msqan.pcf qan15.dat ModelCalcs_24.52.7_QAN.py efficiencyCases=[('PTV150',1.04,1.01),('PTV500',1.09,1.022)]
+#        python EfficiencyCases_QAN.py C:\MSProjects\QAN\msqan.pcf qan15.dat ModelCalcs_24.52.7_QAN.py efficiency_sweep.txt
+# A ModelCalcs run with the array engine and efficiencyBasisFile named writes the efficiency basis in the project folder, e.g.
+#   python BatchRun_QAN.py ModelCalcs_24.52.7_QAN.py C:\MSProjects\QAN\msqan.pcf qan15.dat efficiencyBasisFile=ModelCalcs_efficiency_basis.csv
+# for each block with geology its tonnes, the SAG and ball mill throughput before the grinding circuit efficiency (TPH_eff) and, for blocks
+# with metallurgy, the recovery inputs and the zinc recovery models before the zinc recovery efficiency (ZnRec_eff); its first line has
+# the model file and benches of the run, which must be the model file and all benches of the project. The efficiency cases of the script
+# (efficiencyCases, each (name, TPH_eff, ZnRec_eff)) are calculated from it by the script's EfficiencyArrays and RecoveryArrays, with the
+# highTPH limit and the recovery limits, without opening the model or running the bench loop, so a sweep of many pairs takes seconds.
+# name=value and parameter files set the script's constants as for its batch run (BatchRun_QAN); apart from efficiencyCases they must be
+# those of the run that wrote the basis (efficiencyBasisFile, basisFile below if the script names none).
+# The cases are written to efficiencyCaseFile in the project folder, with the columns of the efficiency cases of a run (TPH, MPT and the
+# zinc recovery dependent items of each case), and the grinding hours and the mean zinc recovery (tonnes weighted) of each case are
+# printed. The model and the basis are only read.
+
+import sys
+import os
+import time
+
+try: # needed for the efficiency cases
+   import numpy
+except ImportError:
+   numpy = None
+
+import BatchRun_QAN
+import RunJournal_QAN
+
+#==============================================================================
+# Version Information
+#==============================================================================
+
+# Oct 18, 2026 - v1.0.0: efficiency cases rescaled from the efficiency basis of a ModelCalcs run, written as its efficiency case file
+# Oct 18, 2026 - v1.0.1: basis checked to be of the model file and all benches of the project (its first line), project files by
+#                        RunJournal_QAN.ProjectFile as the run writes them
+# Oct 18, 2026 - v1.0.2: script parameters set by BatchRun_QAN.SetParameters, so the constants derived from them are calculated again
+
+#==============================================================================
+# Constants
+#==============================================================================
+
+positionColumns = ["BENCH", "ROW", "COLUMN"]
+basisFile = "ModelCalcs_efficiency_basis.csv" # efficiency basis if the script names none (efficiencyBasisFile '')
+
+#==============================================================================
+# Efficiency Functions
+#==============================================================================
+
+# fields of the first line of an efficiency basis (ModelCalcs EfficiencyBasisTag), {name: value}; empty if it has none
+def BasisTag(line):
+   if not line.startswith("# efficiency basis"):
+      return {}
+   return dict([field.strip().split('=', 1) for field in line.split(';') if '=' in field])
+
+# Efficiency basis of a ModelCalcs run, for a loaded ModelCalcs script with its constants set: the basis is read once, and
+# Values(tphEff, znRecEff) are the TPH, MPT and efficiency items of its blocks for the efficiencies of a case
+class EfficiencyRescale(object):
+
+   def __init__(self, script, basisPath):
+      self.script = script
+      openFile = open(basisPath, "r")
+      self.tag = BasisTag(openFile.readline().strip())
+      header = openFile.readline().strip().split(',')
+      openFile.close()
+      if len(self.tag) == 0:
+         raise ValueError("%s is not an efficiency basis, it has no model and benches line" % (basisPath))
+      missing = [name for name in positionColumns + script.efficiencyBasisColumns + script.efficiencyItems if name not in header]
+      if len(missing) > 0:
+         raise ValueError("%s is not an efficiency basis of %s, it has no %s columns" % (basisPath, script.PROC_TITLE, ', '.join(missing)))
+      self.isQanaiyaq = script.efficiencyItemsQan[0] in header
+      self.items = script.efficiencyItems + self.isQanaiyaq*script.efficiencyItemsQan
+      columns = numpy.loadtxt(basisPath, delimiter=",", skiprows=2, ndmin=2)
+      if len(columns) == 0:
+         raise ValueError("%s has no blocks, ModelCalcs has not been run with the array engine" % (basisPath))
+      column = dict(zip(header, columns.T))
+      (self.bench, self.rows, self.cols) = [column[name].astype(int) for name in positionColumns]
+      self.tonnes = column["TONNES"]
+      (self.QWXFG, self.TPHsag, self.TPHbm) = [column[name] for name in ("QWXFG", "TPHSAG", "TPHBM")]
+      self.isDefault = column["DEFAULT"] > 0
+      isRecovery = column["RECOVERY"] > 0
+      self.recoveryBlocks = numpy.nonzero(isRecovery)[0]
+      self.inputs = numpy.array([column[name][isRecovery] for name in script.recoveryInputs])
+      self.recoveryModel = [column[name][isRecovery] for name in script.recoveryModels]
+      self.stored = [column[item] for item in self.items]
+
+   # TPH, MPT and the efficiency items of the blocks (arrays) with the grinding circuit efficiency tphEff and zinc recovery efficiency
+   # znRecEff; the host geology defaults have their throughput rescaled only, blocks without metallurgy their stored items
+   def Values(self, tphEff, znRecEff):
+      errorSettings = numpy.seterr(divide='ignore', invalid='ignore', over='ignore')
+      try:
+         (TPH, SAGFG) = self.script.EfficiencyArrays(self.TPHsag, self.TPHbm, self.QWXFG, tphEff)
+         TPH = numpy.where(self.isDefault, self.TPHsag*tphEff, TPH)
+         MPT = self.script.RoundArray(60.0/TPH,6)
+         if len(self.recoveryBlocks) > 0:
+            recoveryValues = self.script.RecoveryArrays(self.inputs, self.isQanaiyaq, self.recoveryModel, znRecEff)
+      finally:
+         numpy.seterr(**errorSettings)
+      values = [TPH, MPT]
+      for (item, stored) in zip(self.items, self.stored):
+         itemValues = stored.copy()
+         if len(self.recoveryBlocks) > 0:
+            itemValues[self.recoveryBlocks] = recoveryValues[self.script.recoveryItems.index(item)]
+         values.append(itemValues)
+      return values
+
+   # grinding hours of the blocks and mean ZNREC of the blocks with metallurgy (tonnes weighted) of the values of a case
+   def Summary(self, values):
+      hours = float(numpy.sum(self.tonnes*values[1]/60.0))
+      tonnes = self.tonnes[self.recoveryBlocks]
+      if tonnes.sum() <= 0:
+         return (hours, 0.0)
+      return (hours, float(numpy.sum(tonnes*values[2][self.recoveryBlocks])/tonnes.sum()))
+
+#==============================================================================
+# Rescale Functions
+#==============================================================================
+
+# rescale the efficiency basis of the model file in the project of pcfpath to the efficiency cases of a ModelCalcs script (its constants
+# set by parameters [(name, value), ...]); writes the efficiency case file next to the basis and returns the summary of each case,
+# {name: (grinding hours, mean ZNREC)}
+def Rescale(pcfpath, modelFile, scriptPath, parameters):
+   if numpy is None:
+      raise ImportError("NumPy is needed for the efficiency cases")
+   pcfpath = os.path.abspath(pcfpath)
+   projdir = os.path.dirname(pcfpath)
+   script = BatchRun_QAN.LoadScript(os.path.abspath(scriptPath))
+   from grail.data import pcf as grailpcf # MineSight's, or the local model backend installed by LoadScript
+   BatchRun_QAN.SetParameters(script, parameters)
+   if len(script.efficiencyCases) == 0:
+      raise ValueError("no efficiency cases, set efficiencyCases=[(name, TPH_eff, ZnRec_eff), ...]")
+   started = time.time()
+   basisName = script.efficiencyBasisFile or basisFile
+   basisPath = RunJournal_QAN.ProjectFile(projdir, basisName)
+   rescale = EfficiencyRescale(script, basisPath)
+   benches = "%d-%d" % (1, grailpcf.Pcf(pcfpath).nz())
+   if rescale.tag.get("model") != modelFile or rescale.tag.get("benches") != benches:
+      raise ValueError("%s is the efficiency basis of model %s benches %s, not of model %s benches %s" % (basisPath, rescale.tag.get("model"),
+                       rescale.tag.get("benches"), modelFile, benches))
+   header = list(positionColumns)
+   columns = [rescale.bench, rescale.rows, rescale.cols]
+   summaries = {}
+   lines = ["%-16s %8s %10s %14s %10s" % ("case", "TPH_eff", "ZnRec_eff", "grinding h", "ZNREC %")]
+   for (name, tphEff, znRecEff) in script.efficiencyCases:
+      values = rescale.Values(tphEff, znRecEff)
+      header.extend(["TPH_" + name, "MPT_" + name] + [item + "_" + name for item in rescale.items])
+      columns.extend(values)
+      summaries[name] = rescale.Summary(values)
+      lines.append("%-16s %8.3f %10.3f %14.0f %10.2f" % ((name, tphEff, znRecEff) + summaries[name]))
+   casePath = RunJournal_QAN.ProjectFile(projdir, script.efficiencyCaseFile)
+   caseFile = open(casePath, "w")
+   caseFile.write(','.join(header) + "\n")
+   numpy.savetxt(caseFile, numpy.column_stack(columns), fmt=["%d","%d","%d"] + (["%.2f","%.6f"] + ["%.2f"]*len(rescale.items))*len(script.efficiencyCases),
+                 delimiter=",")
+   caseFile.close()
+   lines.extend(["", "%d blocks (%d with metallurgy) from %s, %d cases written to %s in %.1f s" % (len(rescale.rows),
+                 len(rescale.recoveryBlocks), basisName, len(script.efficiencyCases), script.efficiencyCaseFile, time.time() - started)])
+   for line in ["Efficiency cases of " + os.path.basename(scriptPath) + " for " + modelFile, "  script: " + script.PROC_TITLE,
+                "  basis: run %s of %s" % (rescale.tag.get("run"), rescale.tag.get("script")), ""] + lines:
+      print(line)
+   return summaries
+
+def Main(argv):
+   if len(argv) < 4:
+      print("usage: python EfficiencyCases_QAN.py <project .pcf> <model file> <ModelCalcs script> [parameter file ...] [name=value ...]")
+      return 1
+   parameters = []
+   for arg in argv[4:]:
+      if '=' in arg:
+         parameters.append(BatchRun_QAN.ParseParameter(arg))
+      else:
+         parameters.extend(BatchRun_QAN.ReadParameters(arg))
+   Rescale(argv[1], argv[2], argv[3], parameters)
+   return 0
+
+#==============================================================================
+
+# from the command line, run through the imported module so the scripts see the same batchMode
+if __name__ == "__main__":
+   import EfficiencyCases_QAN
+   sys.exit(EfficiencyCases_QAN.Main(sys.argv))
@@ -0,0 +1,319 @@
+#==============================================================================
+# Equivalence check of a candidate engine against the reference (block by block) run of the model scripts, on copies of a local model
+#==============================================================================
+
+# usage: python Equivalence_QAN.py [tolerance=x] [tolerance.ITEM=x ...] <local .pcf> <model file> <reference stages> -- <candidate stages>
+#        python Equivalence_QAN.py [tolerance=x] [tolerance.ITEM=x ...] <blasthole model .bmf> <reference script> -- <candidate script>
+#   e.g. python Equivalence_QAN.py C:\Offline\QAN\qanlocal.pcf qan15.dat DEST_11.52.5_QAN.py useArrayEngine=False -- DEST_11.52.5_QAN.py
+#        python Equivalence_QAN.py tolerance.VALT1=0.01 C:\Offline\QAN\qanlocal.pcf qan15.dat ModelCalcs_24.52.7_QAN.py AMR_5.23.3_QAN.py
+#               useArrayEngine=False -- fused ModelCalcs_24.52.7_QAN.py AMR_5.23.3_QAN.py benchWorkers=0
+#        python Equivalence_QAN.py C:\Offline\Vulcan\qan_bh_1150.bmf Vulcan_Block_Codingv2.1.0_QAN.py -- Vulcan_Block_Codingv2.1.1_QAN.py
+# The reference and the candidate are each run on their own copy of the model (reference_<model file>, candidate_<model file>), then every
+# item of the two copies is compared. A side is one or more stages run one after the other as batch runs (BatchRun_QAN), each stage a
+# script with its parameter files and name=value parameters; "fused" before the stages runs them as one fused run (Pipeline_QAN). For
+# the Vulcan blasthole coding each side is a script, run on a copy of the local blasthole model (LocalVulcan_QAN) with the reference
+# model in the same folder.
+# A value matches if it is within the tolerance of the item (tolerance.ITEM=x) or the default tolerance (tolerance=x) of the reference
+# value; undefined values only match undefined values. Mismatches are counted by item, bench (level) and rule branch (the reference ORCT2,
+# MET and DESTC of the block, as far as the model has them) and the first of them listed by bench, row and column (blasthole and
+# coordinates for the Vulcan coding), in <model file>_equivalence.txt next to the model. The exit code is 0 if every item matches.
+# A side whose run fails (an error, a bench that failed, the Vulcan script stopping), that writes no item, or that does not write the
+# items asked for by the ModelItems parameter of its stages fails the check, without comparing the items.
+# Only local models (LocalModel_QAN, LocalVulcan_QAN) can be copied, so a MineSight model is checked from a CSV export converted to a
+# local model.
+
+import sys
+import os
+import time
+import shutil
+
+try: # needed for the item comparison
+   import numpy
+except ImportError:
+   numpy = None
+
+import LocalModel_QAN
+import LocalVulcan_QAN
+import BatchRun_QAN
+import Pipeline_QAN
+import Benchmark_QAN
+
+#==============================================================================
+# Version Information
+#==============================================================================
+
+# Oct 18, 2026 - v1.0.0: reference and candidate runs on copies of a local model or blasthole model, item comparison with tolerances,
+#                        mismatches by bench, row, column and rule branch
+# Oct 18, 2026 - v1.0.1: a side that fails, writes no item or does not write its ModelItems fails the check (exit code 1)
+
+#==============================================================================
+# Constants
+#==============================================================================
+
+defaultTolerance = 1e-6 # largest difference of a matching value from the reference, for items without their own tolerance
+branchItems = ["ORCT2", "MET", "DESTC"] # reference items identifying the rule branch of a block (ore category, metallurgy, destination)
+listedMismatches = 20 # mismatches listed by location for each item
+sideSeparator = "--"
+fusedKeyword = "fused"
+
+#==============================================================================
+# Run Functions
+#==============================================================================
+
+# (fused, [(script path, [(name, value), ...]), ...]) from the arguments of a side, as for Pipeline_QAN
+def ParseSide(args):
+   fused = len(args) > 0 and args[0].lower() == fusedKeyword
+   stages = []
+   for arg in args[1:] if fused else args:
+      if arg.lower().endswith(".py"):
+         stages.append((arg, []))
+      elif len(stages) == 0:
+         raise ValueError("no script before "+arg)
+      elif '=' in arg:
+         stages[-1][1].append(BatchRun_QAN.ParseParameter(arg))
+      else:
+         stages[-1][1].extend(BatchRun_QAN.ReadParameters(arg))
+   if len(stages) == 0:
+      raise ValueError("no script in "+' '.join(args))
+   return (fused, stages)
+
+def DescribeSide(side):
+   (fused, stages) = side
+   text = ' + '.join([' '.join([os.path.basename(scriptPath)] + ["%s=%r" % (name, value) for (name, value) in parameters])
+                      for (scriptPath, parameters) in stages])
+   if fused:
+      return "fused " + text
+   return text
+
+# copy of a local model folder, replacing any earlier copy
+def CopyModel(folder, copyFolder):
+   if os.path.isdir(copyFolder):
+      shutil.rmtree(copyFolder)
+   shutil.copytree(folder, copyFolder)
+
+# run a side on its copy of the model file of the local pcf
+def RunSide(side, pcfpath, modelFile):
+   (fused, stages) = side
+   if fused:
+      Pipeline_QAN.Run(stages, pcfpath, modelFile)
+   else:
+      for (scriptPath, parameters) in stages:
+         BatchRun_QAN.Run(scriptPath, pcfpath, modelFile, parameters)
+
+# items the stages of a side are asked to store by their ModelItems parameter (upper case, as the item files)
+def RequestedItems(side):
+   items = []
+   for (scriptPath, parameters) in side[1]:
+      for (name, value) in parameters:
+         if name == "ModelItems":
+            items.extend([item.upper() for item in (value if isinstance(value, (list, tuple)) else [value]) if item != ''])
+   return items
+
+# run a side (runFunction(*args)); returns '' if it ran completely, otherwise why it failed. A script stopping with sys.exit() (the
+# Vulcan coding on an invalid area) has not run completely either.
+def RunChecked(runFunction, args):
+   try:
+      runFunction(*args)
+   except (Exception, SystemExit) as error:
+      return "%s: %s" % (error.__class__.__name__, error)
+   return ''
+
+# modification times of the item (variable) files of a local model folder, name -> time
+def ItemTimes(folder):
+   return dict([(fileName[:-4], os.path.getmtime(os.path.join(folder, fileName))) for fileName in os.listdir(folder) if fileName.endswith(".npy")])
+
+# items of a local model folder written since their modification times before the run (the copy keeps those of the model)
+def WrittenItems(folder, before):
+   after = ItemTimes(folder)
+   return [name for name in sorted(after) if after[name] != before.get(name)]
+
+# why a side failed, from the error of its run and the items it wrote; '' if it did not fail
+def SideFailure(sideName, error, written, requested):
+   if error != '':
+      return "%s run failed: %s" % (sideName, error)
+   if len(written) == 0:
+      return "%s run wrote no items" % (sideName)
+   missing = [name for name in requested if name not in written]
+   if len(missing) > 0:
+      return "%s run did not write %s" % (sideName, ', '.join(missing))
+   return ''
+
+# items of a local model (or variables of a local Vulcan model) folder, name -> array
+def LoadItems(folder):
+   items = {}
+   for fileName in sorted(os.listdir(folder)):
+      if fileName.endswith(".npy"):
+         items[fileName[:-4]] = numpy.load(os.path.join(folder, fileName))
+   return items
+
+#==============================================================================
+# Comparison Functions
+#==============================================================================
+
+# blocks of an item that do not match, a boolean array; numeric values within tolerance of the reference (both undefined, or both not
+# a number, match), other values equal
+def Mismatches(reference, candidate, tolerance):
+   if reference.shape != candidate.shape:
+      return numpy.ones(reference.shape, dtype=bool)
+   if reference.dtype.kind not in "fiu" or candidate.dtype.kind not in "fiu":
+      return reference != candidate
+   difference = numpy.abs(candidate.astype(float) - reference.astype(float))
+   return ~((difference <= tolerance) | (numpy.isnan(reference.astype(float)) & numpy.isnan(candidate.astype(float))))
+
+# largest difference of the mismatching numeric values, None for other values
+def MaxDifference(reference, candidate, mismatched):
+   if reference.dtype.kind not in "fiu" or candidate.dtype.kind not in "fiu" or reference.shape != candidate.shape:
+      return None
+   return float(numpy.nanmax(numpy.abs(candidate[mismatched].astype(float) - reference[mismatched].astype(float))))
+
+# text of the rule branch of a block, the reference branch items at its index
+def BranchText(branches, index):
+   return ', '.join(["%s %g" % (name, values[index]) for (name, values) in branches])
+
+# text of a block location: level (bench), row and column of a model, blasthole and coordinates of a blasthole model
+def LocationText(index, coordinates):
+   if coordinates is None:
+      return "level %d row %d column %d" % tuple([n+1 for n in index])
+   return "blasthole %d (%.1f, %.1f, %.1f)" % ((index[0],) + tuple([values[index] for values in coordinates]))
+
+def ValueText(value):
+   if isinstance(value, float) and value == LocalModel_QAN.UNDEFINED:
+      return "undefined"
+   return "%r" % (value,)
+
+# compare the items of the candidate with the reference; returns the report lines and the number of mismatching items
+def Compare(reference, candidate, tolerances, coordinates=None):
+   lines = []
+   mismatchedItems = 0
+   branches = [(name, reference[key]) for name in branchItems for key in (name, name.lower()) if key in reference]
+   for name in sorted(set(reference) | set(candidate)):
+      if name not in candidate or name not in reference:
+         lines.append("%-8s only in the %s" % (name, "reference" if name in reference else "candidate"))
+         mismatchedItems += 1
+         continue
+      tolerance = tolerances.get(name.upper(), tolerances.get(None, defaultTolerance))
+      mismatched = Mismatches(reference[name], candidate[name], tolerance)
+      count = int(mismatched.sum())
+      if count == 0:
+         continue
+      mismatchedItems += 1
+      maxDifference = MaxDifference(reference[name], candidate[name], mismatched)
+      lines.append("%-8s %d of %d blocks do not match (tolerance %g%s)" % (name, count, mismatched.size, tolerance,
+                   "" if maxDifference is None else ", largest difference %g" % (maxDifference)))
+      if reference[name].shape != candidate[name].shape:
+         continue
+      indices = list(zip(*numpy.nonzero(mismatched)))
+      if coordinates is None: # by bench
+         levels = numpy.nonzero(mismatched)[0]
+         lines.append("   by bench: " + ', '.join(["%d: %d" % (level+1, n) for (level, n) in zip(*numpy.unique(levels, return_counts=True))]))
+      if len(branches) > 0: # by rule branch
+         branchCounts = {}
+         for index in indices:
+            branch = BranchText(branches, index)
+            branchCounts[branch] = branchCounts.get(branch, 0) + 1
+         lines.append("   by rule branch:")
+         for (branch, n) in sorted(branchCounts.items(), key=lambda pair: -pair[1]):
+            lines.append("      %s: %d" % (branch, n))
+      for index in indices[:listedMismatches]:
+         lines.append("   %s: reference %s, candidate %s%s" % (LocationText(index, coordinates), ValueText(reference[name][index].item()),
+                      ValueText(candidate[name][index].item()), "" if len(branches) == 0 else " (%s)" % (BranchText(branches, index))))
+      if count > listedMismatches:
+         lines.append("   ... %d more" % (count - listedMismatches))
+   return (lines, mismatchedItems)
+
+# write the report of a comparison to reportPath and print it; returns True if every item matches and no side failed
+def Report(reportPath, title, referenceText, candidateText, lines, mismatchedItems, failures=[]):
+   header = [title, "  reference: " + referenceText, "  candidate: " + candidateText, "  " + time.strftime("%b %d, %Y %H:%M"), ""]
+   if len(failures) > 0:
+      footer = failures + ["", "Check failed, items not compared"]
+   elif mismatchedItems == 0:
+      footer = ["All items match"]
+   else:
+      footer = ["", "%d items do not match" % (mismatchedItems)]
+   reportFile = open(reportPath, "w")
+   for line in header + lines + footer:
+      print(line)
+      reportFile.write(line + "\n")
+   reportFile.close()
+   return len(failures) == 0 and mismatchedItems == 0
+
+#==============================================================================
+# Equivalence Functions
+#==============================================================================
+
+# run the reference and candidate sides on copies of the model file of the local pcf and compare them; tolerances {ITEM:x, None:default}
+def CheckModel(pcfpath, modelFile, referenceSide, candidateSide, tolerances):
+   if numpy is None:
+      raise ImportError("NumPy is needed for the item comparison")
+   pcfpath = os.path.abspath(pcfpath)
+   folder = LocalModel_QAN.ModelFolder(pcfpath, modelFile)
+   results = []
+   failures = []
+   for (prefix, side) in (("reference_", referenceSide), ("candidate_", candidateSide)):
+      copyFolder = LocalModel_QAN.ModelFolder(pcfpath, prefix + modelFile)
+      CopyModel(folder, copyFolder)
+      before = ItemTimes(copyFolder)
+      error = RunChecked(RunSide, (side, pcfpath, prefix + modelFile))
+      failure = SideFailure(prefix[:-1], error, WrittenItems(copyFolder, before), RequestedItems(side))
+      if failure != '':
+         failures.append(failure)
+      results.append(LoadItems(copyFolder))
+   (lines, mismatchedItems) = ([], 0) if len(failures) > 0 else Compare(results[0], results[1], tolerances)
+   reportPath = os.path.join(os.path.dirname(pcfpath), modelFile + "_equivalence.txt")
+   return Report(reportPath, "Equivalence check of " + modelFile, DescribeSide(referenceSide), DescribeSide(candidateSide), lines,
+                 mismatchedItems, failures)
+
+# run the reference and candidate Vulcan coding scripts on copies of the local blasthole model and compare them
+def CheckVulcan(bhModel, referenceScript, candidateScript, tolerances):
+   if numpy is None:
+      raise ImportError("NumPy is needed for the item comparison")
+   bhModel = os.path.abspath(bhModel)
+   (folder, modelName) = os.path.split(bhModel)
+   results = []
+   failures = []
+   for (prefix, scriptPath) in (("reference_", referenceScript), ("candidate_", candidateScript)):
+      copyModel = os.path.join(folder, prefix + modelName)
+      copyFolder = LocalVulcan_QAN.ModelFolder(copyModel)
+      CopyModel(LocalVulcan_QAN.ModelFolder(bhModel), copyFolder)
+      before = ItemTimes(copyFolder)
+      error = RunChecked(Benchmark_QAN.RunVulcan, (os.path.abspath(scriptPath), copyModel))
+      failure = SideFailure(prefix[:-1], error, WrittenItems(copyFolder, before), [])
+      if failure != '':
+         failures.append(failure)
+      results.append(LoadItems(copyFolder))
+   if len(failures) > 0:
+      (lines, mismatchedItems) = ([], 0)
+   else:
+      coordinates = [results[0][name] for name in ("xworld", "yworld", "zworld")]
+      (lines, mismatchedItems) = Compare(results[0], results[1], tolerances, coordinates)
+   reportPath = os.path.join(folder, modelName + "_equivalence.txt")
+   return Report(reportPath, "Equivalence check of " + modelName, os.path.basename(referenceScript), os.path.basename(candidateScript), lines,
+                 mismatchedItems, failures)
+
+def Main(argv):
+   tolerances = {}
+   args = argv[1:]
+   while len(args) > 0 and args[0].lower().startswith("tolerance"):
+      (name, value) = BatchRun_QAN.ParseParameter(args.pop(0))
+      tolerances[name.split('.', 1)[1].upper() if '.' in name else None] = float(value)
+   isVulcan = len(args) > 0 and args[0].lower().endswith(".bmf")
+   first = 1 if isVulcan else 2
+   if sideSeparator not in args[first:] or len(args) <= first:
+      print("usage: python Equivalence_QAN.py [tolerance=x] [tolerance.ITEM=x ...] <local .pcf> <model file> <reference stages> -- <candidate stages>")
+      print("       python Equivalence_QAN.py [tolerance=x] [tolerance.ITEM=x ...] <blasthole model .bmf> <reference script> -- <candidate script>")
+      return 1
+   separator = args.index(sideSeparator, first)
+   if isVulcan:
+      matched = CheckVulcan(args[0], args[1], args[separator+1], tolerances)
+   else:
+      matched = CheckModel(args[0], args[1], ParseSide(args[first:separator]), ParseSide(args[separator+1:]), tolerances)
+   if matched:
+      return 0
+   return 1
+
+#==============================================================================
+
+# from the command line, run through the imported module so the scripts see the same batchMode
+if __name__ == "__main__":
+   import Equivalence_QAN
+   sys.exit(Equivalence_QAN.Main(sys.argv))
@@ -0,0 +1,315 @@
+#==============================================================================
+# Local (NumPy memory mapped) stand-in for the grail model backend, for batch runs of the model scripts without MineSight
+#==============================================================================
+
+# usage: python LocalModel_QAN.py <local .pcf> <model file> <csv file> [ITEM ...]
+#   e.g. python LocalModel_QAN.py C:\Offline\QAN\qanlocal.pcf qan15.dat qan15_export.csv VALT1 VLTO1 VLTW1 VALS1 DESTC DESTD DESTR
+# Converts a CSV (tabular) export of a model file into a local model, one memory mapped array (.npy) per item. The CSV has a header line of
+# item names and one line per block, located by LEVEL (or BENCH), ROW and COLUMN, or by XC, YC and ZC; any other column is an item. Empty or
+# non numeric values are undefined. The items listed after the CSV file are added as undefined, for the items a script stores that are not
+# in the export.
+# The local pcf is a text file of "name = value" lines giving the model geometry: nx, ny, nz (columns, rows, levels), dx, dy, dz (block
+# size) and, for a CSV with block coordinates, xmin, ymin, zmin (model origin, lower corner); # for comments. Row 1, column 1 and level 1
+# are at the origin. As the scripts tell Qanaiyaq from Aqqaluk by the pcf path, keep "qan" in the name of a Qanaiyaq local pcf.
+# A batch run (BatchRun_QAN, Pipeline_QAN) without MineSight installed uses this backend in place of grail.data.model and grail.data.pcf,
+# the model file is then the local model converted here, in the folder of the local pcf.
+
+import sys
+import os
+import io
+import csv
+import types
+from math import floor
+
+try: # needed for local models, not for runs with MineSight
+   import numpy
+   import numpy.lib.format
+except ImportError:
+   numpy = None
+
+#==============================================================================
+# Version Information
+#==============================================================================
+
+# Oct 18, 2026 - v1.0.0: local model backend (Model, slab, storeslab, UNDEFINED, isdefined, Pcf) on NumPy memory mapped items, CSV converter
+# Oct 18, 2026 - v1.0.1: whole level reads and writes of a slab item as a 2D array (LevelArray, SetLevelArray), for the scripts' array engines
+# Oct 18, 2026 - v1.0.2: CSV export read as text with no newline translation under Python 3, as bytes under Python 2
+
+#==============================================================================
+# Constants
+#==============================================================================
+
+UNDEFINED = -1.0e30 # undefined value of a local model, as grail model.UNDEFINED
+localModelSuffix = '.local' # a local model is the folder <model file>.local next to the local pcf, with <ITEM>.npy for each item
+storageType = 'float64' # stored value type of a new item
+
+levelColumns = ("LEVEL", "BENCH") # CSV columns locating a block by index (1 based), in order of preference
+rowColumns = ("ROW",)
+columnColumns = ("COLUMN", "COL")
+xColumns = ("XC", "X", "XWORLD") # CSV columns locating a block by its coordinates
+yColumns = ("YC", "Y", "YWORLD")
+zColumns = ("ZC", "Z", "ZWORLD")
+
+#==============================================================================
+# Model Functions
+#==============================================================================
+
+class ModelError(Exception):
+   pass
+
+# 1 if a model value is defined, 0 if not, as grail model.isdefined
+def isdefined(value):
+   if value == UNDEFINED:
+      return 0
+   return 1
+
+# project control file of a local model, the model geometry from a text file of "name = value" lines; as grail pcf.Pcf for the
+# geometry the scripts use
+class Pcf(object):
+
+   def __init__(self, path):
+      self.path = path
+      self.values = {}
+      pcfFile = open(path, "r")
+      for line in pcfFile:
+         line = line.split('#', 1)[0].strip()
+         if line != '':
+            (name, value) = line.split('=', 1)
+            self.values[name.strip().lower()] = float(value)
+      pcfFile.close()
+
+   def Value(self, name):
+      if name not in self.values:
+         raise ModelError("%s is not in the local pcf %s" % (name, self.path))
+      return self.values[name]
+
+   def nx(self):
+      return int(self.Value("nx"))
+
+   def ny(self):
+      return int(self.Value("ny"))
+
+   def nz(self):
+      return int(self.Value("nz"))
+
+   def dx(self):
+      return self.Value("dx")
+
+   def dy(self):
+      return self.Value("dy")
+
+   def dz(self):
+      return self.Value("dz")
+
+   def xmin(self):
+      return self.Value("xmin")
+
+   def ymin(self):
+      return self.Value("ymin")
+
+   def zmin(self):
+      return self.Value("zmin")
+
+# folder of a local model file
+def ModelFolder(pcfpath, modelFile):
+   return os.path.join(os.path.dirname(os.path.abspath(pcfpath)), modelFile + localModelSuffix)
+
+# path of an item of a local model
+def ItemPath(folder, item):
+   return os.path.join(folder, item.upper() + ".npy")
+
+# values of the items of an open model window, as a grail slab; slab[item, l, r, c] with l, r and c from 0 at the first level, row and
+# column of the window. Values are held as lists, faster than NumPy arrays for the scripts' block by block access
+class Slab(object):
+
+   def __init__(self, values, rows, cols):
+      self.values = values # item -> [level][row][column] values
+      self.rows = rows
+      self.cols = cols
+
+   def __getitem__(self, key):
+      (item, l, r, c) = key
+      return self.values[item][l][r][c]
+
+   def __setitem__(self, key, value):
+      (item, l, r, c) = key
+      self.values[item][l][r][c] = float(value)
+
+   # values of an item on level l as a 2D (row, column) array, undefined values replaced by undefinedDefault if given
+   def LevelArray(self, item, l, undefinedDefault=None):
+      values = numpy.array(self.values[item][l], dtype=float)
+      if undefinedDefault is not None:
+         values[values == UNDEFINED] = undefinedDefault
+      return values
+
+   # set the values of an item on level l from a 2D (row, column) array
+   def SetLevelArray(self, item, l, values):
+      self.values[item][l] = numpy.asarray(values, dtype=float).tolist()
+
+   def maxrow(self):
+      return self.rows
+
+   def maxcolumn(self):
+      return self.cols
+
+# window of levels b1 to b2, rows minRow to maxRow and columns minColumn to maxColumn (1 based, inclusive) of the items in itemlist of a
+# local model, as grail model.Model: slab() reads the window, storeslab() writes it back to the model file and free() drops it
+class Model(object):
+
+   def __init__(self, pcfpath, modelFile, b1, b2, minRow, maxRow, minColumn, maxColumn, itemlist):
+      if numpy is None:
+         raise ModelError("NumPy is needed for local models")
+      self.folder = ModelFolder(pcfpath, modelFile)
+      if not os.path.isdir(self.folder):
+         raise ModelError("no local model %s" % (self.folder))
+      self.items = []
+      for item in itemlist:
+         if item not in self.items:
+            if not os.path.exists(ItemPath(self.folder, item)):
+               raise ModelError("item %s is not in the local model %s" % (item, modelFile))
+            self.items.append(item)
+      self.window = (slice(b1-1, b2), slice(minRow-1, maxRow), slice(minColumn-1, maxColumn))
+      self.bench = None
+
+   def slab(self):
+      values = {}
+      shape = (0, 0, 0)
+      for item in self.items:
+         stored = numpy.load(ItemPath(self.folder, item), mmap_mode='r')[self.window]
+         shape = stored.shape
+         values[item] = stored.tolist()
+      self.bench = Slab(values, shape[1], shape[2])
+      return self.bench
+
+   def storeslab(self):
+      if self.bench is None:
+         return
+      for item in self.items:
+         stored = numpy.load(ItemPath(self.folder, item), mmap_mode='r+')
+         stored[self.window] = self.bench.values[item]
+         stored.flush()
+         del stored
+
+   def free(self):
+      self.bench = None
+
+#==============================================================================
+# Stand-in Modules
+#==============================================================================
+
+# directory of a path, as grail fileutils.getdir
+def getdir(path):
+   return os.path.dirname(path)
+
+# 1 if point (x, y, ...) is inside the polygon of (x, y, ...) points (even-odd rule), otherwise 0; as grail ag.point_inside_pointlist2d
+def point_inside_pointlist2d(point, pointlist):
+   (x, y) = (point[0], point[1])
+   inside = 0
+   for k in range(len(pointlist)):
+      (xa, ya) = (pointlist[k-1][0], pointlist[k-1][1])
+      (xb, yb) = (pointlist[k][0], pointlist[k][1])
+      if (ya > y) != (yb > y) and x < xa + (y - ya)*(xb - xa)/(yb - ya):
+         inside = 1 - inside
+   return inside
+
+def StandInModule(name, **names):
+   module = types.ModuleType(name)
+   module.__dict__.update(names)
+   sys.modules[name] = module
+   return module
+
+# when MineSight (grail) is not installed, install this backend as the grail modules the model scripts and batch runs import: grail.data.model,
+# grail.data.pcf, grail.fileutils and grail.ag; returns True if installed
+def Install():
+   try:
+      import grail.data.model
+      return False
+   except ImportError:
+      pass
+   grail = StandInModule("grail")
+   grail.data = StandInModule("grail.data")
+   grail.data.model = StandInModule("grail.data.model", Model=Model, ModelError=ModelError, UNDEFINED=UNDEFINED, isdefined=isdefined)
+   grail.data.pcf = StandInModule("grail.data.pcf", Pcf=Pcf)
+   grail.fileutils = StandInModule("grail.fileutils", getdir=getdir)
+   grail.ag = StandInModule("grail.ag", point_inside_pointlist2d=point_inside_pointlist2d)
+   return True
+
+#==============================================================================
+# Conversion Functions
+#==============================================================================
+
+# index of the first of names in the header (upper case), or None
+def HeaderColumn(header, names):
+   for name in names:
+      if name in header:
+         return header.index(name)
+   return None
+
+# value of a CSV field, undefined if empty or not a number
+def FieldValue(text):
+   try:
+      return float(text)
+   except ValueError:
+      return UNDEFINED
+
+# convert a CSV export to the local model modelFile of the local pcf, with extraItems added as undefined; returns the number of blocks read
+def ConvertCSV(csvPath, pcfpath, modelFile, extraItems=[]):
+   if numpy is None:
+      raise ModelError("NumPy is needed for local models")
+   pcf = Pcf(pcfpath)
+   shape = (pcf.nz(), pcf.ny(), pcf.nx())
+   if sys.version_info[0] >= 3:
+      csvFile = io.open(csvPath, "r", newline='')
+   else: # the Python 2 csv module reads bytes
+      csvFile = open(csvPath, "rb")
+   reader = csv.reader(csvFile)
+   header = [name.strip().upper() for name in next(reader)]
+   byIndex = [HeaderColumn(header, names) for names in (levelColumns, rowColumns, columnColumns)]
+   byCoordinate = [HeaderColumn(header, names) for names in (xColumns, yColumns, zColumns)]
+   if None not in byIndex:
+      located = byIndex
+      origin, size = None, None
+   elif None not in byCoordinate:
+      located = byCoordinate
+      origin, size = (pcf.xmin(), pcf.ymin(), pcf.zmin()), (pcf.dx(), pcf.dy(), pcf.dz())
+   else:
+      raise ModelError("%s has no LEVEL, ROW and COLUMN or XC, YC and ZC columns" % (csvPath))
+   itemColumns = [(header[k], k) for k in range(len(header)) if k not in located]
+   folder = ModelFolder(pcfpath, modelFile)
+   if not os.path.isdir(folder):
+      os.makedirs(folder)
+   arrays = {}
+   for item in [name for (name, k) in itemColumns] + [item.upper() for item in extraItems]:
+      arrays[item] = numpy.lib.format.open_memmap(ItemPath(folder, item), mode='w+', dtype=storageType, shape=shape)
+      arrays[item].fill(UNDEFINED)
+   blocks = 0
+   for fields in reader:
+      if len(fields) < len(header):
+         continue
+      if origin is None: # LEVEL, ROW, COLUMN
+         (l, r, c) = [int(float(fields[k])) - 1 for k in located]
+      else: # XC, YC, ZC
+         (c, r, l) = [int(floor((float(fields[k]) - o)/s)) for (k, o, s) in zip(located, origin, size)]
+      if not (0 <= l < shape[0] and 0 <= r < shape[1] and 0 <= c < shape[2]):
+         continue
+      for (item, k) in itemColumns:
+         arrays[item][l, r, c] = FieldValue(fields[k])
+      blocks += 1
+   csvFile.close()
+   for item in arrays:
+      arrays[item].flush()
+   return blocks
+
+def Main(argv):
+   if len(argv) < 4:
+      print("usage: python LocalModel_QAN.py <local .pcf> <model file> <csv file> [ITEM ...]")
+      return 1
+   blocks = ConvertCSV(argv[3], argv[1], argv[2], argv[4:])
+   print("%d blocks converted to %s" % (blocks, ModelFolder(argv[1], argv[2])))
+   return 0
+
+#==============================================================================
+
+# from the command line...
+if __name__ == "__main__":
+   sys.exit(Main(sys.argv))
@@ -0,0 +1,263 @@
+#==============================================================================
+# Local (NumPy) stand-in for vulcan.block_model, for the blasthole coding script without Vulcan
+#==============================================================================
+
+# usage: python LocalVulcan_QAN.py <model file> <csv file> <block size x,y,z> [variable ...]
+#   e.g. python LocalVulcan_QAN.py QAN2016_I.bmf qan2016_i_export.csv 15,15,12.5
+#        python LocalVulcan_QAN.py Qan_bh_1150.bmf qan_bh_1150_export.csv 15,15,12.5 bench geolchk agm nsg oden tonnes brxnf met znrec ...
+# Loads a CSV export of a Vulcan block model into a local model of the same name (folder <model file>.local), one array (.npy) per variable.
+# The CSV has a header line of variable names and one line per block; the block centre is XWORLD, YWORLD, ZWORLD (or XC, YC, ZC) and its
+# size XLENGTH, YLENGTH, ZLENGTH if given, otherwise the schema block size. A column with any non numeric value is a string variable (e.g.
+# AREA), empty numeric values are set to undefinedValue. The variables listed after the block size are added as undefined, for the
+# variables the script stores that are not in the export.
+# The blasthole coding script uses this module as vulcan when Vulcan is not installed, with the blasthole and reference models as local
+# models in the working folder.
+
+import sys
+import os
+import csv
+from math import floor
+
+try: # needed for local models, not with Vulcan
+   import numpy
+except ImportError:
+   numpy = None
+
+#==============================================================================
+# Version Information
+#==============================================================================
+
+# Oct 18, 2026 - v1.0.0: local block_model (iteration, block variables, find_world_xyz, get, get_string, get_matches, get_data,
+#                        model_schema_size) on NumPy variable arrays, CSV loader
+
+#==============================================================================
+# Constants
+#==============================================================================
+
+localModelSuffix = '.local' # a local model is the folder <model file>.local, with <variable>.npy for each variable and schema.txt
+undefinedValue = -99.0 # value of an empty numeric field, and of get() when the point is not in a block
+storageType = 'float64'
+
+centreColumns = (("XWORLD", "XC", "X"), ("YWORLD", "YC", "Y"), ("ZWORLD", "ZC", "Z")) # CSV columns of the block centre
+lengthColumns = ("XLENGTH", "YLENGTH", "ZLENGTH") # CSV columns of the block size, optional
+
+#==============================================================================
+# Model Functions
+#==============================================================================
+
+# folder of a local model file
+def ModelFolder(path):
+   return path + localModelSuffix
+
+# path of a variable of a local model
+def VariablePath(folder, name):
+   return os.path.join(folder, name.lower() + ".npy")
+
+# schema of a local model, "name = value" lines: xsize, ysize, zsize (schema block size)
+def ReadSchema(folder):
+   schema = {}
+   schemaFile = open(os.path.join(folder, "schema.txt"), "r")
+   for line in schemaFile:
+      line = line.split('#', 1)[0].strip()
+      if line != '':
+         (name, value) = line.split('=', 1)
+         schema[name.strip().lower()] = float(value)
+   schemaFile.close()
+   return schema
+
+def WriteSchema(folder, blockSize):
+   schemaFile = open(os.path.join(folder, "schema.txt"), "w")
+   schemaFile.write("# local block model schema\n")
+   for (name, size) in zip(("xsize", "ysize", "zsize"), blockSize):
+      schemaFile.write("%s = %r\n" % (name, size))
+   schemaFile.close()
+
+# Local block model, as vulcan.block_model for the subset the blasthole coding script uses; opened with mode "r" (read only) or "w"
+# (variables set on a block are stored when the model is closed). Iterating the model moves to each block in turn and gives the model
+# itself, so block["zn"] is the variable of the current block, as in Vulcan. Numeric variables are floats, string variables strings.
+class block_model(object):
+
+   def __init__(self, path, mode="r"):
+      if numpy is None:
+         raise IOError("NumPy is needed for local block models")
+      self.path = path
+      self.folder = ModelFolder(path)
+      if not os.path.isdir(self.folder):
+         raise IOError("no local block model %s" % (self.folder))
+      self.writable = mode != "r"
+      self.schema = ReadSchema(self.folder)
+      self.variables = {} # name (lower case) -> array of values by block
+      for fileName in os.listdir(self.folder):
+         if fileName.endswith(".npy"):
+            self.variables[fileName[:-4]] = numpy.load(os.path.join(self.folder, fileName), mmap_mode='r+' if self.writable else 'r')
+      self.blocks = len(self.variables["xworld"])
+      self.centres = [numpy.asarray(self.variables[name], dtype=float) for name in ("xworld", "yworld", "zworld")]
+      self.halfLengths = [numpy.asarray(self.variables[name.lower()], dtype=float)/2.0 if name.lower() in self.variables
+                          else numpy.empty(self.blocks) for name in lengthColumns]
+      for (n, size) in enumerate(self.model_schema_size(0)):
+         if lengthColumns[n].lower() not in self.variables:
+            self.halfLengths[n].fill(size/2.0)
+      self.cellBlocks = None # schema cell (i, j, k) -> blocks overlapping it, for find_world_xyz
+      self.block = -1 # current block, -1 if none
+
+   def __enter__(self):
+      return self
+
+   def __exit__(self, excType, excValue, traceback):
+      self.close()
+      return False
+
+   def close(self):
+      if self.writable:
+         for values in self.variables.values():
+            values.flush()
+
+   def Variable(self, name):
+      values = self.variables.get(name.lower())
+      if values is None:
+         raise ValueError("variable %s is not in the block model %s" % (name, self.path))
+      return values
+
+   # iteration over the blocks, in model order
+   def rewind(self):
+      self.block = 0 if self.blocks > 0 else -1
+
+   def __iter__(self):
+      for block in range(self.blocks):
+         self.block = block
+         yield self
+
+   def __getitem__(self, name):
+      return self.get(name)
+
+   def __setitem__(self, name, value):
+      self.put(name, value)
+
+   # value of a variable for the current block, undefinedValue if there is no current block
+   def get(self, name):
+      values = self.Variable(name)
+      if self.block < 0:
+         return undefinedValue
+      return float(values[self.block])
+
+   def get_string(self, name):
+      values = self.Variable(name)
+      if self.block < 0:
+         return ''
+      return str(values[self.block])
+
+   def put(self, name, value):
+      if not self.writable:
+         raise IOError("block model %s is open read only" % (self.path))
+      self.Variable(name)[self.block] = value
+
+   def model_schema_size(self, schema):
+      return (self.schema["xsize"], self.schema["ysize"], self.schema["zsize"])
+
+   # schema cell of a point
+   def Cell(self, x, y, z):
+      return tuple([int(floor(v/size)) for (v, size) in zip((x, y, z), self.model_schema_size(0))])
+
+   # move to the block containing the world point; 0 if found, otherwise 1 and no current block
+   def find_world_xyz(self, x, y, z):
+      if self.cellBlocks is None:
+         self.cellBlocks = {}
+         for block in range(self.blocks):
+            low = self.Cell(*[centre[block] - half[block] for (centre, half) in zip(self.centres, self.halfLengths)])
+            high = self.Cell(*[centre[block] + half[block] for (centre, half) in zip(self.centres, self.halfLengths)])
+            for i in range(low[0], high[0]+1):
+               for j in range(low[1], high[1]+1):
+                  for k in range(low[2], high[2]+1):
+                     self.cellBlocks.setdefault((i, j, k), []).append(block)
+      self.block = -1
+      for block in self.cellBlocks.get(self.Cell(x, y, z), []):
+         if all([abs(v - centre[block]) <= half[block] for (v, centre, half) in zip((x, y, z), self.centres, self.halfLengths)]):
+            self.block = block
+            return 0
+      return 1
+
+   # blocks overlapping the box of a "-bw xmin xmax ymin ymax zmin zmax" selection (other options ignored), in model order
+   def get_matches(self, selection):
+      words = selection.split()
+      if "-bw" not in words:
+         raise ValueError("only -bw selections are supported by local block models: "+selection)
+      box = [float(word) for word in words[words.index("-bw")+1:words.index("-bw")+7]]
+      inside = numpy.ones(self.blocks, dtype=bool)
+      for (n, (centre, half)) in enumerate(zip(self.centres, self.halfLengths)):
+         inside &= (centre + half > box[2*n]) & (centre - half < box[2*n+1])
+      return numpy.nonzero(inside)[0].tolist()
+
+   # values of a variable for a list of blocks
+   def get_data(self, name, blocks):
+      return self.Variable(name)[blocks].tolist()
+
+#==============================================================================
+# Conversion Functions
+#==============================================================================
+
+# index of the first of names in the header (lower case), or None
+def HeaderColumn(header, names):
+   for name in names:
+      if name.lower() in header:
+         return header.index(name.lower())
+   return None
+
+# value of a numeric CSV field, undefinedValue if empty
+def FieldValue(text):
+   if text.strip() == '':
+      return undefinedValue
+   return float(text)
+
+def IsNumber(text):
+   try:
+      float(text)
+      return True
+   except ValueError:
+      return text.strip() == ''
+
+# load a CSV export into the local model of path, blockSize the schema (x, y, z) block size, with extraVariables added as undefined;
+# returns the number of blocks loaded
+def LoadCSV(csvPath, path, blockSize, extraVariables=[]):
+   if numpy is None:
+      raise IOError("NumPy is needed for local block models")
+   csvFile = open(csvPath, "r")
+   reader = csv.reader(csvFile)
+   header = [name.strip().lower() for name in next(reader)]
+   rows = [fields for fields in reader if len(fields) >= len(header)]
+   csvFile.close()
+   centres = [HeaderColumn(header, names) for names in centreColumns]
+   if None in centres:
+      raise ValueError("%s has no XWORLD, YWORLD and ZWORLD (or XC, YC and ZC) columns" % (csvPath))
+   folder = ModelFolder(path)
+   if not os.path.isdir(folder):
+      os.makedirs(folder)
+   WriteSchema(folder, blockSize)
+   for (k, name) in enumerate(header):
+      if k in centres:
+         name = ("xworld", "yworld", "zworld")[centres.index(k)]
+      fields = [row[k] for row in rows]
+      if all([IsNumber(text) for text in fields]):
+         values = numpy.array([FieldValue(text) for text in fields], dtype=storageType)
+      else:
+         values = numpy.array([text.strip() for text in fields])
+      numpy.save(VariablePath(folder, name), values)
+   for name in extraVariables:
+      values = numpy.empty(len(rows), dtype=storageType)
+      values.fill(undefinedValue)
+      numpy.save(VariablePath(folder, name), values)
+   return len(rows)
+
+def Main(argv):
+   if len(argv) < 4:
+      print("usage: python LocalVulcan_QAN.py <model file> <csv file> <block size x,y,z> [variable ...]")
+      return 1
+   blockSize = tuple([float(size) for size in argv[3].split(',')])
+   blocks = LoadCSV(argv[2], argv[1], blockSize, argv[4:])
+   print("%d blocks loaded to %s" % (blocks, ModelFolder(argv[1])))
+   return 0
+
+#==============================================================================
+
+# from the command line...
+if __name__ == "__main__":
+   sys.exit(Main(sys.argv))
@@ -3,29 +3,47 @@
 #==============================================================================
 
 import sys
-from Tkinter import *
-import tkMessageBox
-from math import *
 from datetime import datetime
+from StringIO import StringIO
 import getpass
 
-from grail.widgets import *
-from grail.rtv import *
-import grail.compass.projectinfo
 from grail.data import model
-from grail.dialogs import gselectprojectdialog
-from grail.compass.responsevar import ResponseVar
-from grail.compass import cmpsys
-from grail import messages
 from grail import fileutils
-from grail import gsys
 from grail.ag import *  # for PCA
 
+import BenchPool_QAN
+import Pipeline_QAN
+import Profile_QAN
+import RunJournal_QAN
+import PCAIndex_QAN
+
+# loaded by a batch run (BatchRun_QAN, only imported by the batch run itself): panel variables only, no panel or widget toolkit
+batchMode = "BatchRun_QAN" in sys.modules and sys.modules["BatchRun_QAN"].batchMode
+if batchMode:
+   from BatchRun_QAN import StringRTV, IntegerRTV, FloatRTV
+else:
+   from Tkinter import *
+   import tkMessageBox
+   from grail.widgets import *
+   from grail.rtv import *
+   import grail.compass.projectinfo
+   from grail.dialogs import gselectprojectdialog
+   from grail.compass.responsevar import ResponseVar
+   from grail.compass import cmpsys
+   from grail import messages
+   from grail import gsys
+try: # optional, used for whole bench array calculations
+   import numpy
+except ImportError:
+   numpy = None
+
+from math import *
+
 #==============================================================================
 # Version Information
 #==============================================================================
 
-PROC_TITLE = "Model Calculations - ver 24.52.7_QAN - Feb 26, 2024"
+PROC_TITLE = "Model Calculations - ver 24.52.27_QAN - Oct 18, 2026"
 
 # Aug  3, 2010 - v1
 # Oct 10, 2010 - v2: added low & high sulphide waste catagories
@@ -105,6 +123,35 @@ PROC_TITLE = "Model Calculations - ver 24.52.7_QAN - Feb 26, 2024"
 # Jan 10, 2023 - v24.52.7: Updated the values for the LOM 2024, planning cycle. Note that the v24.52.6 is the new QAN model update version, with updated geological codes (In Progress). 
 # July 3, 2023 - v24.52.7: Same version used for the 5YBP 2024 as there is no change in the metallurgical parameters from LOM to 5YBP
 # Feb 26, 2023 - v23.52.7_QAN: update Geol codes for QAN22v6 (updated S) model
+# Oct 18, 2026 - v24.52.8_QAN: moved bench calculation to ModelCalcBench, run in a pool of worker processes (BenchPool_QAN) when benchWorkers is not 1
+# Oct 18, 2026 - v24.52.9_QAN: replaced the per block Power function with SAG mill power models (MillPower), calculated once per mill configuration and cached by SG
+# Oct 18, 2026 - v24.52.10_QAN: ACLS from the PCA class raster index (PCAIndex_QAN) instead of testing each PCA polygon in turn
+# Oct 18, 2026 - v24.52.11_QAN: batch entry point: RunModelCalc split from ExecuteModelCalc, panel and widget toolkit not loaded for batch runs (BatchRun_QAN)
+# Oct 18, 2026 - v24.52.12_QAN: fused runs with the other model scripts (Pipeline_QAN): RunStage split from RunModelCalc, benches opened by OpenBench
+# Oct 18, 2026 - v24.52.13_QAN: run profile (Profile_QAN, profileRun): time per bench and per phase (open, read, calculate, store), blocks and peak memory
+# Oct 18, 2026 - v24.52.14_QAN: run journal (RunJournal_QAN): start and end record of each run; run log only appended to, "Failed!" written when the bench pass fails
+# Oct 18, 2026 - v24.52.15_QAN: metallurgical recoveries (concentrate grades, Zn, Pb and bulk recoveries, Ag grades) of each bench by whole bench
+#                     arrays (RecoveryArrays) if NumPy is available (useArrayEngine); the bench loop keeps the recovery inputs of the blocks
+# Oct 18, 2026 - v24.52.16_QAN: mill throughput (SEsag, SEbm, TPH with TPH_eff and the highTPH limit, SAGFG, MPT, GNDHR) of each bench by whole
+#                     bench arrays (ThroughputArrays), with the host geology defaults for blocks without sulphides (useArrayEngine)
+# Oct 18, 2026 - v24.52.17_QAN: grinding circuit scenarios (circuitScenarios, GrindingCircuit): throughput and MPT of several circuit
+#                     configurations in the same pass, stored to MPT items and/or a side file
+# Oct 18, 2026 - v24.52.18_QAN: efficiency cases (efficiencyCases): TPH, MPT and Zn recoveries for several TPH_eff/ZnRec_eff pairs in the
+#                     same pass, rescaled from the throughput and recovery models before the efficiencies (BenchThroughput, BenchRecovery)
+# Oct 18, 2026 - v24.52.19_QAN: outcome of the bench pass (BenchPool_QAN.BenchOutcome); a run with failed benches (model access error) raises BenchError after its bench pass, logged "Failed!" and journalled as failed
+# Oct 18, 2026 - v24.52.20_QAN: run log kept in memory for the run and appended in one locked write at its end, "Executed OK" or "Failed!"
+#                     (RunJournal_QAN.RunLog), so the lines of runs in parallel are not interleaved
+# Oct 18, 2026 - v24.52.21_QAN: efficiency basis (efficiencyBasisFile): throughput and recovery models before TPH_eff and ZnRec_eff of each
+#                     block with geology, for efficiency cases without a run (EfficiencyCases_QAN)
+# Oct 18, 2026 - v24.52.22_QAN: BatchRun_QAN only imported when loaded by a batch run, not at MineSight start-up
+# Oct 18, 2026 - v24.52.23_QAN: efficiency basis only written when efficiencyBasisFile is named, headed by its model, benches and run
+#                               (EfficiencyBasisTag); side files in the project folder by RunJournal_QAN.ProjectFile
+# Oct 18, 2026 - v24.52.24_QAN: constants derived from other constants (derivedConstants) calculated again by DeriveConstants after a batch run sets the
+#                               constants, so CSsag1_2/CSsag3, PRim_net and the SAG mill power models follow RPMsag1_2, PRim, BCsag1_2, ...
+# Oct 18, 2026 - v24.52.25_QAN: SAG mill power models of a grinding circuit made for its speed and filling unless those of the constants (SagMillPower); the
+#                               block by block loop uses the bench's circuit (GrindingCircuit) as the array engine does
+# Oct 18, 2026 - v24.52.26_QAN: run profile off by default (profileRun); blocks counted from the GEOL and PERLT values the bench calculation reads
+# Oct 18, 2026 - v24.52.27_QAN: mill power draw cached by SG rounded to millPowerSGDigits, cache cleared when it holds millPowerCacheSize SGs
 
 #==============================================================================
 # Constants
@@ -113,6 +160,7 @@ PROC_TITLE = "Model Calculations - ver 24.52.7_QAN - Feb 26, 2024"
 # items to get from/put into model
 itemlist = ["PERLT","P80","PB","SPB","STZN","STPB","STSPB","STFE","STBA","TOC","S","AG","AGM","NSG","SIO2","GEOL","GEOL1","ORCT1","ORCT2","CU","DEP","ODENM","SG","RPB","ZNFE","ZNPB","MET","ZNGRD","ZNREC","PBGRD","PBREC","AGGZN","AGGPB","ACLS","SESAG","SEBM","MPT","GNDHR","SAGFG","T1","T2","T6","SHCRR","WARDC","AB","BMWi","KCFLG","BRXNF","AGGOX","PBROX","PBGOX","AGGWX","ZNGWX","PBGWX","ZNRWX","PBRWX","QWXFG","WXFG","SHPCT","GEOSM"]
 # *** Note: add "FLAG1" to 'itemlist' to tag ore polygon cuts for annual mill throughput Back Calculation
+#           (Calibration_QAN fits the throughput model to the mill tonnes and hours of the FLAG1 tagged blocks)
 
 # GEOL code group for plates, ORCT1
 Block_1_Q = [11,21,31,41,51,61] # QAN [Exhalite High Grade, Exhalite Low Grade, High-Pb Weathered, Exhalite High Iron, Exhalite High Barium,Exhalite Low Barium]
@@ -215,6 +263,7 @@ P80fine, P80medium, P80coarse = 65.0, 65.0, 65.0 # um
 # SAG parameters
 # notes: 1) max power draw 1870 kW all SAGs; however as TK Jan 2017 memo used 1720 kW all SAGs
 #        2) when fitting parameters: i) set P80 variable to mill measured for fitting period then ii) do BC% first, keep ML% const, do not increase Speed above 235 rpm
+#        3) Ksag, Kbm, TPH_eff and BC%/ML% can be fitted to actual mill data by least squares with Calibration_QAN
 RPMsag1_2, RPMsag3 = 225, 225   # SAG Mill speed, RPM
 BCsag1_2, BCsag3 = 0.140, 0.140 # SAG Ball Charge "ball filling", fraction
 MLsag1_2, MLsag3 = 0.254, 0.254 # SAG Mill Load "total filling", fraction
@@ -225,6 +274,14 @@ CSsag1_2, CSsag3 = RPMsag1_2*CSsag_const, RPMsag3*CSsag_const
 PRim = 2081.0 # kW, maximum, not net, power from IsaMill (nominally 835 kW in TK2016, however maximum is 3000 hp x 0.746 kW/hp x 93% motor eff = 2081 kW)
 PFimVbm = 23.895*pow(PRim-PRim_nl,-0.377) # Power Factor, IsaMill vs Ball Mill
 PRim_net = (PRim-PRim_nl)*PFimVbm*1.0753  # net IsaMill power (in Ball Mill power equivalent)
+# 6) grinding circuit scenarios: throughput for several circuit configurations in the same pass over each bench as the circuit above,
+#    from the same hardness (SG, Ab, BBMWi, PCA class) of each block (requires the array engine)
+#    each scenario is (name, {parameter: value, ...}, MPT item) with any of the circuitParameters (the others as for the circuit above),
+#    use '' for no MPT item; Ksag and Kbm default to those of the scenario's grinding configuration gc
+circuitScenarios = [] # empty list for the circuit above only
+##circuitScenarios = [("pebble", {"gc":1}, ''), ("precrush", {"gc":2}, ''), ("rpm235", {"RPMsag1_2":235, "RPMsag3":235}, ''),
+##                    ("P80_75", {"P80fine":75.0, "P80medium":75.0, "P80coarse":75.0}, "MPT2"), ("isamill", {"PRim":2500.0}, '')]
+circuitScenarioFile = "ModelCalcs_circuit_scenarios.csv" # side file in model folder with TPH and MPT columns per scenario for each block with geology, '' for none
 
 # PCA class boundaries
 PCA1 = [(0.07739765,-0.065052144,1),(0,-0.44449356,1),(0.7596754,-1.9022361,1),(1.8326122,-1.3898741,1),(0.77248174,-0.5780578,1),(0.07739765,-0.065052144,1)]
@@ -238,11 +295,191 @@ PCA8 = [(-1.4677393,-1.5680045,1),(-1.1420099,-2.0472643,1),(-0.73650986,-1.2458
 PCA9 = [(1.3209039,0.57174075,1),(0.33600292,1.0987418,1),(0.07739765,-0.065052144,1),(0,-0.44449356,1),(0.07739765,-0.065052144,1),(0.77248174,-0.5780578,1),(1.3209039,0.57174075,1)]
 PCA10 = [(-0.29675466,1.2451309,1),(-1.6172923,0.9157553,1),(-1.7136983,-1.1987387,1),(-0.87999207,0.1545316,1),(-0.29675466,1.2451309,1)]
 PCA11 = [(-1.1420099,-2.0472643,1),(-1.474234,-2.619543,1),(-0.946019,-3.6442673,1),(-0.4783286,-3.702823,1),(-0.32426587,-2.3706815,1),(-0.6433958,-2.5317097,1),(-0.9405167,-2.3194454,1),(-1.1420099,-2.0472643,1)]
+# PCA class test order (ACLS) and boundaries, for the PCA class index
+pcaClasses = [3, 6, 4, 7, 8, 5, 1, 2, 9, 10, 11]
+pcaPolygons = [PCA3, PCA6, PCA4, PCA7, PCA8, PCA5, PCA1, PCA2, PCA9, PCA10, PCA11]
 
 # Throughput and recovery efficency
 ## TPH_eff, ZnRec_eff = 1.04, 1.01 # base case, "PTV150" +4% and +1.0% increase
 TPH_eff, ZnRec_eff = 1.09, 1.022 # Race 23 "better" case, "PTV500" +9% and +2.2% total increase (note: not incremental) This is now the Base Case for LOM 2023, updated Jan 19, 2022
 ##TPH_eff, ZnRec_eff = 1.17, 1.042 # Race 23, better Case, Scenario 6 "crank it up" for LOM 2023, Updated March 9, 2022
+# efficiency cases: TPH, MPT and Zn recoveries for other efficiencies in the same pass over each bench as TPH_eff, ZnRec_eff above (the
+# model items keep those), each case is (name, TPH_eff, ZnRec_eff); the highTPH limit and the recovery limits apply as for the base case
+# (requires the array engine); EfficiencyCases_QAN calculates them from the efficiency basis below without a run
+efficiencyCases = [] # empty list for TPH_eff, ZnRec_eff above only
+##efficiencyCases = [("PTV150", 1.04, 1.01), ("PTV500", 1.09, 1.022), ("crank_it_up", 1.17, 1.042)]
+efficiencyCaseFile = "ModelCalcs_efficiency_cases.csv" # side file in model folder with TPH, MPT and efficiencyItems columns per case for each block with geology
+# side file in model folder with the throughput and recovery models before TPH_eff and ZnRec_eff for each block with geology, from which
+# EfficiencyCases_QAN calculates efficiency cases without a run, headed by the model, benches and run it is of (requires the array engine;
+# it adds to the bench pass, so it is only written when named)
+efficiencyBasisFile = '' # '' for none
+##efficiencyBasisFile = "ModelCalcs_efficiency_basis.csv"
+
+# execution
+benchWorkers = 1 # worker processes for benches: 1 runs in this process, 0 uses one per processor (see BenchPool_QAN)
+useArrayEngine = True # True: metallurgical recoveries and mill throughput of each bench with whole bench array (NumPy) operations if NumPy is available; False: block by block loop
+millPowerCacheSize = 10000 # ore SGs of which each mill power model (MillPower) remembers the power draw, cleared when full
+millPowerSGDigits = 4 # decimals of the ore SG for the mill power draw (the SG item is stored to 2 decimals)
+profileRun = False # time each bench and its phases, written to the run profile next to the run log (see Profile_QAN)
+
+#==============================================================================
+# Mill Power Model
+#==============================================================================
+
+# Power draw model for a SAG or Ball mill (Morrell), calculated once per mill configuration; only the ore SG changes from block to block,
+# so the terms that depend on the configuration alone are calculated when the model is made and the power draw is cached by SG, rounded
+# to millPowerSGDigits; the cache is cleared when it holds cacheSize SGs
+# parameters are: mill type ('SAG' or 'BALL'), Critical Speed (fraction), Ball Charge (fraction), Mill Load (fraction), & mill dimensions (metres): inside radius, inside belly length, center line length, & trunion diameter)
+# for what-if runs make a model with another configuration, e.g. MillPower('SAG',235*CSsag_const,0.15,0.26,sag_radius,sag_belly,sag_center,sag_trunion)
+class MillPower(object):
+
+   def __init__(self,mill,CSmill,BCmill,MLmill,mill_radius,mill_belly,mill_center,mill_trunion,cacheSize=millPowerCacheSize):
+      self.mill, self.CSmill, self.BCmill, self.MLmill = mill, CSmill, BCmill, MLmill
+      self.mill_radius, self.mill_belly, self.mill_center, self.mill_trunion = mill_radius, mill_belly, mill_center, mill_trunion
+      self.cacheSize = cacheSize
+      self.cache = {} # gross power draw (kW) by rounded SG
+      # terms not depending on the ore
+      RPS_CS_fr = CSmill*30/pi*pow(Cgvty/mill_radius,0.5)/60 # revolutions per second at the fraction of Critical Speed mill is being run
+      mill_vol = mill_belly*pi*pow(mill_radius,2) # cubic metres
+      t_const = 0.35*(3.364-MLmill) - CSmill
+      if t_const < 0:
+         t = halfPI
+      else:
+         t = 2.5307*(1.2796-MLmill)*(1-exp(-19.42*t_const)) + halfPI
+      s = halfPI - (t-halfPI)*(0.3386 + 0.1041*CSmill + (1.54 - 2.5673*CSmill)*MLmill)
+      ALtemp1 = (2*pi+s-t)/(2*pi)         # Active Load, interim calc #1
+      ALtemp2 = pow(1-MLmill/ALtemp1,0.5) # Active Load, interim calc #2
+      ALtemp3 = 2*ALtemp1/RPS_CS_fr       # Active Load, interim calc #3
+      AL_fract = ALtemp3/(pow(mill_radius*(1+ALtemp2)*(sin(s)-sin(t))/Cgvty,0.5) + ALtemp3) # Active Load fraction
+      charge_surface_radius = mill_radius*pow(1-AL_fract*MLmill/ALtemp1,0.5)
+      z = pow(1-MLmill,0.4532)
+      if t_const >= 0:
+         ki_temp = mill_radius - z*charge_surface_radius
+         self.ki_pow = pow(pi*RPS_CS_fr*mill_radius/ki_temp,3)
+         self.ki_diff = pow(ki_temp,4) - pow((1-z)*charge_surface_radius,4)
+      if mill == 'SAG': # SAG mills use a grate, Ball mills do not
+         t_overflow = t
+      else: # Ball mill
+         t_overflow = 3.395
+      ConeEnd_const = 4*(mill_center - mill_belly)/(2*mill_radius - mill_trunion)
+      self.RPS_CS_fr, self.mill_vol, self.t_const, self.t, self.s, self.t_overflow = RPS_CS_fr, mill_vol, t_const, t, s, t_overflow
+      self.charge_surface_radius, self.z, self.ConeEnd_const = charge_surface_radius, z, ConeEnd_const
+      self.MASSballs = BCmill*mill_vol*0.6*SGball
+      self.PRnl = 1.68*pow((0.33*mill_center + 0.67*mill_belly)*pow(2*mill_radius,2.5)*CSmill,0.82) # no load power, kW
+
+   # gross power draw (kW) for an ore SG, calculated for the SG rounded to millPowerSGDigits
+   def Power(self,SG):
+      SG = round(SG,millPowerSGDigits)
+      if SG in self.cache:
+         return self.cache[SG]
+      mill, CSmill, BCmill, MLmill = self.mill, self.CSmill, self.BCmill, self.MLmill
+      mill_radius, mill_belly = self.mill_radius, self.mill_belly
+      RPS_CS_fr, mill_vol, t, s, t_overflow = self.RPS_CS_fr, self.mill_vol, self.t, self.s, self.t_overflow
+      charge_surface_radius, z, MASSballs = self.charge_surface_radius, self.z, self.MASSballs
+      Solids_V_fr = Solids_W_fr/SG/(Solids_W_fr/SG + (1-Solids_W_fr)/SGliquid) # solids volume fraction
+      SGslurry = Solids_V_fr*SG - Solids_V_fr + SGliquid
+      MASSore = SG*mill_vol*(MLmill*(0.6+0.4*Solids_V_fr) - BCmill*0.6)
+      MASSliquid = MLmill*mill_vol*0.4*(1-Solids_V_fr)*SGliquid # 0.004 changed to 0.4 as ML is defined as a fraction not a % in this implementation
+      VOLcharge =(MASSore/SG + MASSballs/SGball)/(0.6 + 0.4*Solids_V_fr)
+      SGcharge = (MASSballs + MASSore + MASSliquid)/VOLcharge
+      if self.t_const < 0:
+         kinetic_energy_allowance = 0.0
+      else:
+         kinetic_energy_allowance = mill_belly*SGcharge*self.ki_pow*self.ki_diff
+      if mill == 'SAG' or t_overflow > t:
+         overflow_mill_correction_pe = 0.0
+      else: # Ball mill
+         overflow_mill_correction_pe = 2*pi*Cgvty*mill_belly*SGslurry*RPS_CS_fr*(pow(mill_radius,3)*((1-MLmill)/2 + MLmill/3) - pow(charge_surface_radius,2)*mill_radius*(1-MLmill)/2 - MLmill/3*pow(charge_surface_radius,3))*(sin(t)-sin(t_overflow))
+      ConeEnd_const = self.ConeEnd_const
+      ConeEnd_pe_const = pi*RPS_CS_fr*Cgvty*ConeEnd_const*(SGcharge*(sin(s) - sin(t)) + SGslurry*(sin(t) - sin(t_overflow)))
+      ConeEnd_pe = ConeEnd_pe_const*(pow(mill_radius,4) - 4*mill_radius*pow(charge_surface_radius,3) + 3*pow(charge_surface_radius,4))/12
+      ConeEnd_ke_const = SGcharge*2*ConeEnd_const*pow(RPS_CS_fr*pi,3)
+      ConeEnd_ke = ConeEnd_ke_const/20*(pow(mill_radius,5) - 5*mill_radius*pow(charge_surface_radius,4) + 4*pow(charge_surface_radius,5))
+      ConeEnd_total = ConeEnd_pe + ConeEnd_ke
+      PRnet = pi*Cgvty*mill_belly*SGcharge*RPS_CS_fr*mill_radius*(2*pow(mill_radius,3) - 3*z*charge_surface_radius*pow(mill_radius,2) + (3*z-2)*pow(charge_surface_radius,3))/(3*(mill_radius - z*charge_surface_radius))*(sin(s)-sin(t)) + overflow_mill_correction_pe + kinetic_energy_allowance + ConeEnd_total # net power draw, kW
+      PRgross = PRnet*Kmill + self.PRnl # total, kW
+###################################################
+###  DEBUGGING code for Throughput model
+##
+##      print "SGslurry:%6.3f  VOLcharge:%7.3f  t:%6.3f  s:%7.4f  z:%7.4f  KEA:%9.4f  PRnet:%7.1f  PRnl:%6.1f  PRgross:%7.1f" % (SGslurry,VOLcharge,t,s,z,kinetic_energy_allowance,PRnet,self.PRnl,PRgross)
+###################################################
+      if len(self.cache) >= self.cacheSize:
+         self.cache.clear()
+      self.cache[SG] = PRgross
+      return PRgross
+
+# SAG mill power models (Note: SAG 1 and SAG 2 have the same configuration)
+sagMill1_2 = MillPower('SAG',CSsag1_2,BCsag1_2,MLsag1_2,sag_radius,sag_belly,sag_center,sag_trunion)
+sagMill3 = MillPower('SAG',CSsag3,BCsag3,MLsag3,sag_radius,sag_belly,sag_center,sag_trunion)
+
+# SAG mill power model of a configuration: mill (one of the models above) if it has that configuration, so its power draw cache is kept,
+# otherwise a model made for it
+def SagMillPower(mill,CSmill,BCmill,MLmill):
+   if (mill.CSmill, mill.BCmill, mill.MLmill) == (CSmill, BCmill, MLmill):
+      return mill
+   return MillPower('SAG',CSmill,BCmill,MLmill,sag_radius,sag_belly,sag_center,sag_trunion)
+
+# constants derived from other constants, calculated again as above by DeriveConstants when a batch run (BatchRun_QAN.SetParameters) has
+# set the constants, so e.g. RPMsag1_2 also changes CSsag1_2 and the SAG mill power model; they cannot be set themselves
+derivedConstants = ["CUlimitSlp", "CUlimitInt", "pebble_F80", "pebble_P80", "F80_fx", "P80_fx", "PRpcr_const", "CSSconst", "CSsag_const",
+                    "CSsag1_2", "CSsag3", "PFimVbm", "PRim_net", "sagMill1_2", "sagMill3"]
+def DeriveConstants():
+   global CUlimitSlp, CUlimitInt, pebble_F80, pebble_P80, F80_fx, P80_fx, PRpcr_const, CSSconst, CSsag_const, CSsag1_2, CSsag3, PFimVbm, PRim_net
+   global sagMill1_2, sagMill3
+   CUlimitSlp, CUlimitInt = 1/(CUlimitHI-CUlimitLO), 1+CUlimitLO/(CUlimitHI-CUlimitLO)
+   pebble_F80, pebble_P80 = 0.65*pebble_port*1000, 0.65*pebble_CCS*1000 # microns
+   F80_fx = -(pebble_fx + pebble_F80/1000000) # metre
+   P80_fx = -(pebble_fx + pebble_P80/1000000) # metre
+   PRpcr_const = pebble_K2*4*pow(pebble_P80,P80_fx) - pow(pebble_F80,F80_fx)
+   CSSconst = pow(CSS,0.7)
+   CSsag_const = pow(2*sag_radius,0.5)/(42.3*18.16)
+   CSsag1_2, CSsag3 = RPMsag1_2*CSsag_const, RPMsag3*CSsag_const
+   PFimVbm = 23.895*pow(PRim-PRim_nl,-0.377) # Power Factor, IsaMill vs Ball Mill
+   PRim_net = (PRim-PRim_nl)*PFimVbm*1.0753  # net IsaMill power (in Ball Mill power equivalent)
+   sagMill1_2 = SagMillPower(sagMill1_2,CSsag1_2,BCsag1_2,MLsag1_2)
+   sagMill3 = SagMillPower(sagMill3,CSsag3,BCsag3,MLsag3)
+
+# Grinding circuit of the throughput model (ThroughputArrays): the circuit of the constants above with the parameters {parameter: value, ...}
+# changed, any of circuitParameters; Ksag and Kbm default to those of the grinding configuration gc of the circuit
+circuitParameters = ["gc", "Ksag", "Kbm", "P80fine", "P80medium", "P80coarse", "RPMsag1_2", "RPMsag3", "BCsag1_2", "BCsag3", "MLsag1_2", "MLsag3", "PRim"]
+class GrindingCircuit(object):
+
+   def __init__(self,parameters={}):
+      for parameter in parameters:
+         if parameter not in circuitParameters:
+            raise ValueError("grinding circuit has no parameter "+parameter)
+      self.parameters = parameters
+      self.gc = parameters.get("gc",gc)
+      self.Ksag, self.Kbm, self.k1 = parameters.get("Ksag",Ksag[self.gc]), parameters.get("Kbm",Kbm[self.gc]), k1[self.gc]
+      self.P80fine, self.P80medium, self.P80coarse = parameters.get("P80fine",P80fine), parameters.get("P80medium",P80medium), parameters.get("P80coarse",P80coarse)
+      self.CSsag1_2, self.CSsag3 = parameters.get("RPMsag1_2",RPMsag1_2)*CSsag_const, parameters.get("RPMsag3",RPMsag3)*CSsag_const
+      self.BCsag1_2, self.BCsag3 = parameters.get("BCsag1_2",BCsag1_2), parameters.get("BCsag3",BCsag3)
+      self.MLsag1_2, self.MLsag3 = parameters.get("MLsag1_2",MLsag1_2), parameters.get("MLsag3",MLsag3)
+      # the SAG mill power models above, or models made for another speed or filling of the circuit
+      self.sagMill1_2 = SagMillPower(sagMill1_2,self.CSsag1_2,self.BCsag1_2,self.MLsag1_2)
+      self.sagMill3 = SagMillPower(sagMill3,self.CSsag3,self.BCsag3,self.MLsag3)
+      circuitPRim = parameters.get("PRim",PRim)
+      circuitPFimVbm = 23.895*pow(circuitPRim-PRim_nl,-0.377) # Power Factor, IsaMill vs Ball Mill
+      self.PRim_net = (circuitPRim-PRim_nl)*circuitPFimVbm*1.0753 # net IsaMill power (in Ball Mill power equivalent)
+
+   # P80 target (um) for blocks of PCA classes ACLS (array), as in the bench loop
+   def P80(self,ACLS):
+      return numpy.where(ACLS == 3, self.P80coarse, numpy.where((ACLS == 1) | (ACLS == 9), self.P80medium, self.P80fine))
+
+   # "parameter=value ..." of the parameters changed
+   def Text(self):
+      return ' '.join(["%s=%s" % (parameter, self.parameters[parameter]) for parameter in circuitParameters if parameter in self.parameters])
+
+#==============================================================================
+# PCA Class Index
+#==============================================================================
+
+# exact test of a point (U2XP, U1YP) against PCA polygon i, only used by the index for points near a class boundary
+def PCAInside(i, x, y):
+   return point_inside_pointlist2d((x,y,1),pcaPolygons[i])==1
+
+# raster lookup of ACLS, same result as testing the polygons in pcaClasses order
+pcaIndex = PCAIndex_QAN.PCAIndex(pcaClasses, pcaPolygons, PCAInside)
 
 #==============================================================================
 # Panel 1
@@ -254,428 +491,752 @@ NGPperiod = IntegerRTV(name="perFlag", value=0)
 PERLT_FUNCTIONS = ["no, apply to all blocks", "yes, apply only to unassigned periods"]
 perFunction = IntegerRTV(name="perFunction")
 
-class DefineModelFile(GPanel):
+if not batchMode: # panel
+
+   class DefineModelFile(GPanel):
 
-   def makewidgets(self):
-      self.makeFilePickers()
-      self.makePeriodFlag()
+      def makewidgets(self):
+         self.makeFilePickers()
+         self.makePeriodFlag()
 
-   def makeFilePickers(self):
-      grp = GGroup(self, text="Choose model file")
-      grp.pack(anchor=NW, pady=2, padx=2, ipadx = 2, ipady=2)
-      item15 = cmpsys.getpcf().filelistbytype(15)
-      cbs = GComboBox(grp.interior(), items=item15, rtv=file15)
-      lbls = GLabel(grp.interior(), text="Name of 3D block model:")
-      gtools.stdwidgetcolumns([lbls], [cbs])
-      self.remember([cbs])
+      def makeFilePickers(self):
+         grp = GGroup(self, text="Choose model file")
+         grp.pack(anchor=NW, pady=2, padx=2, ipadx = 2, ipady=2)
+         item15 = cmpsys.getpcf().filelistbytype(15)
+         cbs = GComboBox(grp.interior(), items=item15, rtv=file15)
+         lbls = GLabel(grp.interior(), text="Name of 3D block model:")
+         gtools.stdwidgetcolumns([lbls], [cbs])
+         self.remember([cbs])
 
-   def makePeriodFlag(self):
-      grp = GGroup(self, text="Period filter?")
-      grp.pack(side='top', anchor=W, pady=2, padx=2)
-      rbut = GRadio(grp.interior(), items=PERLT_FUNCTIONS, rtv=perFunction)
-      rbut.pack(anchor=NW, padx=4, pady=4)
-      self.remember([rbut])
+      def makePeriodFlag(self):
+         grp = GGroup(self, text="Period filter?")
+         grp.pack(side='top', anchor=W, pady=2, padx=2)
+         rbut = GRadio(grp.interior(), items=PERLT_FUNCTIONS, rtv=perFunction)
+         rbut.pack(anchor=NW, padx=4, pady=4)
+         self.remember([rbut])
 
 #==============================================================================
 # Folder Layout
 #==============================================================================
 
-PANEL1 = "Model File Information"
-PROC_FOLDERS = GFolder("Model Operations",[GItem(PANEL1, DefineModelFile)])
+if not batchMode:
+   PANEL1 = "Model File Information"
+   PROC_FOLDERS = GFolder("Model Operations",[GItem(PANEL1, DefineModelFile)])
 
 #==============================================================================
-# Execution Functions
+# Array Functions (whole bench)
 #==============================================================================
 
-def ExecuteModelCalc(projectpath):
-   projinf = cmpsys.getproject()
-   pcffile = projinf.get(grail.compass.projectinfo.PCFPATH_TAG)
-   projdir = fileutils.getdir(projectpath)
-   pcfpath = projdir+'\\'+pcffile
-   PythonLog = projdir+"\RunLog-Python_scripts.txt" # will create an empty file if none present in model folder
-   PyLogFile = open(PythonLog,"a")
-   DT = datetime.today()
-   msgText = "\n"+DT.strftime("%d-%b-%Y  %H:%M\n")+"User: "+getpass.getuser()+"\n"+"Script: "+PROC_TITLE
-   PyLogFile.write(msgText)
-
-   #  replacement for col, row, level spinners
-   pcf = cmpsys.getpcf()
-   blockVolume = pcf.dx()*pcf.dy()*pcf.dz()
-   minColumn, minRow, minLevel = 1, 1, 1
-   maxColumn, maxRow, maxLevel = pcf.nx(), pcf.ny(), pcf.nz()
-##   minColumn, minRow, minLevel = 1, 1, 25
-##   maxColumn, maxRow, maxLevel = pcf.nx(), pcf.ny(), 25
-##   minColumn, minRow, minLevel = 84, 59, 25
-##   maxColumn, maxRow, maxLevel = 84, 59, 25
+# store values of level l of the slab for blocks rows, cols (arrays)
+def StoreBlockValues(slab, item, l, rows, cols, values):
+   for (r, c, value) in zip(rows.tolist(), cols.tolist(), values.tolist()):
+      slab[item, l, r, c] = value
+
+# recovery inputs of RecoveryModelArrays and RecoveryArrays and recovery models of RecoveryModelArrays, in order (efficiency basis columns)
+recoveryInputs = ["DEP", "MET", "ORCT2", "Deduct", "ZN", "PB", "SPB", "BA", "FE", "NSGmet", "STZN", "STPB", "STSPB", "SIO2", "SIO2_defined", "AG",
+                  "TOC", "T2", "CU", "AGM"]
+recoveryModels = ["ZNRECmodel", "ZNRWXmodel", "PBREC", "PBROX"]
+
+# items stored by RecoveryArrays, in the order of its result
+recoveryItems = ["ZNGRD", "ZNREC", "PBGRD", "PBREC", "AGGZN", "AGGPB", "AGGOX", "PBROX", "PBGOX", "AGGWX", "ZNGWX", "PBGWX", "ZNRWX", "PBRWX"]
+
+# round(value, digits) for each value of an array; NumPy rounds ties to even and by scaling, so values within rounding error of a tie are
+# rounded by round() itself, as in the block by block loop
+def RoundArray(values, digits):
+   rounded = numpy.round(values, digits)
+   scaled = values*pow(10.0,digits)
+   for k in numpy.nonzero(numpy.abs(scaled - numpy.floor(scaled) - 0.5) < 1e-6)[0]:
+      rounded[k] = round(float(values[k]), digits)
+   return rounded
+
+# recoveries of the blocks of a bench that do not depend on the zinc recovery efficiency (ZnRec_eff), from their recovery inputs as
+# arrays (one value per block): the zinc recovery models before the efficiency (zinc concentrate, and Qanaiyaq bulk concentrate zinc),
+# and the lead recoveries (lead concentrate, Qanaiyaq High Lead-Silver Oxide); the same branches as the block by block loop, each
+# calculated for all blocks and chosen by masks
+def RecoveryModelArrays(inputs, isQanaiyaq):
+   (DEP, MET, ORCT2, Deduct, ZN, PB, SPB, BA, FE, NSGmet, STZN, STPB, STSPB, SIO2, SIO2_defined, AG, TOC, T2, CU, AGM) = inputs
+   Deduct = Deduct > 0
+   zeros = numpy.zeros(len(DEP))
+   if not isQanaiyaq:  # Main, Aqqaluk, Paalaaq
+      isUniversal = (DEP <= 2) | ((DEP == 3) & (MET == 9)) # only for Main, Aqqaluk, and baritic Paalaaq
+      RPBmet = SPB/PB * 100.0
+      sulPB = PB - SPB
+      ZNadjPB = numpy.maximum(11.0692 * numpy.exp(-0.0239*RPBmet) - 0.5748*sulPB, ZNadjPBmin)
+      PBadjPB = numpy.maximum(4.0118 * numpy.exp(-0.0766*RPBmet) + 0.5396*sulPB, PBadjPBmin)
+      # zinc concentrate, original ZNREC model for low Zn, low Fe, high Ba blocks, otherwise the revised, exponential model
+      isOriginal = (FE <= recLimitFE) & (ZN <= recLimitZN) & (BA >= recLimitBA)
+      ZNREClabOriginal = numpy.clip(35.8735*ZN**0.2504*PB**-0.1601*FE**-0.05875*NSGmet**0.09152,ZnRecMin,ZnRecMax)
+      BAzn = numpy.where(MET == 2, numpy.minimum(BA,BAlimitWeathered), BA) # limit high BA grades for milling criteria weathered Aqqaluk/Main
+      e1 = 0.0161 * BAzn + 0.2481
+      e2 = -0.0024 * BAzn - 0.0888
+      e3 = -0.0075 * BAzn + 0.0740
+      e4 = -0.0018 * BAzn + 0.1491
+      e5 = 0.0117 * BAzn + 0.0136
+      e6 = -0.0160 * BAzn + 0.0029
+      e7 = -0.0405 * BAzn + 0.1711
+      ZNREClabExponential = 17.469*ZN**e1*PB**e2*FE**e3*NSGmet**e4*BAzn**e5*SPB**e6*ZNadjPB**e7
+      ZNREClab = numpy.where(isOriginal, ZNREClabOriginal, ZNREClabExponential)
+      Y = numpy.maximum(4.60517 - numpy.log(ZNREClab),0.0001)
+      ZNRECmodel = numpy.where(ORCT2 == 3, ZNREClab + (10.7349/Y) * numpy.exp(-0.5*((numpy.log(Y)+0.42027)/0.58708)**2), # Baritic, May 2016 plant transfer function
+                                           ZNREClab + (4.0746/Y) * numpy.exp(-0.5*((numpy.log(Y)+0.87774)/0.42255)**2)) # April 2003 plant transfer function
+      ZNRWXmodel = zeros
+      # lead concentrate, none for milling criteria weathered Aqqaluk/Main
+      e1 = 0.0762 * FE - 0.3363
+      e2 = -0.3824 * FE + 3.6151
+      e3 = 0.000 * FE - 0.1788
+      e4 = 0.0410 * FE - 0.0603
+      e5 = 0.0075 * FE - 0.0419
+      e6 = 0.1602 * FE - 1.6041
+      e7 = 0.2504 * FE - 2.4251
+      PBREClab = RoundArray(9.24*ZN**e1*PB**e2*FE**e3*NSGmet**e4*BA**e5*SPB**e6*PBadjPB**e7,2)
+      PBRECuniversal = numpy.where(MET == 2, 0.0, numpy.clip(PBREClab,PbRecMin,PbRecMax))
+      # Paalaaq MET = 8, Veined, ore Type B, or MET = 7, Siliceous, ore Type A
+      PBREC = numpy.where(isUniversal, PBRECuniversal, numpy.where(MET == 8, 67.0, 49.6))
+      PBROX = zeros
+   else: # Qanaiyaq (DEP == 4)
+      # zinc concentrate, Regular (zinc & lead) or Weathered (zinc)
+      AGclip = numpy.clip(AG,1.158,6.912) # clip AG based on range of data used to develop model
+      TOCclip = numpy.clip(TOC,0.10,0.65) # clip TOC based on range of data used to develop model
+      ZZ = 13.78371 + 1.32534*STZN - 1.85221*STSPB + 0.66301*SIO2 + 2.20423*AGclip - 13.85855*TOCclip + 0.21601*T2
+      CUreduction = numpy.clip(CUlimitInt - CUlimitSlp*CU,0.0,1.0) # linear reduction to recovery for region between LO and HI limits
+      ZNRECmodel = numpy.where(Deduct, CUreduction*ZZ, ZZ)
+      # Weathered High Copper, bulk concentrate zinc
+      ZNRWXmodel = 6.67*STZN-33.33
+      # lead concentrate, Regular (zinc & lead)
+      P = RoundArray(63.67652 - 11.3144*STSPB + 1.044188*STPB,2)
+      PBREC = numpy.where(MET == 1, numpy.clip(P,0,PbRecMax), 0.0)
+      # High Lead-Silver Oxide
+      isOxide = (MET == 3) & (STPB > 0)
+      P = RoundArray(67.2*numpy.log(numpy.where(isOxide, STPB, 1.0)) - 104.0,2)
+      PBROX = numpy.where(isOxide, numpy.clip(P,0,PbRecPbOxMax), 0.0)
+   return [ZNRECmodel, ZNRWXmodel, PBREC, PBROX]
+
+# concentrate grades, recoveries and silver grades (recoveryItems) for the blocks of a bench, from their recovery inputs and recovery
+# models (RecoveryModelArrays) as arrays, with the zinc recovery efficiency znRecEff
+def RecoveryArrays(inputs, isQanaiyaq, recoveryModel, znRecEff):
+   (DEP, MET, ORCT2, Deduct, ZN, PB, SPB, BA, FE, NSGmet, STZN, STPB, STSPB, SIO2, SIO2_defined, AG, TOC, T2, CU, AGM) = inputs
+   (ZNRECmodel, ZNRWXmodel, PBREC, PBROX) = recoveryModel
+   Deduct = Deduct > 0
+   zeros = numpy.zeros(len(DEP))
+   ZNGRD = zeros + 53.0
+   PBGRD = zeros + 54.5
+   if not isQanaiyaq:  # Main, Aqqaluk, Paalaaq
+      # set Oxide and Weathered metallurgy to zero as only in Qanaiyaq
+      PBGOX = zeros
+      ZNRWX, ZNGWX, PBRWX, PBGWX = zeros, zeros, zeros, zeros
+      isUniversal = (DEP <= 2) | ((DEP == 3) & (MET == 9)) # only for Main, Aqqaluk, and baritic Paalaaq
+      Z = RoundArray(ZNRECmodel*znRecEff,2)    # zinc flotation circuit efficency adjustment
+      # Paalaaq MET = 8, Veined, ore Type B, or MET = 7, Siliceous, ore Type A
+      ZNREC = numpy.where(isUniversal, numpy.clip(Z,ZnRecMin,ZnRecMax), numpy.where(MET == 8, round(81.3*znRecEff,1), round(43.8*znRecEff,1)))
+   else: # Qanaiyaq (DEP == 4)
+      PBGOX = zeros + 45.0
+      ZNGWX = zeros + 40.5
+      PBGWX = zeros + 7.5
+      # zinc concentrate, Regular (zinc & lead) or Weathered (zinc)
+      Z = RoundArray(ZNRECmodel*znRecEff,2)    # zinc flotation circuit efficency adjustment
+      ZNREC = numpy.where(((MET == 1) | (MET == 2)) & (SIO2_defined > 0), numpy.clip(Z,0,ZnRecMax), 0.0)
+      # Weathered High Copper, bulk concentrate zinc
+      isBulk = (MET == 4) | Deduct
+      Z = RoundArray(ZNRWXmodel*znRecEff,2)
+      ZNRWX = numpy.where(isBulk, numpy.clip(Z,0,ZnRecMax), 0.0)
+      # Weathered High Copper, bulk concentrate lead; if Pb recovery is clipped then new concentrate Pb grade must be computed at that recovery
+      isBulkPb = isBulk & (STPB > 0)
+      ConcTns = STZN*ZNRWX/ZNGWX
+      P = RoundArray(ConcTns*PBGWX/STPB,2)
+      PBRWX = numpy.where(isBulkPb, numpy.where(P <= PbRecMax, numpy.maximum(P,0), PbRecMax), 0.0)
+      PBGWX = numpy.where(isBulkPb & (P > PbRecMax), RoundArray(STPB*PbRecMax/ConcTns,2), PBGWX)
+
+   # silver grade (grams/tonne) in zinc, lead, and bulk concentrates; calculate recovery then convert to grade
+   # Regular, i.e. Main, Aqqaluk, Paalaaq, or Qanaiyaq (sulphide ore MET codes)
+   isRegular = (DEP <= 3) | ((DEP == 4) & ((MET == 1) | (MET == 2)))
+   # Ag recovery to zinc concentrate
+   A = 0.71200*exp(-7.416)*FE**0.1988*TOC**-0.1760*NSGmet**-0.4080*ZNREC**2.659 + 19.05360
+   AgRecZn = numpy.where((TOC > 0) & (ZNREC > 0), numpy.clip(A,0,AgRecZnMax), 0.0)
+   # Ag recovery to lead concentrate, not for Qanaiyaq 2-Weathered (zinc)
+   A = 0.50950*exp(-4.665)*PB**1.459*SPB**-0.5752*AG**-1.040*PBREC**1.517 + 14.41932
+   AgRecPb = numpy.where((AG > 0) & (PBREC > 0) & ~((DEP == 4) & (MET == 2)), numpy.clip(A,0,AgRecPbMax), 0.0)
+   # cap Ag recoveries based on total recovery
+   AgRecTotal = AgRecZn + AgRecPb
+   AgRecAdjust = numpy.where(AgRecTotal > AgRecPbMax, AgRecPbMax/AgRecTotal, 1.0)
+   AgRecZn = numpy.where(AgRecTotal > AgRecPbMax, AgRecZn*AgRecAdjust, AgRecZn)
+   AgRecPb = numpy.where(AgRecTotal > AgRecPbMax, AgRecPb*AgRecAdjust, AgRecPb)
+   # convert Ag recoveries to Ag grades
+   AGGZN = numpy.where(isRegular & (AgRecZn > 0) & (STZN > 0) & (ZNREC > 0), RoundArray(AGM*AgRecZn/(STZN*ZNREC/ZNGRD),1), 0.0)
+   AGGPB = numpy.where(isRegular & (AgRecPb > 0) & (STPB > 0) & (PBREC > 0), RoundArray(AGM*AgRecPb/(STPB*PBREC/PBGRD),1), 0.0)
+   # Qanaiyaq 3-High Lead-Silver Oxide: Ag recovery to Oxide Pb concentrate
+   isOxideAg = ~isRegular & (MET == 3) & (PBROX > 0) & (AGM > 0)
+   A = 56.8*numpy.log(numpy.where(isOxideAg, AGM, 1.0)) - 252.8  # from follow-up graph to Sept 12,'17 file note by D.Lin
+   AGGOX = numpy.where(isOxideAg, RoundArray(AGM*numpy.clip(A,0,AgRecPbOxMax)/(STPB*PBROX/PBGOX),1), 0.0)
+   # Ag recovery to Weathered High Copper (Bulk concentrate), from MET 1, 2, or 4; grade adjusted if recovery too high
+   isBulkAg = (DEP == 4) & ((MET == 4) | Deduct)
+   ConcTns = STZN*ZNRWX/ZNGWX
+   isAdjusted = isBulkAg & (AGM > 0) & (ConcTns*381.0/AGM > AgRecPbMax)
+   AGGWX = numpy.where(isAdjusted, RoundArray(AGM*AgRecPbMax/ConcTns,1), numpy.where(isBulkAg, 381.0, 0.0))
+   return [ZNGRD, ZNREC, PBGRD, PBREC, AGGZN, AGGPB, AGGOX, PBROX, PBGOX, AGGWX, ZNGWX, PBGWX, ZNRWX, PBRWX]
+
+# Recoveries of the blocks with metallurgy kept by the bench loop, [(r, c, recovery inputs), ...] with the inputs in the order of
+# RecoveryArrays (the values of the bench loop at the start of the recovery calculation); the recovery models are calculated once, so
+# Values(znRecEff) for a zinc recovery efficiency only rescales them
+class BenchRecovery(object):
+
+   def __init__(self, recoveryBlocks, isQanaiyaq):
+      columns = numpy.array(recoveryBlocks, dtype=float).reshape(-1, 22).T
+      self.rows, self.cols = columns[0].astype(int), columns[1].astype(int)
+      self.inputs = columns[2:]
+      self.isQanaiyaq = isQanaiyaq
+      errorSettings = numpy.seterr(divide='ignore', invalid='ignore', over='ignore') # every branch is calculated for all blocks, masked out
+      try:
+         self.recoveryModel = RecoveryModelArrays(self.inputs, isQanaiyaq)
+      finally:
+         numpy.seterr(**errorSettings)
 
-   # check if path to a Qanaiyaq model
-   isQanaiyaq = "QAN" in pcfpath or "qan" in pcfpath or "Qan" in pcfpath
-   if isQanaiyaq:
-      msgText = "\n  Qanaiyaq model "+file15.get()+" in "+projdir+"\n"
-      print msgText
-      PyLogFile.write(msgText)
-      msgText = "  Sulfide, Oxide, and Weathered metallurgy\n"
-      print msgText
-      PyLogFile.write(msgText)
+   # recoveryItems of the blocks (arrays) with the zinc recovery efficiency znRecEff
+   def Values(self, znRecEff):
+      errorSettings = numpy.seterr(divide='ignore', invalid='ignore', over='ignore')
+      try:
+         return RecoveryArrays(self.inputs, self.isQanaiyaq, self.recoveryModel, znRecEff)
+      finally:
+         numpy.seterr(**errorSettings)
+
+# specific energy (kWh/t) and throughput (t/h, before the grinding circuit efficiency) of the SAG and ball mills in a grinding circuit
+# (GrindingCircuit) for blocks with sulphide metallurgy, from their SG, Ab, BBMWi and P80 as arrays; the same model as the block by
+# block loop
+def ThroughputArrays(SG, Ab, BBMWi, P80, circuit):
+   # power draw (kW) for each SAG mill from the mill power models, once per SG
+   SGs, index = numpy.unique(SG, return_inverse=True)
+   PRsag1_2 = numpy.array([circuit.sagMill1_2.Power(value) for value in SGs.tolist()])[index]
+   PRsag3 = numpy.array([circuit.sagMill3.Power(value) for value in SGs.tolist()])[index]
+   PRtotal = 2*PRsag1_2 + PRsag3
+   # average over all SAGs
+   CS = (2*PRsag1_2*circuit.CSsag1_2 + PRsag3*circuit.CSsag3)/PRtotal # fraction of Critical Speed
+   BC = (2*PRsag1_2*circuit.BCsag1_2 + PRsag3*circuit.BCsag3)/PRtotal # fraction of Ball Charge (ball filling)
+   ML = (2*PRsag1_2*circuit.MLsag1_2 + PRsag3*circuit.MLsag3)/PRtotal # fraction of Mill Load (total filling)
+   DWI = 100.0*SG/Ab # Drop Weight Index
+   if circuit.gc == 2: # pre-crushing
+      F80 = 0.36*DWI**1.18*CSSconst # mm
+      P1in = 5.547*DWI**-0.45*CSSconst # % (not a fraction)
    else:
-      msgText = "\n  Aqqaluk model "+file15.get()+" in "+projdir+"\n"
-      print msgText
-      PyLogFile.write(msgText)
-      msgText = "  Sulfide metallurgy\n"
-      print msgText
-      PyLogFile.write(msgText)
+      F80 = 0.392*DWI**1.18*CSSconst # mm
+      P1in = 4.343*DWI**-0.45*CSSconst # % (not a fraction)
+   F80 = numpy.maximum(numpy.minimum(F80,F80max),F80min)
+   P1in = numpy.minimum(P1in,P1max)
+   T80 = circuit.k1 +k2*Ab + k3*BBMWi + k4*CS + k5*ML + k6*ML*BC + k7*F80 + k8*P1in + k9*screen_aper # microns
+   DWIAB = C1 + C2*F80 + C3*DWI + C4*F80*DWI
+   SEsag = circuit.Ksag*(SG*DWIAB)**n1*BBMWi**n2*(T80/1000.0)**n3 # SAG Specific Energy, kWh/t
+   if circuit.gc == 1: # using a Pebble Crusher
+      Mic_pebble = 317.061*Ab**-1.013 # crusher ore Work Index
+      PRpcr_net = TPH_pebble_expected*(Mic_pebble*PRpcr_const) # net Pebble Crusher Power
+   else: # no Pebble Crusher
+      PRpcr_net = 0.0
+   TPHsag = (2*PRsag1_2 + PRsag3 + PRpcr_net)/SEsag
+   OFS = 4000*(14/BBMWi)**0.5 # Optimum Feed Size
+   RRR80 = T80/P80 # Reduction Ratio R80
+   OFF = numpy.where(T80 > OFS, (RRR80 + (0.91*BBMWi - 7)*(T80-OFS)/OFS)/RRR80, 1.0) # Oversize Feed Factor
+   SEbm = OFF*10.0*BBMWi*(P80**-0.5 - (circuit.Kbm*T80)**-0.5)
+   TPHbm = (PRbm + circuit.PRim_net)/SEbm
+   return [SEsag, SEbm, TPHsag, TPHbm]
+
+# throughput (t/h) and SAG limited flag (SAGFG) with the grinding circuit efficiency tphEff, from the SAG and ball mill throughputs of
+# ThroughputArrays; limited to highTPH for weathered Qanaiyaq (QWXFG)
+def EfficiencyArrays(TPHsag, TPHbm, QWXFG, tphEff):
+   TPH = numpy.minimum(TPHsag,TPHbm)*tphEff
+   TPH = numpy.where(QWXFG > 0, numpy.minimum(TPH,highTPH), TPH)
+   SAGFG = numpy.where(TPH < highTPH, TPHsag <= TPHbm, model.UNDEFINED) # not defined when throughput is "high"
+   return [TPH, SAGFG]
+
+# Throughput of the blocks with geology kept by the bench loop: throughputBlocks [(r, c, isCalculated, SG, Ab, BBMWi, QWXFG,
+# TonnesPerBlock, ACLS), ...] by ThroughputArrays (a block not calculated, i.e. no sulphides and no host geology, with the values of the
+# block before it, as in the block by block loop), then defaultBlocks [(r, c, SEsag, SEbm, TPH, SAGFG, TonnesPerBlock), ...] with the
+# host geology defaults. Unscaled(circuit) is the throughput in a grinding circuit before the grinding circuit efficiency, so
+# Values(unscaled, tphEff) for an efficiency only rescales it
+class BenchThroughput(object):
+
+   def __init__(self, throughputBlocks, defaultBlocks):
+      blocks = numpy.array(throughputBlocks, dtype=float).reshape(-1, 9).T
+      defaults = numpy.array(defaultBlocks, dtype=float).reshape(-1, 7).T
+      isCalculated = blocks[2] > 0
+      self.calculated = numpy.cumsum(isCalculated) - 1 # calculated block of each block, itself or the last one calculated before it
+      (self.SG, self.Ab, self.BBMWi, self.QWXFG, self.ACLS) = [values[isCalculated] for values in (blocks[3], blocks[4], blocks[5], blocks[6], blocks[8])]
+      self.rows = numpy.concatenate((blocks[0], defaults[0])).astype(int)
+      self.cols = numpy.concatenate((blocks[1], defaults[1])).astype(int)
+      self.TonnesPerBlock = numpy.concatenate((blocks[7], defaults[6]))
+      self.defaults = defaults[2:6]
+
+   # SEsag, SEbm, TPHsag and TPHbm of the calculated blocks (arrays) in a grinding circuit, P80 the circuit's target for the PCA class
+   def Unscaled(self, circuit):
+      errorSettings = numpy.seterr(divide='ignore', invalid='ignore', over='ignore')
+      try:
+         return ThroughputArrays(self.SG, self.Ab, self.BBMWi, circuit.P80(self.ACLS), circuit)
+      finally:
+         numpy.seterr(**errorSettings)
+
+   # SEsag, SEbm, TPH, SAGFG, MPT and GNDHR of the blocks (arrays) from the unscaled throughput with the grinding circuit efficiency
+   # tphEff; the host geology default throughputs, given with TPH_eff, are rescaled to tphEff
+   def Values(self, unscaled, tphEff):
+      (SEsag, SEbm, TPHsag, TPHbm) = unscaled
+      (defaultSEsag, defaultSEbm, defaultTPH, defaultSAGFG) = self.defaults
+      if tphEff != TPH_eff:
+         defaultTPH = defaultTPH/TPH_eff*tphEff
+      errorSettings = numpy.seterr(divide='ignore', invalid='ignore', over='ignore')
+      try:
+         (TPH, SAGFG) = EfficiencyArrays(TPHsag, TPHbm, self.QWXFG, tphEff)
+         (SEsag, SEbm, TPH, SAGFG) = [numpy.concatenate((values[self.calculated], defaultValues)) for (values, defaultValues) in
+                                      zip((SEsag, SEbm, TPH, SAGFG), (defaultSEsag, defaultSEbm, defaultTPH, defaultSAGFG))]
+         MPT = RoundArray(60.0/TPH,6)
+         GNDHR = RoundArray(self.TonnesPerBlock*MPT/60.0,2)
+      finally:
+         numpy.seterr(**errorSettings)
+      return [SEsag, SEbm, TPH, SAGFG, MPT, GNDHR]
+
+   # QWXFG, TPHsag, TPHbm and DEFAULT of the blocks (arrays) from the unscaled throughput, for the efficiency basis; the host geology
+   # defaults (DEFAULT 1) have their throughput, given with TPH_eff, divided by it as both TPHsag and TPHbm
+   def Basis(self, unscaled):
+      (SEsag, SEbm, TPHsag, TPHbm) = unscaled
+      defaultTPH = self.defaults[2]/TPH_eff
+      zeros = numpy.zeros(len(defaultTPH))
+      return [numpy.concatenate((self.QWXFG[self.calculated], zeros)), numpy.concatenate((TPHsag[self.calculated], defaultTPH)),
+              numpy.concatenate((TPHbm[self.calculated], defaultTPH)), numpy.concatenate((numpy.zeros(len(self.calculated)), zeros + 1))]
+
+# store the items of BenchThroughput.Values for the blocks of the throughput
+def StoreThroughputValues(slab, l, throughput, values):
+   (SEsag, SEbm, TPH, SAGFG, MPT, GNDHR) = values
+   for (item, itemValues) in (("SESAG", SEsag), ("SEBM", SEbm), ("SAGFG", SAGFG), ("MPT", MPT), ("GNDHR", GNDHR)):
+      StoreBlockValues(slab, item, l, throughput.rows, throughput.cols, itemValues)
+
+# side file lines of a bench (one line per block of the throughput, model bench/row/column) with the columns of values
+def SideFileText(throughput, columns, fmt, b, minRow, minColumn):
+   rows, cols = throughput.rows, throughput.cols
+   order = numpy.lexsort((cols, rows))
+   columns = [numpy.zeros(len(rows)) + b, rows + minRow, cols + minColumn] + columns
+   sideText = StringIO()
+   if len(rows) > 0:
+      numpy.savetxt(sideText, numpy.column_stack(columns)[order], fmt=["%d","%d","%d"] + fmt, delimiter=",")
+   return sideText.getvalue()
+
+# calculate the grinding circuit scenarios [(name, GrindingCircuit, MPT item), ...] for the blocks of a BenchThroughput, storing
+# scenarios with an MPT item and returning all as TPH and MPT columns of side file lines; blocks with the host geology defaults have
+# the same throughput in every scenario
+def CircuitScenarioArrays(slab, l, throughput, scenarios, b, minRow, minColumn):
+   columns = []
+   for (name, circuit, MPTitem) in scenarios:
+      (SEsag, SEbm, TPH, SAGFG, MPT, GNDHR) = throughput.Values(throughput.Unscaled(circuit), TPH_eff)
+      if MPTitem != '':
+         StoreBlockValues(slab, MPTitem, l, throughput.rows, throughput.cols, MPT)
+      columns.extend([TPH, MPT])
+   return SideFileText(throughput, columns, ["%.2f","%.6f"]*len(scenarios), b, minRow, minColumn)
+
+# recoveryItems that depend on the zinc recovery efficiency, in the efficiency case side file (efficiencyItemsQan for Qanaiyaq only)
+efficiencyItems = ["ZNREC", "AGGZN", "AGGPB"]
+efficiencyItemsQan = ["ZNRWX", "PBRWX", "PBGWX", "AGGWX"]
+
+# values of the items stored for the blocks of the throughput of level l of the slab
+def StoredBlockValues(slab, l, throughput, items):
+   return [numpy.array([slab[item, l, r, c] for (r, c) in zip(throughput.rows.tolist(), throughput.cols.tolist())]) for item in items]
+
+# positions of the recovery blocks (BenchRecovery) among the blocks of the throughput (BenchThroughput), as (positions in the recovery,
+# positions in the throughput) arrays
+def RecoveryPositions(throughput, recovery):
+   blockIndex = dict([((r, c), k) for (k, (r, c)) in enumerate(zip(throughput.rows.tolist(), throughput.cols.tolist()))])
+   positions = [(k, blockIndex.get((r, c), -1)) for (k, (r, c)) in enumerate(zip(recovery.rows.tolist(), recovery.cols.tolist()))]
+   recoveryPositions = numpy.array([k for (k, position) in positions if position >= 0], dtype=int)
+   throughputPositions = numpy.array([position for (k, position) in positions if position >= 0], dtype=int)
+   return (recoveryPositions, throughputPositions)
+
+# rescale the throughput (unscaled, of a BenchThroughput) and recoveries (BenchRecovery, None if no blocks with metallurgy) of a bench
+# to the efficiency cases [(name, TPH_eff, ZnRec_eff), ...], returning them as TPH, MPT and efficiencyItems columns of side file lines;
+# blocks without metallurgy have the recoveries stored by the bench loop in every case
+def EfficiencyCaseArrays(slab, l, throughput, unscaled, recovery, isQanaiyaq, cases, b, minRow, minColumn):
+   items = efficiencyItems + isQanaiyaq*efficiencyItemsQan
+   stored = StoredBlockValues(slab, l, throughput, items)
+   if recovery is not None: # recovery blocks among the blocks of the throughput
+      (recoveryPositions, throughputPositions) = RecoveryPositions(throughput, recovery)
+   columns = []
+   for (name, tphEff, znRecEff) in cases:
+      (SEsag, SEbm, TPH, SAGFG, MPT, GNDHR) = throughput.Values(unscaled, tphEff)
+      columns.extend([TPH, MPT])
+      if recovery is not None:
+         recoveryValues = recovery.Values(znRecEff)
+      for (item, values) in zip(items, stored):
+         values = values.copy()
+         if recovery is not None:
+            values[throughputPositions] = recoveryValues[recoveryItems.index(item)][recoveryPositions]
+         columns.append(values)
+   return SideFileText(throughput, columns, (["%.2f","%.6f"] + ["%.2f"]*len(items))*len(cases), b, minRow, minColumn)
+
+# efficiency basis columns after BENCH, ROW and COLUMN, then the efficiencyItems (and efficiencyItemsQan for Qanaiyaq)
+efficiencyBasisColumns = ["TONNES", "QWXFG", "TPHSAG", "TPHBM", "DEFAULT", "RECOVERY"] + recoveryInputs + recoveryModels
+
+# first line of the efficiency basis, before its column names: the model file, benches and run it was written by, checked by
+# EfficiencyCases_QAN so a basis is not rescaled for another model
+def EfficiencyBasisTag(modelFile, minLevel, maxLevel, runId):
+   return "# efficiency basis; model=%s; benches=%d-%d; run=%s; script=%s" % (modelFile, minLevel, maxLevel, runId, PROC_TITLE)
+
+# efficiency basis of a bench, returned as side file lines: for each block of the throughput (unscaled, of a BenchThroughput) its tonnes
+# and throughput before the grinding circuit efficiency (BenchThroughput.Basis) and, for the blocks with metallurgy (RECOVERY 1, of the
+# BenchRecovery, None if none), the recovery inputs and models before the zinc recovery efficiency; the efficiencyItems are those stored,
+# kept by the other blocks in every case. Values are written in full precision, so a case rescaled from the basis is the case of a run.
+def EfficiencyBasisArrays(slab, l, throughput, unscaled, recovery, isQanaiyaq, b, minRow, minColumn):
+   blocks = len(throughput.rows)
+   isRecovery = numpy.zeros(blocks)
+   recoveryColumns = [numpy.zeros(blocks) for name in recoveryInputs + recoveryModels]
+   if recovery is not None:
+      (recoveryPositions, throughputPositions) = RecoveryPositions(throughput, recovery)
+      isRecovery[throughputPositions] = 1
+      for (values, recoveryValues) in zip(recoveryColumns, list(recovery.inputs) + recovery.recoveryModel):
+         values[throughputPositions] = recoveryValues[recoveryPositions]
+   stored = StoredBlockValues(slab, l, throughput, efficiencyItems + isQanaiyaq*efficiencyItemsQan)
+   columns = [throughput.TonnesPerBlock] + throughput.Basis(unscaled) + [isRecovery] + recoveryColumns + stored
+   return SideFileText(throughput, columns, ["%.17g"]*len(columns), b, minRow, minColumn)
 
-#####################################################
-###  DEBUGGING / ANALYSIS code for Throughput model
-##
-##   sagData = projdir+"\sagData.csv" # will create an empty file if none present in model folder
-##   sagDataFile = open(sagData,"w")
-##   sagText = "Level,Row,Column,PRsag1_2,PRsag3,PRbm+im,SG,Ab,BBMWi,F80,T80,P80,P1in,SEsag,SEbm,TPHsag,TPHbm,MPTsag,MPTbm\n"
-##   sagDataFile.write(sagText)
-#####################################################
+#==============================================================================
+# Execution Functions
+#==============================================================================
 
-   # determine if calculations filtered by period
-   period_filter = perFunction.get()>0
-   if period_filter:
-      msgText = "  Apply only to unassigned periods\n"
+# open, calculate and store one bench (b), returning its (message, logged) pairs, grinding circuit scenario lines, efficiency case lines,
+# efficiency basis lines (if basis) and bench profile (None if not profiled); called directly or in a BenchPool worker process
+def ModelCalcBench(pcfpath, modelFile, b, minRow, maxRow, minColumn, maxColumn, itemlist, blockVolume, isQanaiyaq, period_filter, arrayEngine, scenarios,
+                   cases, basis, profiled):
+   benchMessages = [("  Opening and updating Bench: %2d" % (b), False)]
+   scenarioText, caseText, basisText = "", "", ""
+   profile = Profile_QAN.BenchProfile(b, profiled)
+   circuit = GrindingCircuit() # the circuit of the constants, for the block by block loop and the throughput arrays
+   try:
+      m = Pipeline_QAN.OpenBench(pcfpath, modelFile, b, minRow, maxRow, minColumn, maxColumn, itemlist)
+   except model.ModelError, e:
+      benchMessages.append(("Model Access Error: "+str(e)+"\n", True))
+      benchMessages.append(("Failed\n", True))
    else:
-      msgText = "  Apply to all blocks\n"
-   print msgText
-   PyLogFile.write(msgText)
-
-   # assume run fails unless last line overwritten
-   PyLogFile.write("Failed!\n")
-
-   for b in xrange(minLevel,maxLevel+1):
-      print "  Opening and updating Bench: %2d" % (b)
-      try:
-         m = model.Model(pcfpath, file15.get(), b, b, minRow, maxRow, minColumn, maxColumn, itemlist)
-      except model.ModelError, e:
-         msgText = "Model Access Error: "+str(e)+"\n"
-         print msgText
-         PyLogFile.write(msgText)
-         msgText = "Failed\n"
-         print msgText
-         PyLogFile.write(msgText)
-      else:
-         if m != None:
-            slab = m.slab()
-            cols, rows = slab.maxcolumn(), slab.maxrow()
-            l = 0
-            # traverse the slab, get values, calculate, and set the new values
-            for r in xrange(rows):
-               for c in xrange(cols):
-                  if period_filter:
-                     PERLT = slab["PERLT", l, r, c]
-                     run_calcs = PERLT < 1
+      profile.Phase("open")
+      if m != None:
+         slab = m.slab()
+         cols, rows = slab.maxcolumn(), slab.maxrow()
+         l = 0
+         profile.Phase("read")
+         airBlocks, periodBlocks = 0, 0
+         recoveryBlocks = [] # recovery inputs of the blocks with metallurgy, for RecoveryArrays (arrayEngine)
+         throughputBlocks, defaultBlocks = [], [] # throughput inputs of the blocks with geology, for BenchThroughput (arrayEngine)
+         # traverse the slab, get values, calculate, and set the new values
+         for r in xrange(rows):
+            for c in xrange(cols):
+               if period_filter:
+                  PERLT = slab["PERLT", l, r, c]
+                  run_calcs = PERLT < 1
+                  if not run_calcs:
+                     periodBlocks += 1
+               else:
+                  run_calcs = True
+               if run_calcs:
+                  # read model values required for all runs through script
+                  workGEOL = slab["GEOL", l, r, c]
+                  isAir = workGEOL == Air
+                  if isAir:
+                     airBlocks += 1
+                  workGEOL1 = slab["GEOL1", l, r, c]
+                  workGEOSM = slab["GEOSM", l, r, c]
+                  DEP = int(slab["DEP", l, r, c])
+                  d = DEP - 1 # array indices: Main = 0, Aqqaluk = 1, Paalaaq = 2, Qanaiyaq = 3
+                  workSTZN = slab["STZN", l, r, c]
+                  STZN_defined = model.isdefined(workSTZN)>0
+                  workSTPB = slab["STPB", l, r, c]
+                  STPB_defined = model.isdefined(workSTPB)>0
+                  STZNPB_defined = STZN_defined and STPB_defined
+                  workSTSPB = slab["STSPB", l, r, c]
+                  STSPB_defined = model.isdefined(workSTSPB)>0
+                  if not STSPB_defined:  # assign STSPB grade
+                     workPB = slab["PB", l, r, c]
+                     workSPB = slab["SPB", l, r, c]
+                     if model.isdefined(workPB)<1 or model.isdefined(workSPB)<1: # i.e. PB or SPB is not defined
+                        ddh_RPB_defined = False
+                        if (not isQanaiyaq and workGEOSM in Weathered[d]) or (isQanaiyaq and (workGEOL1 in Weathered[d] or workGEOL1 in Oxide[d] or workGEOSM in Oxide[d])):
+                           workSTSPB = round(workSTPB * pctRPBweathered[d],2)
+                        else:
+                           workSTSPB = round(workSTPB * pctRPBnonweathered[d],2)
+                     elif workPB == 0 or workSPB == 0: # PB and SPB are defined, but one or other is 0
+                        ddh_RPB_defined = False
+                        workSTSPB = 0.0
+                     else: # use LT assay for RPB ratio
+                        ddh_RPB_defined = True
+                        ddh_RPB = min(workSPB,workPB)/workPB
+                        workSTSPB = round(workSTPB * ddh_RPB,2)
+                  workSTFE = slab["STFE", l, r, c]
+                  STFE_defined = model.isdefined(workSTFE)>0
+                  STZNPBFE_defined = STZNPB_defined and STFE_defined
+                  if not STFE_defined:
+                     workSTFE = 0.0
+                  workSTBA = slab["STBA", l, r, c]
+                  if model.isdefined(workSTBA)<1:
+                     workSTBA = 0.0
+                  workAG = slab["AG", l, r, c]
+                  if model.isdefined(workAG)<1:
+                     workAG = 0.0
+                     AGM = model.UNDEFINED
                   else:
-                     run_calcs = True
-                  if run_calcs:
-                     # read model values required for all runs through script
-                     workGEOL = slab["GEOL", l, r, c]
-                     isAir = workGEOL == Air
-                     workGEOL1 = slab["GEOL1", l, r, c]
-                     workGEOSM = slab["GEOSM", l, r, c]
-                     DEP = int(slab["DEP", l, r, c])
-                     d = DEP - 1 # array indices: Main = 0, Aqqaluk = 1, Paalaaq = 2, Qanaiyaq = 3
-                     workSTZN = slab["STZN", l, r, c]
-                     STZN_defined = model.isdefined(workSTZN)>0
-                     workSTPB = slab["STPB", l, r, c]
-                     STPB_defined = model.isdefined(workSTPB)>0
-                     STZNPB_defined = STZN_defined and STPB_defined
-                     workSTSPB = slab["STSPB", l, r, c]
-                     STSPB_defined = model.isdefined(workSTSPB)>0
-                     if not STSPB_defined:  # assign STSPB grade
-                        workPB = slab["PB", l, r, c]
-                        workSPB = slab["SPB", l, r, c]
-                        if model.isdefined(workPB)<1 or model.isdefined(workSPB)<1: # i.e. PB or SPB is not defined
-                           ddh_RPB_defined = False
-                           if (not isQanaiyaq and workGEOSM in Weathered[d]) or (isQanaiyaq and (workGEOL1 in Weathered[d] or workGEOL1 in Oxide[d] or workGEOSM in Oxide[d])):
-                              workSTSPB = round(workSTPB * pctRPBweathered[d],2)
-                           else:
-                              workSTSPB = round(workSTPB * pctRPBnonweathered[d],2)
-                        elif workPB == 0 or workSPB == 0: # PB and SPB are defined, but one or other is 0
-                           ddh_RPB_defined = False
-                           workSTSPB = 0.0
-                        else: # use LT assay for RPB ratio
-                           ddh_RPB_defined = True
-                           ddh_RPB = min(workSPB,workPB)/workPB
-                           workSTSPB = round(workSTPB * ddh_RPB,2)
-                     workSTFE = slab["STFE", l, r, c]
-                     STFE_defined = model.isdefined(workSTFE)>0
-                     STZNPBFE_defined = STZNPB_defined and STFE_defined
-                     if not STFE_defined:
-                        workSTFE = 0.0
-                     workSTBA = slab["STBA", l, r, c]
-                     if model.isdefined(workSTBA)<1:
-                        workSTBA = 0.0
-                     workAG = slab["AG", l, r, c]
-                     if model.isdefined(workAG)<1:
-                        workAG = 0.0
-                        AGM = model.UNDEFINED
-                     else:
-                        AGM = round(workAG*34.28572,1)
-                     workTOC = slab["TOC", l, r, c]
-                     if model.isdefined(workTOC)<1:
-                        workTOC = 0.0
-                     workS = slab["S", l, r, c]
-                     if model.isdefined(workS)<1:
-                        workS = 0.0
-                     workSIO2 = slab["SIO2", l, r, c]
-                     SIO2_defined = model.isdefined(workSIO2)>0
-                     workCU = slab["CU", l, r, c]
-                     CU_defined = model.isdefined(workCU)>0
-                     workT1 = slab["T1", l, r, c]
-                     workT2 = slab["T2", l, r, c]
-                     workT6 = slab["T6", l, r, c]
-                     TexturesNotDefined = model.isdefined(workT1)<1 or model.isdefined(workT2)<1 or model.isdefined(workT6)<1
-                     ODENM = slab["ODENM", l, r, c]
-                     SG = slab["SG", l, r, c]
-                     NSG = slab["NSG", l, r, c]
-                     KeyCreek = slab["KCFLG", l, r, c] == 1  # True if Key Creek formation
-                     SHPCT = slab["SHPCT", l, r, c]
-                     isAllShale = SHPCT >= 100                      # True if 100% shale
-                     isAllSulfides = SHPCT <= 0                     # True if 100% sulfide
-                     isMixed = not isAllShale and not isAllSulfides # True if 1% to 99% mixed shale-sulfide
-                     hasSulfides = isAllSulfides or isMixed         # True if 1% to 100% sulfides
-
-                     # grade and ratio calculations
-                     if STSPB_defined and STPB_defined and workSTPB > 0:
-                        RPB = int(round(workSTSPB/workSTPB * 100.0,0)) # RPB written to model based only on actual STSPB, not estimated
-                        ZNPB = round(workSTZN/workSTPB,2) #### STPB is the total sulphide in the rock, STSPB: Non sulphide content in
-                        RPB_defined = True
-                        ZNPB_defined = True
+                     AGM = round(workAG*34.28572,1)
+                  workTOC = slab["TOC", l, r, c]
+                  if model.isdefined(workTOC)<1:
+                     workTOC = 0.0
+                  workS = slab["S", l, r, c]
+                  if model.isdefined(workS)<1:
+                     workS = 0.0
+                  workSIO2 = slab["SIO2", l, r, c]
+                  SIO2_defined = model.isdefined(workSIO2)>0
+                  workCU = slab["CU", l, r, c]
+                  CU_defined = model.isdefined(workCU)>0
+                  workT1 = slab["T1", l, r, c]
+                  workT2 = slab["T2", l, r, c]
+                  workT6 = slab["T6", l, r, c]
+                  TexturesNotDefined = model.isdefined(workT1)<1 or model.isdefined(workT2)<1 or model.isdefined(workT6)<1
+                  ODENM = slab["ODENM", l, r, c]
+                  SG = slab["SG", l, r, c]
+                  NSG = slab["NSG", l, r, c]
+                  KeyCreek = slab["KCFLG", l, r, c] == 1  # True if Key Creek formation
+                  SHPCT = slab["SHPCT", l, r, c]
+                  isAllShale = SHPCT >= 100                      # True if 100% shale
+                  isAllSulfides = SHPCT <= 0                     # True if 100% sulfide
+                  isMixed = not isAllShale and not isAllSulfides # True if 1% to 99% mixed shale-sulfide
+                  hasSulfides = isAllSulfides or isMixed         # True if 1% to 100% sulfides
+
+                  # grade and ratio calculations
+                  if STSPB_defined and STPB_defined and workSTPB > 0:
+                     RPB = int(round(workSTSPB/workSTPB * 100.0,0)) # RPB written to model based only on actual STSPB, not estimated
+                     ZNPB = round(workSTZN/workSTPB,2) #### STPB is the total sulphide in the rock, STSPB: Non sulphide content in
+                     RPB_defined = True
+                     ZNPB_defined = True
+                  else:
+                     RPB = model.UNDEFINED
+                     ZNPB = model.UNDEFINED
+                     RPB_defined = False
+                     ZNPB_defined = False
+
+                  if STZN_defined and STFE_defined and workSTFE > 0:
+                     ZNFE = round(workSTZN/workSTFE,2)
+                     ZNFE_defined = True
+                  else:
+                     ZNFE = model.UNDEFINED
+                     ZNFE_defined = False
+                  ##  RECPB = max(workSTPB - (0.875 * workSTSPB), 0.0)  # "recoverable lead" for historical interest, not saved in block model any more
+
+                  # ORCT1 (uses GEOSM, i.e. mixed geology coding)
+                  if isAir:
+                     ORCT1 = model.UNDEFINED
+                  elif isQanaiyaq:
+                     if workGEOSM in Block_1_Q:
+                        ORCT1 = 1
+                     elif workGEOSM in Block_2_Q:
+                        ORCT1 = 2
+                     elif workGEOSM in Block_3_Q:
+                        ORCT1 = 3
+                     elif workGEOSM in Block_4_Q:
+                        ORCT1 = 4
+                     elif workGEOSM in Block_5_Q:
+                        ORCT1 = 5
                      else:
-                        RPB = model.UNDEFINED
-                        ZNPB = model.UNDEFINED
-                        RPB_defined = False
-                        ZNPB_defined = False
-
-                     if STZN_defined and STFE_defined and workSTFE > 0:
-                        ZNFE = round(workSTZN/workSTFE,2)
-                        ZNFE_defined = True
+                        ORCT1 = 6 #undefined
+                  else: # Main, Aqqaluk, or Paalaaq
+                     if workGEOSM in Lower_Plate_A:
+                        ORCT1 = 8
+                     elif workGEOSM in Middle_Plate_A:
+                        ORCT1 = 1
+                     elif workGEOSM in Sublower_Plate_P:
+                        ORCT1 = 6
                      else:
-                        ZNFE = model.UNDEFINED
-                        ZNFE_defined = False
-                     ##  RECPB = max(workSTPB - (0.875 * workSTSPB), 0.0)  # "recoverable lead" for historical interest, not saved in block model any more
-
-                     # ORCT1 (uses GEOSM, i.e. mixed geology coding)
-                     if isAir:
-                        ORCT1 = model.UNDEFINED
-                     elif isQanaiyaq:
-                        if workGEOSM in Block_1_Q:
-                           ORCT1 = 1
-                        elif workGEOSM in Block_2_Q:
-                           ORCT1 = 2
-                        elif workGEOSM in Block_3_Q:
-                           ORCT1 = 3
-                        elif workGEOSM in Block_4_Q:
-                           ORCT1 = 4
-                        elif workGEOSM in Block_5_Q:
-                           ORCT1 = 5
-                        else:
-                           ORCT1 = 6 #undefined
-                     else: # Main, Aqqaluk, or Paalaaq
-                        if workGEOSM in Lower_Plate_A:
-                           ORCT1 = 8
-                        elif workGEOSM in Middle_Plate_A:
-                           ORCT1 = 1
-                        elif workGEOSM in Sublower_Plate_P:
-                           ORCT1 = 6
-                        else:
-                           ORCT1 = 5
+                        ORCT1 = 5
+
+                  # ORCT2 (uses GEOSM, i.e. mixed geology coding)
+                  if isAir:
+                     ORCT2 = model.UNDEFINED
+                  elif isAllShale: # classify 100% shale blocks first
+                     if workGEOSM in Black_Shale[d]:
+                        ORCT2 = 5
+                     elif workGEOSM in Siksikpuk[d] or workGEOSM in Baritic_Siksikpuk[d]: # construction shales
+                        ORCT2 = 6
+                  elif isQanaiyaq and (workGEOSM in Oxide[d] or workGEOL1 in Oxide[d]):  # because this is set first Weathered below has no Oxide
+                     ORCT2 = 7
+                  elif (not isQanaiyaq and workGEOSM in Weathered[d]) or (isQanaiyaq and workGEOL1 in Weathered[d]):
+                     ORCT2 = 2
+                  elif workGEOSM in Exhalite[d]:
+                     if workSTFE < FElimit and workSTBA < BAlimit:
+                        ORCT2 = 1  # Exhalite
+                     elif workSTBA >= BAlimit:
+                        ORCT2 = 3  # Baritic
+                     else: # workSTFE >= FElimit
+                        ORCT2 = 4  # Iron-rich
+                  elif workGEOSM in Vein[d]:
+                     ORCT2 = 8
+                  elif workGEOSM in Baritic[d]:
+                     ORCT2 = 3
+                  # assignment for shales
+                  if isQanaiyaq:
+                     if workGEOSM >= 201:
+                        ORCT2 = workGEOSM - 190 # thus ORCT2 set to 11 to 13
+                  elif workGEOSM >= 25: # assignment for non-Qanaiyaq codes
+                     ORCT2 = workGEOSM - 15 # thus ORCT2 set to 10 to 18
+
+                  # calculate Fe in Sphalerite lattice
+                  if STZN_defined and workSTZN > 0:
+                     FEinFeS = workSTZN*min(workSTFE/workSTZN,FEinZN)
+                     FEinFeS2 = workSTFE - FEinFeS
+                  else:
+                     FEinFeS = 0.0
+                     FEinFeS2 = workSTFE
 
-                     # ORCT2 (uses GEOSM, i.e. mixed geology coding)
-                     if isAir:
-                        ORCT2 = model.UNDEFINED
-                     elif isAllShale: # classify 100% shale blocks first
-                        if workGEOSM in Black_Shale[d]:
-                           ORCT2 = 5
-                        elif workGEOSM in Siksikpuk[d] or workGEOSM in Baritic_Siksikpuk[d]: # construction shales
-                           ORCT2 = 6
-                     elif isQanaiyaq and (workGEOSM in Oxide[d] or workGEOL1 in Oxide[d]):  # because this is set first Weathered below has no Oxide
-                        ORCT2 = 7
-                     elif (not isQanaiyaq and workGEOSM in Weathered[d]) or (isQanaiyaq and workGEOL1 in Weathered[d]):
-                        ORCT2 = 2
-                     elif workGEOSM in Exhalite[d]:
-                        if workSTFE < FElimit and workSTBA < BAlimit:
-                           ORCT2 = 1  # Exhalite
-                        elif workSTBA >= BAlimit:
-                           ORCT2 = 3  # Baritic
-                        else: # workSTFE >= FElimit
-                           ORCT2 = 4  # Iron-rich
-                     elif workGEOSM in Vein[d]:
-                        ORCT2 = 8
-                     elif workGEOSM in Baritic[d]:
-                        ORCT2 = 3
-                     # assignment for shales
-                     if isQanaiyaq:
-                        if workGEOSM >= 201:
-                           ORCT2 = workGEOSM - 190 # thus ORCT2 set to 11 to 13
-                     elif workGEOSM >= 25: # assignment for non-Qanaiyaq codes
-                        ORCT2 = workGEOSM - 15 # thus ORCT2 set to 10 to 18
-
-                     # calculate Fe in Sphalerite lattice
-                     if STZN_defined and workSTZN > 0:
-                        FEinFeS = workSTZN*min(workSTFE/workSTZN,FEinZN)
-                        FEinFeS2 = workSTFE - FEinFeS
-                     else:
-                        FEinFeS = 0.0
-                        FEinFeS2 = workSTFE
-
-                     # calculate Self Heating Capacity Risk Region and Blasting Agent Reactivity
-                     if hasSulfides:
-                        if STZNPBFE_defined:
-                           Sph = workSTZN/0.6709 + FEinFeS/0.6352
-                           Pyr = FEinFeS2/0.4655
-                           Ang = workSTSPB/0.6832
-                           Bar = workSTBA/0.5884
-
-                           # Self Heating Capacity Risk Region (Nessetech 2016), compute A/B then RR: 1=safe, 2=will not heat >100C, 3= do not expose to high heat, 4=monitor, 5=preventative action required; assign 0 for non-sulphide and 6 for undefined sulphide
-                           # Clip mineral percentages
-                           PyrSHC = max(Pyr, 5)
-                           SphSHC = min(Sph, 48)
-                           # calculate A, B, and Risk Region
-                           A = max(-1.33 + 0.0614*PyrSHC + 0.3*SphSHC - 0.00847*pow(SphSHC,2) + 0.0115*PyrSHC*SphSHC,0)
-                           B = max(-6.56 + 0.896*PyrSHC - 0.00588*pow(PyrSHC,2),0)
-                           if A < 1 and B < 1:
-                              SHCRR = 1
-                           elif A < 1:
-                              SHCRR = 3
-                           elif B < 1:
-                              SHCRR = 2
-                           elif A < 5 or B < 5:
-                              SHCRR = 4
-                           else:
-                              SHCRR = 5
-
-                           # Blasting Agent Reactivity (July 2018 revision to model using 2014 & 2016 data)
-                           Sph_Pyr_defined = Pyr > 0
-                           if Sph_Pyr_defined:
-                              Sph_Pyr = Sph/Pyr
-                           if RPB_defined and Sph_Pyr_defined and (RPB >= 10 and RPB <= 95) and Sph_Pyr <= 1.42 and Pyr >= 6.2 and workS >= 0.12:
-                              # eta AA basis
-                              eta = min(max(101.2 - 22.6234*Pyr + 7.53677*Ang - 325.38*Sph_Pyr + 43.4091*B,-10.0),10.0)
-                              RXNmax_AA = exp(eta)/(1 + exp(eta))
-                              # eta XRF basis
-                              eta = min(max(395.764 - 5.13326*NSG - 21.3756*Bar - 60.4365*Pyr - 9.35528*Sph + 138.797*B - 80.0252*min(SHCRR,5),-10.0),10.0)
-                              RXNmax_XRF = exp(eta)/(1 + exp(eta))
-                              if RXNmax_AA >= 0.5 or RXNmax_XRF >= 0.5:
-                                 BRXNF = 1  # reaction possible with Urea in blends
-                              else:
-                                 BRXNF = 0  # reaction possible without Urea
-                           else:
-                              BRXNF = model.UNDEFINED  # no reaction, with or without Urea
-
-                        else: # STZNPBFE not defined
-                           SHCRR = 6
-                           BRXNF = 1 # worst case assumed, i.e. reaction possible with Urea in blends
-                     else: # all remaining, non-sulfide containing rock and all Air
-                        # set Blasting Agent Reactivity
-                        SHCRR = 0
-                        BRXNF = model.UNDEFINED # no reaction, with or without Urea
-                     # set BA Reaction Flag exception for Ikalukrok shale (due to pyrite inclusions)
-                     if workGEOL in BA_shale_reactive[d] and BRXNF != 1: # check BRXNF for mixed shale blocks, tag incase sulfide portion does not exhibit high reactivity from above calculations
-                        BRXNF = 0  # reaction possible without Urea
-
-                     # Set waste segregation criteria WARDC => 0-Possibly Reactive, 1-Low Reactive, 2-Construction, 3-Cover. For 2-Construction these are "polygon" criteria, not "hole" criteria, as they are applied to model blocks.
-                     # Note: undefined assays are set to 0's when read in from Block Model so grade criteria only apply for some GEOL codes.
-                     if KeyCreek and isAllShale:
-                        WARDC = 3
-                     elif not isMixed and (workGEOSM in Siksikpuk[d] or workGEOSM in Baritic_Siksikpuk[d] or workGEOSM in Baritic[d] or workGEOSM in Exhalite[d]) and STZNPBFE_defined and workSTZN <= 0.5 and workSTPB <= 0.5 and workSTFE <= 2.5:
-                        WARDC = 2
-                     elif SHCRR >= 5: # "take preventative action" on chart, here called "Possibly Reactive"
-                        WARDC = 0
-                     else: # remainder is non/low reactive (including Air)
-                        WARDC = 1
-
-                     # ore host rock type specific metallurgy calculations
-                     if hasSulfides and STZNPB_defined:
-                        # ensure textures defined, else use defaults
-                        if TexturesNotDefined:
-                           if workGEOSM in Baritic[d]:
-                              workT1 = T1_baritic[d]
-                              workT2 = T2_baritic[d]
-                              workT6 = T6_baritic[d]
-                           elif workGEOSM in Vein[d]:
-                              workT1 = T1_vein[d]
-                              workT2 = T2_vein[d]
-                              workT6 = T6_vein[d]
-                           elif ORCT2 == 2 or ORCT2 == 7:
-                              workT1 = T1_weathered[d]
-                              workT2 = T2_weathered[d]
-                              workT6 = T6_weathered[d]
-                           else: # exhalite as default
-                              workT1 = T1_exhalite[d]
-                              workT2 = T2_exhalite[d]
-                              workT6 = T6_exhalite[d]
-
-                        # assign MET codes
-                        if DEP <= 2: # Main or Aqqaluk (these have been simplified from original 5 as only Weathered was extraordinary)
-                           if RPB >= RPBlimit and workSTSPB >= SPBlimit: # all Weathered by RPB + sPb criteria (same definition used for Qanaiyaq MET)
-                              MET = 2 # Weathered
+                  # calculate Self Heating Capacity Risk Region and Blasting Agent Reactivity
+                  if hasSulfides:
+                     if STZNPBFE_defined:
+                        Sph = workSTZN/0.6709 + FEinFeS/0.6352
+                        Pyr = FEinFeS2/0.4655
+                        Ang = workSTSPB/0.6832
+                        Bar = workSTBA/0.5884
+
+                        # Self Heating Capacity Risk Region (Nessetech 2016), compute A/B then RR: 1=safe, 2=will not heat >100C, 3= do not expose to high heat, 4=monitor, 5=preventative action required; assign 0 for non-sulphide and 6 for undefined sulphide
+                        # Clip mineral percentages
+                        PyrSHC = max(Pyr, 5)
+                        SphSHC = min(Sph, 48)
+                        # calculate A, B, and Risk Region
+                        A = max(-1.33 + 0.0614*PyrSHC + 0.3*SphSHC - 0.00847*pow(SphSHC,2) + 0.0115*PyrSHC*SphSHC,0)
+                        B = max(-6.56 + 0.896*PyrSHC - 0.00588*pow(PyrSHC,2),0)
+                        if A < 1 and B < 1:
+                           SHCRR = 1
+                        elif A < 1:
+                           SHCRR = 3
+                        elif B < 1:
+                           SHCRR = 2
+                        elif A < 5 or B < 5:
+                           SHCRR = 4
+                        else:
+                           SHCRR = 5
+
+                        # Blasting Agent Reactivity (July 2018 revision to model using 2014 & 2016 data)
+                        Sph_Pyr_defined = Pyr > 0
+                        if Sph_Pyr_defined:
+                           Sph_Pyr = Sph/Pyr
+                        if RPB_defined and Sph_Pyr_defined and (RPB >= 10 and RPB <= 95) and Sph_Pyr <= 1.42 and Pyr >= 6.2 and workS >= 0.12:
+                           # eta AA basis
+                           eta = min(max(101.2 - 22.6234*Pyr + 7.53677*Ang - 325.38*Sph_Pyr + 43.4091*B,-10.0),10.0)
+                           RXNmax_AA = exp(eta)/(1 + exp(eta))
+                           # eta XRF basis
+                           eta = min(max(395.764 - 5.13326*NSG - 21.3756*Bar - 60.4365*Pyr - 9.35528*Sph + 138.797*B - 80.0252*min(SHCRR,5),-10.0),10.0)
+                           RXNmax_XRF = exp(eta)/(1 + exp(eta))
+                           if RXNmax_AA >= 0.5 or RXNmax_XRF >= 0.5:
+                              BRXNF = 1  # reaction possible with Urea in blends
                            else:
-                              MET = 1 # Regular
-                        elif DEP <= 3: # Paalaaq
-                           if workGEOSM in Exhalite[d]:
-                              if workSTBA >= BAlimit:
-                                 MET = 9
-                              else:
-                                 MET = 7
-                           elif workGEOSM in Vein[d]:
-                              MET = 8
-                           else: # workGEOSM in Baritic[d]:
+                              BRXNF = 0  # reaction possible without Urea
+                        else:
+                           BRXNF = model.UNDEFINED  # no reaction, with or without Urea
+
+                     else: # STZNPBFE not defined
+                        SHCRR = 6
+                        BRXNF = 1 # worst case assumed, i.e. reaction possible with Urea in blends
+                  else: # all remaining, non-sulfide containing rock and all Air
+                     # set Blasting Agent Reactivity
+                     SHCRR = 0
+                     BRXNF = model.UNDEFINED # no reaction, with or without Urea
+                  # set BA Reaction Flag exception for Ikalukrok shale (due to pyrite inclusions)
+                  if workGEOL in BA_shale_reactive[d] and BRXNF != 1: # check BRXNF for mixed shale blocks, tag incase sulfide portion does not exhibit high reactivity from above calculations
+                     BRXNF = 0  # reaction possible without Urea
+
+                  # Set waste segregation criteria WARDC => 0-Possibly Reactive, 1-Low Reactive, 2-Construction, 3-Cover. For 2-Construction these are "polygon" criteria, not "hole" criteria, as they are applied to model blocks.
+                  # Note: undefined assays are set to 0's when read in from Block Model so grade criteria only apply for some GEOL codes.
+                  if KeyCreek and isAllShale:
+                     WARDC = 3
+                  elif not isMixed and (workGEOSM in Siksikpuk[d] or workGEOSM in Baritic_Siksikpuk[d] or workGEOSM in Baritic[d] or workGEOSM in Exhalite[d]) and STZNPBFE_defined and workSTZN <= 0.5 and workSTPB <= 0.5 and workSTFE <= 2.5:
+                     WARDC = 2
+                  elif SHCRR >= 5: # "take preventative action" on chart, here called "Possibly Reactive"
+                     WARDC = 0
+                  else: # remainder is non/low reactive (including Air)
+                     WARDC = 1
+
+                  # ore host rock type specific metallurgy calculations
+                  if hasSulfides and STZNPB_defined:
+                     # ensure textures defined, else use defaults
+                     if TexturesNotDefined:
+                        if workGEOSM in Baritic[d]:
+                           workT1 = T1_baritic[d]
+                           workT2 = T2_baritic[d]
+                           workT6 = T6_baritic[d]
+                        elif workGEOSM in Vein[d]:
+                           workT1 = T1_vein[d]
+                           workT2 = T2_vein[d]
+                           workT6 = T6_vein[d]
+                        elif ORCT2 == 2 or ORCT2 == 7:
+                           workT1 = T1_weathered[d]
+                           workT2 = T2_weathered[d]
+                           workT6 = T6_weathered[d]
+                        else: # exhalite as default
+                           workT1 = T1_exhalite[d]
+                           workT2 = T2_exhalite[d]
+                           workT6 = T6_exhalite[d]
+
+                     # assign MET codes
+                     if DEP <= 2: # Main or Aqqaluk (these have been simplified from original 5 as only Weathered was extraordinary)
+                        if RPB >= RPBlimit and workSTSPB >= SPBlimit: # all Weathered by RPB + sPb criteria (same definition used for Qanaiyaq MET)
+                           MET = 2 # Weathered
+                        else:
+                           MET = 1 # Regular
+                     elif DEP <= 3: # Paalaaq
+                        if workGEOSM in Exhalite[d]:
+                           if workSTBA >= BAlimit:
                               MET = 9
-                        else: # DEP == 4, Qanaiyaq
-                           MET1_2RecoveryDeduct = False
-                           if not CU_defined or not RPB_defined: # waste
-                              MET = 0
-                           elif ORCT2 == 7 or (RPB >= RPBlimitOX and workSTSPB >= SPBlimitOX and ZNPB_defined and ZNPB < ZNPBmaxOX): # possible High Lead-Silver Oxide (lead concentrate)
-                              MET = 3
                            else:
-                              if RPB < RPBlimit or (RPB >= RPBlimit and workSTSPB < SPBlimit): # Regular (zinc & lead)
+                              MET = 7
+                        elif workGEOSM in Vein[d]:
+                           MET = 8
+                        else: # workGEOSM in Baritic[d]:
+                           MET = 9
+                     else: # DEP == 4, Qanaiyaq
+                        MET1_2RecoveryDeduct = False
+                        if not CU_defined or not RPB_defined: # waste
+                           MET = 0
+                        elif ORCT2 == 7 or (RPB >= RPBlimitOX and workSTSPB >= SPBlimitOX and ZNPB_defined and ZNPB < ZNPBmaxOX): # possible High Lead-Silver Oxide (lead concentrate)
+                           MET = 3
+                        else:
+                           if RPB < RPBlimit or (RPB >= RPBlimit and workSTSPB < SPBlimit): # Regular (zinc & lead)
+                              MET = 1
+                           elif RPB < RPBlimitPB: # i.e. between RPBlimit and RPBlimitPB; note that all sPb's will be > SPBlimit
+                              if workCU < CUlimitHI: # Regular (zinc & lead)
                                  MET = 1
-                              elif RPB < RPBlimitPB: # i.e. between RPBlimit and RPBlimitPB; note that all sPb's will be > SPBlimit
-                                 if workCU < CUlimitHI: # Regular (zinc & lead)
-                                    MET = 1
-                                    MET1_2RecoveryDeduct = workCU > CUlimitLO # flag True in linear reduction region
-                                 else:
-                                    MET = 4 # remaining is Weathered High Copper (bulk concentrate)
-                              else: # RPB >= RPBlimitPB; note that all sPb's will be > SPBlimit
-                                 if workCU < CUlimitHI: # Weathered (zinc only)
-                                    MET = 2
-                                    MET1_2RecoveryDeduct = workCU > CUlimitLO # flag True in linear reduction region
-                                 else:
-                                    MET = 4 # remaining is Weathered High Copper (bulk concentrate)
-
-                        # WXFG and QWXFG (Weathered flag for mill feed; metallurgical, not geological, based definition; weathered = 1, unweathered = 0)
-                        QWXFG = int(isQanaiyaq and MET >= 2)  # Note: given the copper parameter in Qanaiyaq MET coding, Weathered in Qan has >= RPBlimitPB whereas Weathered in Aqq has >= RPBlimit
-                        WXFG = max(int(not isQanaiyaq and MET == 2), QWXFG)
-
-                        # set minima for grades near zero for Main and Aqqaluk deposit recovery, and all deposit AG recovery, calculations
-                        ZN = max(workSTZN,ZNmin)
-                        PB = max(workSTPB,PBmin)
-                        if not RPB_defined or workSTSPB == 0 or RPB == 0: # in case sPb=0
-                           if ddh_RPB_defined: # !!! removed the rounding to 2 decimal places in the SPB calcs below on May 22 as made SPB=0.00 with very low ddh_RPB ratios, i.e. round(PB * ddh_RPB,2) and did not seem to be required (?)
-                              SPB = PB * ddh_RPB
-                           else:
-                              if (not isQanaiyaq and workGEOSM in Weathered[d]) or (isQanaiyaq and (workGEOL1 in Weathered[d] or workGEOSM in Oxide[d])):
-                                 SPB = PB * pctRPBweathered[d]
+                                 MET1_2RecoveryDeduct = workCU > CUlimitLO # flag True in linear reduction region
+                              else:
+                                 MET = 4 # remaining is Weathered High Copper (bulk concentrate)
+                           else: # RPB >= RPBlimitPB; note that all sPb's will be > SPBlimit
+                              if workCU < CUlimitHI: # Weathered (zinc only)
+                                 MET = 2
+                                 MET1_2RecoveryDeduct = workCU > CUlimitLO # flag True in linear reduction region
                               else:
-                                 SPB = PB * pctRPBnonweathered[d]
+                                 MET = 4 # remaining is Weathered High Copper (bulk concentrate)
+
+                     # WXFG and QWXFG (Weathered flag for mill feed; metallurgical, not geological, based definition; weathered = 1, unweathered = 0)
+                     QWXFG = int(isQanaiyaq and MET >= 2)  # Note: given the copper parameter in Qanaiyaq MET coding, Weathered in Qan has >= RPBlimitPB whereas Weathered in Aqq has >= RPBlimit
+                     WXFG = max(int(not isQanaiyaq and MET == 2), QWXFG)
+
+                     # set minima for grades near zero for Main and Aqqaluk deposit recovery, and all deposit AG recovery, calculations
+                     ZN = max(workSTZN,ZNmin)
+                     PB = max(workSTPB,PBmin)
+                     if not RPB_defined or workSTSPB == 0 or RPB == 0: # in case sPb=0
+                        if ddh_RPB_defined: # !!! removed the rounding to 2 decimal places in the SPB calcs below on May 22 as made SPB=0.00 with very low ddh_RPB ratios, i.e. round(PB * ddh_RPB,2) and did not seem to be required (?)
+                           SPB = PB * ddh_RPB
                         else:
-                           SPB = PB * workSTSPB/workSTPB
-                        BA = max(workSTBA,BAmin)
-                        FE = max(workSTFE,FEmin)
-                        FEinFeS_met = ZN*min(FE/ZN,FEinZN) # ZN always > 0 due to minima calculations, so do not need ZN=0 logic
-                        FEinFeS2_met = FE - FEinFeS_met
-                        NSGmet = 100.0 - (ZN/0.6709 + (PB-SPB)/0.8660 + SPB/0.6832 + FEinFeS2_met/0.4655 + FEinFeS_met/0.6352 + BA/0.5884 + workS + workTOC)
-                        if NSGmet < NSGmin:  # recalc NSG and Ba for use in Universal Model
-                           deltaNSG = NSGmin - NSGmet
-                           BA = max((BA/0.5884 - deltaNSG)*0.5884,BAmin)
-                           NSGmet = NSGmin
-
-                        # Zinc, Lead, and Bulk concentrate grades and recoveries
+                           if (not isQanaiyaq and workGEOSM in Weathered[d]) or (isQanaiyaq and (workGEOL1 in Weathered[d] or workGEOSM in Oxide[d])):
+                              SPB = PB * pctRPBweathered[d]
+                           else:
+                              SPB = PB * pctRPBnonweathered[d]
+                     else:
+                        SPB = PB * workSTSPB/workSTPB
+                     BA = max(workSTBA,BAmin)
+                     FE = max(workSTFE,FEmin)
+                     FEinFeS_met = ZN*min(FE/ZN,FEinZN) # ZN always > 0 due to minima calculations, so do not need ZN=0 logic
+                     FEinFeS2_met = FE - FEinFeS_met
+                     NSGmet = 100.0 - (ZN/0.6709 + (PB-SPB)/0.8660 + SPB/0.6832 + FEinFeS2_met/0.4655 + FEinFeS_met/0.6352 + BA/0.5884 + workS + workTOC)
+                     if NSGmet < NSGmin:  # recalc NSG and Ba for use in Universal Model
+                        deltaNSG = NSGmin - NSGmet
+                        BA = max((BA/0.5884 - deltaNSG)*0.5884,BAmin)
+                        NSGmet = NSGmin
+
+                     # Zinc, Lead, and Bulk concentrate grades and recoveries, and silver grades in the concentrates
+                     if arrayEngine: # for the whole bench once the loop is done (RecoveryArrays), from the recovery inputs of the block
+                        recoveryBlocks.append((r, c, DEP, MET, ORCT2, DEP > 3 and MET1_2RecoveryDeduct, ZN, PB, SPB, BA, FE, NSGmet, workSTZN, workSTPB, workSTSPB,
+                                               workSIO2, SIO2_defined, workAG, workTOC, workT2, workCU, AGM))
+                     else:
                         if not isQanaiyaq:  # Main, Aqqaluk, Paalaaq
                            # set Oxide and Weathered metallurgy to zero as only in Qanaiyaq
                            PBROX, PBGOX = 0.0, 0.0
@@ -727,9 +1288,9 @@ def ExecuteModelCalc(projectpath):
                                  PBREClab = round(9.24*pow(ZN,e1)*pow(PB,e2)*pow(FE,e3)*pow(NSGmet,e4)*pow(BA,e5)*pow(SPB,e6)*pow(PBadjPB,e7),2)
                                  PBREC = min(max(PBREClab,PbRecMin),PbRecMax)
  
- ###Not used per David Lin memo (to add date)
- ###removed DJM Jan 18, 2022
- ###not for use in official model
+    ###Not used per David Lin memo (to add date)
+    ###removed DJM Jan 18, 2022
+    ###not for use in official model
                            else: # DEP == 3, Paalaaq, MET = 7 or 8
                              if MET == 8: # Veined, ore Type B
                                 ZNGRD = 53.0
@@ -859,172 +1420,104 @@ def ExecuteModelCalc(projectpath):
                         else:
                            AGGWX = 0.0
 
-                        # PCA parameter calculation
-                        Gal = (workSTPB-workSTSPB)/0.8660
-                        Sph = workSTZN/0.6709 + FEinFeS/0.6352
-                        Pyr = FEinFeS2/0.4655
-                        Bar = workSTBA/0.5884
-                        U1YP = -0.004074671*Bar + 0.012634782*NSG - 0.025242613*Sph - 0.107611865*Gal - 0.015048441*Pyr - 0.00473548*10*workTOC
-                        U2XP = 0.03159656*Bar - 0.000326032*NSG - 0.002455592*Sph - 0.014168624*Gal - 0.019183818*Pyr - 0.034004886*10*workTOC
-                        U = (U2XP,U1YP,1)
-
-
-                        # assign PCA class and calculate work index parameters, only Ab fully implemented as Class Based gives too low a BBMWi value (i.e. soft)
-                        universal_Ab = True
-                        universal_BBMWi = True
-                        if point_inside_pointlist2d(U,PCA3)==1: # Baritic
-                           ACLS = 3
-                           P80 = P80coarse
-                           if ZNFE_defined:
-                              Ab = round(15.18*Gal + 2.054*Bar - 226.1*workTOC - 3.133*ZNFE,1)
-                           else:
-                              Ab = Ab_min
-                           universal_Ab = False
-                           BBMWi = round(14.23 - 0.144*workT2 - 0.0619*workT6 - 0.227*Sph,2)
-                           universal_BBMWi = False
-                        elif point_inside_pointlist2d(U,PCA6)==1: # Siliceous
-                           ACLS = 6
-                           P80 = P80fine
-                           Ab = round(71.33 - 0.223*workT6 - 1.049*Pyr + 1.141*Bar,1)
-                           universal_Ab = False
-##                           BBMWi = round(19.24 + 0.0997*workT6 - 2.886*Gal - 3.219*Bar,2)
-##                           universal_BBMWi = False
-                        elif point_inside_pointlist2d(U,PCA4)==1: # Sphalerite
-                           ACLS = 4
-                           P80 = P80fine
-                           Ab = round(27.45 + 0.556*workT2 + 0.638*Sph + 1.179*Bar,1)
-                           universal_Ab = False
-##                           BBMWi = round(8.596 + 0.0105*workT2 + 0.0422*NSG + 0.0302*Sph,2)
-##                           universal_BBMWi = False
-                        elif point_inside_pointlist2d(U,PCA7)==1: # Sil-Pyr
-                           ACLS = 7
-                           P80 = P80fine
-                           Ab = round(43.18 + 0.154*workT2 + 0.368*Sph + 3.905*Bar - 6.462*workTOC,1)
-                           universal_Ab = False
-##                           BBMWi = round(0.0236*workT2 + 0.275*NSG + 0.0783*Pyr - 9.717*Bar,2)
-##                           universal_BBMWi = False
-                        elif point_inside_pointlist2d(U,PCA8)==1: # Pyr-Sph
-                           ACLS = 8
-                           P80 = P80fine
-                           Ab = round(391.8 - 0.133*workT6 - 1.720*NSG - 74.554*SG,1)
-                           universal_Ab = False
-##                           BBMWi = round(-107.28 + 1.243*NSG + 1.394*Sph + 0.896*Gal + 1.088*Pyr,2)
-##                           universal_BBMWi = False
-                        elif point_inside_pointlist2d(U,PCA5)==1: # Sil-Sph
-                           ACLS = 5
-                           P80 = P80fine
-                           if ZNFE_defined:
-                              Ab = round(37.06 + 0.562*workT2 + 26.35*workTOC + 0.867*ZNFE,1)
-                           else:
-                              Ab = Ab_min
-                           universal_Ab = False
-##                           BBMWi = round(0.0777*workT2 + 0.0925*workT6 + 0.083*NSG,2)
-##                           universal_BBMWi = False
-                        elif point_inside_pointlist2d(U,PCA1)==1: # Barite Transition
-                           ACLS = 1
-                           P80 = P80medium
-                        elif point_inside_pointlist2d(U,PCA2)==1: # Sphalerite Transition
-                           ACLS = 2
-                           P80 = P80fine
-                        elif point_inside_pointlist2d(U,PCA9)==1: # Sil-Barite Transition
-                           ACLS = 9
-                           P80 = P80medium
-                        elif point_inside_pointlist2d(U,PCA10)==1: # High TOC Universal
-                           ACLS = 10
-                           P80 = P80fine
-                        elif point_inside_pointlist2d(U,PCA11)==1: # High Galena Universal
-                           ACLS = 11
-                           P80 = P80fine
-                        else: # not defined in any polygons
-                           ACLS = 0
-                           P80 = P80fine
-
-                        # use Universal model for undefined classes or if Ab or BBMWi are out of limit with Class-based equation
-                        # Ab
-                        if universal_Ab or Ab < Ab_min or Ab > Ab_max:
-                           if ZNFE_defined:
-                              Ab = round(38.60 + 0.160*workT2 + 0.469*Sph + 1.295*Bar - 0.647*ZNFE,1)
-                              Ab = min(max(Ab,Ab_min),Ab_max) # ensure limited whether from Class or Universal basis
-                           else:
-                              Ab = Ab_min
-                        if QWXFG == 1: # exception for weathered Qanaiyaq as poor quality rock
-                           Ab = min(max(150.0, Ab), Ab_max) # for friable material
-                        # BBMWi
-                        BBMWi_min = 66.748*pow(Ab,-0.445)
-                        if isQanaiyaq: # Qanaiyaq; has custom BBMWi formula
-                           BBMWi = round(0.49216*workSTZN + 0.2699*NSG - 0.10428*workT1,2)
-                        else: # Main, Aqqaluk, Paalaaq
-                           if universal_BBMWi or BBMWi < BBMWi_min or BBMWi > BBMWi_max: # use Universal form
-                              BBMWi = round(5.772 + 0.0256*workT2 + 0.105*NSG + 4.95*workTOC,2)
-                        BBMWi = min(max(BBMWi,BBMWi_min),BBMWi_max) # ensure limited whether from Class or Universal basis
-
-                        # calculate specific energy and throughput
-                        #============================
-                        # Function to calculate power, can be used for SAG or Ball mills
-                        # parameters are: mill type ('SAG' or 'BALL'), Critical Speed (fraction), Ball Charge (fraction), Mill Load (fraction), & mill dimensions (metres): inside radius, inside belly length, center line length, & trunion diameter)
-                        def Power(mill,CSmill,BCmill,MLmill,mill_radius,mill_belly,mill_center,mill_trunion):
-                           RPS_CS_fr = CSmill*30/pi*pow(Cgvty/mill_radius,0.5)/60 # revolutions per second at the fraction of Critical Speed mill is being run
-                           Solids_V_fr = Solids_W_fr/SG/(Solids_W_fr/SG + (1-Solids_W_fr)/SGliquid) # solids volume fraction
-                           SGslurry = Solids_V_fr*SG - Solids_V_fr + SGliquid
-                           mill_vol = mill_belly*pi*pow(mill_radius,2) # cubic metres
-                           MASSballs = BCmill*mill_vol*0.6*SGball
-                           MASSore = SG*mill_vol*(MLmill*(0.6+0.4*Solids_V_fr) - BCmill*0.6)
-                           MASSliquid = MLmill*mill_vol*0.4*(1-Solids_V_fr)*SGliquid # 0.004 changed to 0.4 as ML is defined as a fraction not a % in this implementation
-                           VOLcharge =(MASSore/SG + MASSballs/SGball)/(0.6 + 0.4*Solids_V_fr)
-                           SGcharge = (MASSballs + MASSore + MASSliquid)/VOLcharge
-                           t_const = 0.35*(3.364-MLmill) - CSmill
-                           if t_const < 0:
-                              t = halfPI
-                           else:
-                              t = 2.5307*(1.2796-MLmill)*(1-exp(-19.42*t_const)) + halfPI
-                           s = halfPI - (t-halfPI)*(0.3386 + 0.1041*CSmill + (1.54 - 2.5673*CSmill)*MLmill)
-                           ALtemp1 = (2*pi+s-t)/(2*pi)         # Active Load, interim calc #1
-                           ALtemp2 = pow(1-MLmill/ALtemp1,0.5) # Active Load, interim calc #2
-                           ALtemp3 = 2*ALtemp1/RPS_CS_fr       # Active Load, interim calc #3
-                           AL_fract = ALtemp3/(pow(mill_radius*(1+ALtemp2)*(sin(s)-sin(t))/Cgvty,0.5) + ALtemp3) # Active Load fraction
-                           charge_surface_radius = mill_radius*pow(1-AL_fract*MLmill/ALtemp1,0.5)
-                           z = pow(1-MLmill,0.4532)
-                           if t_const < 0:
-                              kinetic_energy_allowance = 0.0
-                           else:
-                              ki_temp = mill_radius - z*charge_surface_radius
-                              kinetic_energy_allowance = mill_belly*SGcharge*pow(pi*RPS_CS_fr*mill_radius/ki_temp,3)*(pow(ki_temp,4) - pow((1-z)*charge_surface_radius,4))
-                           if mill == 'SAG': # SAG mills use a grate, Ball mills do not
-                              t_overflow = t
-                              overflow_mill_correction_pe = 0.0
-                           else: # Ball mill
-                              t_overflow = 3.395
-                              if t_overflow > t:
-                                 overflow_mill_correction_pe = 0.0
-                              else:
-                                 overflow_mill_correction_pe = 2*pi*Cgvty*mill_belly*SGslurry*RPS_CS_fr*(pow(mill_radius,3)*((1-MLmill)/2 + MLmill/3) - pow(charge_surface_radius,2)*mill_radius*(1-MLmill)/2 - MLmill/3*pow(charge_surface_radius,3))*(sin(t)-sin(t_overflow))
-                           ConeEnd_const = 4*(mill_center - mill_belly)/(2*mill_radius - mill_trunion)
-                           ConeEnd_pe_const = pi*RPS_CS_fr*Cgvty*ConeEnd_const*(SGcharge*(sin(s) - sin(t)) + SGslurry*(sin(t) - sin(t_overflow)))
-                           ConeEnd_pe = ConeEnd_pe_const*(pow(mill_radius,4) - 4*mill_radius*pow(charge_surface_radius,3) + 3*pow(charge_surface_radius,4))/12
-                           ConeEnd_ke_const = SGcharge*2*ConeEnd_const*pow(RPS_CS_fr*pi,3)
-                           ConeEnd_ke = ConeEnd_ke_const/20*(pow(mill_radius,5) - 5*mill_radius*pow(charge_surface_radius,4) + 4*pow(charge_surface_radius,5))
-                           ConeEnd_total = ConeEnd_pe + ConeEnd_ke
-                           PRnet = pi*Cgvty*mill_belly*SGcharge*RPS_CS_fr*mill_radius*(2*pow(mill_radius,3) - 3*z*charge_surface_radius*pow(mill_radius,2) + (3*z-2)*pow(charge_surface_radius,3))/(3*(mill_radius - z*charge_surface_radius))*(sin(s)-sin(t)) + overflow_mill_correction_pe + kinetic_energy_allowance + ConeEnd_total # net power draw, kW
-                           PRnl = 1.68*pow((0.33*mill_center + 0.67*mill_belly)*pow(2*mill_radius,2.5)*CSmill,0.82) # no load power, kW
-                           PRgross = PRnet*Kmill + PRnl # total, kW
-###################################################
-###  DEBUGGING code for Throughput model
-##
-##                           print "SGslurry:%6.3f  VOLcharge:%7.3f  t_const:%6.3f  t:%6.3f  s:%7.4f  ALtemp1:%7.4f  ALtemp2:%7.4f  ALtemp3:%7.4f  AL_fract:%7.4f" % (SGslurry,VOLcharge,t_const,t,s,ALtemp1,ALtemp2,ALtemp3,AL_fract)
-##                           print "z:%7.4f  KEA:%9.4f  PRnet:%7.1f  PRnl:%6.1f  PRgross:%7.1f" % (z,kinetic_energy_allowance,PRnet,PRnl,PRgross)
-##                           print "row:%3d  col:%3d  bench:%3d\n" % ((r+minRow),(c+minColumn),minLevel)
-###################################################
-                           return PRgross;
-                        # end of power calculation function
-                        #==================================
-                        # determine power draw (kW) for each SAG mill (Note: fraction of CS is calculated for each mill before main program loop)
-                        PRsag1_2 = Power('SAG',CSsag1_2,BCsag1_2,MLsag1_2,sag_radius,sag_belly,sag_center,sag_trunion);
-                        PRsag3 = Power('SAG',CSsag3,BCsag3,MLsag3,sag_radius,sag_belly,sag_center,sag_trunion);
+                     # PCA parameter calculation
+                     Gal = (workSTPB-workSTSPB)/0.8660
+                     Sph = workSTZN/0.6709 + FEinFeS/0.6352
+                     Pyr = FEinFeS2/0.4655
+                     Bar = workSTBA/0.5884
+                     U1YP = -0.004074671*Bar + 0.012634782*NSG - 0.025242613*Sph - 0.107611865*Gal - 0.015048441*Pyr - 0.00473548*10*workTOC
+                     U2XP = 0.03159656*Bar - 0.000326032*NSG - 0.002455592*Sph - 0.014168624*Gal - 0.019183818*Pyr - 0.034004886*10*workTOC
+
+                     # assign PCA class and calculate work index parameters, only Ab fully implemented as Class Based gives too low a BBMWi value (i.e. soft)
+                     universal_Ab = True
+                     universal_BBMWi = True
+                     ACLS = pcaIndex.Classify(U2XP,U1YP) # PCA polygons by raster lookup, see pcaClasses for test order
+                     if ACLS == 3: # Baritic
+                        P80 = P80coarse
+                        if ZNFE_defined:
+                           Ab = round(15.18*Gal + 2.054*Bar - 226.1*workTOC - 3.133*ZNFE,1)
+                        else:
+                           Ab = Ab_min
+                        universal_Ab = False
+                        BBMWi = round(14.23 - 0.144*workT2 - 0.0619*workT6 - 0.227*Sph,2)
+                        universal_BBMWi = False
+                     elif ACLS == 6: # Siliceous
+                        P80 = P80fine
+                        Ab = round(71.33 - 0.223*workT6 - 1.049*Pyr + 1.141*Bar,1)
+                        universal_Ab = False
+##                        BBMWi = round(19.24 + 0.0997*workT6 - 2.886*Gal - 3.219*Bar,2)
+##                        universal_BBMWi = False
+                     elif ACLS == 4: # Sphalerite
+                        P80 = P80fine
+                        Ab = round(27.45 + 0.556*workT2 + 0.638*Sph + 1.179*Bar,1)
+                        universal_Ab = False
+##                        BBMWi = round(8.596 + 0.0105*workT2 + 0.0422*NSG + 0.0302*Sph,2)
+##                        universal_BBMWi = False
+                     elif ACLS == 7: # Sil-Pyr
+                        P80 = P80fine
+                        Ab = round(43.18 + 0.154*workT2 + 0.368*Sph + 3.905*Bar - 6.462*workTOC,1)
+                        universal_Ab = False
+##                        BBMWi = round(0.0236*workT2 + 0.275*NSG + 0.0783*Pyr - 9.717*Bar,2)
+##                        universal_BBMWi = False
+                     elif ACLS == 8: # Pyr-Sph
+                        P80 = P80fine
+                        Ab = round(391.8 - 0.133*workT6 - 1.720*NSG - 74.554*SG,1)
+                        universal_Ab = False
+##                        BBMWi = round(-107.28 + 1.243*NSG + 1.394*Sph + 0.896*Gal + 1.088*Pyr,2)
+##                        universal_BBMWi = False
+                     elif ACLS == 5: # Sil-Sph
+                        P80 = P80fine
+                        if ZNFE_defined:
+                           Ab = round(37.06 + 0.562*workT2 + 26.35*workTOC + 0.867*ZNFE,1)
+                        else:
+                           Ab = Ab_min
+                        universal_Ab = False
+##                        BBMWi = round(0.0777*workT2 + 0.0925*workT6 + 0.083*NSG,2)
+##                        universal_BBMWi = False
+                     elif ACLS == 1: # Barite Transition
+                        P80 = P80medium
+                     elif ACLS == 2: # Sphalerite Transition
+                        P80 = P80fine
+                     elif ACLS == 9: # Sil-Barite Transition
+                        P80 = P80medium
+                     elif ACLS == 10: # High TOC Universal
+                        P80 = P80fine
+                     elif ACLS == 11: # High Galena Universal
+                        P80 = P80fine
+                     else: # not defined in any polygons, ACLS = 0
+                        P80 = P80fine
+
+                     # use Universal model for undefined classes or if Ab or BBMWi are out of limit with Class-based equation
+                     # Ab
+                     if universal_Ab or Ab < Ab_min or Ab > Ab_max:
+                        if ZNFE_defined:
+                           Ab = round(38.60 + 0.160*workT2 + 0.469*Sph + 1.295*Bar - 0.647*ZNFE,1)
+                           Ab = min(max(Ab,Ab_min),Ab_max) # ensure limited whether from Class or Universal basis
+                        else:
+                           Ab = Ab_min
+                     if QWXFG == 1: # exception for weathered Qanaiyaq as poor quality rock
+                        Ab = min(max(150.0, Ab), Ab_max) # for friable material
+                     # BBMWi
+                     BBMWi_min = 66.748*pow(Ab,-0.445)
+                     if isQanaiyaq: # Qanaiyaq; has custom BBMWi formula
+                        BBMWi = round(0.49216*workSTZN + 0.2699*NSG - 0.10428*workT1,2)
+                     else: # Main, Aqqaluk, Paalaaq
+                        if universal_BBMWi or BBMWi < BBMWi_min or BBMWi > BBMWi_max: # use Universal form
+                           BBMWi = round(5.772 + 0.0256*workT2 + 0.105*NSG + 4.95*workTOC,2)
+                     BBMWi = min(max(BBMWi,BBMWi_min),BBMWi_max) # ensure limited whether from Class or Universal basis
+
+                     # calculate specific energy and throughput
+                     if arrayEngine: # for the whole bench once the loop is done (ThroughputArrays), from the hardness of the block
+                        SEsag, SEbm, TPH, SAGFG = None, None, None, None
+                     else:
+                        # determine power draw (kW) for each SAG mill from the mill power models (Note: fraction of CS is calculated for each mill before main program loop)
+                        PRsag1_2 = circuit.sagMill1_2.Power(SG)
+                        PRsag3 = circuit.sagMill3.Power(SG)
                         PRtotal = 2*PRsag1_2 + PRsag3
                         # determine average over all SAGs
-                        CS = (2*PRsag1_2*CSsag1_2 + PRsag3*CSsag3)/PRtotal # fraction of Critical Speed
-                        BC = (2*PRsag1_2*BCsag1_2 + PRsag3*BCsag3)/PRtotal # fraction of Ball Charge (ball filling)
-                        ML = (2*PRsag1_2*MLsag1_2 + PRsag3*MLsag3)/PRtotal # fraction of Mill Load (total filling)
+                        CS = (2*PRsag1_2*circuit.CSsag1_2 + PRsag3*circuit.CSsag3)/PRtotal # fraction of Critical Speed
+                        BC = (2*PRsag1_2*circuit.BCsag1_2 + PRsag3*circuit.BCsag3)/PRtotal # fraction of Ball Charge (ball filling)
+                        ML = (2*PRsag1_2*circuit.MLsag1_2 + PRsag3*circuit.MLsag3)/PRtotal # fraction of Mill Load (total filling)
                         DWI = 100.0*SG/Ab # Drop Weight Index
                         if gc == 2: # pre-crushing
                            F80 = 0.36*pow(DWI,1.18)*CSSconst # mm
@@ -1051,7 +1544,7 @@ def ExecuteModelCalc(projectpath):
                         else: # set Oversize Feed Factor to 1
                            OFF = 1.0
                         SEbm = OFF*10.0*BBMWi*(pow(P80,-0.5) - pow(Kbm[gc]*T80,-0.5))
-                        TPHbm = (PRbm + PRim_net)/SEbm
+                        TPHbm = (PRbm + circuit.PRim_net)/SEbm
                         TPH = min(TPHsag,TPHbm)
 ##                        # calculate potential P80 if SAG mill limited and BM power not reduced (not used)
 ##                        SEbm_prod = (PRbm + PRim_net)/TPH
@@ -1068,127 +1561,133 @@ def ExecuteModelCalc(projectpath):
 ###################################################
 ###  DEBUGGING / ANALYSIS code for Throughput model
 ##
-##                     # explicitly convert SAGFG to S, B, or - for debugging text printout
-##                     if SAGFG == 1:
-##                        SGBM = 'S'
-##                     elif SAGFG == 0:
-##                        SGBM = 'B'
-##                     else:
-##                        SGBM = '-'
+##                  # explicitly convert SAGFG to S, B, or - for debugging text printout
+##                  if SAGFG == 1:
+##                     SGBM = 'S'
+##                  elif SAGFG == 0:
+##                     SGBM = 'B'
+##                  else:
+##                     SGBM = '-'
 ##
-####                     print "SG:%5.2f  Ab:%7.2f  BBMWi:%6.2f  P1in:%5.1f  F80:%5.1f  T80:%4.0f  P80in:%3.0f  PRsag1_2:%5.0f  PRsag3:%5.0f  PRpcr:%4.0f  PRbm+im:%5.0f  TPHsag:%5.0f  TPHbm:%5.0f  Limit: %s\n" % (SG,Ab,BBMWi,P1in,F80,T80,P80,PRsag1_2,PRsag3,PRpcr_net,PRbm+PRim_net,TPHsag,TPHbm,SGBM)
-##                     # or
-##                        print "CS:%4.3f  BC:%4.3f  ML:%4.3f  SEsag:%6.2f  SEbm:%6.2f" % (CS,BC,ML,SEsag,SEbm)
-##                        print "PRsag1_2:%5.0f  PRsag3:%5.0f  SG:%5.2f  Ab:%7.2f  DWI:%5.2f  F80:%5.1f  P1in:%5.1f" % (PRsag1_2,PRsag3,SG,Ab,DWI,F80,P1in)
-##                        print "DWIAB:%5.2f  BBMWi:%6.2f  T80:%4.0f  P80in:%3.0f  TPH:%4.0f  row:%3d  col:%3d  bench:%3d\n" % (DWIAB,BBMWi,T80,P80,TPH,(r+minRow),(c+minColumn),minLevel)
-##                     # or
-##                     FLAG1 = slab["FLAG1", l, r, c]
-##                     if model.isdefined(workT1) and FLAG1: # textures are defined
-##                        sagText = "%2d,%3d,%3d,%4.0f,%4.0f,%4.0f,%4.2f,%3.0f,%4.1f,%5.1f,%5.1f,%4.1f,%4.1f,%5.2f,%5.2f,%4.0f,%4.0f,%8.6f,%8.6f\n" % (b,r+minRow,c+minColumn,PRsag1_2,PRsag3,PRbm+PRim_net,SG,Ab,BBMWi,F80,T80,P80,P1in,SEsag,SEbm,TPHsag,TPHbm,60.0/TPHsag,60.0/TPHbm)
-##                        sagDataFile.write(sagText)
-##                       # Level  Row  Column  PRsag1_2  PRsag3  PRbm+im   SG   Ab  BBMWi   F80   T80  P80  P1in  SEsag  SEbm  TPHsag  TPHbm   MPTsag    MPTbm
-##                       #  37   180    180     4500     2300     4800   3.47  88   13.5  90.3  60.3  60.3  30.0  10.67  10.67  452     600  0.010101  0.010101
+####                  print "SG:%5.2f  Ab:%7.2f  BBMWi:%6.2f  P1in:%5.1f  F80:%5.1f  T80:%4.0f  P80in:%3.0f  PRsag1_2:%5.0f  PRsag3:%5.0f  PRpcr:%4.0f  PRbm+im:%5.0f  TPHsag:%5.0f  TPHbm:%5.0f  Limit: %s\n" % (SG,Ab,BBMWi,P1in,F80,T80,P80,PRsag1_2,PRsag3,PRpcr_net,PRbm+PRim_net,TPHsag,TPHbm,SGBM)
+##                  # or
+##                     print "CS:%4.3f  BC:%4.3f  ML:%4.3f  SEsag:%6.2f  SEbm:%6.2f" % (CS,BC,ML,SEsag,SEbm)
+##                     print "PRsag1_2:%5.0f  PRsag3:%5.0f  SG:%5.2f  Ab:%7.2f  DWI:%5.2f  F80:%5.1f  P1in:%5.1f" % (PRsag1_2,PRsag3,SG,Ab,DWI,F80,P1in)
+##                     print "DWIAB:%5.2f  BBMWi:%6.2f  T80:%4.0f  P80in:%3.0f  TPH:%4.0f  row:%3d  col:%3d  bench:%3d\n" % (DWIAB,BBMWi,T80,P80,TPH,(r+minRow),(c+minColumn),minLevel)
+##                  # or
+##                  FLAG1 = slab["FLAG1", l, r, c]
+##                  if model.isdefined(workT1) and FLAG1: # textures are defined
+##                     sagText = "%2d,%3d,%3d,%4.0f,%4.0f,%4.0f,%4.2f,%3.0f,%4.1f,%5.1f,%5.1f,%4.1f,%4.1f,%5.2f,%5.2f,%4.0f,%4.0f,%8.6f,%8.6f\n" % (b,r+minRow,c+minColumn,PRsag1_2,PRsag3,PRbm+PRim_net,SG,Ab,BBMWi,F80,T80,P80,P1in,SEsag,SEbm,TPHsag,TPHbm,60.0/TPHsag,60.0/TPHbm)
+##                     sagDataFile.write(sagText)
+##                    # Level  Row  Column  PRsag1_2  PRsag3  PRbm+im   SG   Ab  BBMWi   F80   T80  P80  P1in  SEsag  SEbm  TPHsag  TPHbm   MPTsag    MPTbm
+##                    #  37   180    180     4500     2300     4800   3.47  88   13.5  90.3  60.3  60.3  30.0  10.67  10.67  452     600  0.010101  0.010101
 ###################################################
-                     else: # does not contain sulfides (thus can be Air) or STZN or STPB assays not defined
-                        MET = 0
-                        ACLS = 0
-                        WXFG, QWXFG = 0, 0  # no grades so no metallurgical weathering estimation for these blocks
-                        ZNGRD, ZNREC, AGGZN = 53.0, 0.0, 0.0 # Zn conc
-                        PBGRD, PBREC, AGGPB = 54.5, 0.0, 0.0 # Pb conc
-                        PBROX, AGGOX = 0.0, 0.0              # Pb-Ag oxide conc
-                        ZNRWX, PBRWX, AGGWX = 0.0, 0.0, 0.0  # Zn-Cu weathered conc
-                        # deposit specific defaults
-                        if isQanaiyaq:
-                           PBGOX = 45.6             # Pb-Ag oxide conc
-                           ZNGWX, PBGWX = 40.5, 7.5 # Zn-Cu weathered conc
-                           # host geology specific defaults (SEsag, SEbm, and TPH calculated using TK2016 model)
-                           if workGEOSM in Black_Shale[d]:
-                              # TF = Qan_Black_Shale_TF for computing grinding parameters
-                              Ab = 42.8 # Ab & BBWWi from AQQ testing Black Shale as no QAN specific samples
-                              BBMWi = 20.90
-                              P80 = 60.0 # "P80coarse"
-                              SEsag = 9.50
-                              SEbm = 15.89
-                              TPH = 439.3*TPH_eff # grinding circuit efficency adjustment
-                              SAGFG = 0 # if SAG limited then True (1)
-                         ##elif workGEOSM in Baritic_Siksikpuk[d]:  *** Commented out as Baritic Siksikpuk not separated from Siksikpuk in most recent Qanaiyaq model QAN2016; however, retained should Baritic Siksikpuk reappear
-                         ##   # TF = Qan_Baritic_Siksikpuk_Shale_TF for computing grinding parameters
-                         ##   Ab = 195.7 # Ab & BBWWi from AQQ testing Baritic Siksikpuk Shale as no QAN specific samples
-                         ##   BBMWi = 9.09
-                         ##   P80 = 60.0 # "P80coarse"
-                         ##   SEsag = 5.62
-                         ##   SEbm = 6.69
-                         ##   TPH = 896.4*TPH_eff # grinding circuit efficency adjustment
-                         ##   SAGFG = model.UNDEFINED # would be 1, but TPH is > 672 (highTPH) so undefined; if SAG limited then True (1)
-                           elif workGEOSM > Air: # i.e. not air
-                              # TF = Qan_Siksikpuk_Shale_TF for computing grinding parameters
-                              Ab = 49.4 # Ab & BBWWi from AQQ testing Siksikpuk Shale as no QAN specific samples
-                              BBMWi = 18.86
-                              P80 = 60.0 # "P80coarse"
-                              SEsag = 9.03
-                              SEbm = 14.0
-                              TPH = 498.8*TPH_eff # grinding circuit efficency adjustment
-                              SAGFG = 0 # if SAG limited then True (1)
-                        else: # Main, Aqqaluk, Paalaaq
-                           PBGOX = 0.0             # Pb-Ag oxide conc
-                           ZNGWX, PBGWX = 0.0, 0.0 # Zn-Cu weathered conc
-                           # host geology specific defaults (SEsag, SEbm, and TPH calculated using TK2016 model)
-                           if workGEOSM in Black_Shale[d]:
-                              # TF = Black_Shale_TF for computing grinding parameters
-                              Ab = 42.8
-                              BBMWi = 20.90
-                              P80 = 60.0 # "P80coarse"
-                              SEsag = 11.56
-                              SEbm = 15.88
-                              TPH = 413.9*TPH_eff # grinding circuit efficency adjustment # 393.6
-                              SAGFG = 1 # if SAG limited then True (1)
-                           elif workGEOSM in Baritic_Siksikpuk[d]:
-                              # TF = Baritic_Siksikpuk_Shale_TF for computing grinding parameters
-                              Ab = 195.7
-                              BBMWi = 9.09
-                              P80 = 60.0 # "P80coarse"
-                              SEsag = 5.60
-                              SEbm = 6.78
-                              TPH = 958.9*TPH_eff # grinding circuit efficency adjustment # 911.3
-                              SAGFG = model.UNDEFINED # would be 1, but TPH is > 672 (highTPH) so undefined; if SAG limited then True (1)
-                           elif workGEOSM > Air: # i.e. not air
-                              # TF = Siksikpuk_Shale_TF for computing grinding parameters
-                              Ab = 49.4
-                              BBMWi = 18.86
-                              P80 = 60.0 # "P80coarse"
-                              SEsag = 10.32
-                              SEbm = 14.0
-                              TPH = 468.5*TPH_eff # grinding circuit efficency adjustment # 445.4
-                              SAGFG = 1 # if SAG limited then True (1)
-
-                     # calculate throughput and grinding hours
-                     if isAir: # no geology as is in air
-                        Ab = model.UNDEFINED
-                        BBMWi = model.UNDEFINED
-                        P80 = model.UNDEFINED
-                        SEsag = model.UNDEFINED
-                        SEbm = model.UNDEFINED
-                        SAGFG = model.UNDEFINED
-                        MPT = 0.0
-                        GNDHR = 0.0
-                     else: # geology defined
-                        TonnesPerBlock = blockVolume*ODENM  # NOTE this is not adjusted by topo, will be taken care of by partials file
+                  else: # does not contain sulfides (thus can be Air) or STZN or STPB assays not defined
+                     MET = 0
+                     ACLS = 0
+                     WXFG, QWXFG = 0, 0  # no grades so no metallurgical weathering estimation for these blocks
+                     ZNGRD, ZNREC, AGGZN = 53.0, 0.0, 0.0 # Zn conc
+                     PBGRD, PBREC, AGGPB = 54.5, 0.0, 0.0 # Pb conc
+                     PBROX, AGGOX = 0.0, 0.0              # Pb-Ag oxide conc
+                     ZNRWX, PBRWX, AGGWX = 0.0, 0.0, 0.0  # Zn-Cu weathered conc
+                     # deposit specific defaults
+                     if isQanaiyaq:
+                        PBGOX = 45.6             # Pb-Ag oxide conc
+                        ZNGWX, PBGWX = 40.5, 7.5 # Zn-Cu weathered conc
+                        # host geology specific defaults (SEsag, SEbm, and TPH calculated using TK2016 model)
+                        if workGEOSM in Black_Shale[d]:
+                           # TF = Qan_Black_Shale_TF for computing grinding parameters
+                           Ab = 42.8 # Ab & BBWWi from AQQ testing Black Shale as no QAN specific samples
+                           BBMWi = 20.90
+                           P80 = 60.0 # "P80coarse"
+                           SEsag = 9.50
+                           SEbm = 15.89
+                           TPH = 439.3*TPH_eff # grinding circuit efficency adjustment
+                           SAGFG = 0 # if SAG limited then True (1)
+                      ##elif workGEOSM in Baritic_Siksikpuk[d]:  *** Commented out as Baritic Siksikpuk not separated from Siksikpuk in most recent Qanaiyaq model QAN2016; however, retained should Baritic Siksikpuk reappear
+                      ##   # TF = Qan_Baritic_Siksikpuk_Shale_TF for computing grinding parameters
+                      ##   Ab = 195.7 # Ab & BBWWi from AQQ testing Baritic Siksikpuk Shale as no QAN specific samples
+                      ##   BBMWi = 9.09
+                      ##   P80 = 60.0 # "P80coarse"
+                      ##   SEsag = 5.62
+                      ##   SEbm = 6.69
+                      ##   TPH = 896.4*TPH_eff # grinding circuit efficency adjustment
+                      ##   SAGFG = model.UNDEFINED # would be 1, but TPH is > 672 (highTPH) so undefined; if SAG limited then True (1)
+                        elif workGEOSM > Air: # i.e. not air
+                           # TF = Qan_Siksikpuk_Shale_TF for computing grinding parameters
+                           Ab = 49.4 # Ab & BBWWi from AQQ testing Siksikpuk Shale as no QAN specific samples
+                           BBMWi = 18.86
+                           P80 = 60.0 # "P80coarse"
+                           SEsag = 9.03
+                           SEbm = 14.0
+                           TPH = 498.8*TPH_eff # grinding circuit efficency adjustment
+                           SAGFG = 0 # if SAG limited then True (1)
+                     else: # Main, Aqqaluk, Paalaaq
+                        PBGOX = 0.0             # Pb-Ag oxide conc
+                        ZNGWX, PBGWX = 0.0, 0.0 # Zn-Cu weathered conc
+                        # host geology specific defaults (SEsag, SEbm, and TPH calculated using TK2016 model)
+                        if workGEOSM in Black_Shale[d]:
+                           # TF = Black_Shale_TF for computing grinding parameters
+                           Ab = 42.8
+                           BBMWi = 20.90
+                           P80 = 60.0 # "P80coarse"
+                           SEsag = 11.56
+                           SEbm = 15.88
+                           TPH = 413.9*TPH_eff # grinding circuit efficency adjustment # 393.6
+                           SAGFG = 1 # if SAG limited then True (1)
+                        elif workGEOSM in Baritic_Siksikpuk[d]:
+                           # TF = Baritic_Siksikpuk_Shale_TF for computing grinding parameters
+                           Ab = 195.7
+                           BBMWi = 9.09
+                           P80 = 60.0 # "P80coarse"
+                           SEsag = 5.60
+                           SEbm = 6.78
+                           TPH = 958.9*TPH_eff # grinding circuit efficency adjustment # 911.3
+                           SAGFG = model.UNDEFINED # would be 1, but TPH is > 672 (highTPH) so undefined; if SAG limited then True (1)
+                        elif workGEOSM > Air: # i.e. not air
+                           # TF = Siksikpuk_Shale_TF for computing grinding parameters
+                           Ab = 49.4
+                           BBMWi = 18.86
+                           P80 = 60.0 # "P80coarse"
+                           SEsag = 10.32
+                           SEbm = 14.0
+                           TPH = 468.5*TPH_eff # grinding circuit efficency adjustment # 445.4
+                           SAGFG = 1 # if SAG limited then True (1)
+
+                  # calculate throughput and grinding hours
+                  if isAir: # no geology as is in air
+                     Ab = model.UNDEFINED
+                     BBMWi = model.UNDEFINED
+                     P80 = model.UNDEFINED
+                     SEsag = model.UNDEFINED
+                     SEbm = model.UNDEFINED
+                     SAGFG = model.UNDEFINED
+                     MPT = 0.0
+                     GNDHR = 0.0
+                  else: # geology defined
+                     TonnesPerBlock = blockVolume*ODENM  # NOTE this is not adjusted by topo, will be taken care of by partials file
+                     if not arrayEngine:
                         MPT = round(60.0/TPH,6)
                         GNDHR = round(TonnesPerBlock*MPT/60.0,2)
-
-                     # write values to model
-                     slab["AGM", l, r, c] = AGM
-                     slab["ZNFE", l, r, c] = ZNFE
-                     slab["ZNPB", l, r, c] = ZNPB
-                     slab["RPB", l, r, c] = RPB
-                     slab["ORCT1", l, r, c] = ORCT1
-                     slab["ORCT2", l, r, c] = ORCT2
-                     slab["QWXFG", l, r, c] = QWXFG
-                     slab["WXFG", l, r, c] = WXFG
-                     slab["P80", l, r, c] = P80
-                     slab["WARDC", l, r, c] = WARDC
-                     slab["MET", l, r, c] = MET
-                     slab["ACLS", l, r, c] = ACLS
+                     elif TPH is None: # for the whole bench once the loop is done (BenchThroughput)
+                        throughputBlocks.append((r, c, hasSulfides and STZNPB_defined, SG, Ab, BBMWi, QWXFG, TonnesPerBlock, ACLS))
+                     else: # host geology defaults
+                        defaultBlocks.append((r, c, SEsag, SEbm, TPH, SAGFG, TonnesPerBlock))
+
+                  # write values to model
+                  slab["AGM", l, r, c] = AGM
+                  slab["ZNFE", l, r, c] = ZNFE
+                  slab["ZNPB", l, r, c] = ZNPB
+                  slab["RPB", l, r, c] = RPB
+                  slab["ORCT1", l, r, c] = ORCT1
+                  slab["ORCT2", l, r, c] = ORCT2
+                  slab["QWXFG", l, r, c] = QWXFG
+                  slab["WXFG", l, r, c] = WXFG
+                  slab["P80", l, r, c] = P80
+                  slab["WARDC", l, r, c] = WARDC
+                  slab["MET", l, r, c] = MET
+                  slab["ACLS", l, r, c] = ACLS
+                  if not (arrayEngine and hasSulfides and STZNPB_defined): # otherwise stored with the recoveries of the bench after the loop
                      slab["ZNGRD", l, r, c] = ZNGRD
                      slab["ZNREC", l, r, c] = ZNREC
                      slab["PBGRD", l, r, c] = PBGRD
@@ -1203,29 +1702,227 @@ def ExecuteModelCalc(projectpath):
                      slab["PBGWX", l, r, c] = PBGWX
                      slab["ZNRWX", l, r, c] = ZNRWX
                      slab["PBRWX", l, r, c] = PBRWX
-                     slab["SHCRR", l, r, c] = SHCRR
-                     slab["BRXNF", l, r, c] = BRXNF
+                  slab["SHCRR", l, r, c] = SHCRR
+                  slab["BRXNF", l, r, c] = BRXNF
+                  slab["AB", l, r, c] = Ab
+                  slab["BMWi", l, r, c] = BBMWi
+                  if isAir or not arrayEngine: # otherwise stored with the throughput of the bench after the loop
                      slab["MPT", l, r, c] = MPT
                      slab["GNDHR", l, r, c] = GNDHR
                      slab["SESAG", l, r, c] = SEsag
                      slab["SEBM", l, r, c] = SEbm
-                     slab["AB", l, r, c] = Ab
-                     slab["BMWi", l, r, c] = BBMWi
                      slab["SAGFG", l, r, c] = SAGFG
-            m.storeslab()
-            m.free()
-         print "  Done"
-   # if executes completely, remove and rewrite last line
-   PyLogFile.close
-   PyLogFile = open(PythonLog,"r")
-   fileContents = PyLogFile.readlines()
-   fileContents = fileContents[:-1] # remove last line of file
-   PyLogFile.close
-   PyLogFile = open(PythonLog,"w")
-   for item in fileContents: # rewrites file content from list
-      PyLogFile.write("%s" % item)
+         profile.CountBlocks(rows*cols, airBlocks, periodBlocks)
+         profile.Phase("calculate")
+         recovery = None
+         if len(recoveryBlocks) > 0:
+            recovery = BenchRecovery(recoveryBlocks, isQanaiyaq)
+            for (item, values) in zip(recoveryItems, recovery.Values(ZnRec_eff)):
+               StoreBlockValues(slab, item, l, recovery.rows, recovery.cols, values)
+            profile.Phase("recovery")
+         if len(throughputBlocks) + len(defaultBlocks) > 0:
+            throughput = BenchThroughput(throughputBlocks, defaultBlocks)
+            unscaled = throughput.Unscaled(circuit)
+            StoreThroughputValues(slab, l, throughput, throughput.Values(unscaled, TPH_eff))
+            profile.Phase("throughput")
+            if len(scenarios) > 0: # same throughput inputs for every grinding circuit scenario
+               scenarioText = CircuitScenarioArrays(slab, l, throughput, [(name, GrindingCircuit(parameters), MPTitem)
+                                                    for (name, parameters, MPTitem) in scenarios], b, minRow, minColumn)
+               profile.Phase("circuit scenarios")
+            if len(cases) > 0: # same unscaled throughput and recovery models for every efficiency case
+               caseText = EfficiencyCaseArrays(slab, l, throughput, unscaled, recovery, isQanaiyaq, cases, b, minRow, minColumn)
+               profile.Phase("efficiency cases")
+            if basis:
+               basisText = EfficiencyBasisArrays(slab, l, throughput, unscaled, recovery, isQanaiyaq, b, minRow, minColumn)
+               profile.Phase("efficiency basis")
+         m.storeslab()
+         m.free()
+         profile.Phase("store")
+      benchMessages.append(("  Done", False))
+   return benchMessages, scenarioText, caseText, basisText, profile.Result()
+
+def ExecuteModelCalc(projectpath):
+   projinf = cmpsys.getproject()
+   pcffile = projinf.get(grail.compass.projectinfo.PCFPATH_TAG)
+   projdir = fileutils.getdir(projectpath)
+   pcfpath = projdir+'\\'+pcffile
+   RunModelCalc(projdir, pcfpath, cmpsys.getpcf())
+
+# run for the model file (file15) and panel variables in the project folder projdir, pcfpath and pcf are the project control file path
+# and pcf object; from ExecuteModelCalc, or from a batch run (BatchRun_QAN) without the panel
+def RunModelCalc(projdir, pcfpath, pcf):
+   run = RunStage(projdir, pcfpath, pcf)
+   try:
+      for (benchFunction, benchArgs, report) in run:
+         BenchPool_QAN.RunBenches(benchFunction, benchArgs, benchWorkers, report)
+   finally:
+      run.close() # a bench pass that fails is ended as failed in the run log and run journal
+
+# RunModelCalc as a stage, yielding its bench pass as (bench function, bench argument tuples, report function) for the caller to run;
+# RunModelCalc runs it in a BenchPool, a fused run (Pipeline_QAN) runs it on the benches opened once for all of its stages
+def RunStage(projdir, pcfpath, pcf):
+   PythonLog = projdir+"\RunLog-Python_scripts.txt" # will create an empty file if none present in model folder
+   PyLogFile = RunJournal_QAN.RunLog(PythonLog)
+   journal = RunJournal_QAN.RunJournal(projdir, PROC_TITLE, [("file15", file15.get()), ("perFunction", perFunction.get()), ("TPH_eff", TPH_eff),
+                                    ("ZnRec_eff", ZnRec_eff), ("circuitScenarios", circuitScenarios), ("efficiencyCases", efficiencyCases),
+                                    ("useArrayEngine", useArrayEngine),
+                                    ("benchWorkers", benchWorkers)])
+   journal.Start()
+   DT = datetime.today()
+   msgText = "\n"+DT.strftime("%d-%b-%Y  %H:%M\n")+"User: "+getpass.getuser()+"\n"+"Script: "+PROC_TITLE+"\n"+"Run: "+journal.runId
+   PyLogFile.write(msgText)
+
+   #  replacement for col, row, level spinners
+   blockVolume = pcf.dx()*pcf.dy()*pcf.dz()
+   minColumn, minRow, minLevel = 1, 1, 1
+   maxColumn, maxRow, maxLevel = pcf.nx(), pcf.ny(), pcf.nz()
+##   minColumn, minRow, minLevel = 1, 1, 25
+##   maxColumn, maxRow, maxLevel = pcf.nx(), pcf.ny(), 25
+##   minColumn, minRow, minLevel = 84, 59, 25
+##   maxColumn, maxRow, maxLevel = 84, 59, 25
+
+   # check if path to a Qanaiyaq model
+   isQanaiyaq = "QAN" in pcfpath or "qan" in pcfpath or "Qan" in pcfpath
+   if isQanaiyaq:
+      msgText = "\n  Qanaiyaq model "+file15.get()+" in "+projdir+"\n"
+      print msgText
+      PyLogFile.write(msgText)
+      msgText = "  Sulfide, Oxide, and Weathered metallurgy\n"
+      print msgText
+      PyLogFile.write(msgText)
+   else:
+      msgText = "\n  Aqqaluk model "+file15.get()+" in "+projdir+"\n"
+      print msgText
+      PyLogFile.write(msgText)
+      msgText = "  Sulfide metallurgy\n"
+      print msgText
+      PyLogFile.write(msgText)
+
+#####################################################
+###  DEBUGGING / ANALYSIS code for Throughput model
+##
+##   sagData = projdir+"\sagData.csv" # will create an empty file if none present in model folder
+##   sagDataFile = open(sagData,"w")
+##   sagText = "Level,Row,Column,PRsag1_2,PRsag3,PRbm+im,SG,Ab,BBMWi,F80,T80,P80,P1in,SEsag,SEbm,TPHsag,TPHbm,MPTsag,MPTbm\n"
+##   sagDataFile.write(sagText)
+#####################################################
+
+   # determine if calculations filtered by period
+   period_filter = perFunction.get()>0
+   if period_filter:
+      msgText = "  Apply only to unassigned periods\n"
+   else:
+      msgText = "  Apply to all blocks\n"
+   print msgText
+   PyLogFile.write(msgText)
+
+   # metallurgical recoveries and mill throughput by whole bench arrays if NumPy is available
+   arrayEngine = useArrayEngine and numpy is not None
+   if arrayEngine:
+      msgText = "  Recoveries and throughput calculated by whole bench arrays\n"
+   else:
+      msgText = "  Recoveries and throughput calculated block by block\n"
+   print msgText
+   PyLogFile.write(msgText)
+
+   # grinding circuit scenarios, calculated from the throughput inputs of the circuit above
+   scenarios = []
+   scenarioFile = None
+   benchItems = list(itemlist)
+   if len(circuitScenarios) > 0 and not arrayEngine:
+      msgText = "  Grinding circuit scenarios (%d) not run as they require the array engine (NumPy)\n" % (len(circuitScenarios))
+      print msgText
+      PyLogFile.write(msgText)
+   elif len(circuitScenarios) > 0:
+      header = "BENCH,ROW,COLUMN"
+      for (name, parameters, MPTitem) in circuitScenarios:
+         circuit = GrindingCircuit(parameters) # parameters checked before the bench pass
+         scenarios.append((name, parameters, MPTitem))
+         if MPTitem != '':
+            benchItems.append(MPTitem)
+         header = header + ",TPH_" + name + ",MPT_" + name
+         msgText = "  Grinding circuit scenario %s (%s) MPT stored in %s\n" % (name, circuit.Text(), MPTitem or "side file only")
+         print msgText
+         PyLogFile.write(msgText)
+      if circuitScenarioFile != '':
+         scenarioFile = open(RunJournal_QAN.ProjectFile(projdir, circuitScenarioFile),"w")
+         scenarioFile.write(header+"\n")
+         msgText = "  Grinding circuit scenario values for blocks with geology written to "+circuitScenarioFile+"\n"
+         print msgText
+         PyLogFile.write(msgText)
+
+   # efficiency cases, rescaled from the throughput and recoveries before TPH_eff and ZnRec_eff
+   cases = []
+   caseFile = None
+   if len(efficiencyCases) > 0 and not arrayEngine:
+      msgText = "  Efficiency cases (%d) not run as they require the array engine (NumPy)\n" % (len(efficiencyCases))
+      print msgText
+      PyLogFile.write(msgText)
+   elif len(efficiencyCases) > 0:
+      header = "BENCH,ROW,COLUMN"
+      for (name, tphEff, znRecEff) in efficiencyCases:
+         cases.append((name, tphEff, znRecEff))
+         header = header + ",TPH_" + name + ",MPT_" + name + ''.join(["," + item + "_" + name for item in efficiencyItems + isQanaiyaq*efficiencyItemsQan])
+         msgText = "  Efficiency case %s: TPH_eff %.3f, ZnRec_eff %.3f\n" % (name, tphEff, znRecEff)
+         print msgText
+         PyLogFile.write(msgText)
+      if efficiencyCaseFile != '':
+         caseFile = open(RunJournal_QAN.ProjectFile(projdir, efficiencyCaseFile),"w")
+         caseFile.write(header+"\n")
+         msgText = "  Efficiency case values for blocks with geology written to "+efficiencyCaseFile+"\n"
+         print msgText
+         PyLogFile.write(msgText)
+
+   # efficiency basis, for efficiency cases without a run (EfficiencyCases_QAN)
+   basisFile = None
+   if efficiencyBasisFile != '' and arrayEngine:
+      basisFile = open(RunJournal_QAN.ProjectFile(projdir, efficiencyBasisFile),"w")
+      basisFile.write(EfficiencyBasisTag(file15.get(), minLevel, maxLevel, journal.runId)+"\n")
+      basisFile.write(','.join(["BENCH", "ROW", "COLUMN"] + efficiencyBasisColumns + efficiencyItems + isQanaiyaq*efficiencyItemsQan)+"\n")
+      msgText = "  Throughput and recovery models before the efficiencies for blocks with geology written to "+efficiencyBasisFile+"\n"
+      print msgText
+      PyLogFile.write(msgText)
+
+   # calculate benches, in a pool of worker processes if benchWorkers is not 1; messages, scenario, case and basis lines are written in
+   # bench order
+   profile = Profile_QAN.RunProfile(projdir, PROC_TITLE, profileRun, journal.runId)
+   outcome = BenchPool_QAN.BenchOutcome(PROC_TITLE, minLevel)
+   def ReportBench(result):
+      benchMessages, scenarioText, caseText, basisText, benchProfile = result
+      BenchPool_QAN.ReportMessages(benchMessages, PyLogFile)
+      outcome.Report(benchMessages)
+      if scenarioFile != None:
+         scenarioFile.write(scenarioText)
+      if caseFile != None:
+         caseFile.write(caseText)
+      if basisFile != None:
+         basisFile.write(basisText)
+      profile.Add(benchProfile)
+   benchArgs = [(pcfpath, file15.get(), b, minRow, maxRow, minColumn, maxColumn, benchItems, blockVolume, isQanaiyaq, period_filter, arrayEngine, scenarios,
+                 cases, basisFile != None, profileRun) for b in xrange(minLevel,maxLevel+1)]
+   try:
+      yield (ModelCalcBench, benchArgs, ReportBench)
+      outcome.Check()
+   except: # bench pass failed, benches of it failed, or its run stopped (close() of this stage)
+      PyLogFile.write("Failed!\n")
+      PyLogFile.close()
+      journal.End("Failed")
+      raise
+   if scenarioFile != None:
+      scenarioFile.close()
+   if caseFile != None:
+      caseFile.close()
+   if basisFile != None:
+      basisFile.close()
+   msgText = profile.Write()
+   if msgText != '':
+      print msgText
+      PyLogFile.write(msgText)
+   # executed completely; the run log and run journal are only appended to, the run's lines together (those of the other stages of a fused
+   # run or of runs in parallel before or after them)
    PyLogFile.write("Executed OK\n")
-   PyLogFile.close
+   PyLogFile.close()
+   journal.End("OK")
 ###################################################
 ###  DEBUGGING / ANALYSIS code for Throughput model
 ##   sagText = "\n"
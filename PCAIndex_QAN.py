@@ -0,0 +1,158 @@
+#==============================================================================
+# Raster lookup index for the PCA hardness class polygons (ACLS), shared by ModelCalcs and the Vulcan block coding script
+#==============================================================================
+
+from math import floor
+from bisect import bisect_left
+
+try: # optional, used for classifying whole arrays of points
+   import numpy
+except ImportError:
+   numpy = None
+
+#==============================================================================
+# Version Information
+#==============================================================================
+
+# Oct 18, 2026 - v1.0.0: raster of the PCA class polygons, exact polygon test only in cells crossed by a class boundary
+
+#==============================================================================
+# Constants
+#==============================================================================
+
+pcaCellSize = 0.02 # PCA units (U2XP, U1YP), raster cell size
+pcaNoClass = 0     # ACLS if not in any polygon
+
+#==============================================================================
+# PCA Class Index
+#==============================================================================
+
+# Each cell of a raster over the polygons holds the ACLS of its centre, found with an even-odd scanline fill in the same priority order as the
+# script's if/elif chain, or -1 if any polygon edge crosses the cell. A point in a whole cell gets the cell ACLS, any other point (boundary cell
+# or outside the raster) is classified by the script's own exact test, so the result is always the same as the if/elif chain.
+# parameters are: ACLS codes in test order, polygon for each code (list of (x, y, ...) points or shapely Polygon),
+#                 inside(i, x, y) exact test of point (x, y) against polygon i, raster cell size
+class PCAIndex(object):
+
+   def __init__(self, classes, polygons, inside, cellSize=pcaCellSize):
+      self.classes = list(classes)
+      self.inside = inside
+      self.cellSize = cellSize
+      rings = [PolygonPoints(polygon) for polygon in polygons]
+      # raster extent, padded by a cell on each side
+      xs = [x for ring in rings for (x, y) in ring]
+      ys = [y for ring in rings for (x, y) in ring]
+      self.x0, self.y0 = min(xs) - cellSize, min(ys) - cellSize
+      self.nx = int(floor((max(xs) + cellSize - self.x0)/cellSize)) + 1
+      self.ny = int(floor((max(ys) + cellSize - self.y0)/cellSize)) + 1
+      self.x1, self.y1 = self.x0 + self.nx*cellSize, self.y0 + self.ny*cellSize
+      unset = -2
+      raster = [unset]*(self.nx*self.ny)
+      # 1) boundary cells, crossed by any edge of any polygon
+      for ring in rings:
+         for k in range(len(ring)-1):
+            self.MarkEdge(raster, ring[k], ring[k+1])
+      # 2) whole cells, class of the cell centre (first polygon in test order containing it)
+      for (code, ring) in zip(self.classes, rings):
+         rxs = [x for (x, y) in ring]
+         rys = [y for (x, y) in ring]
+         c0, c1 = self.Column(min(rxs)), self.Column(max(rxs))
+         r0, r1 = self.Row(min(rys)), self.Row(max(rys))
+         for r in range(r0, r1+1):
+            yc = self.y0 + (r + 0.5)*cellSize
+            crossings = []
+            for k in range(len(ring)-1):
+               (xa, ya), (xb, yb) = ring[k], ring[k+1]
+               if (ya > yc) != (yb > yc):
+                  crossings.append(xa + (yc - ya)*(xb - xa)/(yb - ya))
+            if len(crossings) == 0:
+               continue
+            crossings.sort()
+            for c in range(c0, c1+1):
+               cell = r*self.nx + c
+               if raster[cell] == unset and bisect_left(crossings, self.x0 + (c + 0.5)*cellSize) % 2 == 1:
+                  raster[cell] = code
+      self.raster = [pcaNoClass if code == unset else code for code in raster]
+      self.boundaryCells = self.raster.count(-1)
+      if numpy is not None:
+         self.rasterArray = numpy.array(self.raster)
+
+   # raster column and row of a coordinate, limited to the raster
+   def Column(self, x):
+      return min(max(int(floor((x - self.x0)/self.cellSize)), 0), self.nx-1)
+
+   def Row(self, y):
+      return min(max(int(floor((y - self.y0)/self.cellSize)), 0), self.ny-1)
+
+   # set every cell an edge passes through (or touches) to -1
+   def MarkEdge(self, raster, a, b):
+      (xa, ya), (xb, yb) = a, b
+      pad = self.cellSize*1.0e-6 # guard against round off at cell edges
+      for r in range(self.Row(min(ya, yb)), self.Row(max(ya, yb))+1):
+         for c in range(self.Column(min(xa, xb)), self.Column(max(xa, xb))+1):
+            left, bottom = self.x0 + c*self.cellSize - pad, self.y0 + r*self.cellSize - pad
+            right, top = left + self.cellSize + 2*pad, bottom + self.cellSize + 2*pad
+            if SegmentInBox(xa, ya, xb, yb, left, bottom, right, top):
+               raster[r*self.nx + c] = -1
+
+   # ACLS by the exact test of each polygon in order
+   def Exact(self, x, y):
+      for i in range(len(self.classes)):
+         if self.inside(i, x, y):
+            return self.classes[i]
+      return pcaNoClass
+
+   # ACLS of a point (U2XP, U1YP)
+   def Classify(self, x, y):
+      if self.x0 <= x < self.x1 and self.y0 <= y < self.y1:
+         code = self.raster[self.Row(y)*self.nx + self.Column(x)]
+         if code >= 0:
+            return code
+      return self.Exact(x, y)
+
+   # ACLS of arrays of points (U2XP, U1YP), as an array of the same shape (a list if NumPy is not available)
+   def ClassifyArray(self, xs, ys):
+      if numpy is None:
+         return [self.Classify(x, y) for (x, y) in zip(xs, ys)]
+      xs = numpy.asarray(xs, dtype=float)
+      ys = numpy.asarray(ys, dtype=float)
+      codes = numpy.empty(xs.shape, dtype=int)
+      codes.fill(-1)
+      inRaster = (xs >= self.x0) & (xs < self.x1) & (ys >= self.y0) & (ys < self.y1)
+      columns = numpy.minimum(numpy.floor((xs[inRaster] - self.x0)/self.cellSize).astype(int), self.nx-1)
+      rows = numpy.minimum(numpy.floor((ys[inRaster] - self.y0)/self.cellSize).astype(int), self.ny-1)
+      codes[inRaster] = self.rasterArray[rows*self.nx + columns]
+      for k in zip(*numpy.nonzero(codes < 0)): # boundary cells and outside the raster
+         codes[k] = self.Exact(xs[k], ys[k])
+      return codes
+
+#==============================================================================
+# Geometry Functions
+#==============================================================================
+
+# closed ring of (x, y) points from a list of (x, y, ...) points or a shapely Polygon
+def PolygonPoints(polygon):
+   if hasattr(polygon, "exterior"):
+      polygon = list(polygon.exterior.coords)
+   ring = [(float(p[0]), float(p[1])) for p in polygon]
+   if ring[0] != ring[-1]:
+      ring.append(ring[0])
+   return ring
+
+# True if the segment (xa, ya)-(xb, yb) touches the box, clipping the segment to the box (Liang-Barsky)
+def SegmentInBox(xa, ya, xb, yb, left, bottom, right, top):
+   t0, t1 = 0.0, 1.0
+   dx, dy = xb - xa, yb - ya
+   for (p, q) in ((-dx, xa - left), (dx, right - xa), (-dy, ya - bottom), (dy, top - ya)):
+      if p == 0:
+         if q < 0: # parallel to and outside this side
+            return False
+      else:
+         t = q/p
+         if p < 0:
+            t0 = max(t0, t)
+         else:
+            t1 = min(t1, t)
+         if t0 > t1:
+            return False
+   return True
@@ -0,0 +1,197 @@
+#==============================================================================
+# Fused runs of the grail model scripts (ModelCalcs -> AMR -> DEST), each bench read and stored once for all of them
+#==============================================================================
+
+# usage: python Pipeline_QAN.py <project .pcf> <model file> [benchWorkers=n] <script> [parameter file ...] [name=value ...] [<script> ...]
+#   e.g. python Pipeline_QAN.py C:\MSProjects\QAN\msqan.pcf qan15.dat ModelCalcs_24.52.7_QAN.py AMR_5.23.3_QAN.py pickPriceZn=120 DEST_11.52.5_QAN.py dest.txt
+# Each script is a stage, run in the order given, with the parameters that follow it (as for a batch run, BatchRun_QAN). Any one stage, or
+# any of them in order, can be run; a single stage gives the same model as a batch run of its script.
+# Each bench is opened once with the items of all stages, the stages calculate it in turn on the same slab (so a stage sees the values set
+# by the stages before it) and it is then stored once. The scripts only use blocks of the bench being calculated, so the model is the same as
+# running the scripts one after the other, without reading and storing every bench once per script.
+# Each stage writes its own run log entry and run journal records, marked "Executed OK" when the stage has finished, "Failed!" if the fused
+# run fails.
+
+import sys
+import os
+
+import BenchPool_QAN
+# the batch run (BatchRun_QAN) and the model backend are imported when a fused run is started, so the model scripts can use OpenBench
+# without loading them at MineSight start-up
+
+#==============================================================================
+# Version Information
+#==============================================================================
+
+# Oct 18, 2026 - v1.0.0: fused ModelCalcs, AMR and DEST runs on benches kept open in memory between the stages
+# Oct 18, 2026 - v1.0.1: local model backend (LocalModel_QAN) installed when MineSight is not available
+# Oct 18, 2026 - v1.0.2: stages closed when the fused run fails, so each ends its run as failed in the run log and run journal
+# Oct 18, 2026 - v1.0.3: every stage finished after the bench pass, a stage with failed benches fails the fused run (BenchPool_QAN.BenchError)
+# Oct 18, 2026 - v1.0.4: batch run and model backend imported by the run functions, not when the scripts import this module
+# Oct 18, 2026 - v1.0.5: stage parameters set by BatchRun_QAN.SetParameters, so the constants derived from them are calculated again
+# Oct 18, 2026 - v1.0.6: RunScripts for loaded scripts, so the scripts can be loaded apart from the fused run
+
+#==============================================================================
+# Constants
+#==============================================================================
+
+benchWorkers = 1 # worker processes for the fused benches, 0 for one per processor (the scripts' own benchWorkers are not used)
+
+#==============================================================================
+# Shared Bench
+#==============================================================================
+
+sharedBench = None # bench being calculated by a fused run in this process, None outside a fused run
+
+# One bench of the model file opened for all stages of a fused run, with the items of all of them. Used by the bench functions as the model
+# they open (OpenBench): slab() is read once and shared, storeslab() and free() are left to Close() once every stage has calculated the bench.
+class SharedBench(object):
+
+   def __init__(self, pcfpath, modelFile, b, minRow, maxRow, minColumn, maxColumn, itemlist):
+      self.key = (pcfpath, modelFile, b, minRow, maxRow, minColumn, maxColumn)
+      self.itemlist = itemlist
+      self.model = None # opened by the first stage, so a model access error is reported by the stage as in a script run
+      self.bench = None
+      self.changed = False
+
+   def slab(self):
+      if self.bench is None:
+         self.bench = self.model.slab()
+      return self.bench
+
+   def storeslab(self):
+      self.changed = True
+
+   def free(self):
+      pass
+
+   # store the bench if any stage changed it, and free it
+   def Close(self):
+      if self.model != None:
+         if self.changed:
+            self.model.storeslab()
+         self.model.free()
+
+# model for bench b, as model.Model(pcfpath, modelFile, b, b, minRow, maxRow, minColumn, maxColumn, itemlist); the shared bench in a
+# fused run, otherwise the bench opened from the model file
+def OpenBench(pcfpath, modelFile, b, minRow, maxRow, minColumn, maxColumn, itemlist):
+   from grail.data import model # as imported by the script calling it
+   if sharedBench is None or sharedBench.key != (pcfpath, modelFile, b, minRow, maxRow, minColumn, maxColumn):
+      return model.Model(pcfpath, modelFile, b, b, minRow, maxRow, minColumn, maxColumn, itemlist)
+   if sharedBench.model is None:
+      sharedBench.model = model.Model(pcfpath, modelFile, b, b, minRow, maxRow, minColumn, maxColumn, sharedBench.itemlist)
+   return sharedBench
+
+#==============================================================================
+# Fused Bench Functions
+#==============================================================================
+
+# items of all stages for a bench, in stage order without repeats
+def BenchItems(jobs):
+   items = []
+   for (benchFunction, args) in jobs:
+      for item in args[7]:
+         if item not in items:
+            items.append(item)
+   return items
+
+# run the bench function of every stage on one bench, opened once; jobs are the (bench function, arguments) of the stages in order, the
+# arguments all starting (pcfpath, modelFile, b, minRow, maxRow, minColumn, maxColumn, itemlist); returns the results of the stages in
+# order, called directly or in a BenchPool worker process
+def FusedBench(jobs):
+   global sharedBench
+   (pcfpath, modelFile, b, minRow, maxRow, minColumn, maxColumn) = jobs[0][1][:7]
+   sharedBench = SharedBench(pcfpath, modelFile, b, minRow, maxRow, minColumn, maxColumn, BenchItems(jobs))
+   try:
+      results = [benchFunction(*args) for (benchFunction, args) in jobs]
+      sharedBench.Close()
+   finally:
+      sharedBench = None
+   return results
+
+# fused bench jobs, one list of (bench function, arguments) per bench, from the (bench function, bench argument tuples, report function)
+# bench pass of each stage; the stages must be on the same model file, benches, rows and columns
+def FusedJobs(benchPasses):
+   benches = [[args[:7] for args in benchArgs] for (benchFunction, benchArgs, report) in benchPasses]
+   for stageBenches in benches[1:]:
+      if stageBenches != benches[0]:
+         raise ValueError("stages are not on the same model file, benches, rows and columns")
+   return [[(benchFunction, benchArgs[n]) for (benchFunction, benchArgs, report) in benchPasses] for n in xrange(len(benches[0]))]
+
+#==============================================================================
+# Run Functions
+#==============================================================================
+
+# load the scripts of the stages; also run in each bench worker process so the bench functions can be found by their module names
+def LoadScripts(paths):
+   import BatchRun_QAN
+   return [BatchRun_QAN.LoadScript(path) for path in paths]
+
+# run the stages [(script path, [(name, value), ...]), ...], their scripts loaded (LoadScripts), for the model file in the project of
+# pcfpath, in order, as one fused run
+def RunScripts(scripts, stages, pcfpath, modelFile):
+   import BatchRun_QAN
+   pcfpath = os.path.abspath(pcfpath)
+   projdir = os.path.dirname(pcfpath)
+   scriptPaths = [os.path.abspath(scriptPath) for (scriptPath, parameters) in stages]
+   from grail.data import pcf as grailpcf # MineSight's, or the local model backend installed by LoadScript
+   pcf = grailpcf.Pcf(pcfpath)
+   BenchPool_QAN.workerInitializer, BenchPool_QAN.workerInitArgs = LoadScripts, (scriptPaths,)
+   for (script, (scriptPath, parameters)) in zip(scripts, stages):
+      script.file15.set(modelFile)
+      BatchRun_QAN.SetParameters(script, parameters)
+   runs = [script.RunStage(projdir, pcfpath, pcf) for script in scripts]
+   try:
+      # each stage up to its bench pass
+      benchPasses = [next(run) for run in runs]
+      reports = [report for (benchFunction, benchArgs, report) in benchPasses]
+      def ReportBench(results):
+         for (report, result) in zip(reports, results):
+            report(result)
+      BenchPool_QAN.RunBenches(FusedBench, [(jobs,) for jobs in FusedJobs(benchPasses)], benchWorkers, ReportBench)
+      # each stage after its bench pass (side files, run log); a stage with failed benches does not stop the stages after it
+      failures = []
+      for (script, run) in zip(scripts, runs):
+         try:
+            if len(list(run)) > 0:
+               raise ValueError("%s has more than one bench pass, it can not be run as a stage" % (script.PROC_TITLE))
+         except BenchPool_QAN.BenchError as error:
+            failures.append(str(error))
+      if len(failures) > 0:
+         raise BenchPool_QAN.BenchError('; '.join(failures))
+   finally:
+      for run in runs: # a stage that has not finished is ended as failed
+         run.close()
+
+# run the stages [(script path, [(name, value), ...]), ...] for the model file in the project of pcfpath, in order, as one fused run
+def Run(stages, pcfpath, modelFile):
+   RunScripts(LoadScripts([os.path.abspath(scriptPath) for (scriptPath, parameters) in stages]), stages, pcfpath, modelFile)
+
+def Main(argv):
+   global benchWorkers
+   import BatchRun_QAN
+   stages = []
+   for arg in argv[3:]:
+      if arg.lower().endswith(".py"):
+         stages.append((arg, []))
+      elif len(stages) == 0: # fused run setting, before the first script
+         (name, value) = BatchRun_QAN.ParseParameter(arg)
+         if name != "benchWorkers":
+            raise ValueError("only benchWorkers can be set before the first script: "+arg)
+         benchWorkers = value
+      elif '=' in arg:
+         stages[-1][1].append(BatchRun_QAN.ParseParameter(arg))
+      else:
+         stages[-1][1].extend(BatchRun_QAN.ReadParameters(arg))
+   if len(argv) < 4 or len(stages) == 0:
+      print("usage: python Pipeline_QAN.py <project .pcf> <model file> [benchWorkers=n] <script> [parameter file ...] [name=value ...] [<script> ...]")
+      return 1
+   Run(stages, argv[1], argv[2])
+   return 0
+
+#==============================================================================
+
+# from the command line, run through the imported module so the scripts see the same batchMode and bench functions
+if __name__ == "__main__":
+   import Pipeline_QAN
+   sys.exit(Pipeline_QAN.Main(sys.argv))
@@ -0,0 +1,182 @@
+#==============================================================================
+# Run profile of the grail model scripts (ModelCalcs, AMR, DEST): time per bench and per calculation phase, blocks, peak memory
+#==============================================================================
+
+# Each bench function times its phases (model open, item reads, each calculation step, storeslab) with a BenchProfile, counts the
+# blocks of the bench calculated and skipped (Air, period filter) as it reads them for its calculation and returns the profile with its messages; the run adds up the bench
+# profiles in a RunProfile, which appends them to the profile file next to the run log (RunProfile-Python_scripts.csv) and gives the
+# summary line for the run log.
+# The profile file has one line per value: RUN (run id), DATE, SCRIPT, BENCH (bench number, or "all" for the run), KIND, NAME, VALUE,
+# with KIND one of
+#   seconds  NAME "bench" (a bench, calculation only) or "run" (wall time of the run, with the calculation time of all benches as "benches")
+#   phase    NAME the phase, VALUE seconds (for the run, the total over all benches)
+#   blocks   NAME "blocks", "calculated", "air" or "period" (skipped by the period filter, PERLT >= 1)
+#   rate     NAME "blocks/s", blocks of the run per second of its wall time
+#   memory   NAME "peak MB", peak memory of the process that calculated the bench (for the run, the largest), empty if not known
+
+import sys
+import os
+import time
+
+#==============================================================================
+# Version Information
+#==============================================================================
+
+# Oct 18, 2026 - v1.0.0: bench and phase timings, block counts and peak memory, written to the run profile file
+# Oct 18, 2026 - v1.0.1: run id given by the run (the id of its run journal, RunJournal_QAN)
+# Oct 18, 2026 - v1.0.2: blocks counted by the bench function from the values it reads (no read pass of its own), profile lines
+#                        appended with the file locked (RunJournal_QAN.AppendLines)
+
+#==============================================================================
+# Constants
+#==============================================================================
+
+profileFile = "RunProfile-Python_scripts.csv" # in the project folder, next to the run log
+profileHeader = "RUN,DATE,SCRIPT,BENCH,KIND,NAME,VALUE\n"
+
+#==============================================================================
+# Memory Functions
+#==============================================================================
+
+# peak memory (MB) of this process, None if not known
+def PeakMemory():
+   try:
+      import resource
+   except ImportError: # Windows
+      return WindowsPeakMemory()
+   peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+   if sys.platform == "darwin": # bytes
+      return peak/1048576.0
+   return peak/1024.0 # kB
+
+def WindowsPeakMemory():
+   try:
+      import ctypes
+      from ctypes import wintypes
+      class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+         _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD)] + \
+                    [(name, ctypes.c_size_t) for name in ("PeakWorkingSetSize", "WorkingSetSize", "QuotaPeakPagedPoolUsage", "QuotaPagedPoolUsage",
+                                                         "QuotaPeakNonPagedPoolUsage", "QuotaNonPagedPoolUsage", "PagefileUsage", "PeakPagefileUsage")]
+      counters = PROCESS_MEMORY_COUNTERS()
+      counters.cb = ctypes.sizeof(counters)
+      if ctypes.windll.psapi.GetProcessMemoryInfo(ctypes.windll.kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb):
+         return counters.PeakWorkingSetSize/1048576.0
+   except (ImportError, AttributeError, OSError, ValueError):
+      pass
+   return None
+
+#==============================================================================
+# Profile Classes
+#==============================================================================
+
+runCount = 0 # runs profiled in this process, so the runs of a fused or batch run have their own ids
+
+# id of a run, unique for the runs of a project folder: start time, process and run in the process
+def RunId():
+   global runCount
+   runCount += 1
+   return time.strftime("%Y%m%d-%H%M%S") + "-%d-%d" % (os.getpid(), runCount)
+
+# Profile of one bench, in the process that calculates it: Phase(name) ends the phase name (timed from the end of the phase before it, or
+# the start of the bench), CountBlocks keeps the block counts of the bench. Result() is returned by the bench function with its
+# messages, None if the run is not profiled (enabled False, every call then does nothing).
+class BenchProfile(object):
+
+   def __init__(self, b, enabled=True):
+      self.b = b
+      self.enabled = enabled
+      self.phases = [] # (phase, seconds), in order
+      self.blocks = {}
+      self.start = self.last = time.time()
+
+   def Phase(self, name):
+      if self.enabled:
+         now = time.time()
+         self.phases.append((name, now - self.last))
+         self.last = now
+
+   # blocks of the bench: all, Air (left as air by the bench calculation), skipped by the period filter (PERLT >= 1) and calculated;
+   # counted by the bench function as it reads GEOL and PERLT for its calculation
+   def CountBlocks(self, blocks, air, period=0):
+      if self.enabled:
+         self.blocks = {"blocks":blocks, "calculated":blocks - air - period, "air":air, "period":period}
+
+   def Result(self):
+      if not self.enabled:
+         return None
+      return (self.b, time.time() - self.start, self.phases, self.blocks, PeakMemory())
+
+# Profile of a run (runId, a new id if None), the bench profiles added as the benches are reported; Write() appends them to the profile
+# file of the project folder and returns the summary line for the run log ('' if the run is not profiled)
+class RunProfile(object):
+
+   def __init__(self, projdir, title, enabled=True, runId=None):
+      self.path = os.path.join(projdir, profileFile)
+      self.title = title
+      self.enabled = enabled
+      if runId is None:
+         runId = RunId()
+      self.runId = runId
+      self.date = time.strftime("%Y-%m-%d %H:%M:%S")
+      self.benches = []
+      self.start = time.time()
+
+   def Add(self, result):
+      if result is not None:
+         self.benches.append(result)
+
+   # totals over the benches: calculation seconds, phase -> seconds (in order of first use), blocks, peak memory
+   def Totals(self):
+      seconds = 0.0
+      phases, phaseOrder = {}, []
+      blocks = {"blocks":0, "calculated":0, "air":0, "period":0}
+      peak = PeakMemory()
+      for (b, benchSeconds, benchPhases, benchBlocks, benchPeak) in self.benches:
+         seconds += benchSeconds
+         for (name, phaseSeconds) in benchPhases:
+            if name not in phases:
+               phases[name] = 0.0
+               phaseOrder.append(name)
+            phases[name] += phaseSeconds
+         for name in benchBlocks:
+            blocks[name] += benchBlocks[name]
+         if benchPeak is not None and (peak is None or benchPeak > peak):
+            peak = benchPeak
+      return (seconds, [(name, phases[name]) for name in phaseOrder], blocks, peak)
+
+   def Line(self, bench, kind, name, value):
+      title = self.title
+      if ',' in title or '"' in title:
+         title = '"' + title.replace('"', '""') + '"'
+      if value is None:
+         value = ''
+      elif isinstance(value, float):
+         value = "%.4f" % (value)
+      return "%s,%s,%s,%s,%s,%s,%s\n" % (self.runId, self.date, title, bench, kind, name, value)
+
+   def Write(self):
+      if not self.enabled:
+         return ''
+      wallSeconds = time.time() - self.start
+      lines = []
+      for (b, benchSeconds, benchPhases, benchBlocks, benchPeak) in self.benches:
+         lines.append(self.Line(b, "seconds", "bench", benchSeconds))
+         lines.extend([self.Line(b, "phase", name, phaseSeconds) for (name, phaseSeconds) in benchPhases])
+         lines.extend([self.Line(b, "blocks", name, benchBlocks[name]) for name in ("blocks", "calculated", "air", "period") if name in benchBlocks])
+         lines.append(self.Line(b, "memory", "peak MB", benchPeak))
+      (seconds, phases, blocks, peak) = self.Totals()
+      rate = blocks["blocks"]/max(wallSeconds, 1e-9)
+      lines.append(self.Line("all", "seconds", "run", wallSeconds))
+      lines.append(self.Line("all", "seconds", "benches", seconds))
+      lines.extend([self.Line("all", "phase", name, phaseSeconds) for (name, phaseSeconds) in phases])
+      lines.extend([self.Line("all", "blocks", name, blocks[name]) for name in ("blocks", "calculated", "air", "period")])
+      lines.append(self.Line("all", "rate", "blocks/s", rate))
+      lines.append(self.Line("all", "memory", "peak MB", peak))
+      import RunJournal_QAN # here, as the run journal takes its run ids from this module
+      RunJournal_QAN.AppendLines(self.path, profileHeader, lines) # one locked write, so the lines of runs in parallel are not mixed
+      if peak is None:
+         peakText = "not known"
+      else:
+         peakText = "%.0f MB" % (peak)
+      return "  Profile: %d benches in %.1f s, %d blocks (%d calculated, %d Air, %d period filtered), %.0f blocks/s, peak memory %s, in %s\n" % \
+             (len(self.benches), wallSeconds, blocks["blocks"], blocks["calculated"], blocks["air"], blocks["period"], rate, peakText, profileFile)
@@ -0,0 +1,181 @@
+#==============================================================================
+# In memory reference block model index for the Vulcan blasthole coding script
+#==============================================================================
+
+from math import floor
+from collections import Counter
+
+try: # optional, without it every reference value is read from the model block by block
+   import numpy
+except ImportError:
+   numpy = None
+
+#==============================================================================
+# Version Information
+#==============================================================================
+
+# Oct 18, 2026 - v1.0.0: reference items read once for the blast pattern area into arrays indexed by block ijk
+# Oct 18, 2026 - v1.1.0: 3x3x3 neighbourhood mode ranking (GEOL, GEOL1) calculated once for every indexed block, for the geology fallback search
+# Oct 18, 2026 - v1.2.0: values derived from a reference block kept by block ijk for the other blastholes in the same block, with hit statistics
+
+#==============================================================================
+# Constants
+#==============================================================================
+
+gridTolerance = 0.01 # fraction of block size, block centres further than this from the regular grid disable the index (rotated or sub-blocked model)
+modeDepth = 4 # number of modes kept in the neighbourhood ranking, as Counter(...).most_common(4) in the geology search
+
+#==============================================================================
+# Reference Model Index
+#==============================================================================
+
+# Reads the reference items of every block in the extent (xmin, xmax, ymin, ymax, zmin, zmax), padded by one block on each side, into dense
+# arrays indexed by block ijk. find_world_xyz() turns a blasthole coordinate into ijk arithmetically and get() is then an array lookup.
+# Used in place of the reference model itself, as any point or item not in the index is passed on to the model (find_world_xyz and get).
+# For the mode items the ranking of codes in the 3x3x3 neighbourhood of each block is also calculated once, see Modes().
+# parameters are: open reference vulcan.block_model, list of item names, extent of the blastholes (world coordinates, None if no blastholes),
+#                 list of item names for the neighbourhood mode ranking
+class RefModelIndex(object):
+
+   def __init__(self, model, items, extent, modeItems=[]):
+      self.model = model
+      self.blockSize = model.model_schema_size(0)
+      self.values = {} # item name (lower case) -> array of values by cell
+      self.modes = {} # item name (lower case) -> list of neighbourhood mode rankings by cell
+      self.cell = -1 # current cell, -1 if the current point is not in the index
+      self.ijk = None # ijk of the current block, None if the current point is not in the index
+      self.derived = {} # ijk -> values derived from the reference block only, see Derived()
+      self.derivedHits = 0
+      self.derivedMisses = 0
+      self.point = None # current point, set in the model only when needed
+      self.modelAt = None # point the model is set to
+      self.indexed = 0 # find_world_xyz calls found in the index
+      self.passed = 0 # find_world_xyz calls passed on to the model
+      self.message = ''
+      if numpy is None:
+         self.message = 'NumPy not available, reference model read block by block'
+         return
+      if extent is None:
+         self.message = 'no blastholes to code'
+         return
+      (dx, dy, dz) = self.blockSize
+      search_str = '-X -bw %.2f %.2f %.2f %.2f %.2f %.2f' % (extent[0] - dx, extent[1] + dx, extent[2] - dy, extent[3] + dy, extent[4] - dz, extent[5] + dz)
+      blocks = model.get_matches(search_str)
+      if len(blocks) == 0:
+         self.message = 'no reference blocks in the blast pattern area'
+         return
+      xs = numpy.asarray(model.get_data("xworld", blocks), dtype=float)
+      ys = numpy.asarray(model.get_data("yworld", blocks), dtype=float)
+      zs = numpy.asarray(model.get_data("zworld", blocks), dtype=float)
+      # grid of block centres, origin at the lowest centre
+      self.origin = (xs.min() - dx/2.0, ys.min() - dy/2.0, zs.min() - dz/2.0)
+      fi, fj, fk = (xs - xs.min())/dx, (ys - ys.min())/dy, (zs - zs.min())/dz
+      i, j, k = numpy.rint(fi).astype(int), numpy.rint(fj).astype(int), numpy.rint(fk).astype(int)
+      if max(abs(fi - i).max(), abs(fj - j).max(), abs(fk - k).max()) > gridTolerance:
+         self.message = 'reference model is not a regular grid in world coordinates, reference model read block by block'
+         return
+      self.shape = (i.max()+1, j.max()+1, k.max()+1)
+      cells = (i*self.shape[1] + j)*self.shape[2] + k
+      if len(numpy.unique(cells)) < len(cells):
+         self.message = 'reference model has sub-blocks, reference model read block by block'
+         return
+      self.cells = numpy.empty(self.shape[0]*self.shape[1]*self.shape[2], dtype=int)
+      self.cells.fill(-1)
+      self.cells[cells] = numpy.arange(len(cells))
+      for item in items:
+         try:
+            self.values[item.lower()] = numpy.asarray(model.get_data(item, blocks), dtype=float)
+         except Exception: # not in this model, e.g. KCFLG only in Aqqaluk; read from the model if ever asked for
+            pass
+      neighbours = self.Neighbours(i, j, k)
+      for item in modeItems:
+         try:
+            codes = list(model.get_data(item, blocks))
+         except Exception: # not in this model, e.g. GEOL1 only in Qanaiyaq
+            continue
+         self.modes[item.lower()] = [None if row is None else Counter([codes[n] for n in row]).most_common(modeDepth) for row in neighbours]
+      self.message = '%d reference blocks, %d items and %d mode rankings read into the index' % (len(cells), len(self.values), len(self.modes))
+
+   # blocks in the 3x3x3 neighbourhood of each block (in model order, as returned by a search of the model), None for blocks on the edge
+   # of the index as part of their neighbourhood was not read
+   def Neighbours(self, i, j, k):
+      (ni, nj, nk) = self.shape
+      grid = numpy.empty((ni+2, nj+2, nk+2), dtype=int) # block number by ijk, padded by a layer of -1
+      grid.fill(-1)
+      grid[i+1, j+1, k+1] = numpy.arange(len(i))
+      rows = numpy.empty((len(i), 27), dtype=int)
+      n = 0
+      for di in (-1, 0, 1):
+         for dj in (-1, 0, 1):
+            for dk in (-1, 0, 1):
+               rows[:,n] = grid[i+1+di, j+1+dj, k+1+dk]
+               n += 1
+      rows.sort(axis=1)
+      onEdge = (i == 0) | (i == ni-1) | (j == 0) | (j == nj-1) | (k == 0) | (k == nk-1)
+      return [None if edge else [n for n in row if n >= 0] for (row, edge) in zip(rows.tolist(), onEdge)]
+
+   # ijk of the reference block containing a world point, or None if outside the index
+   def FindIJK(self, x, y, z):
+      if len(self.values) == 0:
+         return None
+      ijk = (int(floor((x - self.origin[0])/self.blockSize[0])),
+             int(floor((y - self.origin[1])/self.blockSize[1])),
+             int(floor((z - self.origin[2])/self.blockSize[2])))
+      for (n, size) in zip(ijk, self.shape):
+         if n < 0 or n >= size:
+            return None
+      return ijk
+
+   # set the current point, as vulcan.block_model.find_world_xyz
+   def find_world_xyz(self, x, y, z):
+      self.point = (x, y, z)
+      self.cell = -1
+      self.ijk = None
+      ijk = self.FindIJK(x, y, z)
+      if ijk is not None:
+         self.cell = self.cells[(ijk[0]*self.shape[1] + ijk[1])*self.shape[2] + ijk[2]]
+      if self.cell >= 0:
+         self.ijk = ijk
+         self.indexed += 1
+      else:
+         self.passed += 1
+
+   # item value of the current block, as vulcan.block_model.get
+   def get(self, item):
+      values = self.values.get(item.lower())
+      if values is not None and self.cell >= 0:
+         return values[self.cell]
+      if self.modelAt != self.point:
+         self.model.find_world_xyz(*self.point)
+         self.modelAt = self.point
+      return self.model.get(item)
+
+   # ranking of the codes of item in the 3x3x3 neighbourhood of the current block, as Counter(...).most_common(4) of a search of the
+   # model around the point; None if not in the index, the model must then be searched
+   def Modes(self, item):
+      modes = self.modes.get(item.lower())
+      if modes is None or self.cell < 0:
+         return None
+      return modes[self.cell]
+
+   # derive(index) for the current block, the values derived from the reference block only (no blasthole assays); calculated once per
+   # block ijk and kept for the other blastholes in the same block, points not in the index are always calculated
+   def Derived(self, derive):
+      if self.ijk is None:
+         return derive(self)
+      values = self.derived.get(self.ijk)
+      if values is None:
+         self.derivedMisses += 1
+         values = derive(self)
+         self.derived[self.ijk] = values
+      else:
+         self.derivedHits += 1
+      return values
+
+   # index statistics for the end of run message
+   def Summary(self):
+      text = 'Reference model index: %s; %d blastholes found in the index, %d read from the model' % (self.message, self.indexed, self.passed)
+      lookups = self.derivedHits + self.derivedMisses
+      if lookups > 0:
+         text += '\nReference block values: %d blocks calculated, %d blastholes shared an already calculated block (%.1f%% hit rate)' % (self.derivedMisses, self.derivedHits, 100.0*self.derivedHits/lookups)
+      return text
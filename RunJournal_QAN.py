@@ -0,0 +1,172 @@
+#==============================================================================
+# Run journal of the grail model scripts (ModelCalcs, AMR, DEST): start and end record of each run, appended only
+#==============================================================================
+
+# Each run appends a start record when it starts and an end record when it has finished, to the journal file next to the run log
+# (RunJournal-Python_scripts.csv). Records are only ever appended, each in one write with the file locked (msvcrt on Windows, fcntl
+# elsewhere), so a run costs the same however long the journal and the run log are, and runs in parallel on the same project folder do
+# not mix their records or both write the header.
+# The journal has one line per record: RUN (run id, as in the run profile), RECORD ("start" or "end"), DATE, USER, SCRIPT, PARAMETERS
+# (name=value; ... of the panel variables and constants of the run), SECONDS (end record, from the start of the run) and OUTCOME ("OK" or
+# "Failed"). A run with a start record and no end record did not finish (stopped, or failed before its bench pass).
+# The run log of a run (RunLog) is kept in memory and written to the run log file in one locked write when the run ends, "Executed OK"
+# or "Failed!", so the lines of runs in parallel are not interleaved. Its heading is appended with "Failed!" when the run starts, so a run
+# that stops without ending (crash, killed process) is logged as failed; at the end that entry is replaced by the run's lines, only the
+# lines appended after it (runs in parallel) being rewritten.
+
+import os
+import time
+import getpass
+
+try: # file lock on Windows
+   import msvcrt
+except ImportError:
+   msvcrt = None
+try: # file lock elsewhere
+   import fcntl
+except ImportError:
+   fcntl = None
+
+import Profile_QAN
+
+#==============================================================================
+# Version Information
+#==============================================================================
+
+# Oct 18, 2026 - v1.0.0: append only run journal with start and end records, run id shared with the run profile (Profile_QAN)
+# Oct 18, 2026 - v1.0.1: appends locked (LockFile), header written under the lock if the file is empty
+# Oct 18, 2026 - v1.0.2: run log of a run kept in memory and appended in one locked write when it is closed (RunLog)
+# Oct 18, 2026 - v1.0.3: path of a file in the project folder (ProjectFile), for the side files of the scripts and the tools reading them
+# Oct 18, 2026 - v1.0.4: run log heading appended with "Failed!" when the run starts and replaced by the run's lines at its end (ReplaceLines)
+
+#==============================================================================
+# Constants
+#==============================================================================
+
+journalFile = "RunJournal-Python_scripts.csv" # in the project folder, next to the run log
+journalHeader = "RUN,RECORD,DATE,USER,SCRIPT,PARAMETERS,SECONDS,OUTCOME\n"
+
+#==============================================================================
+# Journal Functions
+#==============================================================================
+
+# path of the file fileName in the project folder projdir, for the journal and the side files of the scripts (written by a run, read by
+# the tools that rescale or compare them)
+def ProjectFile(projdir, fileName):
+   return os.path.join(projdir, fileName)
+
+# CSV field, quoted if it has a comma, quote or line break
+def Field(value):
+   text = str(value)
+   if ',' in text or '"' in text or '\n' in text:
+      text = '"' + text.replace('"', '""') + '"'
+   return text
+
+# "name=value; ..." of the parameters [(name, value), ...]
+def ParameterText(parameters):
+   return "; ".join(["%s=%r" % (name, value) for (name, value) in parameters])
+
+# lock (locked True) or unlock an open file, waiting for the lock of another process: msvcrt locks the first byte (LK_LOCK gives up
+# after 10 tries, so it is tried again), fcntl the whole file; not locked if neither is available
+def LockFile(openFile, locked):
+   if msvcrt is not None:
+      openFile.seek(0)
+      while True:
+         try:
+            msvcrt.locking(openFile.fileno(), msvcrt.LK_LOCK if locked else msvcrt.LK_UNLCK, 1)
+            break
+         except IOError:
+            if not locked:
+               raise
+   elif fcntl is not None:
+      fcntl.flock(openFile.fileno(), fcntl.LOCK_EX if locked else fcntl.LOCK_UN)
+
+# append lines to a file of the project folder in one write, with the header line if the file is empty; the file is locked from the
+# header check to the end of the write. Returns the position of the lines in the file (for ReplaceLines).
+def AppendLines(path, header, lines):
+   appendFile = open(path, "a")
+   try:
+      LockFile(appendFile, True)
+      appendFile.seek(0, 2)
+      if appendFile.tell() == 0:
+         appendFile.write(header)
+      position = appendFile.tell()
+      appendFile.write(''.join(lines))
+      appendFile.flush()
+      LockFile(appendFile, False)
+   finally:
+      appendFile.close()
+   return position
+
+# replace lines appended at position (AppendLines) by the lines replacement in one write, with the file locked; only the file from
+# position is read and written again, the lines having moved on if lines before them were replaced meanwhile (runs in parallel). The
+# whole file is searched if they moved back, and the replacement appended if they are not found (file edited meanwhile).
+def ReplaceLines(path, position, lines, replacement):
+   (text, newText) = (''.join(lines), ''.join(replacement))
+   replaceFile = open(path, "r+")
+   try:
+      LockFile(replaceFile, True)
+      replaceFile.seek(position)
+      after = replaceFile.read()
+      if text not in after:
+         position = 0
+         replaceFile.seek(position)
+         after = replaceFile.read()
+      if text in after:
+         replaceFile.seek(position)
+         replaceFile.write(after.replace(text, newText, 1))
+         replaceFile.truncate()
+      else:
+         replaceFile.seek(0, 2)
+         replaceFile.write(newText)
+      replaceFile.flush()
+      LockFile(replaceFile, False)
+   finally:
+      replaceFile.close()
+
+# Run log of one run, written to as the run log file was: the first text (the run's heading) is appended to the file at path at once,
+# with "Failed!" after it, and the text of the run replaces that entry in one write by close()
+class RunLog(object):
+
+   def __init__(self, path):
+      self.path = path
+      self.lines = []
+      self.started = None # (position, lines) of the entry appended by the first write
+
+   def write(self, text):
+      self.lines.append(text)
+      if self.started is None:
+         startLines = [text, "\nFailed!\n"]
+         self.started = (AppendLines(self.path, '', startLines), startLines)
+
+   def close(self):
+      if len(self.lines) > 0:
+         (position, startLines) = self.started
+         ReplaceLines(self.path, position, startLines, self.lines)
+         self.lines = []
+         self.started = None
+
+# Journal of one run of the script title, parameters [(name, value), ...]: Start() appends the start record, End(outcome) the end record
+class RunJournal(object):
+
+   def __init__(self, projdir, title, parameters):
+      self.path = ProjectFile(projdir, journalFile)
+      self.title = title
+      self.parameters = parameters
+      self.runId = Profile_QAN.RunId()
+      self.start = time.time()
+      self.ended = False
+
+   def Record(self, record, seconds, outcome):
+      return ','.join([Field(value) for value in (self.runId, record, time.strftime("%Y-%m-%d %H:%M:%S"), getpass.getuser(), self.title,
+                                                  ParameterText(self.parameters), seconds, outcome)]) + "\n"
+
+   def Start(self):
+      self.start = time.time()
+      AppendLines(self.path, journalHeader, [self.Record("start", '', '')])
+
+   # end record, once only: outcome "OK" or "Failed"
+   def End(self, outcome):
+      if not self.ended:
+         self.ended = True
+         AppendLines(self.path, journalHeader, [self.Record("end", "%.1f" % (time.time() - self.start), outcome)])
@@ -0,0 +1,45 @@
+#==============================================================================
+# Whole bench arrays of slab items, for the array engines of the grail model scripts (AMR, DEST)
+#==============================================================================
+
+# A slab item of one level is read into a 2D (row, column) NumPy array and written back from one. A local model slab (LocalModel_QAN) is
+# read and written a whole level at once; a MineSight slab has no whole level access, so it is read and written block by block.
+
+try: # needed by the array engines, which are only used when NumPy is available
+   import numpy
+except ImportError:
+   numpy = None
+
+#==============================================================================
+# Version Information
+#==============================================================================
+
+# Oct 18, 2026 - v1.0.0: SlabArray and StoreSlabArray of AMR and DEST in one module
+
+#==============================================================================
+# Slab Array Functions
+#==============================================================================
+
+# read a model item for level l of a slab into a 2D (row, column) array, replacing undefined values if a default is given
+def SlabArray(slab, item, l, rows, cols, undefinedDefault=None):
+   if hasattr(slab, "LevelArray"):
+      return slab.LevelArray(item, l, undefinedDefault)
+   from grail.data import model # as imported by the script calling it
+   values = numpy.empty((rows, cols))
+   for r in xrange(rows):
+      for c in xrange(cols):
+         value = slab[item, l, r, c]
+         if undefinedDefault is not None and model.isdefined(value)<1:
+            value = undefinedDefault
+         values[r, c] = value
+   return values
+
+# write a 2D (row, column) array back to a model item for level l of a slab
+def StoreSlabArray(slab, item, l, values):
+   if hasattr(slab, "SetLevelArray"):
+      slab.SetLevelArray(item, l, values)
+      return
+   rows, cols = values.shape
+   for r in xrange(rows):
+      for c in xrange(cols):
+         slab[item, l, r, c] = float(values[r, c])
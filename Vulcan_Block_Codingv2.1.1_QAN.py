@@ -36,13 +36,27 @@
 #                       Mine, mill, tails, rehandle, indirect, averageTPH, postCost, comminutionCost, haulIncrLU, haulIncroLD, default DPScutoff updated (see DEST 11.52.5.py)
 #                       Version number changed but current version is reverted to match 2023, therefore no change from 2023. (see ModelCalcs 24.52.7.py)
 # Feb 26, 2024 - v2.1.1 [AR; AJ] Update GEO codes for QAN22v6; will work with either LTM GEO codes (backwards compatible).  Oxide coding is now in GEOL1; not GEOSM
+# Oct 18, 2026 - v2.1.2 ACLS from the PCA class raster index (PCAIndex_QAN) instead of testing each PCA polygon in turn; polygon test only for points near a class boundary
+# Oct 18, 2026 - v2.1.3 reference model items read once for the blast pattern area into an ijk index (RefModelIndex_QAN), blasthole lookups are array indexing
+# Oct 18, 2026 - v2.1.4 3x3x3 GEOL/GEOL1 mode ranking for the geology search taken from the reference model index instead of a model search for each blasthole;
+#                       Qanaiyaq Weathered search now ranks the GEOL1 codes of the neighbouring blocks (was ranking an unset list, so always fell through to the default)
+# Oct 18, 2026 - v2.1.5 reference block values (DEP, TOC/S defaults, KCFLG, RPB, GEOSM, ORCT1, T1/T2/T6, PITPH) calculated once per reference block and shared by its blastholes
+# Oct 18, 2026 - v2.1.6 runs on local copies of the blasthole and reference models (LocalVulcan_QAN) when Vulcan is not installed
+# Oct 18, 2026 - v2.1.7 Qanaiyaq Weathered search ranks MTXg1 again, as before v2.1.4, so the GEOL coding is that of v2.1.3; only the GEOL ranking is indexed
+# Oct 18, 2026 - v2.1.8 Qanaiyaq Weathered search can rank the GEOL1 codes of the neighbouring blocks (rankWeatheredGEOL1), off by default as it changes the GEOL coding
+# Oct 18, 2026 - v2.1.9 Aqqaluk and Paalaaq ore holes set their (nil) oxide and weathered conc grades and recoveries, a first ore hole no longer fails on ZNGWX
 
 from collections import Counter
 from math import pow, pi, exp, log, sin
 import sys
-import vulcan
+try:
+   import vulcan
+except ImportError: # without Vulcan, blasthole and reference models from local copies (LocalVulcan_QAN)
+   import LocalVulcan_QAN as vulcan
 from shapely.geometry import Point
 from shapely.geometry.polygon import Polygon
+import PCAIndex_QAN
+import RefModelIndex_QAN
 
 #==============================================================================
 # Constants
@@ -50,6 +64,12 @@ from shapely.geometry.polygon import Polygon
 
 # Models
 Vulcan_refModel = ["RED2018_H.bmf","QAN2016_I.bmf"]
+# reference model items read into the reference model index
+refItems = ["DEP", "TOC", "S", "KCFLG", "rpb", "geosm", "ORCT1", "t1", "t2", "t6", "PITPH"]
+# Qanaiyaq Weathered geology search: False ranks MTXg1, never read from the model, so the search always ends in the default code (as
+# v2.1.1); True ranks the GEOL1 codes of the neighbouring blocks, which changes GEOL of the Weathered blastholes that fail the test
+rankWeatheredGEOL1 = False
+refModeItems = ["GEOL"] + rankWeatheredGEOL1*["GEOL1"] # 3x3x3 mode ranking for the geology search
 
 # Zn or Pb minimum grade for testing if GEOL code questionable; Ba minimum grade check for Cover (W_CV)
 MinGrade = 3.0
@@ -183,6 +203,9 @@ PCA8 = Polygon([(-1.4677393,-1.5680045,1),(-1.1420099,-2.0472643,1),(-0.73650986
 PCA9 = Polygon([(1.3209039,0.57174075,1),(0.33600292,1.0987418,1),(0.07739765,-0.065052144,1),(0.77248174,-0.5780578,1),(1.3209039,0.57174075,1)])
 PCA10 = Polygon([(-0.29675466,1.2451309,1),(-1.6172923,0.9157553,1),(-1.7136983,-1.1987387,1),(-0.87999207,0.1545316,1),(-0.29675466,1.2451309,1)])
 PCA11 = Polygon([(-1.1420099,-2.0472643,1),(-1.474234,-2.619543,1),(-0.946019,-3.6442673,1),(-0.4783286,-3.702823,1),(-0.32426587,-2.3706815,1),(-0.6433958,-2.5317097,1),(-0.9405167,-2.3194454,1),(-1.1420099,-2.0472643,1)])
+# PCA class test order (ACLS) and boundaries, for the PCA class index
+pcaClasses = [3, 6, 4, 7, 8, 5, 1, 2, 9, 10, 11]
+pcaPolygons = [PCA3, PCA6, PCA4, PCA7, PCA8, PCA5, PCA1, PCA2, PCA9, PCA10, PCA11]
 
 # === Grinding model parameters (T. Kojovic 2016 spreadsheet model) ===
 # 1) Hardness estimate limits
@@ -350,6 +373,53 @@ else:
    PbTcBk = PbTcBase + (PbTcBasis-PbPricet)*PbBelowBasis
 BkTc = (ZnTcBk + PbTcBk)/2
 
+# exact test of a point (U2XP, U1YP) against PCA polygon i, only used by the index for points near a class boundary
+def PCAInside(i, x, y):
+   return pcaPolygons[i].contains(Point(x,y,1))
+
+# raster lookup of ACLS, same result as testing the polygons in pcaClasses order
+pcaIndex = PCAIndex_QAN.PCAIndex(pcaClasses, pcaPolygons, PCAInside)
+
+# values from the current reference block only, the same for every blasthole in the block, kept by the reference model index (ref)
+def RefBlockValues(ref):
+   DEP = int(ref.get("DEP"))  # ensure an integer
+   d = DEP - 1
+   refTOC = ref.get("TOC") # used if not in blasthole model
+   if refTOC < 0: # if not in reference model use median value
+      refTOC = TOC50[d]
+   workS = ref.get("S")
+   if workS < 0: # if not in model use median value
+      workS = S[d]
+   # get Key Creek boolean
+   if DEP == 2: # Aqqaluk, so get flag from model
+      KeyCreek = ref.get("KCFLG") #### KCFLG: Flag for block in Key Creek Plate
+   else: # Main, Paalaaq, Qanaiyaq, so not present
+      KeyCreek = False
+   RPBm = ref.get("rpb") ##### ratio stsPb/stPb
+   GEOSM = ref.get("geosm")
+   ORCT1 = ref.get("ORCT1")
+   (T1, T2, T6) = (ref.get("t1"), ref.get("t2"), ref.get("t6"))
+   PITPH = ref.get("PITPH")
+   return (DEP, refTOC, workS, KeyCreek, RPBm, GEOSM, ORCT1, T1, T2, T6, PITPH)
+
+# top 4 codes of item in the 3x3x3 blocks around (xworld, yworld, zworld), with their counts: from the reference model index (ref), or
+# by a search of the reference model (refm) if the block is not in the index
+def ModeRanking(refm, ref, item, xworld, yworld, zworld):
+   modeMTX = ref.Modes(item)
+   if modeMTX is None: # search the reference model
+      block_size = refm.model_schema_size(0)
+      search_ext = (xworld - block_size[0],
+                    xworld + block_size[0],
+                    yworld - block_size[1],
+                    yworld + block_size[1],
+                    zworld - block_size[2],
+                    zworld + block_size[2])
+      search_str = '-X -bw %.2f %.2f %.2f %.2f %.2f %.2f' % (search_ext[0],search_ext[1],search_ext[2],search_ext[3],search_ext[4],search_ext[5])
+      sel_ext = refm.get_matches(search_str)
+      MTX = refm.get_data(item, sel_ext)
+      modeMTX = Counter(MTX).most_common(4) # pick top 4 sorts as only go 4 deep in code below, i.e. from a practical standpoint if you have to pick the 5th most common code is this really a worthwhile estimate anymore...
+   return modeMTX
+
 #==============================================================================
 # Execution Function
 #==============================================================================
@@ -360,6 +430,16 @@ modelPath = sys.argv[1]   # modelPath = r"E:\repos\_scripting\Vulcan_GC2\Aqq_bh_
 with vulcan.block_model(modelPath, "w") as bm:
    bm.rewind()
    pitname = bm.get_string("area").upper()
+   # extent of the blastholes to be coded, for the reference model index
+   bhExtent = None
+   for block in bm:
+      if block["zn"] < 0:
+         continue
+      (xworld, yworld, zworld) = (block["xworld"], block["yworld"], block["zworld"])
+      if bhExtent is None:
+         bhExtent = [xworld, xworld, yworld, yworld, zworld, zworld]
+      else:
+         bhExtent = [min(bhExtent[0], xworld), max(bhExtent[1], xworld), min(bhExtent[2], yworld), max(bhExtent[3], yworld), min(bhExtent[4], zworld), max(bhExtent[5], zworld)]
 
 if pitname == 'AQQ':
    MDL = 0
@@ -377,6 +457,8 @@ refModel = Vulcan_refModel[MDL]  # refModel = r"E:\repos\_scripting\Vulcan_GC2\A
 print("Starting execution...")
 
 with vulcan.block_model(modelPath, "w") as bm, vulcan.block_model(refModel, "r") as refm:
+   refIndex = RefModelIndex_QAN.RefModelIndex(refm, refItems, bhExtent, refModeItems) # reference items by block ijk, used in place of refm.find_world_xyz and refm.get
+   print(refIndex.message)
    for block in bm:
       # get ZN
       workZN = block["zn"]
@@ -385,9 +467,9 @@ with vulcan.block_model(modelPath, "w") as bm, vulcan.block_model(refModel, "r")
 
       # determine block coordinate in refm model
       (xworld, yworld, zworld) = (block["xworld"], block["yworld"], block["zworld"])
-      refm.find_world_xyz(xworld, yworld, zworld)
+      refIndex.find_world_xyz(xworld, yworld, zworld)
+      (DEP, refTOC, workS, KeyCreek, RPBm, refGEOSM, refORCT1, refT1, refT2, refT6, refPITPH) = refIndex.Derived(RefBlockValues)
       # get location items
-      DEP = int(refm.get("DEP"))  # ensure an integer
       d = DEP - 1
       isPaalaaq = (DEP == 3)
       workELEV = block["zworld"] - 12.5
@@ -413,18 +495,8 @@ with vulcan.block_model(modelPath, "w") as bm, vulcan.block_model(refModel, "r")
       if isQanaiyaq: #### Q pit coding starts here:
          workCU = block["cu"]
       workTOC = block["toc"]
-      if workTOC < 0: # if not in blasthole model try in reference model
-         workTOC = refm.get("TOC")
-         if workTOC < 0: # if not in reference model use median value
-            workTOC = TOC50[d]
-      workS = refm.get("S")
-      if workS < 0: # if not in model use median value
-         workS = S[d]
-      # get Key Creek boolean
-      if DEP == 2: # Aqqaluk, so get flag from model
-         KeyCreek = refm.get("KCFLG") #### KCFLG: Flag for block in Key Creek Plate
-      else: # Main, Paalaaq, Qanaiyaq, so not present
-         KeyCreek = False
+      if workTOC < 0: # if not in blasthole model use reference model (or median) value
+         workTOC = refTOC
 
       # calculate RPB ratio  *** this section could be simplified, a side-effect of blasthole assay script conversion ***
       if workPB > 0 and workSPB >= 0:
@@ -440,7 +512,6 @@ with vulcan.block_model(modelPath, "w") as bm, vulcan.block_model(refModel, "r")
          RPBb = int(round(workSPB / workPB * 100.0))
       else:
          RPBb = 0
-      RPBm = refm.get("rpb") ##### ratio stsPb/stPb
       # determine RPB for GEOL estimation (if required when suitable GEOL code not found)
       if RPBb > -1: # blasthole assay based value exists
          geolRPB = RPBb
@@ -488,7 +559,7 @@ with vulcan.block_model(modelPath, "w") as bm, vulcan.block_model(refModel, "r")
 
       # reset geology code if required
       workGEOL = block["geol"]
-      workGEOSM = refm.get("geosm") # GEOSM - sulfide mineral preference majority geology code, so mixed shale/sulfide blocks get sulfide code, unmixed blocks have simple majority code (GEOL)
+      workGEOSM = refGEOSM # GEOSM - sulfide mineral preference majority geology code, so mixed shale/sulfide blocks get sulfide code, unmixed blocks have simple majority code (GEOL)
       workGEOL1 = block["geol1"] # GEOL1 - secondary geology description in Qanaiyaq, generally for weathering
       hasMinGrade = (workZN > MinGrade or workPB > MinGrade)
       if hasMinGrade: # grade is above minimum threshold so test if GEOL code is a Sulphide host and, if so, whether a Weathered or Oxide sulphide
@@ -521,37 +592,30 @@ with vulcan.block_model(modelPath, "w") as bm, vulcan.block_model(refModel, "r")
 #
 #See Blasthole_Coding_v1.8.0.py line 590 onwards for matrix
 #
-      ORCT1 = refm.get("ORCT1")
+      ORCT1 = refORCT1
       geolChange = (FailSulphideTest or FailWeatheredTest or FailOxideTest)  # True if GEOL will be from an adjacent model block or default
       if geolChange:
-         block_size = refm.model_schema_size(0)
-         search_ext = (xworld - block_size[0],
-                       xworld + block_size[0],
-                       yworld - block_size[1],
-                       yworld + block_size[1],
-                       zworld - block_size[2],
-                       zworld + block_size[2])
-         search_str = '-X -bw %.2f %.2f %.2f %.2f %.2f %.2f' % (search_ext[0],search_ext[1],search_ext[2],search_ext[3],search_ext[4],search_ext[5])
-         sel_ext = refm.get_matches(search_str)
-         MTX = refm.get_data("GEOL", sel_ext)
          if isQanaiyaq and isWeathered:  # need Weathered search exception for Qanaiyaq as weathering is in GEOL1 code
-            modeMTXg1 = Counter(MTXg1).most_common(4) # pick top 4 sorts as only go 4 deep in code below, i.e. from a practical standpoint if you have to pick the 5th most common code is this really a worthwhile estimate anymore...
+            if rankWeatheredGEOL1:
+               modeMTXg1 = ModeRanking(refm, refIndex, "GEOL1", xworld, yworld, zworld)
+            else:
+               modeMTXg1 = Counter(MTXg1).most_common(4) # pick top 4 sorts as only go 4 deep in code below, i.e. from a practical standpoint if you have to pick the 5th most common code is this really a worthwhile estimate anymore...
             workGEOL1 = modeMTXg1[0][0]  # first mode, count starts at 0; example: MTXg1 is [1,3,4,6,6,6,5,5] => modeMTXg1 is [(6, 3), (5, 2), (1, 1), (3, 1), (4, 1)]
             blockCount_g1 = modeMTXg1[0][1]
             FailWeatheredTest = not(workGEOL1 in Weathered[d]) and isWeathered
-            if blockCount_g1 < 26 and FailWeatheredTest: # get second mode
+            if blockCount_g1 < 26 and FailWeatheredTest and len(modeMTXg1) >= 2: # get second mode
                workGEOL1 = modeMTXg1[1][0]
                blockCount_g1 = blockCount_g1 + modeMTXg1[1][1]
                FailWeatheredTest = not(workGEOL1 in Weathered[d]) and isWeathered
-               if blockCount_g1 < 26 and FailWeatheredTest: # get third mode
+               if blockCount_g1 < 26 and FailWeatheredTest and len(modeMTXg1) >= 3: # get third mode
                   workGEOL1 = modeMTXg1[2][0]
                   blockCount_g1 = blockCount_g1 + modeMTXg1[2][1]
                   FailWeatheredTest = not(workGEOL1 in Weathered[d]) and isWeathered
-                  if blockCount_g1 < 26 and FailWeatheredTest: # get fourth mode
+                  if blockCount_g1 < 26 and FailWeatheredTest and len(modeMTXg1) >= 4: # get fourth mode
                      workGEOL1 = modeMTXg1[3][0]
                      FailWeatheredTest = not(workGEOL1 in Weathered[d]) and isWeathered
          else: # general Sulphide check for Aqqaluk or Qanaiyaq, and specific Aqqaluk/isWeathered or Qanaiyaq/isOxide checks
-            modeMTX = Counter(MTX).most_common(4) # pick top 4 sorts as only go 4 deep in code below, i.e. from a practical standpoint if you have to pick the 5th most common code is this really a worthwhile estimate anymore...
+            modeMTX = ModeRanking(refm, refIndex, "GEOL", xworld, yworld, zworld)
             workGEOSM = modeMTX[0][0]  # first mode, count starts at 0; example: MTX is [1,3,4,6,6,6,5,5] => modeMTX is [(6, 3), (5, 2), (1, 1), (3, 1), (4, 1)]
             blockCount = modeMTX[0][1]
             FailSulphideTest = not(workGEOSM in SulfideHost[d])
@@ -668,9 +732,7 @@ with vulcan.block_model(modelPath, "w") as bm, vulcan.block_model(refModel, "r")
                workGEOL = workGEOSM
 
       # get texture, but need to know workGEOL for defaults, so use workGEOL at this point
-      workT1 = refm.get("t1")
-      workT2 = refm.get("t2")
-      workT6 = refm.get("t6")
+      (workT1, workT2, workT6) = (refT1, refT2, refT6)
       if (workT1 + workT2 + workT6) <= 98: # if not ~100(%), use median value defaults
          if workGEOL in Baritic[d]:
             workT1 = T1_baritic[d]
@@ -964,6 +1026,8 @@ with vulcan.block_model(modelPath, "w") as bm, vulcan.block_model(refModel, "r")
             else: # no Bulk concentrate from 1-Regular (zinc & lead), 2-Weathered (zinc), or 3-High Lead-Silver Oxide
                PBRWX = 0.0
          else: # Main, Aqqaluk, Paalaaq
+            PBGOX, PBROX, AGGOX = 0.0, 0.0, 0.0 # no Pb-Ag oxide conc, as for waste
+            ZNGWX, PBGWX, ZNRWX, PBRWX = 0.0, 0.0, 0.0, 0.0 # no Zn-Cu weathered conc, as for waste
             if DEP <= 2 or (isPaalaaq and MET == 9): # only for Main, Aqqaluk, and baritic Paalaaq
                ZNGRD = 53.0
                PBGRD = 54.5
@@ -1091,14 +1155,13 @@ with vulcan.block_model(modelPath, "w") as bm, vulcan.block_model(refModel, "r")
          Bar = workBA/0.5884
          U1YP = -0.004074671*Bar + 0.012634782*NSG - 0.025242613*Sph - 0.107611865*Gal - 0.015048441*Pyr - 0.00473548*10*workTOC
          U2XP = 0.03159656*Bar - 0.000326032*NSG - 0.002455592*Sph - 0.014168624*Gal - 0.019183818*Pyr - 0.034004886*10*workTOC
-         U = Point(U2XP,U1YP,1)
 
          # assign PCA class
          universal_Ab = False
          universal_BBMWi = True
          BBMWi = 0.0 # default value
-         if PCA3.contains(U): # Baritic
-            ACLS = 3
+         ACLS = pcaIndex.Classify(U2XP,U1YP) # PCA polygons by raster lookup, see pcaClasses for test order
+         if ACLS == 3: # Baritic
             P80 = P80coarse
             if ZNFE_defined:
                Ab = round(15.18*Gal + 2.054*Bar - 226.1*workTOC - 3.133*ZNFE,1)
@@ -1106,51 +1169,40 @@ with vulcan.block_model(modelPath, "w") as bm, vulcan.block_model(refModel, "r")
                Ab = Ab_min
             BBMWi = round(14.23 - 0.144*workT2 - 0.0619*workT6 - 0.227*Sph,2)
             universal_BBMWi = False
-         elif PCA6.contains(U): # Siliceous
-            ACLS = 6
+         elif ACLS == 6: # Siliceous
             P80 = P80fine
             Ab = round(71.33 - 0.223*workT6 - 1.049*Pyr + 1.141*Bar,1)
-         elif PCA4.contains(U): # Sphalerite
-            ACLS = 4
+         elif ACLS == 4: # Sphalerite
             P80 = P80fine
             Ab = round(27.45 + 0.556*workT2 + 0.638*Sph + 1.179*Bar,1)
-         elif PCA7.contains(U) == 1: # Sil-Pyr
-            ACLS = 7
+         elif ACLS == 7: # Sil-Pyr
             P80 = P80fine
             Ab = round(43.18 + 0.154*workT2 + 0.368*Sph + 3.905*Bar - 6.462*workTOC,1)
-         elif PCA8.contains(U) == 1: # Pyr-Sph
-            ACLS = 8
+         elif ACLS == 8: # Pyr-Sph
             P80 = P80fine
             Ab = round(391.8 - 0.133*workT6 - 1.720*NSG - 74.554*SG,1)
-         elif PCA5.contains(U): # Sil-Sph
-            ACLS = 5
+         elif ACLS == 5: # Sil-Sph
             P80 = P80fine
             if ZNFE_defined:
                Ab = round(37.06 + 0.562*workT2 + 26.35*workTOC + 0.867*ZNFE,1)
             else:
                Ab = Ab_min
-         elif PCA1.contains(U): # Barite Transition
-            ACLS = 1
+         elif ACLS == 1: # Barite Transition
             P80 = P80medium
             universal_Ab = True
-         elif PCA2.contains(U) == 1: # Sphalerite Transition
-            ACLS = 2
+         elif ACLS == 2: # Sphalerite Transition
             P80 = P80fine
             universal_Ab = True
-         elif PCA9.contains(U) == 1: # Sil-Barite Transition
-            ACLS = 9
+         elif ACLS == 9: # Sil-Barite Transition
             P80 = P80medium
             universal_Ab = True
-         elif PCA10.contains(U): # High TOC Universal
-            ACLS = 10
+         elif ACLS == 10: # High TOC Universal
             P80 = P80fine
             universal_Ab = True
-         elif PCA11.contains(U): # High Galena Universal
-            ACLS = 11
+         elif ACLS == 11: # High Galena Universal
             P80 = P80fine
             universal_Ab = True
-         else: # not defined in any polygons
-            ACLS = 0
+         else: # not defined in any polygons, ACLS = 0
             P80 = P80fine
             universal_Ab = True
 
@@ -1585,7 +1637,7 @@ with vulcan.block_model(modelPath, "w") as bm, vulcan.block_model(refModel, "r")
       MPT = round(60.0/TPH,6)
 
       # write all data to block model
-      block["pitph"] = refm.get("PITPH") # need for Accounting
+      block["pitph"] = refPITPH # need for Accounting
       block["bench"] = workELEV
       block["geolchk"] = geolChange
       block["geol"] = workGEOL
@@ -1660,5 +1712,6 @@ with vulcan.block_model(modelPath, "w") as bm, vulcan.block_model(refModel, "r")
 ##         block["valswx"] = VALS_WX
       block["pbcon"] = PbConcentrate*TonnesPerBlock
       block["zncon"] = ZnConcentrate*TonnesPerBlock
+print(refIndex.Summary())
 print("Block model coding complete")
 